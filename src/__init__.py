@@ -1,17 +1,96 @@
-from .bezier import *
-from .ellipse import *
-from .fuzzy import *
-from .linear import *
-from .rect import *
-from .vector import *
+from importlib import import_module
 
-__all__ = []
+# Submodules are only imported when one of their names is first accessed
+# (see ``__getattr__``), so ``import geom`` itself is cheap. Every public name
+# has to be listed here under the submodule that defines it.
+_exports = {
+	"aabb": ["AABB3D", "AABB3DArray"],
+	"backend": [
+		"SCALAR", "BATCH", "Backend", "PythonBackend", "NumpyBackend", "register_backend",
+		"get_backend", "set_backend", "use_backend", "calibrate"
+		],
+	"bezier": ["BezierCurve", "fit_bezier_curves"],
+	"bounds": [
+		"bounding_rect", "enclosing_circle", "enclosing_sphere", "bounding_ellipse",
+		"bounding_rects", "enclosing_circles", "enclosing_spheres", "bounding_ellipses"
+		],
+	"cache": [
+		"DEFAULT_METHODS", "LRUCache", "enable_cache", "disable_cache", "cache_enabled",
+		"clear_cache", "invalidate", "cache_stats", "caching", "memoize"
+		],
+	"delaunay": ["INCREMENTAL", "QHULL", "Triangulation", "Voronoi"],
+	"dataset": ["DatasetException", "RECTS", "SEGMENTS", "POINTS", "GeometryDataset"],
+	"ellipse": ["Ellipse", "Ellipsoid3D"],
+	"fuzzy": [
+		"FuzzyComparable", "EPSILON", "EPSILONS", "default_epsilon", "fuzzy_eq_numbers",
+		"fuzzy_eq", "fuzzy_ne", "fill_in_fne"
+		],
+	"instrument": [
+		"DEFAULT_MODULES", "Snapshot", "enable", "disable", "is_enabled", "reset",
+		"snapshot", "instrumented"
+		],
+	"linear": [
+		"_LineBase", "_Line2DBase", "_Line3DBase", "Line2D", "Ray2D", "Segment2D",
+		"Line3D", "Ray3D", "Segment3D", "segments_to_array", "segment_intersections",
+		"line_distances", "line_closest_points", "line_sides", "clip_segments_to_polygon"
+		],
+	"octree": ["Octree"],
+	"parallel": [
+		"SERIAL", "THREAD", "PROCESS", "ParallelExecutor", "parallel_contains_points",
+		"parallel_segment_intersections", "parallel_evaluate_bezier"
+		],
+	"polygon": ["Polygon"],
+	"polyline": ["Polyline2D", "Polyline3D"],
+	"precision": [
+		"FLOAT64", "FLOAT32", "get_precision", "set_precision", "use_precision", "get_dtype",
+		"as_float_array"
+		],
+	"predicates": [
+		"orient2d", "orient2d_many", "incircle", "segments_intersect", "line_intersection",
+		"convex_hull", "fallback_counts", "reset_fallback_counts"
+		],
+	"raster": ["Raster", "rasterize"],
+	"rect": ["Rect"],
+	"region": ["Region"],
+	"sampling": [
+		"sample_unit_circle", "sample_unit_sphere", "sample_rect", "sample_ellipse", "sample_ellipsoid",
+		"sample_segment", "sample_bezier", "sample_poisson_disk"
+		],
+	"serialize": [
+		"SerializationException", "FLOAT64", "FLOAT32", "dumps", "loads", "dump", "load",
+		"dump_many", "dumps_batch", "loads_batch", "loads_batch_array", "iter_load",
+		"iter_load_arrays"
+		],
+	"service": ["BatchQueryService"],
+	"stream": ["Pipeline", "iter_chunks"],
+	"sweep": ["time_of_impact", "times_of_impact"],
+	"vector": [
+		"VectorException", "_VectorMeta", "_BaseVector", "VectorType", "Vector2",
+		"ImmutableVector2", "Vector3", "ImmutableVector3", "Vector4", "ImmutableVector4",
+		"Quaternion", "to_vector", "to_vector_many", "vectors_to_array",
+		"change_vector_dimension", "rectify_vector", "rectify_vectors"
+		],
+	}
 
-from .tests import *
+# A name some module re-exports (like serialize's FLOAT64 and FLOAT32, which
+# live in precision) is looked up in the first module listing it.
+_origins = {}
+for _module, _names in _exports.items():
+	for _name in _names:
+		_origins.setdefault(_name, _module)
+del _module, _names, _name
 
-__all__.extend(bezier.__all__)
-__all__.extend(ellipse.__all__)
-__all__.extend(fuzzy.__all__)
-__all__.extend(linear.__all__)
-__all__.extend(rect.__all__)
-__all__.extend(vector.__all__)
\ No newline at end of file
+__all__ = list(_origins)
+
+def __getattr__(name):
+	if (name in _exports):
+		return import_module("." + name, __name__)
+	module = _origins.get(name)
+	if (module is None):
+		raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+	value = getattr(import_module("." + module, __name__), name)
+	globals()[name] = value
+	return value
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
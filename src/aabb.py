@@ -0,0 +1,335 @@
+import math
+from numbers import Number
+
+from .exception import *
+from .vector import *
+from .compat import *
+from .fuzzy import *
+from .linear import *
+from .ellipse import *
+from .backend import BATCH, get_backend
+from .precision import as_float_array
+
+numpy = try_import("numpy")
+
+__all__ = ["AABB3D", "AABB3DArray"]
+
+_INF = float("inf")
+
+def _slab(lo, hi, origin, direction, t_min, t_max):
+	# Clips [t_min, t_max] to the part of origin + t*direction inside the box
+	# (the slab test). Returns the clipped range or None if it's empty.
+	for l, h, o, d in zip(lo, hi, origin, direction):
+		if (d == 0):
+			if (o < l or o > h):
+				return None
+			continue
+		t1, t2 = (l - o)/d, (h - o)/d
+		if (t1 > t2):
+			t1, t2 = t2, t1
+		t_min, t_max = max(t_min, t1), min(t_max, t2)
+		if (t_min > t_max):
+			return None
+	return t_min, t_max
+
+def _bounds_of(shape):
+	# (lo, hi) corners of the bounding box of a 3D point, AABB3D,
+	# Ellipsoid3D or Segment3D, as lists.
+	if (isinstance(shape, AABB3D)):
+		return list(shape.min), list(shape.max)
+	if (isinstance(shape, Ellipsoid3D)):
+		c, axes = shape.center, (abs(shape.a), abs(shape.b), abs(shape.c))
+		return [x - a for x, a in zip(c, axes)], [x + a for x, a in zip(c, axes)]
+	if (isinstance(shape, Segment3D)):
+		s, e = shape
+		return [min(a, b) for a, b in zip(s, e)], [max(a, b) for a, b in zip(s, e)]
+	p = list(getattr(shape, "_components", shape))
+	if (len(p) != 3 or not all(isinstance(x, Number) for x in p)):
+		raise ValueError("Cannot bound %r in 3D." % (shape,))
+	return p, p[:]
+
+@fill_in_fne
+class AABB3D(FuzzyComparable):
+
+	# An axis-aligned box, given like a Rect by its minimum corner and its
+	# width, height and depth. Negative sizes are normalized.
+
+	def __init__(self, x, y, z, w, h, d):
+		self.min = ImmutableVector3(min(x, x + w), min(y, y + h), min(z, z + d))
+		self.width = abs(w)
+		self.height = abs(h)
+		self.depth = abs(d)
+
+	@classmethod
+	def from_corners(cls, lo, hi):
+		(x1, y1, z1), (x2, y2, z2) = lo, hi
+		return cls(x1, y1, z1, x2 - x1, y2 - y1, z2 - z1)
+
+	@classmethod
+	def from_points(cls, points):
+		if (numpy is not None and isinstance(points, numpy.ndarray)):
+			points = points.reshape(-1, 3)
+			if (not len(points)):
+				raise ValueError("Cannot bound an empty set of points.")
+			return cls.from_corners(points.min(axis=0).tolist(), points.max(axis=0).tolist())
+		rows = [list(getattr(p, "_components", p)) for p in points]
+		if (not rows):
+			raise ValueError("Cannot bound an empty set of points.")
+		return cls.from_corners([min(c) for c in zip(*rows)], [max(c) for c in zip(*rows)])
+
+	@classmethod
+	def from_shape(cls, shape):
+		# The bounding box of a point, AABB3D, Ellipsoid3D or Segment3D.
+		return cls.from_corners(*_bounds_of(shape))
+
+	def __repr__(self):
+		return "%s(%s, %s, %s, %s)" % \
+			(
+				self.__class__.__name__,
+				self.min,
+				self.width,
+				self.height,
+				self.depth
+			)
+
+	def __getitem__(self, index):
+		if (0 <= index < 3):
+			return self.min[index]
+		elif (index == 3):
+			return self.width
+		elif (index == 4):
+			return self.height
+		elif (index == 5):
+			return self.depth
+		raise index_out_of_range(type(self))
+
+	def __iter__(self):
+		return iter([self.min.x, self.min.y, self.min.z, self.width, self.height, self.depth])
+
+	def __eq__(self, other):
+		try:
+			return all(self[i] == other[i] for i in range(6))
+		except:
+			return False
+
+	def __feq__(self, other, epsilon=None):
+		try:
+			return all(fuzzy_eq_numbers(self[i], other[i], epsilon) for i in range(6))
+		except:
+			return False
+
+	@property
+	def max(self):
+		x, y, z = self.min
+		return ImmutableVector3(x + self.width, y + self.height, z + self.depth)
+
+	@property
+	def center(self):
+		x, y, z = self.min
+		return ImmutableVector3(x + self.width/2, y + self.height/2, z + self.depth/2)
+
+	@property
+	def size(self):
+		return ImmutableVector3(self.width, self.height, self.depth)
+
+	@property
+	def volume(self):
+		return self.width*self.height*self.depth
+
+	@property
+	def surface_area(self):
+		w, h, d = self.width, self.height, self.depth
+		return 2*(w*h + h*d + w*d)
+
+	@property
+	def corners(self):
+		(x1, y1, z1), (x2, y2, z2) = self.min, self.max
+		return [ImmutableVector3(x, y, z) for x in (x1, x2) for y in (y1, y2) for z in (z1, z2)]
+
+	## Queries
+
+	def contains_point(self, point):
+		lo, hi = self.min, self.max
+		return all(l <= p <= h for l, p, h in zip(lo, change_vector_dimension(point, 3), hi))
+
+	def contains_points(self, points, backend=None):
+		return get_backend(BATCH, len(points), backend).contains_box(
+			points, self.min._components, self.max._components
+			)
+
+	def contains_aabb(self, box):
+		(lo1, hi1), (lo2, hi2) = (self.min, self.max), _bounds_of(box)
+		return all(a <= b for a, b in zip(lo1, lo2)) and all(a >= b for a, b in zip(hi1, hi2))
+
+	def collides_aabb(self, box):
+		# Whether the boxes overlap; touching boxes collide.
+		(lo1, hi1), (lo2, hi2) = (self.min, self.max), _bounds_of(box)
+		return all(l1 <= h2 and l2 <= h1 for l1, h1, l2, h2 in zip(lo1, hi1, lo2, hi2))
+
+	def distance_to(self, point):
+		# 0 inside the box.
+		lo, hi = self.min, self.max
+		return math.sqrt(sum(max(l - p, 0, p - h)**2 for l, p, h in zip(lo, change_vector_dimension(point, 3), hi)))
+
+	def intersect_ray(self, origin, direction, max_distance=_INF):
+		# The parameter t >= 0 at which origin + t*direction enters the box
+		# (0 if origin is inside it), or None if it misses the box before
+		# t = max_distance.
+		hit = _slab(self.min, self.max, change_vector_dimension(origin, 3),
+					change_vector_dimension(direction, 3), 0, max_distance)
+		return None if hit is None else hit[0]
+
+	def collides_line(self, line):
+		# For Line3D, Ray3D and Segment3D.
+		s, e = line
+		lo, hi = line.__range__
+		return _slab(self.min, self.max, s, e - s, lo, hi) is not None
+
+	## Building new boxes
+
+	def union(self, box):
+		(lo1, hi1), (lo2, hi2) = (self.min, self.max), _bounds_of(box)
+		return AABB3D.from_corners(list(map(min, lo1, lo2)), list(map(max, hi1, hi2)))
+
+	def intersection(self, box):
+		# The overlap of the boxes, or None if they don't collide.
+		if (not self.collides_aabb(box)):
+			return None
+		(lo1, hi1), (lo2, hi2) = (self.min, self.max), _bounds_of(box)
+		return AABB3D.from_corners(list(map(max, lo1, lo2)), list(map(min, hi1, hi2)))
+
+	def expand(self, margin):
+		# Grown by ``margin`` (a number or a 3D vector) on every side.
+		m = [margin]*3 if isinstance(margin, Number) else list(change_vector_dimension(margin, 3))
+		x, y, z = self.min
+		return AABB3D(x - m[0], y - m[1], z - m[2], self.width + 2*m[0], self.height + 2*m[1], self.depth + 2*m[2])
+
+	def translate(self, delta):
+		self.min += change_vector_dimension(delta, 3)
+
+class AABB3DArray(object):
+
+	# Many boxes as two (N, 3) arrays of minimum and maximum corners, for
+	# testing all of them at once.
+
+	@requires("numpy")
+	def __init__(self, lo, hi):
+		lo = as_float_array(lo).reshape(-1, 3)
+		hi = as_float_array(hi).reshape(-1, 3)
+		if (lo.shape != hi.shape):
+			raise ValueError("Expected as many minimum corners as maximum corners.")
+		self.lo = numpy.minimum(lo, hi)
+		self.hi = numpy.maximum(lo, hi)
+
+	@classmethod
+	@requires("numpy")
+	def from_shapes(cls, shapes):
+		# Bounding boxes of points, AABB3Ds, Ellipsoid3Ds and Segment3Ds.
+		bounds = [_bounds_of(shape) for shape in shapes]
+		return cls([b[0] for b in bounds], [b[1] for b in bounds])
+
+	@classmethod
+	@requires("numpy")
+	def from_points(cls, points):
+		points = as_float_array(points).reshape(-1, 3)
+		return cls(points, points)
+
+	@classmethod
+	@requires("numpy")
+	def from_ellipsoids(cls, centers, axes):
+		# From (N, 3) arrays of ellipsoid centers and semi-axes.
+		centers = as_float_array(centers).reshape(-1, 3)
+		axes = numpy.abs(as_float_array(axes).reshape(-1, 3))
+		return cls(centers - axes, centers + axes)
+
+	def __repr__(self):
+		return "%s(%i boxes)" % (self.__class__.__name__, len(self))
+
+	def __len__(self):
+		return len(self.lo)
+
+	def __getitem__(self, index):
+		if (isinstance(index, Number)):
+			if (not -len(self) <= index < len(self)):
+				raise index_out_of_range(type(self))
+			return AABB3D.from_corners(self.lo[index].tolist(), self.hi[index].tolist())
+		return AABB3DArray(self.lo[index], self.hi[index])
+
+	def __iter__(self):
+		for lo, hi in zip(self.lo.tolist(), self.hi.tolist()):
+			yield AABB3D.from_corners(lo, hi)
+
+	@property
+	def centers(self):
+		return (self.lo + self.hi)/2
+
+	@property
+	def sizes(self):
+		return self.hi - self.lo
+
+	@property
+	def volumes(self):
+		return self.sizes.prod(axis=1)
+
+	def bounds(self):
+		# The AABB3D containing every box.
+		if (not len(self)):
+			raise ValueError("Cannot bound an empty set of boxes.")
+		return AABB3D.from_corners(self.lo.min(axis=0).tolist(), self.hi.max(axis=0).tolist())
+
+	def contains_point(self, point):
+		# Boolean mask of the boxes containing ``point``.
+		p = numpy.asarray(getattr(point, "_components", point), dtype=float)
+		return ((self.lo <= p) & (p <= self.hi)).all(axis=1)
+
+	def collides_aabb(self, box):
+		# Boolean mask of the boxes overlapping ``box``.
+		lo, hi = (numpy.asarray(c, dtype=float) for c in _bounds_of(box))
+		return ((self.lo <= hi) & (lo <= self.hi)).all(axis=1)
+
+	def contained_in(self, box):
+		# Boolean mask of the boxes inside ``box``.
+		lo, hi = (numpy.asarray(c, dtype=float) for c in _bounds_of(box))
+		return ((lo <= self.lo) & (self.hi <= hi)).all(axis=1)
+
+	def distances_to(self, point):
+		p = numpy.asarray(getattr(point, "_components", point), dtype=float)
+		gaps = numpy.maximum(numpy.maximum(self.lo - p, p - self.hi), 0)
+		return numpy.sqrt(numpy.einsum("ij,ij->i", gaps, gaps))
+
+	def intersect_ray(self, origin, direction, max_distance=_INF):
+		# The entry parameter t of the ray into every box (see
+		# AABB3D.intersect_ray), inf for the boxes it misses.
+		o = numpy.asarray(getattr(origin, "_components", origin), dtype=float)
+		d = numpy.asarray(getattr(direction, "_components", direction), dtype=float)
+		with numpy.errstate(divide="ignore", invalid="ignore"):
+			inverse = 1/d
+			t1, t2 = (self.lo - o)*inverse, (self.hi - o)*inverse
+		near, far = numpy.minimum(t1, t2), numpy.maximum(t1, t2)
+		# Axes the ray is parallel to: all of t or none of it.
+		parallel = d == 0
+		if (parallel.any()):
+			inside = (self.lo[:, parallel] <= o[parallel]) & (o[parallel] <= self.hi[:, parallel])
+			near[:, parallel] = numpy.where(inside, -_INF, _INF)
+			far[:, parallel] = numpy.where(inside, _INF, -_INF)
+		t_min = numpy.maximum(near.max(axis=1), 0)
+		t_max = numpy.minimum(far.min(axis=1), max_distance)
+		return numpy.where(t_min <= t_max, t_min, _INF)
+
+	def union(self, other):
+		# Pairwise unions with another AABB3DArray (or one box for all).
+		if (isinstance(other, AABB3DArray)):
+			lo, hi = other.lo, other.hi
+		else:
+			lo, hi = (numpy.asarray(c, dtype=self.lo.dtype) for c in _bounds_of(other))
+		return AABB3DArray(numpy.minimum(self.lo, lo), numpy.maximum(self.hi, hi))
+
+	def expand(self, margin):
+		# ``margin`` is a number, a 3D vector or an (N, 1) or (N, 3) array.
+		margin = numpy.asarray(getattr(margin, "_components", margin), dtype=self.lo.dtype)
+		return AABB3DArray(self.lo - margin, self.hi + margin)
+
+	def translate(self, delta):
+		delta = numpy.asarray(getattr(delta, "_components", delta), dtype=self.lo.dtype)
+		self.lo = self.lo + delta
+		self.hi = self.hi + delta
@@ -0,0 +1,554 @@
+import math
+import timeit
+from contextlib import contextmanager
+from operator import mul
+
+from .compat import *
+from .precision import as_float_array
+
+__all__ = [
+	"SCALAR", "BATCH", "Backend", "PythonBackend", "NumpyBackend", "register_backend",
+	"get_backend", "set_backend", "use_backend", "calibrate"
+	]
+
+# Operation classes. Scalar operations work on a single vector or shape,
+# batch operations on arrays of points/shapes.
+SCALAR = "scalar"
+BATCH = "batch"
+
+_NAN = float("nan")
+
+# Bounds the size of the (lines x points) temporaries of line queries.
+_LINE_BLOCK = 1 << 20
+
+def _values(components):
+	# ``tolist`` turns numpy storage into python floats, which are much
+	# faster to do arithmetic on one at a time than numpy scalars.
+	tolist = getattr(components, "tolist", None)
+	return components if tolist is None else tolist()
+
+def _ramanujan_circumference(a, b):
+	h = 3*((a - b)/(a + b))**2
+	return math.pi*(a + b)*(1 + h/(10 + math.sqrt(4 - h)))
+
+def _thomsen_surface_area(a, b, c):
+	p = 1.6075
+	return 4*math.pi*(((a*b)**p + (b*c)**p + (a*c)**p)/3)**(1/p)
+
+class Backend(object):
+
+	name = None
+
+	def is_available(self):
+		return True
+
+	# Scalar operations
+
+	def norm(self, components):
+		raise NotImplementedError()
+
+	def norm_squared(self, components):
+		raise NotImplementedError()
+
+	def dot(self, a, b):
+		raise NotImplementedError()
+
+	def ellipse_circumference(self, a, b):
+		return _ramanujan_circumference(a, b)
+
+	def ellipsoid_surface_area(self, a, b, c):
+		return _thomsen_surface_area(a, b, c)
+
+	# Batch operations. These take sequences of rows (or arrays) and return
+	# numpy arrays when numpy is installed, lists otherwise.
+
+	def contains_ellipse(self, points, center, axes):
+		raise NotImplementedError()
+
+	def contains_rect(self, points, x, y, w, h):
+		raise NotImplementedError()
+
+	def contains_box(self, points, lo, hi):
+		raise NotImplementedError()
+
+	def bezier(self, control_polygon, times):
+		raise NotImplementedError()
+
+	def segment_intersections(self, first, second):
+		raise NotImplementedError()
+
+	# Convex 2D regions are given as K half-planes normals[k].p <= offsets[k].
+	# The outcode of a point has bit k set when the point is outside the k-th
+	# half-plane; for the sides of a rect (see Rect.outcodes) these are the
+	# Cohen-Sutherland outcodes. ``clip_segments`` returns the (N, 2, 2)
+	# parts of segments inside the region, with rows of NaN for segments
+	# entirely outside, and the (N,) mask of the segments that aren't.
+
+	def outcodes(self, points, normals, offsets):
+		raise NotImplementedError()
+
+	def clip_segments(self, segments, normals, offsets):
+		raise NotImplementedError()
+
+	# Lines are given as (M, d) starts and ends, with the range of the line
+	# parameter t (0 at the start, 1 at the end) each line covers: -inf to
+	# inf for lines, 0 to inf for rays and 0 to 1 for segments. Results are
+	# (M, N) for N points.
+
+	def line_distances(self, starts, ends, lo, hi, points):
+		raise NotImplementedError()
+
+	def line_closest_points(self, starts, ends, lo, hi, points):
+		raise NotImplementedError()
+
+	def line_sides(self, starts, ends, points, epsilon):
+		raise NotImplementedError()
+
+class PythonBackend(Backend):
+
+	name = "python"
+
+	def _result(self, values):
+		numpy = try_import("numpy")
+		return values if numpy is None else numpy.asarray(values)
+
+	def norm(self, components):
+		return math.hypot(*_values(components))
+
+	def norm_squared(self, components):
+		c = _values(components)
+		return sum(map(mul, c, c))
+
+	def dot(self, a, b):
+		return sum(map(mul, _values(a), _values(b)))
+
+	def contains_ellipse(self, points, center, axes):
+		center = _values(center)
+		result = []
+		for p in _values(points):
+			total = 0
+			for pc, cc, ac in zip(p, center, axes):
+				d = (pc - cc)/ac
+				total += d*d
+			result.append(total <= 1)
+		return self._result(result)
+
+	def contains_rect(self, points, x, y, w, h):
+		return self._result([
+			((x <= px) == (px <= x + w)) and ((y <= py) == (py <= y + h))
+			for px, py in _values(points)
+		])
+
+	def contains_box(self, points, lo, hi):
+		lo, hi = _values(lo), _values(hi)
+		return self._result([
+			all(l <= c <= h for l, c, h in zip(lo, p, hi)) for p in _values(points)
+		])
+
+	def bezier(self, control_polygon, times):
+		cp = [_values(c) for c in control_polygon]
+		n = len(cp) - 1
+		d = len(cp[0])
+		coefficients = [math.factorial(n)/math.factorial(i)/math.factorial(n - i) for i in range(n + 1)]
+		result = []
+		for t in _values(times):
+			point = [0.0]*d
+			for i in range(n + 1):
+				basis = coefficients[i] * t**i * (1 - t)**(n - i)
+				for j in range(d):
+					point[j] += basis * cp[i][j]
+			result.append(point)
+		return self._result(result)
+
+	def segment_intersections(self, first, second):
+		first, second = _values(first), _values(second)
+		if (len(first) == 1):
+			first = first * len(second)
+		elif (len(second) == 1):
+			second = second * len(first)
+		# Decided with the same filtered predicates as Segment2D's (imported
+		# here as predicates depends on vector, which depends on this module).
+		from .predicates import _segment_intersection
+		result = []
+		for ((x1, y1), (x2, y2)), ((x3, y3), (x4, y4)) in zip(first, second):
+			point = _segment_intersection(x1, y1, x2, y2, x3, y3, x4, y4)
+			result.append([_NAN, _NAN] if point is None else list(point))
+		return self._result(result)
+
+	def outcodes(self, points, normals, offsets):
+		planes = list(zip(_values(normals), _values(offsets)))
+		return self._result([
+			sum(1 << k for k, (n, c) in enumerate(planes) if sum(map(mul, n, p)) > c)
+			for p in _values(points)
+		])
+
+	def clip_segments(self, segments, normals, offsets):
+		# Cyrus-Beck: the part of the segment p0 + t*(p1 - p0) inside each
+		# half-plane is an interval of t, the part inside them all their
+		# intersection.
+		planes = list(zip(_values(normals), _values(offsets)))
+		clipped, visible = [], []
+		for p0, p1 in _values(segments):
+			t0, t1 = 0.0, 1.0
+			for n, c in planes:
+				d0, d1 = sum(map(mul, n, p0)) - c, sum(map(mul, n, p1)) - c
+				if (d0 > 0 and d1 > 0):
+					t0, t1 = 1.0, 0.0
+					break
+				elif (d0 > 0):
+					t0 = max(t0, d0/(d0 - d1))
+				elif (d1 > 0):
+					t1 = min(t1, d0/(d0 - d1))
+			if (t0 <= t1):
+				# Measured from the nearest end, so unclipped ends are exact.
+				clipped.append([
+					[a + t0*(b - a) for a, b in zip(p0, p1)],
+					[b - (1 - t1)*(b - a) for a, b in zip(p0, p1)]
+				])
+			else:
+				clipped.append([[_NAN]*len(p0)]*2)
+			visible.append(t0 <= t1)
+		return self._result(clipped), self._result(visible)
+
+	def _line_projections(self, starts, ends, lo, hi, points):
+		# Yields, for every line, the closest point of the line to each point
+		# along with the point.
+		points = _values(points)
+		for s, e, l, h in zip(_values(starts), _values(ends), _values(lo), _values(hi)):
+			d = [ec - sc for sc, ec in zip(s, e)]
+			dd = sum(map(mul, d, d)) or 1.0
+			projections = []
+			for p in points:
+				t = sum((pc - sc)*dc for pc, sc, dc in zip(p, s, d))/dd
+				t = min(max(t, l), h)
+				projections.append(([sc + t*dc for sc, dc in zip(s, d)], p))
+			yield projections
+
+	def line_distances(self, starts, ends, lo, hi, points):
+		return self._result([
+			[math.sqrt(sum((cc - pc)**2 for cc, pc in zip(c, p))) for c, p in projections]
+			for projections in self._line_projections(starts, ends, lo, hi, points)
+		])
+
+	def line_closest_points(self, starts, ends, lo, hi, points):
+		return self._result([
+			[c for c, p in projections]
+			for projections in self._line_projections(starts, ends, lo, hi, points)
+		])
+
+	def line_sides(self, starts, ends, points, epsilon):
+		points = _values(points)
+		result = []
+		for (x1, y1), (x2, y2) in zip(_values(starts), _values(ends)):
+			dx, dy = x2 - x1, y2 - y1
+			band = epsilon*math.hypot(dx, dy)
+			row = []
+			for px, py in points:
+				cross = dx*(py - y1) - dy*(px - x1)
+				row.append(0 if abs(cross) <= band else (1 if cross < 0 else -1))
+			result.append(row)
+		return self._result(result)
+
+class NumpyBackend(Backend):
+
+	name = "numpy"
+
+	def is_available(self):
+		return try_import("numpy") is not None
+
+	def norm(self, components):
+		return require("numpy").linalg.norm(components)
+
+	def norm_squared(self, components):
+		return require("numpy").dot(components, components)
+
+	def dot(self, a, b):
+		return require("numpy").dot(a, b)
+
+	def ellipse_circumference(self, a, b):
+		special = try_import("scipy.special")
+		if (special is None):
+			return super().ellipse_circumference(a, b)
+		if (a < b):
+			a, b = b, a
+		return 4*a*special.ellipe(1 - (b/a)**2)
+
+	def ellipsoid_surface_area(self, a, b, c):
+		special = try_import("scipy.special")
+		a, b, c = sorted((a, b, c), reverse=True)
+		if (special is None or a == c):
+			return super().ellipsoid_surface_area(a, b, c)
+		c_sqrd = c*c
+		m = (a*a*(b*b - c_sqrd))/(b*b*(a*a - c_sqrd))
+		phi = math.acos(c/a)
+		return 2*math.pi*(
+			c_sqrd + a*b/math.sin(phi)*(
+				special.ellipeinc(phi, m)*math.sin(phi)**2 +
+				special.ellipkinc(phi, m)*math.cos(phi)**2
+				)
+			)
+
+	def contains_ellipse(self, points, center, axes):
+		numpy = require("numpy")
+		points = as_float_array(points)
+		total = 0
+		for i, a in enumerate(axes):
+			d = (points[:, i] - center[i])/a
+			total = total + d*d
+		return total <= 1
+
+	def contains_rect(self, points, x, y, w, h):
+		numpy = require("numpy")
+		points = as_float_array(points)
+		px, py = points[:, 0], points[:, 1]
+		return ((x <= px) == (px <= x + w)) & \
+			   ((y <= py) == (py <= y + h))
+
+	def contains_box(self, points, lo, hi):
+		numpy = require("numpy")
+		points = as_float_array(points)
+		# Column by column against python floats, which is faster than one
+		# (N, d) comparison and keeps float32 points in float32.
+		inside = numpy.ones(len(points), dtype=bool)
+		for i in range(points.shape[1]):
+			column = points[:, i]
+			inside &= (float(lo[i]) <= column) & (column <= float(hi[i]))
+		return inside
+
+	def bezier(self, control_polygon, times):
+		numpy = require("numpy")
+		times = numpy.asarray(times, dtype=float)
+		n = len(control_polygon) - 1
+		points = numpy.zeros((len(times), len(control_polygon[0])))
+		for i in range(n + 1):
+			coefficient = math.factorial(n)/math.factorial(i)/math.factorial(n - i)
+			basis = coefficient * times**i * (1 - times)**(n - i)
+			points += basis[:, None] * numpy.asarray(control_polygon[i], dtype=float)
+		return points
+
+	def segment_intersections(self, first, second):
+		numpy = require("numpy")
+		first = numpy.asarray(first, dtype=float).reshape(-1, 2, 2)
+		second = numpy.asarray(second, dtype=float).reshape(-1, 2, 2)
+		from .predicates import _CCW_BOUND, _segment_intersection_exact
+		n = max(len(first), len(second))
+		x1, y1, x2, y2 = first[:, 0, 0], first[:, 0, 1], first[:, 1, 0], first[:, 1, 1]
+		x3, y3, x4, y4 = second[:, 0, 0], second[:, 0, 1], second[:, 1, 0], second[:, 1, 1]
+		dx1, dy1, dx2, dy2 = x2 - x1, y2 - y1, x4 - x3, y4 - y3
+		bx, by = x3 - x1, y3 - y1
+		# The signs of the denominator d, t*d, (t - 1)*d, u*d and (u - 1)*d
+		# decide the hits; rows where any of them is within the orient2d
+		# error bound are redone exactly (see predicates._segment_intersection).
+		dets, uncertain = [], numpy.zeros(n, dtype=bool)
+		for left, right in (
+				(dx1*dy2, dy1*dx2), (bx*dy2, by*dx2), ((x3 - x2)*dy2, (y3 - y2)*dx2),
+				(bx*dy1, by*dx1), ((x4 - x1)*dy1, (y4 - y1)*dx1)):
+			det = left - right
+			bound = numpy.abs(left)
+			bound += numpy.abs(right)
+			bound *= _CCW_BOUND
+			uncertain |= numpy.abs(det) < bound
+			dets.append(det)
+		denom, t, t1, u, u1 = dets
+		sign = numpy.sign(denom)
+		hit = (sign != 0) & (t*sign >= 0) & (t1*sign <= 0) & (u*sign >= 0) & (u1*sign <= 0) & ~uncertain
+		points = numpy.full((n, 2), numpy.nan)
+		t = t[hit]/denom[hit]
+		points[hit, 0] = numpy.broadcast_to(x1, (n,))[hit] + t*numpy.broadcast_to(dx1, (n,))[hit]
+		points[hit, 1] = numpy.broadcast_to(y1, (n,))[hit] + t*numpy.broadcast_to(dy1, (n,))[hit]
+		for i in numpy.flatnonzero(uncertain).tolist():
+			row = first[i % len(first)].ravel().tolist() + second[i % len(second)].ravel().tolist()
+			point = _segment_intersection_exact(*row)
+			if (point is not None):
+				points[i] = point
+		return points
+
+	def _outside(self, points, normal, offset):
+		# normal.p > offset for each of ``points``, without multiplying by the
+		# zero components of the normals of a rect's sides.
+		(a, b), x, y = normal, points[:, 0], points[:, 1]
+		if (b == 0):
+			return x > offset/a if a > 0 else x < offset/a
+		if (a == 0):
+			return y > offset/b if b > 0 else y < offset/b
+		return a*x + b*y > offset
+
+	def outcodes(self, points, normals, offsets):
+		numpy = require("numpy")
+		points = as_float_array(points).reshape(-1, 2)
+		codes = numpy.zeros(len(points), dtype=int)
+		for k, (normal, offset) in enumerate(zip(_values(normals), _values(offsets))):
+			codes |= self._outside(points, normal, offset).astype(int) << k
+		return codes
+
+	def clip_segments(self, segments, normals, offsets):
+		numpy = require("numpy")
+		segments = as_float_array(segments)
+		planes = list(zip(_values(normals), _values(offsets)))
+		p0, p1 = segments[:, 0], segments[:, 1]
+		# Trivially rejected (both ends outside the same side) and accepted
+		# (both ends inside every side) segments skip the clipping.
+		rejected = numpy.zeros(len(segments), dtype=bool)
+		outside = numpy.zeros(len(segments), dtype=bool)
+		for normal, offset in planes:
+			out0, out1 = self._outside(p0, normal, offset), self._outside(p1, normal, offset)
+			rejected |= out0 & out1
+			outside |= out0
+			outside |= out1
+		visible = ~rejected
+		clipped = segments.copy()
+		clipped[rejected] = numpy.nan
+		crossing = numpy.flatnonzero(outside & visible)
+		if (len(crossing)):
+			a, b = p0[crossing], p1[crossing]
+			normals = numpy.asarray(normals, dtype=segments.dtype)
+			offsets = numpy.asarray(offsets, dtype=segments.dtype)
+			d0, d1 = a.dot(normals.T) - offsets, b.dot(normals.T) - offsets
+			with numpy.errstate(divide="ignore", invalid="ignore"):
+				t = d0/(d0 - d1)
+			t0 = numpy.where(d0 > 0, t, 0).max(axis=1)
+			t1 = numpy.where(d1 > 0, t, 1).min(axis=1)
+			inside = t0 <= t1
+			clipped[crossing] = numpy.where(
+				inside[:, None, None],
+				numpy.stack((a + t0[:, None]*(b - a), b - (1 - t1)[:, None]*(b - a)), axis=1),
+				numpy.nan
+				)
+			visible[crossing] = inside
+		return clipped, visible
+
+	def _line_blocks(self, starts, ends, lo, hi, points):
+		# Yields (lines, t, offsets, directions) for blocks of lines, where t
+		# is the clamped (lines, N) line parameter of the closest points and
+		# offsets the (lines, N, d) vectors from the line starts to the
+		# points. Blocks keep the temporaries around _LINE_BLOCK values.
+		numpy = require("numpy")
+		starts = numpy.asarray(starts, dtype=float)
+		directions = numpy.asarray(ends, dtype=float) - starts
+		lo = numpy.asarray(lo, dtype=float)
+		hi = numpy.asarray(hi, dtype=float)
+		points = numpy.asarray(points, dtype=float)
+		squared = numpy.einsum("ij,ij->i", directions, directions)
+		squared[squared == 0] = 1
+		block = max(1, _LINE_BLOCK // max(1, points.size))
+		for i in range(0, len(starts), block):
+			lines = slice(i, i + block)
+			offsets = points[None, :, :] - starts[lines, None, :]
+			t = numpy.einsum("mnj,mj->mn", offsets, directions[lines]) / squared[lines, None]
+			numpy.clip(t, lo[lines, None], hi[lines, None], out=t)
+			yield lines, t, offsets, directions[lines]
+
+	def line_distances(self, starts, ends, lo, hi, points):
+		numpy = require("numpy")
+		result = numpy.empty((len(starts), len(points)))
+		for lines, t, offsets, directions in self._line_blocks(starts, ends, lo, hi, points):
+			offsets -= t[..., None]*directions[:, None, :]
+			result[lines] = numpy.sqrt(numpy.einsum("mnj,mnj->mn", offsets, offsets))
+		return result
+
+	def line_closest_points(self, starts, ends, lo, hi, points):
+		numpy = require("numpy")
+		starts = numpy.asarray(starts, dtype=float)
+		result = numpy.empty((len(starts), len(points), starts.shape[1]))
+		for lines, t, offsets, directions in self._line_blocks(starts, ends, lo, hi, points):
+			result[lines] = starts[lines, None, :] + t[..., None]*directions[:, None, :]
+		return result
+
+	def line_sides(self, starts, ends, points, epsilon):
+		numpy = require("numpy")
+		starts = numpy.asarray(starts, dtype=float)
+		d = numpy.asarray(ends, dtype=float) - starts
+		points = numpy.asarray(points, dtype=float)
+		band = epsilon*numpy.hypot(d[:, 0], d[:, 1])[:, None]
+		result = numpy.empty((len(starts), len(points)), dtype=numpy.int8)
+		block = max(1, _LINE_BLOCK // max(1, len(points)))
+		for i in range(0, len(starts), block):
+			lines = slice(i, i + block)
+			# Relative to the line starts, so far-away coordinates don't lose
+			# precision.
+			cross = d[lines, 0, None]*(points[None, :, 1] - starts[lines, 1, None]) - \
+					d[lines, 1, None]*(points[None, :, 0] - starts[lines, 0, None])
+			side = numpy.where(cross < 0, 1, -1).astype(numpy.int8)
+			side[numpy.abs(cross) <= band[lines]] = 0
+			result[lines] = side
+		return result
+
+_backends = { }
+
+# The backend explicitly chosen for each operation class, or None to select
+# one automatically (see ``get_backend``).
+_active = {SCALAR: None, BATCH: None}
+
+# Batches smaller than this are run on the python backend when selecting
+# automatically; numpy's per-call overhead dominates below it. ``calibrate``
+# measures it on the current machine.
+_crossover = {BATCH: 16}
+
+def register_backend(backend):
+	_backends[backend.name] = backend
+	return backend
+
+register_backend(PythonBackend())
+register_backend(NumpyBackend())
+
+def _lookup(name):
+	if (isinstance(name, Backend)):
+		return name
+	backend = _backends.get(name)
+	if (backend is None):
+		raise ValueError("Unknown backend '%s', expected one of %s." % (name, ", ".join(sorted(_backends))))
+	if (not backend.is_available()):
+		raise RequirementException("Backend '%s' is not available." % name)
+	return backend
+
+def get_backend(kind=SCALAR, size=None, override=None):
+	if (override is not None):
+		return _lookup(override)
+	backend = _active[kind]
+	if (backend is not None):
+		return backend
+	# Single vectors have at most 4 components, far below the point where
+	# numpy pays off, so scalar operations default to python.
+	if (kind == SCALAR or (size is not None and size < _crossover[BATCH])):
+		return _backends["python"]
+	numpy_backend = _backends["numpy"]
+	return numpy_backend if numpy_backend.is_available() else _backends["python"]
+
+def set_backend(name, kind=None):
+	# ``name`` is a registered backend name, or "auto" to go back to automatic
+	# selection. Without ``kind`` it applies to both operation classes.
+	backend = None if name == "auto" else _lookup(name)
+	previous = dict(_active)
+	for k in ([SCALAR, BATCH] if kind is None else [kind]):
+		if (k not in _active):
+			raise ValueError("Unknown operation class '%s'." % k)
+		_active[k] = backend
+	return previous
+
+@contextmanager
+def use_backend(name, kind=None):
+	previous = set_backend(name, kind)
+	try:
+		yield get_backend(kind or SCALAR)
+	finally:
+		_active.update(previous)
+
+def calibrate(sizes=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512), number=200):
+	# Finds the smallest batch size at which the numpy backend beats the
+	# python backend on this machine and uses it for automatic selection.
+	numpy = try_import("numpy")
+	if (numpy is None):
+		return None
+	python, numpy_backend = _backends["python"], _backends["numpy"]
+	crossover = None
+	for size in sizes:
+		points = numpy.random.rand(size, 2)
+		times = [
+			timeit.timeit(lambda: backend.contains_ellipse(points, (0.5, 0.5), (0.5, 0.25)), number=number)
+			for backend in (python, numpy_backend)
+		]
+		if (times[1] < times[0]):
+			crossover = size
+			break
+	_crossover[BATCH] = sizes[-1] if crossover is None else crossover
+	return _crossover[BATCH]
@@ -0,0 +1,63 @@
+import argparse
+import json
+import sys
+
+from .runner import DEFAULT_THRESHOLD, run, compare, save, load
+from .workloads import SCALAR, BATCH
+
+def _format_time(seconds):
+	for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+		if (seconds >= scale):
+			return "%8.2f %s" % (seconds / scale, unit)
+	return "%8.2f ns" % (seconds / 1e-9)
+
+def _report(result):
+	size = "" if result["size"] is None else "[%i]" % result["size"]
+	line = "%-40s %s" % (result["name"] + size, _format_time(result["seconds"]))
+	if (result["size"] is not None):
+		line += "   (%s/item)" % _format_time(result["per_item"]).strip()
+	print(line)
+	sys.stdout.flush()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog="python -m %s" % __package__, description="Benchmark the geometry primitives.")
+	parser.add_argument("-m", "--module", action="append", help="only run workloads of this module (repeatable)")
+	parser.add_argument("-k", "--kind", choices=(SCALAR, BATCH), action="append", help="only run scalar or batch workloads")
+	parser.add_argument("-n", "--name", action="append", help="only run this workload (repeatable)")
+	parser.add_argument("--sizes", type=int, nargs="+", help="batch sizes to run")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per repetition")
+	parser.add_argument("--no-memory", action="store_true", help="skip the memory-per-object measurements")
+	parser.add_argument("--json", action="store_true", help="print the results as JSON")
+	parser.add_argument("-o", "--output", help="save the results as JSON to this file")
+	parser.add_argument("-b", "--baseline", help="compare against results saved with --output")
+	parser.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+		help="relative slowdown that counts as a regression (default %(default)s)")
+	args = parser.parse_args(argv)
+
+	results = run(
+		args.module, args.kind, args.name, args.sizes, args.repeat, args.min_time,
+		not args.no_memory, None if args.json else _report
+		)
+
+	if (args.json):
+		print(json.dumps(results, indent=2, sort_keys=True))
+	elif ("memory" in results):
+		print()
+		for name, size in results["memory"].items():
+			print("%-40s %8.1f bytes/object" % (name, size))
+	if (args.output):
+		save(results, args.output)
+
+	if (args.baseline):
+		regressions = compare(results, load(args.baseline), args.threshold)
+		if (regressions):
+			print("\nRegressions (threshold %.0f%%):" % (args.threshold * 100), file=sys.stderr)
+			for key, old, new, ratio in regressions:
+				print("  %-40s %s -> %s (%.2fx)" % (key, _format_time(old), _format_time(new), ratio), file=sys.stderr)
+			return 1
+		print("\nNo regressions against %s." % args.baseline, file=sys.stderr)
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
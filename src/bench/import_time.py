@@ -0,0 +1,61 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# The package this benchmark belongs to (``geom`` when installed as such).
+PACKAGE = __package__.rsplit(".", 1)[0]
+
+DEFAULT_BUDGET = 0.25 # seconds
+DEFAULT_STATEMENT = "%s.Vector2(0, 0)" % PACKAGE
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import %(package)s
+%(statement)s
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(sorted(sys.modules)))
+"""
+
+def _environment():
+	root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+	env = dict(os.environ)
+	env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+	return env
+
+def measure_import(statement=DEFAULT_STATEMENT, repeat=5):
+	# Imports the package (and runs ``statement``) in a fresh interpreter
+	# ``repeat`` times. Returns the fastest time in seconds, and the modules
+	# that were loaded.
+	script = _SCRIPT % {"package": PACKAGE, "statement": statement}
+	best, modules = None, None
+	for i in range(repeat):
+		output = subprocess.check_output([sys.executable, "-c", script], env=_environment())
+		elapsed, loaded = output.decode().strip().split("\n")
+		elapsed = float(elapsed)
+		if (best is None or elapsed < best):
+			best = elapsed
+		modules = loaded.split(",")
+	return best, modules
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Measure the import time of %s." % PACKAGE)
+	parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="budget in seconds")
+	parser.add_argument("--statement", default=DEFAULT_STATEMENT, help="code to run after importing")
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args(argv)
+
+	elapsed, modules = measure_import(args.statement, args.repeat)
+	loaded = [m for m in modules if m == PACKAGE or m.startswith(PACKAGE + ".")]
+	print("import %s; %s" % (PACKAGE, args.statement))
+	print("  time:    %.1f ms (budget %.1f ms)" % (elapsed * 1000, args.budget * 1000))
+	print("  loaded:  %s" % ", ".join(loaded))
+	if (elapsed > args.budget):
+		print("  OVER BUDGET")
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from ..ellipse import Ellipse
+from ..service import BatchQueryService, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_DELAY
+
+def percentile(values, p):
+	values = sorted(values)
+	if (not values):
+		return float("nan")
+	return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+async def _client(query, duration, points, latencies, rng):
+	end = time.perf_counter() + duration
+	while (time.perf_counter() < end):
+		request = [(rng.random() * 4, rng.random() * 4) for i in range(points)]
+		start = time.perf_counter()
+		await query(request)
+		latencies.append(time.perf_counter() - start)
+
+async def run_load(clients=100, duration=2.0, points=1, inline=False,
+		max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_delay=DEFAULT_MAX_DELAY):
+	# Runs ``clients`` concurrent coroutines, each sending point-in-ellipse
+	# requests of ``points`` points back to back for ``duration`` seconds,
+	# either through a BatchQueryService or by calling contains_points inline.
+	zone = Ellipse(2, 2, 1.5, 0.7)
+	latencies = []
+	service = BatchQueryService(max_batch_size=max_batch_size, max_delay=max_delay)
+	if (inline):
+		async def query(request):
+			# Blocks the loop for the call, then lets the other clients run.
+			result = zone.contains_points(request)
+			await asyncio.sleep(0)
+			return result
+	else:
+		async def query(request):
+			return await service.contains_points(zone, request)
+	start = time.perf_counter()
+	await asyncio.gather(*[
+		_client(query, duration, points, latencies, random.Random(i))
+		for i in range(clients)
+	])
+	await service.close()
+	elapsed = time.perf_counter() - start
+	return {
+		"requests": len(latencies),
+		"batches": service.batches,
+		"throughput": len(latencies) / elapsed,
+		"p50": percentile(latencies, 50),
+		"p99": percentile(latencies, 99)
+	}
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Load test the asyncio batch query service.")
+	parser.add_argument("--clients", type=int, default=100)
+	parser.add_argument("--duration", type=float, default=2.0, help="seconds")
+	parser.add_argument("--points", type=int, default=1, help="points per request")
+	parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+	parser.add_argument("--max-delay", type=float, default=DEFAULT_MAX_DELAY, help="seconds")
+	parser.add_argument("--inline", action="store_true", help="call contains_points directly, without batching")
+	args = parser.parse_args(argv)
+
+	result = asyncio.run(run_load(
+		args.clients, args.duration, args.points, args.inline, args.max_batch_size, args.max_delay
+		))
+	print("%s: %i requests in %i batches" % ("inline" if args.inline else "batched", result["requests"], result["batches"]))
+	print("  throughput: %10.1f requests/s" % result["throughput"])
+	print("  p50:        %10.3f ms" % (result["p50"] * 1000))
+	print("  p99:        %10.3f ms" % (result["p99"] * 1000))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
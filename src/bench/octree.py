@@ -0,0 +1,55 @@
+import argparse
+import sys
+import timeit
+
+from ..compat import try_import
+
+numpy = try_import("numpy")
+
+# Scenes of small random boxes in a 100-unit cube, as found in a game level:
+# the octree against testing every box, for each query.
+
+def scene(n, seed=0):
+	from ..aabb import AABB3DArray
+	rng = numpy.random.RandomState(seed)
+	return AABB3DArray.from_ellipsoids(rng.rand(n, 3)*100, rng.rand(n, 3))
+
+def _best(func, repeat):
+	return min(timeit.repeat(func, number=1, repeat=repeat))
+
+def measure(n, queries=20, repeat=3):
+	# Seconds per operation for a scene of ``n`` boxes: building the tree,
+	# and box, ray and nearest neighbour queries with the tree and by brute
+	# force.
+	from ..aabb import AABB3D
+	from ..octree import Octree
+	boxes = scene(n)
+	rng = numpy.random.RandomState(1)
+	tree = Octree.build(boxes)
+	ranges = [AABB3D(*(rng.rand(3)*90).tolist() + [5, 5, 5]) for i in range(queries)]
+	rays = [(rng.rand(3)*100, rng.randn(3)) for i in range(queries)]
+	points = [rng.rand(3)*100 for i in range(queries)]
+	result = {"build": _best(lambda: Octree.build(boxes), repeat)}
+	for name, tree_query, brute_force, args in (
+			("query", tree.query, boxes.collides_aabb, ranges),
+			("ray", lambda r: tree.query_ray(*r), lambda r: boxes.intersect_ray(*r), rays),
+			("nearest", tree.nearest, boxes.distances_to, points)):
+		result[name] = _best(lambda: [tree_query(a) for a in args], repeat)/queries
+		result[name + " (brute force)"] = _best(lambda: [brute_force(a) for a in args], repeat)/queries
+	return result
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Measures the octree on scenes of random boxes.")
+	parser.add_argument("-n", "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="boxes per scene")
+	parser.add_argument("--queries", type=int, default=20)
+	parser.add_argument("--repeat", type=int, default=3)
+	args = parser.parse_args(argv)
+
+	print("%-24s %s" % ("operation", " ".join("%12s" % ("n=%i" % n) for n in args.sizes)))
+	results = [measure(n, args.queries, args.repeat) for n in args.sizes]
+	for name in results[0]:
+		print("%-24s %s" % (name, " ".join("%9.3f ms" % (r[name]*1e3) for r in results)))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,58 @@
+import argparse
+import sys
+import timeit
+
+from ..compat import try_import
+from ..precision import FLOAT64, FLOAT32, get_dtype, use_precision
+
+numpy = try_import("numpy")
+
+# Batch operations on float64 and float32 storage. They mostly stream their
+# inputs through memory once, so halving the bytes per coordinate shows up
+# directly once the batches no longer fit in the caches.
+
+def _best(func, repeat):
+	return min(timeit.repeat(func, number=1, repeat=repeat))
+
+def _operations(n, precision):
+	from ..aabb import AABB3D, AABB3DArray
+	from ..ellipse import Ellipse
+	from ..polyline import Polyline2D
+	rng = numpy.random.RandomState(0)
+	dtype = get_dtype(precision)
+	points2, points3 = (rng.rand(n, 2)*100).astype(dtype), (rng.rand(n, 3)*100).astype(dtype)
+	box, ellipse = AABB3D(25, 25, 25, 50, 50, 50), Ellipse(50, 50, 30, 20)
+	boxes = AABB3DArray.from_points(points3)
+	return [
+		("contains_box", points3.nbytes, lambda: box.contains_points(points3, backend="numpy")),
+		("contains_ellipse", points2.nbytes, lambda: ellipse.contains_points(points2, backend="numpy")),
+		("AABB3DArray.translate", 2*points3.nbytes, lambda: boxes.translate((1, 1, 1))),
+		("Polyline2D.length", points2.nbytes, lambda: Polyline2D(points2).length()),
+		]
+
+def measure(n, repeat=3):
+	# {operation: {precision: (bytes read, seconds)}} for batches of ``n``
+	# points.
+	result = {}
+	for precision in (FLOAT64, FLOAT32):
+		with use_precision(precision):
+			for name, size, func in _operations(n, precision):
+				result.setdefault(name, {})[precision] = (size, _best(func, repeat))
+	return result
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Compares batch operations on float64 and float32 storage.")
+	parser.add_argument("-n", "--sizes", type=int, nargs="+", default=[10000, 1000000, 10000000], help="points per batch")
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args(argv)
+
+	print("%-24s %10s %12s %12s %10s %10s %8s" % ("operation", "n", "float64", "float32", "f64 GB/s", "f32 GB/s", "speedup"))
+	for n in args.sizes:
+		for name, times in measure(n, args.repeat).items():
+			(size64, f64), (size32, f32) = times[FLOAT64], times[FLOAT32]
+			print("%-24s %10i %9.3f ms %9.3f ms %10.2f %10.2f %7.2fx" % (
+				name, n, f64*1e3, f32*1e3, size64/f64/1e9, size32/f32/1e9, f64/f32))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,58 @@
+import argparse
+import random
+import sys
+import timeit
+
+from ..predicates import orient2d, incircle, fallback_counts, reset_fallback_counts
+
+def _float_orient2d(a, b, c):
+	ax, ay = a
+	bx, by = b
+	cx, cy = c
+	return (ax - cx)*(by - cy) - (ay - cy)*(bx - cx)
+
+def random_points(n, rng):
+	return [(rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)) for i in range(n)]
+
+def nearly_collinear_points(n, rng):
+	# Points within a few ulps of a line, where float orientation is
+	# unreliable and the predicates have to fall back to exact arithmetic.
+	points = []
+	for i in range(n):
+		t = rng.random()
+		points.append((0.5 + t*11.5 + rng.randint(-4, 4)*2.0**-50, 0.5 + t*11.5))
+	return points
+
+DISTRIBUTIONS = [("random", random_points), ("nearly collinear", nearly_collinear_points)]
+
+def measure(predicate, arity, points, repeat):
+	calls = [tuple(points[(i + j) % len(points)] for j in range(arity)) for i in range(len(points))]
+	reset_fallback_counts()
+	def run():
+		for args in calls:
+			predicate(*args)
+	elapsed = min(timeit.repeat(run, number=1, repeat=repeat))
+	fallbacks = sum(fallback_counts().values()) / repeat
+	return elapsed / len(calls), 1 - fallbacks / len(calls)
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Measures the speed and float filter hit rate of the adaptive predicates.")
+	parser.add_argument("-n", "--count", type=int, default=20000, help="calls per predicate")
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args(argv)
+
+	rng = random.Random(0)
+	print("%-18s %-16s %12s %12s" % ("predicate", "inputs", "time/call", "filter hits"))
+	for name, generate in DISTRIBUTIONS:
+		points = generate(args.count, rng)
+		for label, predicate, arity in (
+				("float cross", _float_orient2d, 3),
+				("orient2d", orient2d, 3),
+				("incircle", incircle, 4)):
+			per_call, hit_rate = measure(predicate, arity, points, args.repeat)
+			hits = "-" if predicate is _float_orient2d else "%.2f%%" % (100*hit_rate)
+			print("%-18s %-16s %9.1f ns %12s" % (label, name, per_call*1e9, hits))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
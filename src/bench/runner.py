@@ -0,0 +1,106 @@
+import gc
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from .workloads import WORKLOADS, SCALAR, BATCH, memory_factories
+
+DEFAULT_THRESHOLD = 0.1 # 10% slower than the baseline counts as a regression
+
+def _key(name, size):
+	return name if size is None else "%s[%i]" % (name, size)
+
+def time_callable(func, repeat=5, min_time=0.2):
+	# Best time per call in seconds, taken over ``repeat`` runs each lasting
+	# at least ``min_time``.
+	timer = timeit.Timer(func)
+	number = 1
+	while (timer.timeit(number) < min_time / 10):
+		number *= 10
+	number = max(1, int(number * min_time / max(timer.timeit(number), 1e-9)))
+	return min(timer.repeat(repeat, number)) / number
+
+def select(modules=None, kinds=None, names=None):
+	selected = []
+	for workload in WORKLOADS.values():
+		if (modules and workload.module not in modules):
+			continue
+		if (kinds and workload.kind not in kinds):
+			continue
+		if (names and workload.name not in names):
+			continue
+		if (workload.is_available()):
+			selected.append(workload)
+	return selected
+
+def run_workloads(workloads, sizes=None, repeat=5, min_time=0.2, report=None):
+	results = {}
+	for workload in workloads:
+		for size in (sizes if sizes and workload.kind == BATCH else workload.sizes):
+			seconds = time_callable(workload.make(size), repeat, min_time)
+			result = {
+				"name": workload.name,
+				"module": workload.module,
+				"kind": workload.kind,
+				"size": size,
+				"seconds": seconds,
+				"per_item": seconds if size is None else seconds / size
+			}
+			results[_key(workload.name, size)] = result
+			if (report is not None):
+				report(result)
+	return results
+
+def measure_memory(count=10000):
+	# Average number of bytes allocated per object, including everything the
+	# object owns (component arrays, nested vectors, ...).
+	memory = {}
+	for name, factory in memory_factories().items():
+		gc.collect()
+		tracemalloc.start()
+		try:
+			before = tracemalloc.get_traced_memory()[0]
+			objects = [factory(i) for i in range(count)]
+			after = tracemalloc.get_traced_memory()[0]
+		finally:
+			tracemalloc.stop()
+		del objects
+		memory[name] = (after - before) / count
+	return memory
+
+def run(modules=None, kinds=None, names=None, sizes=None, repeat=5, min_time=0.2, memory=True, report=None):
+	results = {
+		"meta": {
+			"python": sys.version.split()[0],
+			"implementation": platform.python_implementation(),
+			"machine": platform.machine(),
+			"platform": platform.platform()
+		},
+		"benchmarks": run_workloads(select(modules, kinds, names), sizes, repeat, min_time, report)
+	}
+	if (memory):
+		results["memory"] = measure_memory()
+	return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+	# Returns (key, baseline seconds, current seconds, ratio) for every
+	# benchmark that got slower than the baseline by more than ``threshold``.
+	regressions = []
+	old = baseline.get("benchmarks", {})
+	for key, result in sorted(results.get("benchmarks", {}).items()):
+		if (key not in old):
+			continue
+		ratio = result["seconds"] / old[key]["seconds"]
+		if (ratio > 1 + threshold):
+			regressions.append((key, old[key]["seconds"], result["seconds"], ratio))
+	return regressions
+
+def save(results, path):
+	with open(path, "w") as f:
+		json.dump(results, f, indent=2, sort_keys=True)
+
+def load(path):
+	with open(path) as f:
+		return json.load(f)
@@ -0,0 +1,519 @@
+import math
+import random
+from collections import OrderedDict
+
+from ..compat import try_import
+
+numpy = try_import("numpy")
+
+SCALAR = "scalar"
+BATCH = "batch"
+
+DEFAULT_SIZES = (1000, 100000)
+
+# name -> Workload, in registration order (grouped by module).
+WORKLOADS = OrderedDict()
+
+class Workload(object):
+
+	def __init__(self, name, kind, setup, sizes=None, requires=None):
+		self.name = name
+		self.kind = kind
+		self.setup = setup
+		self.sizes = sizes or ((None,) if kind == SCALAR else DEFAULT_SIZES)
+		self.requires = requires
+
+	@property
+	def module(self):
+		return self.name.split(".", 1)[0]
+
+	def is_available(self):
+		return self.requires is None or try_import(self.requires) is not None
+
+	def make(self, size):
+		# Returns a zero-argument callable performing one iteration of the
+		# workload. Batch workloads process ``size`` items per call.
+		if (self.kind == SCALAR):
+			return self.setup()
+		return self.setup(size)
+
+def workload(name, kind=SCALAR, sizes=None, requires=None):
+	def decorator(setup):
+		WORKLOADS[name] = Workload(name, kind, setup, sizes, requires)
+		return setup
+	return decorator
+
+def _points(n, d=2, scale=4):
+	rng = random.Random(n)
+	if (numpy is None):
+		return [[rng.random()*scale for j in range(d)] for i in range(n)]
+	return numpy.random.RandomState(n).rand(n, d)*scale
+
+## vector
+
+@workload("vector.add")
+def _vector_add():
+	from ..vector import Vector2
+	a, b = Vector2(1, 2), Vector2(3, 4)
+	return lambda: a + b
+
+@workload("vector.rotate")
+def _vector_rotate():
+	from ..vector import Vector2
+	v = Vector2(3, 4)
+	return lambda: v.rotate(30, (1, 1))
+
+@workload("vector.magnitude")
+def _vector_magnitude():
+	from ..vector import Vector3
+	v = Vector3(1, 2, 3)
+	return lambda: v.magnitude()
+
+@workload("vector.quaternion_mul")
+def _vector_quaternion_mul():
+	from ..vector import Quaternion
+	q1, q2 = Quaternion(1, 2, 3, 4), Quaternion(5, 6, 7, 8)
+	return lambda: q1 * q2
+
+@workload("vector.to_vector_many", BATCH)
+def _vector_to_vector_many(size):
+	from ..vector import to_vector_many
+	points = _points(size)
+	return lambda: to_vector_many(points)
+
+@workload("vector.vectors_to_array", BATCH)
+def _vector_vectors_to_array(size):
+	from ..vector import Vector2, vectors_to_array
+	vectors = [Vector2(x, y) for x, y in _points(size)]
+	return lambda: vectors_to_array(vectors)
+
+## linear
+
+@workload("linear.point_of_intersection", requires="numpy")
+def _linear_point_of_intersection():
+	from ..linear import Segment2D
+	s1, s2 = Segment2D((0, 0), (4, 3)), Segment2D((0, 3), (4, 0))
+	return lambda: s1.point_of_intersection(s2)
+
+@workload("linear.is_to_the_left")
+def _linear_is_to_the_left():
+	from ..linear import Segment2D
+	segment = Segment2D((0, 0), (4, 3))
+	return lambda: segment.is_to_the_left((1, 2))
+
+@workload("linear.segment_intersections", BATCH)
+def _linear_segment_intersections(size):
+	from ..linear import segment_intersections
+	segments = _points(size, 4, 1)
+	if (numpy is not None):
+		segments = segments.reshape(-1, 2, 2)
+	else:
+		segments = [((a, b), (c, d)) for a, b, c, d in segments]
+	return lambda: segment_intersections(segments, ((0, 0), (1, 1)))
+
+@workload("linear.perpendicular_distance")
+def _linear_perpendicular_distance():
+	from ..linear import Segment2D
+	segment = Segment2D((0, 0), (4, 3))
+	return lambda: segment.perpendicular_distance((1, 2))
+
+@workload("linear.line_sides", BATCH)
+def _linear_line_sides(size):
+	from ..linear import line_sides
+	lines, points = [((0, i), (4, i + 1)) for i in range(100)], _points(size)
+	if (numpy is not None):
+		lines = numpy.asarray(lines, dtype=float)
+	return lambda: line_sides(lines, points)
+
+@workload("linear.line_distances", BATCH)
+def _linear_line_distances(size):
+	from ..linear import line_distances
+	lines, points = [((0, i), (4, i + 1)) for i in range(100)], _points(size)
+	if (numpy is not None):
+		lines = numpy.asarray(lines, dtype=float)
+	return lambda: line_distances(lines, points)
+
+## predicates
+
+@workload("predicates.orient2d")
+def _predicates_orient2d():
+	from ..predicates import orient2d
+	a, b, c = (0.1, 0.2), (4.3, 3.1), (1.7, 2.9)
+	return lambda: orient2d(a, b, c)
+
+@workload("predicates.incircle")
+def _predicates_incircle():
+	from ..predicates import incircle
+	a, b, c, d = (0.1, 0.2), (4.3, 3.1), (1.7, 2.9), (2.0, 2.0)
+	return lambda: incircle(a, b, c, d)
+
+@workload("predicates.convex_hull", BATCH, requires="numpy")
+def _predicates_convex_hull(size):
+	from ..predicates import convex_hull
+	points = _points(size)
+	return lambda: convex_hull(points)
+
+## aabb
+
+@workload("aabb.collides_aabb")
+def _aabb_collides_aabb():
+	from ..aabb import AABB3D
+	b1, b2 = AABB3D(0, 0, 0, 4, 3, 2), AABB3D(2, 1, 1, 4, 3, 2)
+	return lambda: b1.collides_aabb(b2)
+
+@workload("aabb.intersect_ray", BATCH, requires="numpy")
+def _aabb_intersect_ray(size):
+	from ..bench.octree import scene
+	boxes = scene(size)
+	return lambda: boxes.intersect_ray((0, 0, 0), (1, 0.9, 1.1))
+
+## octree
+
+@workload("octree.build", BATCH, sizes=(10000, 1000000), requires="numpy")
+def _octree_build(size):
+	from ..bench.octree import scene
+	from ..octree import Octree
+	boxes = scene(size)
+	return lambda: Octree.build(boxes)
+
+@workload("octree.query", requires="numpy")
+def _octree_query():
+	from ..aabb import AABB3D
+	from ..bench.octree import scene
+	from ..octree import Octree
+	tree = Octree.build(scene(100000))
+	probe = AABB3D(40, 40, 40, 5, 5, 5)
+	return lambda: tree.query(probe)
+
+@workload("octree.nearest", requires="numpy")
+def _octree_nearest():
+	from ..bench.octree import scene
+	from ..octree import Octree
+	tree = Octree.build(scene(100000))
+	return lambda: tree.nearest((50, 50, 50), 8)
+
+## precision
+
+def _contains_box(size, precision):
+	from ..aabb import AABB3D
+	from ..precision import get_dtype
+	points = _points(size, 3, 10).astype(get_dtype(precision))
+	box = AABB3D(2, 2, 2, 5, 5, 5)
+	return lambda: box.contains_points(points)
+
+@workload("precision.contains_box_float64", BATCH, sizes=(100000, 1000000), requires="numpy")
+def _precision_contains_box_float64(size):
+	from ..precision import FLOAT64
+	return _contains_box(size, FLOAT64)
+
+@workload("precision.contains_box_float32", BATCH, sizes=(100000, 1000000), requires="numpy")
+def _precision_contains_box_float32(size):
+	from ..precision import FLOAT32
+	return _contains_box(size, FLOAT32)
+
+## sweep
+
+@workload("sweep.time_of_impact", requires="numpy")
+def _sweep_time_of_impact():
+	from ..ellipse import Ellipse
+	from ..rect import Rect
+	from ..sweep import time_of_impact
+	ball, target = Ellipse(0, 0, 0.5, 0.5), Rect(5, 0, 2, 2)
+	return lambda: time_of_impact(ball, (10, 1), target)
+
+@workload("sweep.times_of_impact_rect", BATCH, requires="numpy")
+def _sweep_times_of_impact_rect(size):
+	from ..rect import Rect
+	from ..sweep import times_of_impact
+	positions, velocities = _points(size, 2, 10), 2 - _points(size, 2, 4)[::-1]
+	target = Rect(3, 3, 2, 1)
+	return lambda: times_of_impact(positions, velocities, target, 0.25)
+
+@workload("sweep.times_of_impact_ellipse", BATCH, requires="numpy")
+def _sweep_times_of_impact_ellipse(size):
+	from ..ellipse import Ellipse
+	from ..sweep import times_of_impact
+	positions, velocities = _points(size, 2, 10), 2 - _points(size, 2, 4)[::-1]
+	target = Ellipse(5, 5, 2, 1)
+	return lambda: times_of_impact(positions, velocities, target, 0.25)
+
+## bounds
+
+@workload("bounds.enclosing_circle", BATCH, requires="numpy")
+def _bounds_enclosing_circle(size):
+	from ..bounds import enclosing_circle
+	points = _points(size)
+	return lambda: enclosing_circle(points)
+
+@workload("bounds.bounding_ellipse", BATCH, requires="numpy")
+def _bounds_bounding_ellipse(size):
+	from ..bounds import bounding_ellipse
+	points = _points(size)*(4, 1)
+	return lambda: bounding_ellipse(points)
+
+@workload("bounds.enclosing_spheres", BATCH, sizes=(1000, 100000), requires="numpy")
+def _bounds_enclosing_spheres(size):
+	from ..bounds import enclosing_spheres
+	points = _points(size, 3)
+	labels = numpy.arange(size) % max(1, size // 1000)
+	return lambda: enclosing_spheres(points, labels)
+
+## delaunay
+
+@workload("delaunay.triangulate", BATCH, sizes=(1000, 100000), requires="numpy")
+def _delaunay_triangulate(size):
+	from ..delaunay import Triangulation
+	points = _points(size, 2, 100)
+	return lambda: Triangulation(points)
+
+@workload("delaunay.locate_many", BATCH, sizes=(1000, 100000), requires="numpy")
+def _delaunay_locate_many(size):
+	from ..delaunay import Triangulation
+	triangulation = Triangulation(_points(10000, 2, 100))
+	points = _points(size, 2, 100)
+	return lambda: triangulation.locate_many(points)
+
+## rect
+
+@workload("rect.collides_rect")
+def _rect_collides_rect():
+	from ..rect import Rect
+	r1, r2 = Rect(0, 0, 4, 3), Rect(2, 1, 4, 3)
+	return lambda: r1.collides_rect(r2)
+
+@workload("rect.contains_point")
+def _rect_contains_point():
+	from ..rect import Rect
+	rect = Rect(0, 0, 4, 3)
+	return lambda: rect.contains_point((1, 2))
+
+@workload("rect.contains_points", BATCH)
+def _rect_contains_points(size):
+	from ..rect import Rect
+	rect, points = Rect(1, 1, 2, 2), _points(size)
+	return lambda: rect.contains_points(points)
+
+@workload("rect.clip_segment")
+def _rect_clip_segment():
+	from ..rect import Rect
+	rect = Rect(0, 0, 4, 3)
+	return lambda: rect.clip_segment(((-1, 1), (5, 2)))
+
+@workload("rect.clip_segments", BATCH)
+def _rect_clip_segments(size):
+	from ..rect import Rect
+	# Short segments over an area 16 times the rect's, so most of them are
+	# trivially rejected or accepted, like a viewport over a large scene.
+	rect, segments = Rect(0.375, 0.375, 0.25, 0.25), [((a, b), (a + c/20, b + d/20)) for a, b, c, d in _points(size, 4, 1)]
+	if (numpy is not None):
+		segments = numpy.asarray(segments, dtype=float)
+	return lambda: rect.clip_segments(segments)
+
+## region
+
+def _screen_rects(n):
+	rng = random.Random(n)
+	return [(rng.randint(0, 1900), rng.randint(0, 1000), rng.randint(8, 64), rng.randint(8, 64)) for i in range(n)]
+
+@workload("region.from_rects", BATCH, sizes=(100, 2000))
+def _region_from_rects(size):
+	from ..region import Region
+	rects = _screen_rects(size)
+	return lambda: Region(rects)
+
+@workload("region.union_rect")
+def _region_union_rect():
+	from ..region import Region
+	region = Region(_screen_rects(500))
+	return lambda: region | (600, 400, 32, 32)
+
+## polygon
+
+def _circles(n):
+	from ..ellipse import Ellipse
+	from ..polygon import Polygon
+	rng = random.Random(n)
+	return [Polygon.from_ellipse(Ellipse(rng.uniform(0, 100), rng.uniform(0, 100), 4, 4), 16) for i in range(n)]
+
+def _jittered_ring(n, jitter, seed=0, x=0):
+	# n points around a circle, each moved by up to ``jitter`` times the
+	# spacing: past about half of it, the ring crosses itself all over.
+	rng = random.Random(seed)
+	step = 2*math.pi*100/n
+	return [(x + 100*math.cos(2*math.pi*k/n) + rng.uniform(-jitter, jitter)*step,
+		100*math.sin(2*math.pi*k/n) + rng.uniform(-jitter, jitter)*step) for k in range(n)]
+
+@workload("polygon.union")
+def _polygon_union():
+	from ..ellipse import Ellipse
+	from ..polygon import Polygon
+	first, second = Polygon.from_ellipse(Ellipse(0, 0, 4, 4)), Polygon.from_ellipse(Ellipse(3, 1, 4, 4))
+	return lambda: first | second
+
+@workload("polygon.union_rings", BATCH, sizes=(1000, 20000))
+def _polygon_union_rings(size):
+	from ..polygon import Polygon
+	first, second = Polygon(_jittered_ring(size, 2, 1)), Polygon(_jittered_ring(size, 2, 2, 50))
+	return lambda: first | second
+
+@workload("polygon.union_all", BATCH, sizes=(100, 2000))
+def _polygon_union_all(size):
+	from ..polygon import Polygon
+	circles = _circles(size)
+	return lambda: Polygon.union_all(circles)
+
+@workload("polygon.self_intersecting", BATCH, sizes=(1000, 10000))
+def _polygon_self_intersecting(size):
+	from ..polygon import Polygon
+	ring = _jittered_ring(size, 20)
+	return lambda: Polygon(ring)
+
+@workload("polygon.offset")
+def _polygon_offset():
+	from ..polygon import Polygon
+	polygon = Polygon.union_all(_circles(20))
+	return lambda: polygon.offset(1)
+
+## raster
+
+def _level(size):
+	from ..ellipse import Ellipse
+	from ..linear import Segment2D
+	from ..rect import Rect
+	rng = random.Random(size)
+	shapes = []
+	for i in range(size):
+		x, y = rng.uniform(0, 500), rng.uniform(0, 500)
+		shapes.append([Rect(x, y, rng.uniform(2, 20), rng.uniform(2, 20)), Ellipse(x, y, rng.uniform(2, 10), rng.uniform(2, 10)), Segment2D((x, y), (x + rng.uniform(-30, 30), y + rng.uniform(-30, 30)))][i % 3])
+	return shapes
+
+@workload("raster.rasterize", BATCH, sizes=(100, 1000), requires="numpy")
+def _raster_rasterize(size):
+	from ..raster import rasterize
+	from ..rect import Rect
+	# Shapes on a 1000 x 1000 grid
+	shapes = _level(size)
+	return lambda: rasterize(shapes, Rect(0, 0, 500, 500), .5, 2)
+
+@workload("raster.update", requires="numpy")
+def _raster_update():
+	from ..raster import Raster
+	from ..rect import Rect
+	# Moving one shape back and forth, with distances clamped to 10.
+	raster = Raster(Rect(0, 0, 500, 500), .5, max_distance=10)
+	for shape in _level(1000):
+		raster.add(shape, 2)
+	crate = Rect(200, 200, 4, 4)
+	key = raster.add(crate)
+	raster.distance_field
+	def move(step=[1]):
+		step[0] = -step[0]
+		crate.translate((step[0], 0))
+		raster.update(key)
+		return raster.distance_field
+	return move
+
+## sampling
+
+@workload("sampling.ellipse", BATCH, requires="numpy")
+def _sampling_ellipse(size):
+	from ..ellipse import Ellipse
+	from ..sampling import sample_ellipse
+	ellipse = Ellipse(0, 0, 4, 3)
+	return lambda: sample_ellipse(ellipse, size, 0)
+
+@workload("sampling.bezier", BATCH, requires="numpy")
+def _sampling_bezier(size):
+	from ..bezier import BezierCurve
+	from ..sampling import sample_bezier
+	curve = BezierCurve((0, 0), (1, 3), (4, -1), (5, 2))
+	return lambda: sample_bezier(curve, size, 0)
+
+@workload("sampling.poisson_disk", requires="numpy")
+def _sampling_poisson_disk():
+	from ..rect import Rect
+	from ..sampling import sample_poisson_disk
+	rect = Rect(0, 0, 40, 40)
+	return lambda: sample_poisson_disk(rect, 1, 0)
+
+## ellipse
+
+@workload("ellipse.contains_point")
+def _ellipse_contains_point():
+	from ..ellipse import Ellipse
+	ellipse = Ellipse(0, 0, 2, 1)
+	return lambda: ellipse.contains_point((1, 0.5))
+
+@workload("ellipse.contains_points", BATCH)
+def _ellipse_contains_points(size):
+	from ..ellipse import Ellipse
+	ellipse, points = Ellipse(2, 2, 1.5, 0.7), _points(size)
+	return lambda: ellipse.contains_points(points)
+
+## bezier
+
+@workload("bezier.evaluate_at")
+def _bezier_evaluate_at():
+	from ..bezier import BezierCurve
+	curve = BezierCurve((0, 0), (1, 2), (3, 1), (4, 4))
+	return lambda: curve.evaluate_at(0.3)
+
+@workload("bezier.evaluate_many", BATCH)
+def _bezier_evaluate_many(size):
+	from ..bezier import BezierCurve
+	curve = BezierCurve((0, 0), (1, 2), (3, 1), (4, 4))
+	times = [i/size for i in range(size)]
+	if (numpy is not None):
+		times = numpy.asarray(times)
+	return lambda: curve.evaluate_many(times)
+
+@workload("bezier.fit", BATCH, requires="numpy")
+def _bezier_fit(size):
+	from ..bezier import fit_bezier_curves
+	# A wandering, slightly noisy trace, like a recorded pen stroke.
+	rng = numpy.random.RandomState(size)
+	heading = numpy.cumsum(rng.normal(0, .05, size))
+	points = numpy.cumsum(numpy.stack([numpy.cos(heading), numpy.sin(heading)], axis=1), axis=0)
+	points += rng.normal(0, .05, points.shape)
+	return lambda: fit_bezier_curves(points, .5)
+
+## polyline
+
+def _track(size):
+	from ..polyline import Polyline2D
+	return Polyline2D(numpy.cumsum(_points(size, 2, 1) - 0.5, axis=0))
+
+@workload("polyline.length", BATCH, requires="numpy")
+def _polyline_length(size):
+	vertices = _track(size).vertices
+	from ..polyline import Polyline2D
+	return lambda: Polyline2D(vertices).length()
+
+@workload("polyline.simplify_rdp", BATCH, requires="numpy")
+def _polyline_simplify_rdp(size):
+	track = _track(size)
+	return lambda: track.simplify_rdp(0.5)
+
+@workload("polyline.nearest_points", BATCH, sizes=(1000, 10000), requires="numpy")
+def _polyline_nearest_points(size):
+	track = _track(1000)
+	points = _points(size, 2, 10)
+	return lambda: track.nearest_points(points)
+
+# Factories for the memory-per-object measurements.
+def memory_factories():
+	from ..vector import Vector2, ImmutableVector2, Vector3, Quaternion
+	from ..linear import Segment2D
+	from ..rect import Rect
+	from ..ellipse import Ellipse
+	from ..bezier import BezierCurve
+	return OrderedDict([
+		("Vector2", lambda i: Vector2(i, i)),
+		("ImmutableVector2", lambda i: ImmutableVector2(i, i)),
+		("Vector3", lambda i: Vector3(i, i, i)),
+		("Quaternion", lambda i: Quaternion(i, i, i, i)),
+		("Segment2D", lambda i: Segment2D((i, i), (i + 1, i))),
+		("Rect", lambda i: Rect(i, i, 1, 1)),
+		("Ellipse", lambda i: Ellipse(i, i, 2, 1)),
+		("BezierCurve", lambda i: BezierCurve((i, i), (1, 2), (3, 1), (4, 4))),
+		])
@@ -3,10 +3,11 @@ import math
 from .vector import *
 from .compat import *
 from .fuzzy import *
+from .backend import BATCH, get_backend
 
-scipy = try_import("scipy.integrate")
+numpy = try_import("numpy")
 
-__all__ = ["BezierCurve"]
+__all__ = ["BezierCurve", "fit_bezier_curves"]
 
 def _choose(n, k):
 	return math.factorial(n)/math.factorial(k)/math.factorial(n - k)
@@ -51,18 +52,25 @@ class BezierCurve(FuzzyComparable):
 	def evaluate_at(self, time):
 		cp = self.control_polygon
 		n = len(cp) - 1
-		return sum(bernstein(i, n, time) * cp[i] for i in range(n + 1))
+		return sum((bernstein(i, n, time) * cp[i] for i in range(1, n + 1)), bernstein(0, n, time) * cp[0])
+
+	def evaluate_many(self, times, backend=None):
+		# Returns an (N, d) array with the curve evaluated at each of the
+		# given times.
+		cp = [v._components for v in self.control_polygon]
+		return get_backend(BATCH, len(times), backend).bezier(cp, times)
 
 	def derivative(self):
 		cp = self.control_polygon
 		n = len(cp) - 1
 		return BezierCurve(*[n*(cp[i + 1] - cp[i]) for i in range(n)])
 
-	@requires("scipy")
+	@requires("scipy.integrate")
 	def arclength(self, lo=0, hi=1):
+		integrate = require("scipy.integrate")
 		dt = self.derivative()
 		integrand = lambda t: dt(t).magnitude()
-		return scipy.integrate.quad(integrand, lo, hi)[0]
+		return integrate.quad(integrand, lo, hi)[0]
 
 	def approximate_arclength(self, line_segments):
 		step = 1/line_segments
@@ -76,3 +84,179 @@ class BezierCurve(FuzzyComparable):
 			tn += step
 		return arclength
 
+## Curve fitting
+##
+## Schneider's algorithm ("An Algorithm for Automatically Fitting Digitized
+## Curves", Graphics Gems): a cubic is fitted to a run of points by least
+## squares, with its ends on the first and last point and its inner control
+## points on the end tangents. Points are first given parameters by their
+## chord length along the run; when the fit is close, Newton steps move
+## each parameter to the nearest point of the curve and the fit is redone.
+## When it's still too far off, the run is split at its worst point and
+## both halves are fitted on their own, meeting with a shared tangent so
+## the curves join smoothly.
+##
+## Instead of recursing one run at a time, all the runs left to fit are
+## fitted together in each round, as one array of their points with the
+## per-run sums done by reduceat, so the number of numpy calls grows with
+## the depth of the splits rather than with the number of curves.
+
+def _units(vectors):
+	lengths = numpy.linalg.norm(vectors, axis=-1, keepdims=True)
+	return numpy.divide(vectors, lengths, out=numpy.zeros_like(vectors), where=lengths > 0)
+
+def _cubic_basis(u):
+	v = 1 - u
+	return numpy.stack([v*v*v, 3*u*v*v, 3*u*u*v, u*u*u], axis=1)
+
+def _runs(firsts, lasts):
+	# The indices of the points of the runs firsts[k]..lasts[k], one run
+	# after another, the run of each and where each run starts.
+	counts = lasts - firsts + 1
+	starts = numpy.concatenate([[0], numpy.cumsum(counts)[:-1]])
+	run = numpy.repeat(numpy.arange(len(counts)), counts)
+	return numpy.arange(counts.sum()) - starts[run] + firsts[run], run, starts
+
+def _fit_cubics(local, u, run, starts, chords, first_tangents, last_tangents):
+	# The (R, 4, d) control points, relative to the start of each run,
+	# minimizing the squared distances from each point to its run's curve at
+	# its parameter. ``local`` are the points relative to the start of their
+	# run, and ``chords`` the ends. Only the distances of the inner control
+	# points from the ends, along the tangents, are left to solve for, from
+	# per-run sums of the 2x2 normal equations.
+	basis = _cubic_basis(u)
+	b1, b2, tail = basis[:, 1], basis[:, 2], basis[:, 2] + basis[:, 3]
+	columns = numpy.concatenate([
+		numpy.stack([b1*b1, b1*b2, b2*b2, b1*tail, b2*tail], axis=1), b1[:, None]*local, b2[:, None]*local
+		], axis=1)
+	sums = numpy.add.reduceat(columns, starts)
+	d = local.shape[1]
+	s11, s12, s22, s1, s2 = sums[:, :5].T
+	dot = lambda a, b: numpy.einsum("ij,ij->i", a, b)
+	c00 = s11*dot(first_tangents, first_tangents)
+	c01 = s12*dot(first_tangents, last_tangents)
+	c11 = s22*dot(last_tangents, last_tangents)
+	x0 = dot(first_tangents, sums[:, 5:5 + d] - s1[:, None]*chords)
+	x1 = dot(last_tangents, sums[:, 5 + d:] - s2[:, None]*chords)
+	det = c00*c11 - c01*c01
+	solvable = det != 0
+	det = numpy.where(solvable, det, 1)
+	alpha1 = numpy.where(solvable, (x0*c11 - x1*c01)/det, 0)
+	alpha2 = numpy.where(solvable, (c00*x1 - c01*x0)/det, 0)
+	# Negative or tiny distances make loops or cusps; fall back to the
+	# distances that make the curve as straight as the tangents allow.
+	distance = numpy.sqrt(dot(chords, chords))
+	straight = (alpha1 < 1e-6*distance) | (alpha2 < 1e-6*distance)
+	alpha1, alpha2 = numpy.where(straight, distance/3, alpha1), numpy.where(straight, distance/3, alpha2)
+	return numpy.stack([
+		numpy.zeros_like(chords), alpha1[:, None]*first_tangents, chords + alpha2[:, None]*last_tangents, chords
+		], axis=1)
+
+def _offsets(local, control_points, u, run):
+	# From each point to its run's curve at its parameter.
+	basis = _cubic_basis(u)
+	return numpy.einsum("ij,ijk->ik", basis[:, 1:], control_points[run, 1:]) - local
+
+def _max_errors(local, control_points, u, run, starts):
+	# The largest squared distance from an inner point of each run to the
+	# curve at its parameter, and the index of that point in the run.
+	offsets = _offsets(local, control_points, u, run)
+	errors = numpy.einsum("ij,ij->i", offsets, offsets)
+	errors[starts] = -1
+	errors[numpy.append(starts[1:], len(u)) - 1] = -1
+	worst = numpy.maximum.reduceat(errors, starts)
+	hits = numpy.flatnonzero(errors == worst[run])
+	first_hits = numpy.unique(run[hits], return_index=True)[1]
+	return worst, hits[first_hits] - starts
+
+def _reparameterize(local, control_points, u, run, starts):
+	# One Newton step on the distance from each point to its run's curve;
+	# the ends stay put.
+	d1 = 3*numpy.diff(control_points, axis=1)
+	d2 = 2*numpy.diff(d1, axis=1)
+	v = 1 - u
+	offsets = _offsets(local, control_points, u, run)
+	first = numpy.einsum("ij,ijk->ik", numpy.stack([v*v, 2*u*v, u*u], axis=1), d1[run])
+	second = numpy.einsum("ij,ijk->ik", numpy.stack([v, u], axis=1), d2[run])
+	numerator = numpy.einsum("ij,ij->i", offsets, first)
+	denominator = numpy.einsum("ij,ij->i", first, first) + numpy.einsum("ij,ij->i", offsets, second)
+	u = u - numpy.divide(numerator, denominator, out=numpy.zeros_like(u), where=denominator != 0)
+	u[starts] = 0
+	u[numpy.append(starts[1:], len(u)) - 1] = 1
+	return u
+
+@requires("numpy")
+def fit_bezier_curves(points, tolerance, max_iterations=4):
+	# Fits cubic BezierCurves to an (N, d) array of points, such as a pen
+	# stroke or a GPS trace, so that every point is within ``tolerance`` of
+	# the curves. The first curve starts at the first point and every other
+	# one where the previous one ends. ``max_iterations`` bounds the Newton
+	# reparameterizations tried before a run is split.
+	if (tolerance <= 0):
+		raise ValueError("The fitting tolerance must be positive.")
+	points = numpy.asarray(points, dtype=float)
+	if (len(points)):
+		# Repeated points have no tangent and no chord length.
+		points = points[numpy.concatenate([[True], numpy.any(points[1:] != points[:-1], axis=1)])]
+	if (len(points) < 2):
+		raise ValueError("Cannot fit a curve to fewer than 2 distinct points.")
+	squared = tolerance*tolerance
+	lengths = numpy.concatenate([[0], numpy.cumsum(numpy.linalg.norm(numpy.diff(points, axis=0), axis=1))])
+	firsts, lasts = numpy.array([0]), numpy.array([len(points) - 1])
+	first_tangents, last_tangents = _units(points[[1]] - points[[0]]), _units(points[[-2]] - points[[-1]])
+	fitted, fitted_firsts = [], []
+	while (len(firsts)):
+		# Two points are joined by a curve a third of their distance along
+		# the tangents.
+		pairs = lasts - firsts == 1
+		if (pairs.any()):
+			start, end = points[firsts[pairs]], points[lasts[pairs]]
+			distance = numpy.linalg.norm(end - start, axis=1)[:, None]/3
+			fitted.append(numpy.stack([start, start + distance*first_tangents[pairs], end + distance*last_tangents[pairs], end], axis=1))
+			fitted_firsts.append(firsts[pairs])
+			firsts, lasts, first_tangents, last_tangents = firsts[~pairs], lasts[~pairs], first_tangents[~pairs], last_tangents[~pairs]
+			if (not len(firsts)):
+				break
+
+		indices, run, starts = _runs(firsts, lasts)
+		chords = points[lasts] - points[firsts]
+		local = points[indices] - points[firsts][run]
+		u = (lengths[indices] - lengths[firsts][run])/(lengths[lasts] - lengths[firsts])[run]
+		control_points = _fit_cubics(local, u, run, starts, chords, first_tangents, last_tangents)
+		errors, worst = _max_errors(local, control_points, u, run, starts)
+		iterating = (errors > squared) & (errors <= 4*squared)
+		for i in range(max_iterations):
+			if (not iterating.any()):
+				break
+			# The points of the runs still iterating, renumbered.
+			mask = iterating[run]
+			sub_run = (numpy.cumsum(iterating) - 1)[run[mask]]
+			sub_starts = numpy.concatenate([[0], numpy.cumsum(numpy.bincount(sub_run))[:-1]])
+			sub_local = local[mask]
+			sub_u = _reparameterize(sub_local, control_points[iterating], u[mask], sub_run, sub_starts)
+			sub_control_points = _fit_cubics(
+				sub_local, sub_u, sub_run, sub_starts, chords[iterating], first_tangents[iterating], last_tangents[iterating]
+				)
+			sub_errors, sub_worst = _max_errors(sub_local, sub_control_points, sub_u, sub_run, sub_starts)
+			u[mask] = sub_u
+			control_points[iterating], errors[iterating], worst[iterating] = sub_control_points, sub_errors, sub_worst
+			iterating[iterating] = sub_errors > squared
+
+		done = errors <= squared
+		control_points = control_points[done] + points[firsts[done], None]
+		# Exactly on the ends, so that the curves join.
+		control_points[:, 0], control_points[:, 3] = points[firsts[done]], points[lasts[done]]
+		fitted.append(control_points)
+		fitted_firsts.append(firsts[done])
+		# The others are split at their worst point.
+		split = ~done
+		firsts, lasts, first_tangents, last_tangents = firsts[split], lasts[split], first_tangents[split], last_tangents[split]
+		middles = firsts + worst[split]
+		centers = _units(points[middles - 1] - points[middles + 1])
+		flat = ~centers.any(axis=1)
+		centers[flat] = _units(points[middles[flat] - 1] - points[middles[flat]])
+		firsts, lasts = numpy.concatenate([firsts, middles]), numpy.concatenate([middles, lasts])
+		first_tangents = numpy.concatenate([first_tangents, -centers])
+		last_tangents = numpy.concatenate([centers, last_tangents])
+	order = numpy.argsort(numpy.concatenate(fitted_firsts), kind="stable")
+	return [BezierCurve(*c) for c in numpy.concatenate(fitted)[order].tolist()]
@@ -0,0 +1,256 @@
+import math
+import random
+
+from .compat import *
+from .rect import *
+from .ellipse import *
+
+numpy = try_import("numpy")
+
+__all__ = [
+	"bounding_rect", "enclosing_circle", "enclosing_sphere", "bounding_ellipse",
+	"bounding_rects", "enclosing_circles", "enclosing_spheres", "bounding_ellipses"
+	]
+
+# Points on the boundary of a ball are accepted if they're this far outside it
+# relative to its radius, so rounding can't make Welzl's algorithm recurse
+# on points that are already on the boundary.
+_TOLERANCE = 1e-10
+
+def _rows(points, d):
+	# An (N, d) array if numpy is installed, a list of lists otherwise.
+	if (numpy is not None):
+		if (isinstance(points, numpy.ndarray)):
+			rows = numpy.asarray(points, dtype=float).reshape(-1, d)
+		else:
+			rows = numpy.array([getattr(p, "_components", p) for p in points], dtype=float).reshape(-1, d)
+	else:
+		rows = [list(getattr(p, "_components", p)) for p in points]
+	if (not len(rows)):
+		raise ValueError("Cannot bound an empty set of points.")
+	return rows
+
+## Minimal enclosing balls (Welzl)
+
+def _solve(matrix, vector):
+	# Gaussian elimination with partial pivoting for the small (at most 3x3)
+	# systems below. Returns None if the matrix is singular.
+	n = len(vector)
+	rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+	scale = max([abs(x) for row in matrix for x in row] + [0])
+	for i in range(n):
+		pivot = max(range(i, n), key=lambda r: abs(rows[r][i]))
+		if (abs(rows[pivot][i]) <= 1e-12*scale):
+			return None
+		rows[i], rows[pivot] = rows[pivot], rows[i]
+		for r in range(i + 1, n):
+			f = rows[r][i]/rows[i][i]
+			for c in range(i, n + 1):
+				rows[r][c] -= f*rows[i][c]
+	x = [0.0]*n
+	for i in reversed(range(n)):
+		x[i] = (rows[i][n] - sum(rows[i][c]*x[c] for c in range(i + 1, n)))/rows[i][i]
+	return x
+
+def _inside(ball, p):
+	if (ball is None):
+		return False
+	center, squared = ball
+	return sum((a - b)**2 for a, b in zip(p, center)) <= squared*(1 + _TOLERANCE)
+
+def _circumball(support):
+	# The smallest ball with all of ``support`` (at most d + 1 points) on its
+	# boundary, as (center, squared radius). Its center lies in their affine
+	# hull: a + sum(l[i]*v[i]) with v[i] = support[i + 1] - a.
+	if (not support):
+		return None
+	a = support[0]
+	vs = [[x - y for x, y in zip(p, a)] for p in support[1:]]
+	gram = [[sum(x*y for x, y in zip(u, v)) for v in vs] for u in vs]
+	l = _solve(gram, [gram[i][i]/2 for i in range(len(vs))])
+	if (l is None):
+		# Affinely dependent points (e.g. three collinear ones): the ball is
+		# the smallest one through a subset that contains the others.
+		best = None
+		for skip in range(len(support)):
+			ball = _circumball(support[:skip] + support[skip + 1:])
+			if (all(_inside(ball, p) for p in support) and (best is None or ball[1] < best[1])):
+				best = ball
+		return best
+	center = [x + sum(l[i]*v[k] for i, v in enumerate(vs)) for k, x in enumerate(a)]
+	return center, sum((x - y)**2 for x, y in zip(center, a))
+
+def _welzl(points, n, support, limit):
+	# The smallest ball containing points[:n] with ``support`` on its
+	# boundary. The recursion is at most ``limit`` (d + 1) levels deep.
+	ball = _circumball(support)
+	if (len(support) == limit):
+		return ball
+	for i in range(n):
+		if (not _inside(ball, points[i])):
+			ball = _welzl(points, i, support + [points[i]], limit)
+	return ball
+
+def _welzl_ball(rows, d):
+	# Expected linear time, given the points in random order. The order is
+	# seeded so results are reproducible.
+	rows = list(rows)
+	random.Random(len(rows)).shuffle(rows)
+	return _welzl(rows, len(rows), [], d + 1)
+
+def _enclosing_ball(rows, d, core=None):
+	# Returns (center, radius). With numpy, Welzl's algorithm only runs on a
+	# small core set of the points: the point farthest from the core's ball
+	# is added to it until the ball contains every point, at which point it
+	# is also the smallest ball containing them all. Each round is a single
+	# vectorized pass, and only a few rounds are usually needed. ``core`` is
+	# a list of row indices to start from, which is extended in place.
+	if (isinstance(rows, list)):
+		center, squared = _welzl_ball(rows, d)
+		return center, math.sqrt(squared)
+	if (core is None):
+		core = [0]
+	while (True):
+		center, squared = _welzl_ball(rows[core].tolist(), d)
+		offsets = rows - center
+		distances = numpy.einsum("ij,ij->i", offsets, offsets)
+		far = int(numpy.argmax(distances))
+		if (distances[far] <= squared*(1 + _TOLERANCE)):
+			return center, math.sqrt(squared)
+		core.append(far)
+
+def _hull_candidates(rows):
+	# Drops the 2D points inside the polygon spanned by the extreme points in
+	# eight directions (Akl-Toussaint), which can't touch any enclosing
+	# circle or ellipse; usually only a small fraction of the points is left.
+	if (isinstance(rows, list) or len(rows) < 64):
+		return rows
+	x, y = rows[:, 0], rows[:, 1]
+	directions = (x, x + y, y, y - x, -x, -x - y, -y, x - y)
+	extremes = [int(numpy.argmax(values)) for values in directions]
+	polygon = rows[[i for k, i in enumerate(extremes) if i != extremes[k - 1]]]
+	keep = numpy.zeros(len(rows), dtype=bool)
+	for a, b in zip(polygon, numpy.roll(polygon, -1, axis=0)):
+		keep |= (b[0] - a[0])*(y - a[1]) - (b[1] - a[1])*(x - a[0]) <= 0
+	keep[extremes] = True
+	return rows[keep]
+
+## Single point sets
+
+def bounding_rect(points):
+	# The smallest Rect containing 2D points (vectors, tuples or an (N, 2)
+	# array).
+	rows = _rows(points, 2)
+	if (isinstance(rows, list)):
+		xs, ys = [p[0] for p in rows], [p[1] for p in rows]
+		x1, y1, x2, y2 = min(xs), min(ys), max(xs), max(ys)
+	else:
+		(x1, y1), (x2, y2) = rows.min(axis=0).tolist(), rows.max(axis=0).tolist()
+	return Rect(x1, y1, x2 - x1, y2 - y1)
+
+def enclosing_circle(points):
+	# The smallest circle containing 2D points, as an Ellipse with a == b.
+	(x, y), r = _enclosing_ball(_hull_candidates(_rows(points, 2)), 2)
+	return Ellipse(x, y, r, r)
+
+def enclosing_sphere(points):
+	# The smallest sphere containing 3D points, as an Ellipsoid3D with equal
+	# axes.
+	(x, y, z), r = _enclosing_ball(_rows(points, 3), 3)
+	return Ellipsoid3D(x, y, z, r, r, r)
+
+def bounding_ellipse(points, iterations=20):
+	# An approximation of the smallest-area (axis-aligned) Ellipse
+	# containing 2D points. Stretching the points along x by 1/k turns the
+	# ellipses with axes ratio k into circles, so the area for a given ratio
+	# is pi*k*r**2 with r the radius of the smallest enclosing circle of the
+	# stretched points. The ratio is found by a golden section search around
+	# the aspect of the bounding rect.
+	rows = _hull_candidates(_rows(points, 2))
+	x, y, width, height = bounding_rect(rows)
+	if (width == 0 or height == 0):
+		# Degenerate: a segment (or a point) is bounded by a flat ellipse.
+		(x, y), r = _enclosing_ball(rows, 2)
+		return Ellipse(x, y, r if width else 0, r if height else 0)
+
+	# The points supporting the circle change little between nearby ratios,
+	# so every fit starts from the core set of the previous ones.
+	core = [0]
+
+	def fit(log_k):
+		k = math.exp(log_k)
+		if (isinstance(rows, list)):
+			stretched = [[px/k, py] for px, py in rows]
+		else:
+			stretched = rows*(1/k, 1)
+		(x, y), r = _enclosing_ball(stretched, 2, core)
+		return k*r*r, (x*k, y, k*r, r)
+
+	ratio = 1/((1 + math.sqrt(5))/2)
+	lo, hi = math.log(width/height) - math.log(4), math.log(width/height) + math.log(4)
+	m1, m2 = hi - ratio*(hi - lo), lo + ratio*(hi - lo)
+	f1, f2 = fit(m1), fit(m2)
+	for i in range(iterations):
+		if (f1[0] <= f2[0]):
+			hi, m2, f2 = m2, m1, f1
+			m1 = hi - ratio*(hi - lo)
+			f1 = fit(m1)
+		else:
+			lo, m1, f1 = m1, m2, f2
+			m2 = lo + ratio*(hi - lo)
+			f2 = fit(m2)
+	return Ellipse(*min(f1, f2)[1])
+
+## Many point sets at once
+##
+## The batch functions take an (N, d) array and an array of N non-negative
+## integer labels, and bound the points with each label separately. Row i of
+## the result belongs to label i; labels without points get a row of NaN.
+
+def _groups(points, labels, count, d):
+	points = numpy.asarray(points, dtype=float).reshape(-1, d)
+	labels = numpy.asarray(labels, dtype=numpy.intp).ravel()
+	if (len(labels) != len(points)):
+		raise ValueError("Expected one label per point.")
+	if (len(labels) and labels.min() < 0):
+		raise ValueError("Labels must be non-negative.")
+	sizes = numpy.bincount(labels, minlength=count or 0)
+	order = numpy.argsort(labels, kind="stable")
+	start = numpy.zeros(len(sizes) + 1, dtype=numpy.intp)
+	numpy.cumsum(sizes, out=start[1:])
+	return points[order], sizes, start
+
+def _per_group(points, labels, count, d, columns, bound):
+	points, sizes, start = _groups(points, labels, count, d)
+	result = numpy.full((len(sizes), columns), numpy.nan)
+	for i in numpy.flatnonzero(sizes).tolist():
+		result[i] = bound(points[start[i]:start[i + 1]])
+	return result
+
+@requires("numpy")
+def bounding_rects(points, labels, count=None):
+	# (K, 4) array of x, y, w, h; computed for all labels at once.
+	points, sizes, start = _groups(points, labels, count, 2)
+	result = numpy.full((len(sizes), 4), numpy.nan)
+	filled = sizes > 0
+	if (filled.any()):
+		first = start[:-1][filled]
+		lo = numpy.minimum.reduceat(points, first, axis=0)
+		hi = numpy.maximum.reduceat(points, first, axis=0)
+		result[filled] = numpy.column_stack((lo, hi - lo))
+	return result
+
+@requires("numpy")
+def enclosing_circles(points, labels, count=None):
+	# (K, 3) array of x, y, r.
+	return _per_group(points, labels, count, 2, 3, lambda p: list(enclosing_circle(p))[:3])
+
+@requires("numpy")
+def enclosing_spheres(points, labels, count=None):
+	# (K, 4) array of x, y, z, r.
+	return _per_group(points, labels, count, 3, 4, lambda p: list(enclosing_sphere(p))[:4])
+
+@requires("numpy")
+def bounding_ellipses(points, labels, count=None, iterations=20):
+	# (K, 4) array of x, y, a, b.
+	return _per_group(points, labels, count, 2, 4, lambda p: list(bounding_ellipse(p, iterations)))
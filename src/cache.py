@@ -0,0 +1,281 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from importlib import import_module
+from numbers import Number
+from time import monotonic
+
+from .compat import *
+
+__all__ = [
+	"DEFAULT_METHODS", "LRUCache", "enable_cache", "disable_cache", "cache_enabled",
+	"clear_cache", "invalidate", "cache_stats", "caching", "memoize"
+	]
+
+# Memoization works like instrumentation: ``enable_cache`` swaps the listed
+# methods for caching wrappers and ``disable_cache`` puts the originals back,
+# so there is no overhead while it's disabled. Methods are named
+# "module.Class.attribute".
+DEFAULT_METHODS = (
+	"linear._LineBase.point_of_intersection",
+	"linear._Line2DBase.point_of_intersection",
+	"linear._LineBase.is_skew_with",
+	"linear._Line2DBase.is_skew_with",
+	"bezier.BezierCurve.arclength",
+	"ellipse.Ellipse.circumference",
+	"ellipse.Ellipsoid3D.surface_area"
+	)
+
+# Translating these invalidates the entries computed from the old contents.
+_MUTABLE = ("rect.Rect", "ellipse.Ellipse", "ellipse.Ellipsoid3D")
+
+DEFAULT_MAX_SIZE = 1024
+
+_PACKAGE = __name__.rsplit(".", 1)[0]
+
+_MISSING = object()
+
+numpy = try_import("numpy")
+
+_PLAIN = frozenset([int, float, bool, str, type(None)] + ([numpy.float64, numpy.int64] if numpy else []))
+
+class _Uncacheable(Exception):
+	pass
+
+def _content_key(value):
+	# Results are keyed on the contents of the shapes, not on their identity,
+	# so equal shapes share entries and a shape that is edited in any way
+	# (translate, item or attribute assignment) can never hit a stale entry.
+	cls = type(value)
+	if (cls in _PLAIN):
+		return value
+	components = getattr(value, "_components", None)
+	if (components is not None):
+		return (cls, tuple(components.tolist() if hasattr(components, "tolist") else components))
+	if (cls is tuple or cls is list):
+		return tuple(map(_content_key, value))
+	if (hasattr(value, "__feq__")):
+		# Shapes: Rect, Ellipse, lines, curves...
+		return (cls, tuple(map(_content_key, value)))
+	if (isinstance(value, Number)):
+		return value
+	try:
+		hash(value)
+	except TypeError:
+		raise _Uncacheable()
+	return value
+
+def _copy(value):
+	# Mutable vectors are handed out as copies so callers can't edit the
+	# cached result.
+	if (type(value).__hash__ is None and hasattr(value, "_components")):
+		return type(value)(list(value._components))
+	return value
+
+class LRUCache(object):
+
+	# A thread-safe least recently used cache holding at most ``maxsize``
+	# entries, each valid for ``ttl`` seconds (forever if None).
+
+	def __init__(self, maxsize=DEFAULT_MAX_SIZE, ttl=None):
+		if (maxsize <= 0):
+			raise ValueError("maxsize must be positive.")
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries = OrderedDict()
+		# part -> keys of the entries computed from it, for invalidate
+		self._parts = {}
+		self._lock = threading.Lock()
+
+	def __repr__(self):
+		return "%s(%i/%i entries, %i hits, %i misses)" % (
+			self.__class__.__name__, len(self), self.maxsize, self.hits, self.misses
+			)
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __contains__(self, key):
+		return self.get(key, _MISSING, False) is not _MISSING
+
+	def get(self, key, default=None, count=True):
+		with self._lock:
+			entry = self._entries.get(key)
+			if (entry is not None and entry[1] is not None and entry[1] <= monotonic()):
+				self._remove(key)
+				entry = None
+			if (entry is None):
+				if (count):
+					self.misses += 1
+				return default
+			self._entries.move_to_end(key)
+			if (count):
+				self.hits += 1
+			return entry[0]
+
+	def put(self, key, value, parts=()):
+		# ``parts`` are the content keys of the shapes the value was computed
+		# from, see ``invalidate``.
+		expires = None if self.ttl is None else monotonic() + self.ttl
+		with self._lock:
+			if (key in self._entries):
+				self._remove(key)
+			self._entries[key] = (value, expires, parts)
+			for part in parts:
+				self._parts.setdefault(part, set()).add(key)
+			while (len(self._entries) > self.maxsize):
+				self._remove(next(iter(self._entries)))
+				self.evictions += 1
+
+	def _remove(self, key):
+		value, expires, parts = self._entries.pop(key)
+		for part in parts:
+			keys = self._parts.get(part)
+			if (keys is not None):
+				keys.discard(key)
+				if (not keys):
+					del self._parts[part]
+
+	def invalidate(self, part):
+		# Drops every entry computed from a shape with the contents ``part``.
+		with self._lock:
+			keys = self._parts.get(part, ())
+			for key in list(keys):
+				self._remove(key)
+			return len(keys)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self._parts.clear()
+
+	def info(self):
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"size": len(self),
+			"maxsize": self.maxsize
+			}
+
+def _cached_call(cache, func, args, kwargs):
+	try:
+		parts = tuple(map(_content_key, args))
+		key = (parts, tuple(sorted((k, _content_key(v)) for k, v in kwargs.items()))) if kwargs else parts
+	except _Uncacheable:
+		return func(*args, **kwargs)
+	value = cache.get(key, _MISSING)
+	if (value is _MISSING):
+		value = func(*args, **kwargs)
+		cache.put(key, value, tuple(p for a, p in zip(args, parts) if hasattr(a, "__feq__")))
+	return _copy(value)
+
+def memoize(maxsize=DEFAULT_MAX_SIZE, ttl=None):
+	# Decorator caching the results of a function (or method) by the contents
+	# of its arguments. The cache is available as ``func.cache``.
+	def decorator(func):
+		cache = LRUCache(maxsize, ttl)
+		@wraps(func)
+		def _wrapped(*args, **kwargs):
+			return _cached_call(cache, func, args, kwargs)
+		_wrapped.cache = cache
+		return _wrapped
+	return decorator
+
+## Enabling caching on the package
+
+_caches = OrderedDict()
+_patches = []
+
+def _resolve(name):
+	module, cls, attr = name.rsplit(".", 2)
+	owner = getattr(import_module("." + module, _PACKAGE), cls)
+	if (attr not in owner.__dict__):
+		raise ValueError("'%s' is not defined by %s." % (attr, owner.__name__))
+	return owner, attr, owner.__dict__[attr]
+
+def _patch(owner, attr, value):
+	_patches.append((owner, attr, owner.__dict__.get(attr, _MISSING)))
+	setattr(owner, attr, value)
+
+def _caching_method(cache, func):
+	@wraps(func)
+	def _wrapped(*args, **kwargs):
+		return _cached_call(cache, func, args, kwargs)
+	return _wrapped
+
+def _invalidating_translate(translate):
+	@wraps(translate)
+	def _wrapped(self, *args, **kwargs):
+		invalidate(self)
+		return translate(self, *args, **kwargs)
+	return _wrapped
+
+def enable_cache(methods=DEFAULT_METHODS, maxsize=DEFAULT_MAX_SIZE, ttl=None):
+	# Caches the given methods, each in its own LRUCache. Can be called again
+	# to cache more methods; methods that are already cached are left alone.
+	targets = []
+	for name in methods:
+		if (name not in _caches):
+			targets.append((name, _resolve(name)))
+	if (not _patches):
+		for name in _MUTABLE:
+			module, cls = name.rsplit(".", 1)
+			owner = getattr(import_module("." + module, _PACKAGE), cls)
+			_patch(owner, "translate", _invalidating_translate(owner.__dict__["translate"]))
+
+	for name, (owner, attr, value) in targets:
+		cache = _caches[name] = LRUCache(maxsize, ttl)
+		if (isinstance(value, property)):
+			_patch(owner, attr, property(_caching_method(cache, value.fget), value.fset, value.fdel))
+		else:
+			_patch(owner, attr, _caching_method(cache, value))
+
+def disable_cache():
+	while (_patches):
+		owner, attr, original = _patches.pop()
+		if (original is _MISSING):
+			delattr(owner, attr)
+		else:
+			setattr(owner, attr, original)
+	_caches.clear()
+
+def cache_enabled(method=None):
+	if (method is None):
+		return bool(_caches)
+	return method in _caches
+
+def clear_cache():
+	for cache in _caches.values():
+		cache.clear()
+
+def invalidate(shape):
+	# Drops the cached results computed from ``shape`` (as it is now) and
+	# returns how many were dropped. Translating a Rect or an ellipse does
+	# this automatically; other edits only make the old entries unreachable.
+	try:
+		part = _content_key(shape)
+	except _Uncacheable:
+		return 0
+	return sum(cache.invalidate(part) for cache in _caches.values())
+
+def cache_stats():
+	return {name: cache.info() for name, cache in _caches.items()}
+
+@contextmanager
+def caching(methods=DEFAULT_METHODS, maxsize=DEFAULT_MAX_SIZE, ttl=None):
+	# Caches the methods inside the block only. Yields the statistics, which
+	# are filled in when the block exits.
+	result = {}
+	was_enabled = cache_enabled()
+	enable_cache(methods, maxsize, ttl)
+	try:
+		yield result
+	finally:
+		result.update(cache_stats())
+		if (not was_enabled):
+			disable_cache()
@@ -1,4 +1,5 @@
 from functools import wraps
+from importlib import import_module
 
 _modules = { }
 
@@ -6,15 +7,16 @@ class RequirementException(Exception):
 	pass
 
 def require(module_name):
-	if (module_name in _modules):
-		return _modules[module_name]
-	raise ImportError("This library requires '%s'." % module_name)
+	module = try_import(module_name)
+	if (module is None):
+		raise ImportError("This library requires '%s'." % module_name)
+	return module
 
 def requires(module_name):
 	def decorator(func):
 		@wraps(func)
 		def _wrapped(*args, **kwargs):
-			if (not _modules.contains(module_name)):
+			if (try_import(module_name) is None):
 				raise RequirementException(
 					"Function/method '%s' requires module '%s'." % (func.__name__, module_name)
 					)
@@ -24,18 +26,12 @@ def requires(module_name):
 
 
 def try_import(module_name):
-	return _modules.get(module_name)
-
-
-def _try_import(name):
-	try:
-		module = __import__(name)
-		_modules[name] = module
-	except ImportError:
-		pass
-
-_try_import("numpy")
-_try_import("scipy")
-_try_import("scipy.special")
-_try_import("scipy.integrate")
-_try_import("pygame")
+	# Optional modules are only imported the first time they're asked for,
+	# so that e.g. scipy and pygame don't slow down importing this package.
+	# Missing modules are cached as None.
+	if (module_name not in _modules):
+		try:
+			_modules[module_name] = import_module(module_name)
+		except ImportError:
+			_modules[module_name] = None
+	return _modules[module_name]
@@ -0,0 +1,324 @@
+import json
+import os
+
+from .compat import *
+from .vector import *
+from .linear import *
+from .rect import *
+from .precision import get_dtype
+
+numpy = try_import("numpy")
+
+__all__ = ["DatasetException", "RECTS", "SEGMENTS", "POINTS", "GeometryDataset"]
+
+RECTS = "rects"
+SEGMENTS = "segments"
+POINTS = "points"
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_META = "meta.json"
+_DATA = "data.bin"
+_INDEX_START = "index_start.npy"
+_INDEX_ITEMS = "index_items.npy"
+
+class DatasetException(Exception):
+	pass
+
+def _rect_row(rect):
+	return tuple(rect)
+
+def _segment_row(segment):
+	return tuple(segment[0]) + tuple(segment[1])
+
+def _point_row(point):
+	return tuple(point)
+
+# kind -> (columns per row, object -> row, row -> object)
+_kinds = {
+	RECTS: (4, _rect_row, lambda row: Rect(*row)),
+	SEGMENTS: (4, _segment_row, lambda row: Segment2D(row[:2], row[2:])),
+	POINTS: (2, _point_row, lambda row: Vector2(*row)),
+	}
+
+def _bounds(kind, rows):
+	# (N, 4) array of min_x, min_y, max_x, max_y.
+	if (kind == RECTS):
+		x, y, w, h = rows.T
+		return numpy.stack([numpy.minimum(x, x + w), numpy.minimum(y, y + h),
+			numpy.maximum(x, x + w), numpy.maximum(y, y + h)], axis=1)
+	elif (kind == SEGMENTS):
+		x1, y1, x2, y2 = rows.T
+		return numpy.stack([numpy.minimum(x1, x2), numpy.minimum(y1, y2),
+			numpy.maximum(x1, x2), numpy.maximum(y1, y2)], axis=1)
+	return numpy.concatenate([rows, rows], axis=1)
+
+def _rect_edges(rect):
+	x, y, w, h = rect
+	corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+	return [(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+
+class GeometryDataset(object):
+
+	# A directory holding one kind of shape as a flat file of rows, accessed
+	# through numpy.memmap, so datasets far larger than memory can be queried
+	# a chunk at a time. A uniform grid index can be built and is stored next
+	# to the data.
+
+	@requires("numpy")
+	def __init__(self, path, mode="r"):
+		self.path = path
+		self.mode = mode
+		with open(os.path.join(path, _META)) as f:
+			self._meta = json.load(f)
+		self.kind = self._meta["kind"]
+		self.dtype = numpy.dtype(self._meta["dtype"])
+		self.width = _kinds[self.kind][0]
+		self._rows = None
+		self._index = None
+
+	@classmethod
+	@requires("numpy")
+	def create(cls, path, kind, shapes=(), dtype=None, chunk_size=DEFAULT_CHUNK_SIZE):
+		# ``dtype`` defaults to the active precision (see precision.py).
+		if (kind not in _kinds):
+			raise ValueError("Unknown dataset kind '%s', expected one of %s." % (kind, ", ".join(sorted(_kinds))))
+		if (os.path.exists(os.path.join(path, _META))):
+			raise DatasetException("A dataset already exists at '%s'." % path)
+		if (not os.path.isdir(path)):
+			os.makedirs(path)
+		dtype = get_dtype() if dtype is None else numpy.dtype(dtype)
+		with open(os.path.join(path, _META), "w") as f:
+			json.dump({"kind": kind, "dtype": dtype.str, "count": 0, "index": None}, f)
+		open(os.path.join(path, _DATA), "wb").close()
+		dataset = cls(path, "r+")
+		dataset.extend(shapes, chunk_size)
+		return dataset
+
+	def __len__(self):
+		return self._meta["count"]
+
+	def __getitem__(self, index):
+		return _kinds[self.kind][2](self.rows[index].tolist())
+
+	def __iter__(self):
+		return self.iter_shapes()
+
+	def _save_meta(self):
+		with open(os.path.join(self.path, _META), "w") as f:
+			json.dump(self._meta, f)
+
+	@property
+	def rows(self):
+		# The whole dataset as an (N, width) memmap.
+		if (self._rows is None):
+			if (not len(self)):
+				return numpy.zeros((0, self.width), dtype=self.dtype)
+			mode = "r+" if self.mode == "r+" else "r"
+			self._rows = numpy.memmap(os.path.join(self.path, _DATA), dtype=self.dtype, mode=mode, shape=(len(self), self.width))
+		return self._rows
+
+	def extend(self, shapes, chunk_size=DEFAULT_CHUNK_SIZE):
+		# Appends shape objects, or rows given as an (N, width) array. The
+		# spatial index is dropped since it no longer covers the data.
+		if (self.mode != "r+"):
+			raise DatasetException("Dataset is opened read-only.")
+		width, to_row = _kinds[self.kind][:2]
+		with open(os.path.join(self.path, _DATA), "ab") as f:
+			if (isinstance(shapes, numpy.ndarray)):
+				chunk = numpy.ascontiguousarray(shapes, dtype=self.dtype).reshape(-1, width)
+				f.write(chunk.tobytes())
+				self._meta["count"] += len(chunk)
+			else:
+				buffer = []
+				for shape in shapes:
+					buffer.append(to_row(shape))
+					if (len(buffer) >= chunk_size):
+						f.write(numpy.array(buffer, dtype=self.dtype).tobytes())
+						self._meta["count"] += len(buffer)
+						buffer = []
+				if (buffer):
+					f.write(numpy.array(buffer, dtype=self.dtype).tobytes())
+					self._meta["count"] += len(buffer)
+		self._rows = None
+		self.drop_index()
+		self._save_meta()
+
+	def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+		# Yields (offset, rows) pairs, the rows being views into the memmap.
+		rows = self.rows
+		for start in range(0, len(rows), chunk_size):
+			yield start, rows[start:start + chunk_size]
+
+	def iter_shapes(self, chunk_size=DEFAULT_CHUNK_SIZE):
+		from_row = _kinds[self.kind][2]
+		for start, chunk in self.iter_chunks(chunk_size):
+			for row in chunk.tolist():
+				yield from_row(row)
+
+	def shapes(self, indices):
+		from_row = _kinds[self.kind][2]
+		return [from_row(row) for row in self.rows[numpy.asarray(indices)].tolist()]
+
+	## Index
+
+	@property
+	def has_index(self):
+		return self._meta["index"] is not None
+
+	def drop_index(self):
+		self._meta["index"] = None
+		self._index = None
+		for name in (_INDEX_START, _INDEX_ITEMS):
+			path = os.path.join(self.path, name)
+			if (os.path.exists(path)):
+				os.remove(path)
+
+	def build_index(self, cells=None, chunk_size=DEFAULT_CHUNK_SIZE):
+		# Builds a uniform grid over the dataset's bounds (by default about
+		# one cell per shape), storing for every cell the ids of the shapes
+		# whose bounding boxes overlap it, in compressed sparse row form. Two
+		# passes over the data (count, then fill) keep memory bounded.
+		n = len(self)
+		if (not n):
+			return
+		lo = numpy.full(2, numpy.inf)
+		hi = numpy.full(2, -numpy.inf)
+		for start, chunk in self.iter_chunks(chunk_size):
+			bounds = _bounds(self.kind, chunk)
+			lo = numpy.minimum(lo, bounds[:, :2].min(axis=0))
+			hi = numpy.maximum(hi, bounds[:, 2:].max(axis=0))
+		if (cells is None):
+			cells = max(1, int(numpy.sqrt(n)))
+		shape = numpy.array([cells, cells])
+		size = numpy.maximum((hi - lo) / shape, 1e-12)
+		self._meta["index"] = {"lo": lo.tolist(), "size": size.tolist(), "shape": shape.tolist()}
+
+		counts = numpy.zeros(int(shape.prod()), dtype=numpy.int64)
+		for start, chunk in self.iter_chunks(chunk_size):
+			cell_ids, item_ids = self._cover(_bounds(self.kind, chunk), start)
+			counts += numpy.bincount(cell_ids, minlength=len(counts))
+		start_offsets = numpy.zeros(len(counts) + 1, dtype=numpy.int64)
+		numpy.cumsum(counts, out=start_offsets[1:])
+		items = numpy.lib.format.open_memmap(
+			os.path.join(self.path, _INDEX_ITEMS), mode="w+", dtype=numpy.int64, shape=(int(start_offsets[-1]),)
+			)
+		fill = start_offsets[:-1].copy()
+		for start, chunk in self.iter_chunks(chunk_size):
+			cell_ids, item_ids = self._cover(_bounds(self.kind, chunk), start)
+			order = numpy.argsort(cell_ids, kind="stable")
+			cell_ids, item_ids = cell_ids[order], item_ids[order]
+			unique, first, chunk_counts = numpy.unique(cell_ids, return_index=True, return_counts=True)
+			# Position of every item within its cell's run in this chunk.
+			rank = numpy.arange(len(cell_ids)) - numpy.repeat(first, chunk_counts)
+			items[fill[cell_ids] + rank] = item_ids
+			fill[unique] += chunk_counts
+		items.flush()
+		del items
+		numpy.save(os.path.join(self.path, _INDEX_START), start_offsets)
+		self._index = None
+		self._save_meta()
+
+	def _cell_range(self, bounds):
+		index = self._meta["index"]
+		lo, size, shape = numpy.array(index["lo"]), numpy.array(index["size"]), numpy.array(index["shape"])
+		first = numpy.clip(numpy.floor((bounds[:, :2] - lo) / size).astype(numpy.int64), 0, shape - 1)
+		last = numpy.clip(numpy.floor((bounds[:, 2:] - lo) / size).astype(numpy.int64), 0, shape - 1)
+		return first, last, shape
+
+	def _cover(self, bounds, offset):
+		# Every (cell, item) pair for the given bounding boxes.
+		first, last, shape = self._cell_range(bounds)
+		spans = last - first + 1
+		counts = spans[:, 0] * spans[:, 1]
+		item_ids = numpy.repeat(numpy.arange(len(bounds), dtype=numpy.int64) + offset, counts)
+		local = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+		span_x = numpy.repeat(spans[:, 0], counts)
+		cx = numpy.repeat(first[:, 0], counts) + local % span_x
+		cy = numpy.repeat(first[:, 1], counts) + local // span_x
+		return cy * shape[0] + cx, item_ids
+
+	def _load_index(self):
+		if (self._index is None):
+			self._index = (
+				numpy.load(os.path.join(self.path, _INDEX_START), mmap_mode="r"),
+				numpy.load(os.path.join(self.path, _INDEX_ITEMS), mmap_mode="r")
+				)
+		return self._index
+
+	def _candidates(self, bounds):
+		# Ids of the shapes whose grid cells overlap ``bounds``, or None if
+		# there's no index (meaning every shape is a candidate).
+		if (not self.has_index):
+			return None
+		starts, items = self._load_index()
+		first, last, shape = self._cell_range(numpy.array([bounds], dtype=float))
+		(x0, y0), (x1, y1) = first[0], last[0]
+		found = [
+			items[starts[y*shape[0] + x0]:starts[y*shape[0] + x1 + 1]]
+			for y in range(y0, y1 + 1)
+		]
+		return numpy.unique(numpy.concatenate(found)) if found else numpy.zeros(0, dtype=numpy.int64)
+
+	def _query(self, bounds, test, chunk_size):
+		# Runs the vectorized ``test(rows) -> mask`` over the candidates for
+		# ``bounds`` (or over every chunk without an index) and returns the
+		# ids of the matching shapes.
+		candidates = self._candidates(bounds)
+		if (candidates is not None):
+			found = []
+			for start in range(0, len(candidates), chunk_size):
+				ids = candidates[start:start + chunk_size]
+				found.append(ids[test(numpy.asarray(self.rows[ids]))])
+			return numpy.concatenate(found) if found else numpy.zeros(0, dtype=numpy.int64)
+		found = [start + numpy.flatnonzero(test(chunk)) for start, chunk in self.iter_chunks(chunk_size)]
+		return numpy.concatenate(found) if found else numpy.zeros(0, dtype=numpy.int64)
+
+	## Queries
+
+	def query_rect(self, rect, chunk_size=DEFAULT_CHUNK_SIZE):
+		# Ids of the rects colliding with ``rect`` (see Rect.collides_rect),
+		# segments crossing it, or points inside it.
+		x, y, w, h = rect
+		bounds = (min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h))
+		if (self.kind == RECTS):
+			def test(rows):
+				rx, ry, rw, rh = rows.T
+				return (rx <= x + w) & (rx + rw >= x) & (ry <= y + h) & (ry + rh >= y)
+		elif (self.kind == POINTS):
+			query = Rect(x, y, w, h)
+			test = lambda rows: query.contains_points(rows, backend="numpy")
+		else:
+			query = Rect(x, y, w, h)
+			edges = _rect_edges(rect)
+			def test(rows):
+				segments = rows.reshape(-1, 2, 2)
+				hit = query.contains_points(segments[:, 0], backend="numpy") | \
+					  query.contains_points(segments[:, 1], backend="numpy")
+				for edge in edges:
+					hit |= ~numpy.isnan(segment_intersections(segments, edge, backend="numpy")[:, 0])
+				return hit
+		return self._query(bounds, test, chunk_size)
+
+	def query_point(self, point, chunk_size=DEFAULT_CHUNK_SIZE):
+		# Ids of the rects containing ``point`` (see Rect.contains_point).
+		if (self.kind != RECTS):
+			raise DatasetException("Point containment queries need a dataset of rects.")
+		px, py = point
+		def test(rows):
+			x, y, w, h = rows.T
+			return ((x <= px) == (px <= x + w)) & ((y <= py) == (py <= y + h))
+		return self._query((px, py, px, py), test, chunk_size)
+
+	def query_segment(self, segment, chunk_size=DEFAULT_CHUNK_SIZE):
+		# Ids of the segments intersecting ``segment``, and the points of
+		# intersection. Only for datasets of segments.
+		if (self.kind != SEGMENTS):
+			raise DatasetException("Segment intersection queries need a dataset of segments.")
+		(x1, y1), (x2, y2) = [tuple(v) for v in segment]
+		bounds = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+		query = ((x1, y1), (x2, y2))
+		test = lambda rows: ~numpy.isnan(segment_intersections(rows.reshape(-1, 2, 2), query, backend="numpy")[:, 0])
+		ids = self._query(bounds, test, chunk_size)
+		points = segment_intersections(numpy.asarray(self.rows[ids]).reshape(-1, 2, 2), query, backend="numpy")
+		return ids, points
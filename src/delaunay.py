@@ -0,0 +1,416 @@
+import math
+
+from .compat import *
+from .vector import *
+from .predicates import orient2d, incircle
+
+numpy = try_import("numpy")
+
+__all__ = ["INCREMENTAL", "QHULL", "Triangulation", "Voronoi"]
+
+INCREMENTAL = "incremental"
+QHULL = "qhull"
+
+## Triangulations are stored as index arrays: ``triangles`` is (M, 3) with
+## the vertices of each triangle in counterclockwise order, ``neighbors`` is
+## (M, 3) with the triangle across the edge opposite each vertex (-1 on the
+## convex hull).
+
+def _as_points(points):
+	if (isinstance(points, numpy.ndarray)):
+		return numpy.ascontiguousarray(points, dtype=float).reshape(-1, 2)
+	return numpy.array([getattr(p, "_components", p) for p in points], dtype=float).reshape(-1, 2)
+
+def _bounds(rect):
+	x, y, w, h = rect
+	return min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h)
+
+## Incremental (Bowyer-Watson) construction
+##
+## The convex hull is closed off with "ghost" triangles sharing an infinite
+## vertex (-1), so points outside the hull are inserted like any other: the
+## ghost triangle on a hull edge conflicts with the points beyond that edge.
+## All tests use the exact predicates, so degenerate input (collinear and
+## cocircular points) is handled correctly.
+
+def _incremental(P):
+	order = sorted(range(len(P)), key=P.__getitem__)
+	unique = []
+	for i in order:
+		if (not unique or P[unique[-1]] != P[i]):
+			unique.append(i)
+	if (len(unique) < 3):
+		return [], []
+	a, b = unique[0], unique[1]
+	k = 2
+	while (k < len(unique) and orient2d(P[a], P[b], P[unique[k]]) == 0):
+		k += 1
+	if (k == len(unique)):
+		return [], [] # All collinear
+	c = unique[k]
+	if (orient2d(P[a], P[b], P[c]) < 0):
+		b, c = c, b
+
+	triangles = [[a, b, c], [b, a, -1], [c, b, -1], [a, c, -1]]
+	neighbors = [[2, 3, 1], [3, 2, 0], [1, 3, 0], [2, 1, 0]]
+	alive = [True]*4
+
+	def conflicts(t, p):
+		u, v, w = triangles[t]
+		if (w == -1 or u == -1 or v == -1):
+			# Ghost triangle: conflicts with the points beyond its hull edge
+			# (and the points on the edge itself).
+			if (u == -1):
+				u, v = v, w
+			elif (v == -1):
+				u, v = w, u
+			o = orient2d(P[u], P[v], P[p])
+			if (o != 0):
+				return o > 0
+			(ux, uy), (vx, vy), (px, py) = P[u], P[v], P[p]
+			return min(ux, vx) <= px <= max(ux, vx) and min(uy, vy) <= py <= max(uy, vy)
+		return incircle(P[u], P[v], P[w], P[p]) > 0
+
+	def walk(t, p):
+		while (True):
+			tri = triangles[t]
+			for i in (0, 1, 2):
+				if (orient2d(P[tri[(i + 1) % 3]], P[tri[(i + 2) % 3]], P[p]) < 0):
+					t = neighbors[t][i]
+					if (-1 in triangles[t]):
+						return t
+					break
+			else:
+				return t
+
+	last = 0
+	for p in unique[2:k] + unique[k + 1:]:
+		start = walk(last, p)
+		cavity = [start]
+		in_cavity = set(cavity)
+		for t in cavity:
+			for n in neighbors[t]:
+				if (n not in in_cavity and conflicts(n, p)):
+					in_cavity.add(n)
+					cavity.append(n)
+
+		# Every edge on the border of the cavity makes a new triangle with p.
+		by_first, by_second = {}, {}
+		for t in cavity:
+			alive[t] = False
+			tri = triangles[t]
+			for i in (0, 1, 2):
+				outside = neighbors[t][i]
+				if (outside in in_cavity):
+					continue
+				x, y = tri[(i + 1) % 3], tri[(i + 2) % 3]
+				new = len(triangles)
+				triangles.append([x, y, p])
+				neighbors.append([-1, -1, outside])
+				alive.append(True)
+				n = neighbors[outside]
+				n[n.index(t)] = new
+				by_first[x] = new
+				by_second[y] = new
+				if (x != -1 and y != -1):
+					last = new
+		for x, new in by_first.items():
+			y = triangles[new][1]
+			neighbors[new][0] = by_first[y]
+			neighbors[new][1] = by_second[x]
+
+	# Compact: drop dead and ghost triangles.
+	keep = [t for t in range(len(triangles)) if alive[t] and -1 not in triangles[t]]
+	index = dict((t, i) for i, t in enumerate(keep))
+	return (
+		[triangles[t] for t in keep],
+		[[index.get(n, -1) for n in neighbors[t]] for t in keep]
+	)
+
+def _qhull(points):
+	spatial = require("scipy.spatial")
+	try:
+		hull = spatial.Delaunay(points)
+	except Exception:
+		return numpy.zeros((0, 3), dtype=numpy.intp), numpy.zeros((0, 3), dtype=numpy.intp)
+	triangles = hull.simplices.astype(numpy.intp)
+	neighbors = hull.neighbors.astype(numpy.intp)
+	# Qhull doesn't orient its triangles.
+	p = points[triangles]
+	d1, d2 = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]
+	clockwise = d1[:, 0]*d2[:, 1] - d1[:, 1]*d2[:, 0] < 0
+	triangles[clockwise, 1:] = triangles[clockwise, 2:0:-1]
+	neighbors[clockwise, 1:] = neighbors[clockwise, 2:0:-1]
+	return triangles, neighbors
+
+class Triangulation(object):
+
+	# The Delaunay triangulation of a set of 2D points (Vector2s, tuples or
+	# an (N, 2) array). ``method`` is INCREMENTAL (pure python with exact
+	# predicates) or QHULL (scipy.spatial, which handles millions of points
+	# in seconds); by default QHULL is used when scipy is installed.
+	# Duplicate points are only triangulated once.
+
+	@requires("numpy")
+	def __init__(self, points, method=None):
+		self.points = _as_points(points)
+		if (method is None):
+			method = QHULL if try_import("scipy.spatial") is not None else INCREMENTAL
+		if (method == QHULL):
+			self.triangles, self.neighbors = _qhull(self.points)
+		elif (method == INCREMENTAL):
+			triangles, neighbors = _incremental(list(map(tuple, self.points.tolist())))
+			self.triangles = numpy.array(triangles, dtype=numpy.intp).reshape(-1, 3)
+			self.neighbors = numpy.array(neighbors, dtype=numpy.intp).reshape(-1, 3)
+		else:
+			raise ValueError("Unknown triangulation method '%s'." % method)
+		self.method = method
+		self._grid = None
+
+	def __repr__(self):
+		return "%s(%i points, %i triangles)" % (self.__class__.__name__, len(self.points), len(self.triangles))
+
+	def __len__(self):
+		return len(self.triangles)
+
+	def triangle(self, index):
+		return [ImmutableVector2(*self.points[i]) for i in self.triangles[index]]
+
+	@property
+	def edges(self):
+		# Every edge once, as an (E, 2) array of vertex indices.
+		# Interior edges are shared by two triangles; only the one with the
+		# lower index reports it.
+		t, i = numpy.nonzero((self.neighbors > numpy.arange(len(self.triangles))[:, None]) | (self.neighbors == -1))
+		return numpy.column_stack((self.triangles[t, (i + 1) % 3], self.triangles[t, (i + 2) % 3]))
+
+	@property
+	def hull_edges(self):
+		# The edges on the convex hull, counterclockwise, as (H, 2) indices.
+		t, i = numpy.nonzero(self.neighbors == -1)
+		return numpy.column_stack((self.triangles[t, (i + 1) % 3], self.triangles[t, (i + 2) % 3]))
+
+	def circumcenters(self):
+		p = self.points[self.triangles]
+		a, b, c = p[:, 0], p[:, 1], p[:, 2]
+		b, c = b - a, c - a
+		d = 2*(b[:, 0]*c[:, 1] - b[:, 1]*c[:, 0])
+		bb, cc = (b*b).sum(axis=1), (c*c).sum(axis=1)
+		x = (c[:, 1]*bb - b[:, 1]*cc)/d
+		y = (b[:, 0]*cc - c[:, 0]*bb)/d
+		return a + numpy.column_stack((x, y))
+
+	def vertex_neighbors(self):
+		# (start, indices): the neighbors of vertex i are
+		# indices[start[i]:start[i + 1]].
+		edges = self.edges
+		both = numpy.concatenate((edges, edges[:, ::-1]))
+		both = both[numpy.argsort(both[:, 0], kind="stable")]
+		start = numpy.zeros(len(self.points) + 1, dtype=numpy.intp)
+		numpy.cumsum(numpy.bincount(both[:, 0], minlength=len(self.points)), out=start[1:])
+		return start, both[:, 1]
+
+	## Point location
+
+	def locate(self, point, start=0):
+		# The index of the triangle containing ``point`` (-1 if it's outside
+		# the triangulation), found by walking from triangle ``start``.
+		if (not len(self.triangles)):
+			return -1
+		p = tuple(getattr(point, "_components", point))
+		triangles, neighbors, points = self.triangles, self.neighbors, self.points
+		t = start
+		for step in range(len(triangles) + 1):
+			tri = triangles[t].tolist()
+			for i in (0, 1, 2):
+				if (orient2d(points[tri[(i + 1) % 3]].tolist(), points[tri[(i + 2) % 3]].tolist(), p) < 0):
+					t = int(neighbors[t, i])
+					if (t == -1):
+						return -1
+					break
+			else:
+				return t
+		return -1
+
+	def _start_triangles(self, points):
+		# A triangle near each point to start walking from, looked up in a
+		# grid of triangle centroids.
+		if (self._grid is None):
+			centroids = self.points[self.triangles].mean(axis=1)
+			lo, hi = centroids.min(axis=0), centroids.max(axis=0)
+			size = max(1, int(math.sqrt(len(centroids) / 2)))
+			scale = size / numpy.maximum(hi - lo, 1e-300)
+			cells = numpy.clip(((centroids - lo)*scale).astype(numpy.intp), 0, size - 1)
+			grid = numpy.full(size*size, -1, dtype=numpy.intp)
+			grid[cells[:, 1]*size + cells[:, 0]] = numpy.arange(len(centroids))
+			# Empty cells start from the previous non-empty one.
+			filled = numpy.maximum.accumulate(numpy.where(grid >= 0, numpy.arange(len(grid)), 0))
+			self._grid = (lo, scale, size, numpy.maximum(grid[filled], 0))
+		lo, scale, size, grid = self._grid
+		cells = numpy.clip(((points - lo)*scale).astype(numpy.intp), 0, size - 1)
+		return grid[cells[:, 1]*size + cells[:, 0]]
+
+	def locate_many(self, points, max_steps=None):
+		# locate for an (N, 2) array of points. All the walks take a step at
+		# once, with float orientation tests; the few walks that haven't
+		# finished after ``max_steps`` (which can happen for points on
+		# edges) are finished one at a time with exact tests.
+		points = _as_points(points)
+		result = numpy.full(len(points), -1, dtype=numpy.intp)
+		if (not len(self.triangles) or not len(points)):
+			return result
+		current = self._start_triangles(points)
+		active = numpy.arange(len(points))
+		if (max_steps is None):
+			max_steps = 4*int(math.sqrt(len(self.triangles))) + 16
+		vertices = self.points
+		for step in range(max_steps):
+			if (not len(active)):
+				break
+			t = current[active]
+			p = points[active]
+			tri = vertices[self.triangles[t]]
+			move = numpy.full(len(active), -1)
+			for i in (2, 1, 0):
+				a, b = tri[:, (i + 1) % 3], tri[:, (i + 2) % 3]
+				o = (a[:, 0] - p[:, 0])*(b[:, 1] - p[:, 1]) - (a[:, 1] - p[:, 1])*(b[:, 0] - p[:, 0])
+				move[o < 0] = i
+			done = move == -1
+			result[active[done]] = t[done]
+			walking = ~done
+			t, move, moving = t[walking], move[walking], active[walking]
+			following = self.neighbors[t, move]
+			outside = following == -1
+			result[moving[outside]] = -1
+			current[moving[~outside]] = following[~outside]
+			active = moving[~outside]
+		for i in active.tolist():
+			result[i] = self.locate(points[i], int(current[i]))
+		return result
+
+	## Voronoi
+
+	def voronoi(self, bounds):
+		return Voronoi(self, bounds)
+
+def _clip(polygon, px, py, qx, qy):
+	# Clips a convex polygon to the half-plane of points closer to p than q.
+	dx, dy = qx - px, qy - py
+	limit = (dx*dx + dy*dy)/2
+	values = [(x - px)*dx + (y - py)*dy - limit for x, y in polygon]
+	result = []
+	for i in range(len(polygon)):
+		j = i - 1
+		if ((values[i] <= 0) != (values[j] <= 0)):
+			t = values[j]/(values[j] - values[i])
+			(x1, y1), (x2, y2) = polygon[j], polygon[i]
+			result.append((x1 + t*(x2 - x1), y1 + t*(y2 - y1)))
+		if (values[i] <= 0):
+			result.append(polygon[i])
+	return result
+
+class Voronoi(object):
+
+	# The Voronoi diagram of the points of a Triangulation, clipped to a Rect.
+	# Cells are stored compactly: the cell of point i is the counterclockwise
+	# polygon vertices[start[i]:start[i + 1]] (empty for duplicate points and
+	# cells entirely outside the bounds).
+	#
+	# Cells are built from the circumcenters of the triangles around each
+	# point, all at once; only the cells on the hull or crossing the bounds
+	# are clipped one by one.
+
+	def __init__(self, triangulation, bounds):
+		self.triangulation = triangulation
+		self.bounds = bounds
+		points = triangulation.points
+		triangles = triangulation.triangles
+		n = len(points)
+		x0, y0, x1, y1 = _bounds(bounds)
+
+		centers = triangulation.circumcenters()
+		sites = triangles.ravel()
+		corners = numpy.repeat(centers, 3, axis=0)
+		offsets = corners - points[sites]
+		order = numpy.lexsort((numpy.arctan2(offsets[:, 1], offsets[:, 0]), sites))
+		sites, corners = sites[order], corners[order]
+		counts = numpy.bincount(sites, minlength=n)
+
+		# Cells that need clipping: unbounded ones (on the hull), those
+		# crossing the bounds, and everything when there are no triangles.
+		special = numpy.zeros(n, dtype=bool)
+		special[triangulation.hull_edges.ravel()] = True
+		out = (centers[:, 0] < x0) | (centers[:, 0] > x1) | (centers[:, 1] < y0) | (centers[:, 1] > y1)
+		special[triangles[out].ravel()] = True
+		if (not len(triangles)):
+			special[_unique_points(points)] = True
+
+		clipped = {}
+		if (special.any()):
+			start, neighbors = triangulation.vertex_neighbors()
+			if (not len(triangles)):
+				start, neighbors = _line_neighbors(points)
+			rect = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+			for i in numpy.flatnonzero(special).tolist():
+				px, py = points[i].tolist()
+				polygon = rect
+				for j in neighbors[start[i]:start[i + 1]].tolist():
+					polygon = _clip(polygon, px, py, *points[j].tolist())
+					if (not polygon):
+						break
+				clipped[i] = polygon
+
+		lengths = numpy.where(special, 0, counts)
+		for i, polygon in clipped.items():
+			lengths[i] = len(polygon)
+		self.start = numpy.zeros(n + 1, dtype=numpy.intp)
+		numpy.cumsum(lengths, out=self.start[1:])
+		self.vertices = numpy.empty((self.start[-1], 2))
+		regular = ~special[sites]
+		first = numpy.zeros(n + 1, dtype=numpy.intp)
+		numpy.cumsum(counts, out=first[1:])
+		rank = numpy.arange(len(sites)) - first[sites]
+		self.vertices[self.start[sites[regular]] + rank[regular]] = corners[regular]
+		for i, polygon in clipped.items():
+			if (polygon):
+				self.vertices[self.start[i]:self.start[i + 1]] = polygon
+
+	def __repr__(self):
+		return "%s(%i cells, %i vertices)" % (self.__class__.__name__, len(self), len(self.vertices))
+
+	def __len__(self):
+		return len(self.start) - 1
+
+	def __iter__(self):
+		for i in range(len(self)):
+			yield self.cell(i)
+
+	def cell(self, index):
+		return self.vertices[self.start[index]:self.start[index + 1]]
+
+	@property
+	def areas(self):
+		# The area of every cell (shoelace formula, all cells at once).
+		v = self.vertices
+		lengths = numpy.diff(self.start)
+		owner = numpy.repeat(numpy.arange(len(lengths)), lengths)
+		following = numpy.arange(len(v)) + 1
+		last = self.start[1:][lengths > 0] - 1
+		following[last] = self.start[:-1][lengths > 0]
+		cross = v[:, 0]*v[following, 1] - v[following, 0]*v[:, 1] if len(v) else numpy.zeros(0)
+		return numpy.bincount(owner, weights=cross, minlength=len(lengths))/2
+
+def _unique_points(points):
+	unique, index = numpy.unique(points, axis=0, return_index=True)
+	return index
+
+def _line_neighbors(points):
+	# Collinear points: each point's Voronoi neighbors are the points next
+	# to it along the line.
+	index = _unique_points(points)
+	order = index[numpy.lexsort((points[index, 1], points[index, 0]))]
+	pairs = numpy.concatenate((numpy.column_stack((order[:-1], order[1:])), numpy.column_stack((order[1:], order[:-1]))))
+	pairs = pairs[numpy.lexsort((pairs[:, 1], pairs[:, 0]))]
+	start = numpy.zeros(len(points) + 1, dtype=numpy.intp)
+	numpy.cumsum(numpy.bincount(pairs[:, 0], minlength=len(points)), out=start[1:])
+	return start, pairs[:, 1]
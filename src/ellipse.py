@@ -4,8 +4,7 @@ from .exception import *
 from .vector import *
 from .compat import *
 from .fuzzy import *
-
-scipy = try_import("scipy.special")
+from .backend import SCALAR, BATCH, get_backend
 
 __all__ = ["Ellipse", "Ellipsoid3D"]
 
@@ -46,7 +45,7 @@ class Ellipse(FuzzyComparable):
 		except:
 			return False
 
-	def __feq__(self, other, epsilon=EPSILON):
+	def __feq__(self, other, epsilon=None):
 		try:
 			return all(fuzzy_eq_numbers(self[i], other[i], epsilon) for i in range(4))
 		except:
@@ -56,27 +55,22 @@ class Ellipse(FuzzyComparable):
 	def eccentricity(self):
 		return math.sqrt(1 - (self.b/self.a)**2)
 
-	if (scipy is None):
-
-		@property
-		def circumference(self):
-			a, b = self.a, self.b
-			h = 3*((a - b)/(a + b))**2
-			return math.pi*(a + b)*(1 + h/(10 + math.sqrt(4 - 3*h)))
-
-	else:
-
-		@property
-		def circumference(self):
-			return 4*self.a*scipy.special.ellipe(self.eccentricity)
+	@property
+	def circumference(self):
+		return get_backend(SCALAR).ellipse_circumference(self.a, self.b)
 
-	def is_circle(self, epsilon=EPSILON):
+	def is_circle(self, epsilon=None):
 		return fuzzy_eq_numbers(self.a, self.b, epsilon)
 
 	def contains_point(self, point):
 		x, y = change_vector_dimension(point, 2) - self.center
 		return (x/self.a)**2 + (y/self.b)**2 <= 1
 
+	def contains_points(self, points, backend=None):
+		return get_backend(BATCH, len(points), backend).contains_ellipse(
+			points, self.center._components, (self.a, self.b)
+			)
+
 	def translate(self, delta):
 		self.center += change_vector_dimension(delta, 2)
 
@@ -125,45 +119,31 @@ class Ellipsoid3D(FuzzyComparable):
 		except:
 			return False
 
-	def __feq__(self, other, epsilon=EPSILON):
+	def __feq__(self, other, epsilon=None):
 		try:
 			return all(fuzzy_eq_numbers(self[i], other[i], epsilon) for i in range(6))
 		except:
 			return False
 
-	if (scipy is None):
-
-		@property
-		def surface_area(self):
-			p = 1.6075
-			a, b, c = self.a, self.b, self.c
-			return 4*math.pi*(((a*b)**p + (b*c)**p + (a*c)**p)/3)**p
-
-	else:
-
-		@property
-		def surface_area(self):
-			a, b, c = self.a, self.b, self.c
-			c_sqrd = c*c
-			k = a/b * math.sqrt((b*b - c_sqrd)/(a*a - c_sqrd))
-			phi = math.acos(c/a)
-			return 2*math.pi*(
-				c_sqrd + a*b/math.sin(phi)*(
-					scipy.special.ellipeinc(phi, k)*math.sin(phi)**2 +
-					scipy.special.ellipkinc(phi, k)*math.cos(phi)**2
-					)
-				)
-
-	def is_spherical(self, epsilon=EPSILON):
-		return fuzzy_eq_numbers(self.a, self.b, EPSILON) and \
-			   fuzzy_eq_numbers(self.b, self.c, EPSILON) and \
-			   fuzzy_eq_numbers(self.a, self.c, EPSILON)
+	@property
+	def surface_area(self):
+		return get_backend(SCALAR).ellipsoid_surface_area(self.a, self.b, self.c)
+
+	def is_spherical(self, epsilon=None):
+		return fuzzy_eq_numbers(self.a, self.b, epsilon) and \
+			   fuzzy_eq_numbers(self.b, self.c, epsilon) and \
+			   fuzzy_eq_numbers(self.a, self.c, epsilon)
 			   # fuzzy_eq(a, b) and fuzzy_eq(b, c) does not imply fuzzy_eq(a, c)
 
 	def contains_point(self, point):
 		x, y, z = change_vector_dimension(point, 3) - self.center
 		return (x/self.a)**2 + (y/self.b)**2 + (z/self.c)**2 <= 1
 
+	def contains_points(self, points, backend=None):
+		return get_backend(BATCH, len(points), backend).contains_ellipse(
+			points, self.center._components, (self.a, self.b, self.c)
+			)
+
 	def translate(self, delta):
 		self.center += change_vector_dimension(delta, 3)
 
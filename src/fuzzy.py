@@ -1,21 +1,35 @@
 from numbers import Number
+from .precision import FLOAT64, FLOAT32, get_precision
 
-__all__ = ["FuzzyComparable", "EPSILON", "fuzzy_eq_numbers", "fuzzy_eq", "fuzzy_ne", "fill_in_fne"]
+__all__ = [
+	"FuzzyComparable", "EPSILON", "EPSILONS", "default_epsilon", "fuzzy_eq_numbers", "fuzzy_eq",
+	"fuzzy_ne", "fill_in_fne"
+	]
 
 EPSILON = 1e-8
 
+# The default epsilon for each storage precision: about the square root of
+# its machine epsilon, rounded down to a power of ten. Comparisons without an
+# explicit epsilon use the one of the active precision.
+EPSILONS = {FLOAT64: EPSILON, FLOAT32: 1e-4}
+
+def default_epsilon():
+	return EPSILONS[get_precision()]
+
 class FuzzyComparable(object):
 	
-	def __feq__(self, other, epsilon=EPSILON):
+	def __feq__(self, other, epsilon=None):
 		raise NotImplementedError()
 
-	def __fne__(self, other, epsilon=EPSILON):
+	def __fne__(self, other, epsilon=None):
 		raise NotImplementedError()
 
-def fuzzy_eq_numbers(a, b, epsilon=EPSILON):
+def fuzzy_eq_numbers(a, b, epsilon=None):
+	if (epsilon is None):
+		epsilon = default_epsilon()
 	return abs(a - b) <= epsilon
 
-def fuzzy_eq(a, b, epsilon=EPSILON):
+def fuzzy_eq(a, b, epsilon=None):
 	if (isinstance(a, Number) or isinstance(b, Number)):
 		return fuzzy_eq_numbers(a, b, epsilon)
 	elif (isinstance(a, FuzzyComparable)):
@@ -24,7 +38,7 @@ def fuzzy_eq(a, b, epsilon=EPSILON):
 		return b.__feq__(a, epsilon)
 	return a.__eq__(b)
 
-def fuzzy_ne(a, b, epsilon=EPSILON):
+def fuzzy_ne(a, b, epsilon=None):
 	if (isinstance(a, Number)):
 		return not fuzzy_eq_numbers(a, b, epsilon)
 	elif (isinstance(a, FuzzyComparable)):
@@ -36,5 +50,5 @@ def fuzzy_ne(a, b, epsilon=EPSILON):
 	return not a.__eq__(b)
 
 def fill_in_fne(cls):
-	cls.__fne__ = lambda self, other, epsilon=EPSILON: not self.__feq__(other, epsilon)
-	return cls
\ No newline at end of file
+	cls.__fne__ = lambda self, other, epsilon=None: not self.__feq__(other, epsilon)
+	return cls
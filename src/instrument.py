@@ -0,0 +1,193 @@
+import json
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from importlib import import_module
+from time import perf_counter
+
+__all__ = [
+	"DEFAULT_MODULES", "Snapshot", "enable", "disable", "is_enabled", "reset",
+	"snapshot", "instrumented"
+	]
+
+# Instrumentation works by swapping the public operations of these modules for
+# counting wrappers in ``enable`` and putting the originals back in
+# ``disable``, so there's no overhead at all while it's disabled.
+DEFAULT_MODULES = ("vector", "linear", "rect", "ellipse", "bezier", "fuzzy")
+
+_OPERATORS = frozenset([
+	"__add__", "__radd__", "__sub__", "__rsub__", "__mul__", "__rmul__", "__div__",
+	"__rdiv__", "__truediv__", "__rtruediv__", "__floordiv__", "__neg__", "__abs__",
+	"__eq__", "__feq__", "__fne__"
+	])
+
+_PACKAGE = __name__.rsplit(".", 1)[0]
+
+_MISSING = object()
+
+_patches = []
+_calls = defaultdict(int)
+_times = defaultdict(float)
+_allocations = defaultdict(int)
+_bulk_depth = [0]
+
+class Snapshot(object):
+
+	def __init__(self, calls=None, times=None, allocations=None):
+		self.calls = dict(calls or {})
+		self.times = dict(times or {})
+		self.allocations = dict(allocations or {})
+
+	def __repr__(self):
+		return "%s(%i operations, %i calls, %i allocations)" % (
+			self.__class__.__name__,
+			len(self.calls),
+			sum(self.calls.values()),
+			sum(self.allocations.values())
+			)
+
+	def top(self, n=10, key="time"):
+		# The ``n`` operations with the most cumulative time (or calls).
+		values = self.times if key == "time" else self.calls
+		return sorted(values.items(), key=lambda item: item[1], reverse=True)[:n]
+
+	def as_dict(self, flat=False):
+		if (not flat):
+			return {"calls": dict(self.calls), "time": dict(self.times), "allocations": dict(self.allocations)}
+		result = {}
+		for prefix, values in (("calls", self.calls), ("time", self.times), ("allocations", self.allocations)):
+			for name, value in values.items():
+				result["%s.%s" % (prefix, name)] = value
+		return result
+
+	def to_json(self, flat=True, **kwargs):
+		return json.dumps(self.as_dict(flat), sort_keys=True, **kwargs)
+
+def _timed(label, func):
+	@wraps(func)
+	def _wrapped(*args, **kwargs):
+		start = perf_counter()
+		try:
+			return func(*args, **kwargs)
+		finally:
+			_times[label] += perf_counter() - start
+			_calls[label] += 1
+	return _wrapped
+
+def _counting_init(init):
+	@wraps(init)
+	def __init__(self, *args):
+		_allocations[type(self).__name__] += 1
+		init(self, *args)
+	return __init__
+
+def _counting_bulk(func):
+	# from_array/from_buffer bypass ``__init__``. Only the outermost call is
+	# counted, since from_buffer is implemented with from_array.
+	@wraps(func)
+	def _wrapped(cls, *args, **kwargs):
+		_bulk_depth[0] += 1
+		try:
+			vectors = func(cls, *args, **kwargs)
+		finally:
+			_bulk_depth[0] -= 1
+		if (not _bulk_depth[0]):
+			_allocations[cls.__name__] += len(vectors)
+		return vectors
+	return _wrapped
+
+def _count_allocations(vector):
+	for attr in ("from_array", "from_buffer"):
+		_patch(vector._BaseVector, attr, classmethod(_counting_bulk(vector._BaseVector.__dict__[attr].__func__)))
+	for attr in vector.__all__:
+		cls = getattr(vector, attr)
+		if (isinstance(cls, vector._VectorMeta) and "__init__" in cls.__dict__):
+			_patch(cls, "__init__", _counting_init(cls.__dict__["__init__"]))
+
+def _patch(owner, attr, value):
+	if (isinstance(owner, type)):
+		original = owner.__dict__.get(attr, _MISSING)
+	else:
+		original = getattr(owner, attr, _MISSING)
+	_patches.append((owner, attr, original))
+	setattr(owner, attr, value)
+
+def _wrap_attribute(cls, attr, value):
+	label = "%s.%s" % (cls.__name__, attr)
+	if (isinstance(value, (classmethod, staticmethod))):
+		return type(value)(_timed(label, value.__func__))
+	if (isinstance(value, property)):
+		if (attr in (getattr(cls, "__components__", None) or ())):
+			return None
+		return property(_timed(label, value.fget), value.fset, value.fdel)
+	if (callable(value) and (attr in _OPERATORS or not attr.startswith("_"))):
+		return _timed(label, value)
+	return None
+
+def _instrument_class(cls):
+	for attr, value in list(cls.__dict__.items()):
+		wrapped = _wrap_attribute(cls, attr, value)
+		if (wrapped is not None):
+			_patch(cls, attr, wrapped)
+
+def enable(modules=DEFAULT_MODULES):
+	if (_patches):
+		return
+	_count_allocations(import_module(".vector", _PACKAGE))
+
+	functions = {}
+	for name in modules:
+		module = import_module("." + name, _PACKAGE)
+		for attr in module.__all__:
+			value = getattr(module, attr)
+			if (getattr(value, "__module__", None) != module.__name__):
+				continue
+			if (isinstance(value, type)):
+				_instrument_class(value)
+			elif (callable(value) and not attr.startswith("_")):
+				functions[id(value)] = (value, _timed("%s.%s" % (name, attr), value))
+
+	# Functions are star-imported all over the package, so every module
+	# holding a reference to one has to be patched.
+	for module_name, module in list(sys.modules.items()):
+		if (module is None or not (module_name == _PACKAGE or module_name.startswith(_PACKAGE + "."))):
+			continue
+		for attr, value in list(vars(module).items()):
+			if (id(value) in functions and functions[id(value)][0] is value):
+				_patch(module, attr, functions[id(value)][1])
+
+def disable():
+	while (_patches):
+		owner, attr, original = _patches.pop()
+		if (original is _MISSING):
+			delattr(owner, attr)
+		else:
+			setattr(owner, attr, original)
+
+def is_enabled():
+	return bool(_patches)
+
+def reset():
+	_calls.clear()
+	_times.clear()
+	_allocations.clear()
+
+def snapshot():
+	return Snapshot(_calls, _times, _allocations)
+
+@contextmanager
+def instrumented(modules=DEFAULT_MODULES):
+	# Counts everything done inside the block; the yielded snapshot is filled
+	# in when the block exits.
+	result = Snapshot()
+	was_enabled = is_enabled()
+	reset()
+	enable(modules)
+	try:
+		yield result
+	finally:
+		if (not was_enabled):
+			disable()
+		final = snapshot()
+		result.calls, result.times, result.allocations = final.calls, final.times, final.allocations
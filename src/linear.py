@@ -1,15 +1,23 @@
+from numbers import Number
 from .exception import *
 from .vector import *
 from .compat import *
 from .fuzzy import *
+from .backend import BATCH, get_backend
+from .predicates import _segment_intersection, line_intersection, orient2d
+from .precision import as_float_array
 
 numpy = try_import("numpy")
 
 __all__ = [
 	"_LineBase", "_Line2DBase", "_Line3DBase", "Line2D", 
-	"Ray2D", "Segment2D", "Line3D", "Ray3D", "Segment3D"
+	"Ray2D", "Segment2D", "Line3D", "Ray3D", "Segment3D",
+	"segments_to_array", "segment_intersections", "line_distances",
+	"line_closest_points", "line_sides", "clip_segments_to_polygon"
 	]
 
+_INF = float("inf")
+
 @fill_in_fne
 class _LineBase(FuzzyComparable):
 
@@ -29,7 +37,7 @@ class _LineBase(FuzzyComparable):
 		except:
 			return False
 
-	def __feq__(self, other, epsilon=EPSILON):
+	def __feq__(self, other, epsilon=None):
 		try:
 			return all(fuzzy_eq_numbers(self[i], other[i], epsilon) for i in range(2))
 		except:
@@ -49,14 +57,14 @@ class _LineBase(FuzzyComparable):
 	def is_point_in_range(self, point):
 		raise NotImplementedError()
 
-	def is_orthogonal(self, epsilon=EPSILON):
+	def is_orthogonal(self, epsilon=None):
 		return (self._end - self._start).is_orthogonal(epsilon)
 
-	def is_parallel_with(self, other, epsilon=EPSILON):
+	def is_parallel_with(self, other, epsilon=None):
 		s1, e1, s2, e2 = rectify_vectors(self._start, self._end, other[0], other[1])
 		return fuzzy_eq((e1 - s1).normalize(), (e2 - s2).normalize(), epsilon)
 
-	def contains_point(self, point, epsilon=EPSILON):
+	def contains_point(self, point, epsilon=None):
 		p = change_vector_dimension(point, self.__dimension__)
 		b = p - self._start
 		d = self._end - self._start
@@ -69,10 +77,19 @@ class _LineBase(FuzzyComparable):
 	def perpendicular_distance(self, point):
 		a = self._start
 		p = rectify_vector(a, point)
-		n = self._end - a
+		n = (self._end - a).normalize()
 		b = a - p
 		return (b - b.dot(n)*n).magnitude()
 
+	def perpendicular_distances(self, points, backend=None):
+		# The distance from each point to the (infinite) line, as an array.
+		return line_distances(self, points, False, backend)[0]
+
+	def closest_points(self, points, backend=None):
+		# The closest point of the line, ray or segment to each point, as an
+		# (N, d) array.
+		return line_closest_points(self, points, backend)[0]
+
 	@requires("numpy")
 	def point_of_intersection(self, other):
 		poi = self._poi(other)
@@ -102,7 +119,7 @@ class _LineBase(FuzzyComparable):
 		return None # Lines are skew
 
 	@requires("numpy")
-	def is_skew_with(self, other, epsilon=EPSILON):
+	def is_skew_with(self, other, epsilon=None):
 		s1, e1, s2, e2 = rectify_vectors(self._start ,self._end, other[0], other[1])
 		A = numpy.matrix([
 				list(s1 - e1),
@@ -125,51 +142,35 @@ class _Line2DBase(_LineBase):
 	def slope(self):
 		return (self._end[1] - self._start[1])/(self._end[0] - self._start[0])
 
-	def is_vertical(self, epsilon=EPSILON):
+	def is_vertical(self, epsilon=None):
 		return fuzzy_eq(self._start[0], self._end[0], epsilon)
 
-	def is_horizontal(self, epsilon=EPSILON):
+	def is_horizontal(self, epsilon=None):
 		return fuzzy_eq(self._start[1], self._end[1], epsilon)
 
 	def _poi(self, other):
 		s1, e1, s2, e2 = rectify_vectors(self._start, self._end, other[0], other[1])
 		if (len(s1) != self.__dimension__):
 			return super()._poi(other)
-		x1, y1 = s1
-		x2, y2 = e1
-		x3, y3 = s2
-		x4, y4 = e2
-
-		if x1 == x2 and x3 == x4:
-		    return None
-
-		if x1 == x2:
-		    m1 = (y4 - y3)/(x4 - x3)
-		    b1 = y3 - m1*x3
-		    py = m1*x1 + b1
-		    return Vector2(x1, py)
-
-		elif x3 == x4:
-		    m1 = (y2 - y1)/(x2 - x1)
-		    b1 = y1 - m1*x1
-		    py = m1*x3 + b1
-		    return Vector2(x3, py)
-
-		m1 = (y2 - y1)/(x2 - x1)
-		m2 = (y4 - y3)/(x4 - x3)
-
-		if m1 == m2:
-		    return None
-
-		b1 = y1 - m1*x1
-		b2 = y3 - m2*x3
-
-		px = (b2 - b1)/(m1 - m2)
-		py = m1 * px + b1
+		poi = line_intersection(_point(s1), _point(e1), _point(s2), _point(e2))
+		if (poi is None):
+			return None # Parallel
+		return Vector2(*poi)
 
-		return Vector2(px, py)
+	def point_of_intersection(self, other):
+		# Whether the crossing lies within both lines' ranges is decided
+		# exactly, before the point is computed.
+		s1, e1, s2, e2 = rectify_vectors(self._start, self._end, other[0], other[1])
+		if (len(s1) != self.__dimension__):
+			return super().point_of_intersection(other)
+		(low, high), (other_low, other_high) = self.__range__, getattr(other, "__range__", (-_INF, _INF))
+		bounds = (low == 0, high == 1, other_low == 0, other_high == 1)
+		poi = _segment_intersection(*(_point(s1) + _point(e1) + _point(s2) + _point(e2)), bounds=bounds)
+		if (poi is None):
+			return None
+		return Vector2(*poi)
 
-	def is_skew_with(self, other, epsilon=EPSILON):
+	def is_skew_with(self, other, epsilon=None):
 		s1, e1, s2, e2 = rectify_vectors(self._start, self._end, other[0], other[1])
 		if (len(s1) != self.__dimension__):
 			return super().is_skew_with(other, epsilon)
@@ -178,11 +179,12 @@ class _Line2DBase(_LineBase):
 	is_parallel_with = is_skew_with
 
 	def is_to_the_left(self, point):
-		px, py = point
-		x1, y1 = self._start
-		x2, y2 = self._end
-		result = (x2 - x1)*(py - y2) - (y2 - y1)*(px - x2)
-		return result < 0
+		return orient2d(_point(self._start), _point(self._end), _point(point)) < 0
+
+	def sides(self, points, epsilon=None, backend=None):
+		# 1 for the points to the left of the line (see is_to_the_left), -1
+		# for those to the right and 0 for those within ``epsilon`` of it.
+		return line_sides(self, points, epsilon, backend)[0]
 
 class _Line3DBase(_LineBase):
 
@@ -200,6 +202,8 @@ class _Line3DBase(_LineBase):
 
 class Line2D(_Line2DBase):
 
+	__range__ = (-_INF, _INF)
+
 	@property
 	def y_intercept(self):
 		x1, y1 =  self._start
@@ -226,6 +230,8 @@ class Line2D(_Line2DBase):
 
 class Ray2D(_Line2DBase):
 
+	__range__ = (0, _INF)
+
 	def is_point_in_range(self, point):
 		px, py = change_vector_dimension(point, self.__dimension__)
 		x1, y1 = self._start
@@ -236,6 +242,8 @@ class Ray2D(_Line2DBase):
 
 class Segment2D(_Line2DBase):
 
+	__range__ = (0, 1)
+
 	def is_point_in_range(self, point):
 		px, py = change_vector_dimension(point, self.__dimension__)
 		x1, y1 = self._start
@@ -252,11 +260,15 @@ class Segment2D(_Line2DBase):
 
 class Line3D(_Line3DBase):
 
+	__range__ = (-_INF, _INF)
+
 	def is_point_in_range(self, point):
 		return True
 
 class Ray3D(_Line3DBase):
 
+	__range__ = (0, _INF)
+
 	def is_point_in_range(self, point):
 		px, py, pz = change_vector_dimension(point, self.__dimension__)
 		x1, y1, z1 = self._start
@@ -267,6 +279,8 @@ class Ray3D(_Line3DBase):
 
 class Segment3D(_Line3DBase):
 
+	__range__ = (0, 1)
+
 	def is_point_in_range(self, point):
 		px, py, pz = change_vector_dimension(point, self.__dimension__)
 		x1, y1, z1 = self._start
@@ -279,4 +293,119 @@ class Segment3D(_Line3DBase):
 		return (self._end - self._start).magnitude()
 
 	def length_squared(self):
-		return (self._end - self._start).magnitude_squared()
\ No newline at end of file
+		return (self._end - self._start).magnitude_squared()
+
+def _components(v):
+	return getattr(v, "_components", v)
+
+def _point(v):
+	# Python floats are much faster to do arithmetic on one at a time than
+	# numpy scalars.
+	c = _components(v)
+	return c.tolist() if hasattr(c, "tolist") else c
+
+@requires("numpy")
+def segments_to_array(segments):
+	if (isinstance(segments, numpy.ndarray)):
+		return as_float_array(segments).reshape(-1, 2, 2)
+	if (isinstance(segments, _LineBase)):
+		segments = [segments]
+	rows = [(_components(s[0]), _components(s[1])) for s in segments]
+	return as_float_array(rows).reshape(-1, 2, 2)
+
+def _segment_rows(segments):
+	if (isinstance(segments, _LineBase)):
+		segments = [segments]
+	if (numpy is not None and isinstance(segments, numpy.ndarray)):
+		return segments.reshape(-1, 2, 2)
+	if (len(segments) and isinstance(segments[0][0], Number)):
+		segments = [segments]
+	return [(_components(s[0]), _components(s[1])) for s in segments]
+
+def segment_intersections(first, second, backend=None):
+	# Intersects the i-th segment of ``first`` with the i-th segment of
+	# ``second`` (either may be a single segment, which is broadcast). Returns
+	# an (N, 2) array of intersection points, with rows of NaN where the
+	# segments don't intersect or are parallel.
+	first = _segment_rows(first)
+	second = _segment_rows(second)
+	size = max(len(first), len(second))
+	return get_backend(BATCH, size, backend).segment_intersections(first, second)
+
+def _halfplanes(polygon):
+	# The sides of a convex polygon (in either winding) as outward normals
+	# and offsets, for the backends' clip_segments.
+	vertices = [_point(v) for v in polygon]
+	if (len(vertices) < 3):
+		raise ValueError("A polygon needs at least 3 vertices.")
+	edges = list(zip(vertices, vertices[1:] + vertices[:1]))
+	area = sum(a[0]*b[1] - a[1]*b[0] for a, b in edges)
+	if (area == 0):
+		raise ValueError("Cannot clip to a degenerate polygon.")
+	sign = 1 if area > 0 else -1
+	normals = [(sign*(b[1] - a[1]), sign*(a[0] - b[0])) for a, b in edges]
+	offsets = [n[0]*a[0] + n[1]*a[1] for n, (a, b) in zip(normals, edges)]
+	for v in vertices:
+		if (any(orient2d(a, b, v)*sign < 0 for a, b in edges)):
+			raise ValueError("Can only clip to convex polygons.")
+	return normals, offsets
+
+def clip_segments_to_polygon(segments, polygon, backend=None):
+	# Cyrus-Beck clipping of segments to a convex polygon, given by its
+	# vertices. Returns the (N, 2, 2) clipped segments, with rows of NaN for
+	# the segments entirely outside, and the (N,) mask of the visible ones.
+	# See Rect.clip_segments for rects.
+	normals, offsets = _halfplanes(polygon)
+	segments = _segment_rows(segments)
+	return get_backend(BATCH, len(segments), backend).clip_segments(segments, normals, offsets)
+
+## Lines against points
+##
+## ``lines`` is a line, ray or segment, a sequence of them (or of pairs of
+## points, taken as segments), or an (M, 2, d) array of segments.
+## ``points`` is a point or an (N, d) array (or sequence) of points.
+## Results are indexed [line, point].
+
+def _line_rows(lines):
+	if (numpy is not None and isinstance(lines, numpy.ndarray)):
+		lines = numpy.asarray(lines, dtype=float)
+		lines = lines.reshape(-1, 2, lines.shape[-1])
+		m = len(lines)
+		return lines[:, 0], lines[:, 1], [0]*m, [1]*m
+	if (isinstance(lines, _LineBase)):
+		lines = [lines]
+	# Plain pairs of points are segments.
+	ranges = [getattr(l, "__range__", (0, 1)) for l in lines]
+	starts = [_components(l[0]) for l in lines]
+	ends = [_components(l[1]) for l in lines]
+	return starts, ends, [r[0] for r in ranges], [r[1] for r in ranges]
+
+def _point_rows(points):
+	if (numpy is not None and isinstance(points, numpy.ndarray)):
+		return points.reshape(-1, points.shape[-1])
+	if (hasattr(points, "_components") or isinstance(points[0], Number)):
+		points = [points]
+	return [_components(p) for p in points]
+
+def line_distances(lines, points, clamp=True, backend=None):
+	# The distance from each point to each line, ray or segment. Without
+	# ``clamp``, distances are to the infinite lines through them.
+	starts, ends, lo, hi = _line_rows(lines)
+	points = _point_rows(points)
+	if (not clamp):
+		lo, hi = [-_INF]*len(lo), [_INF]*len(hi)
+	backend = get_backend(BATCH, len(starts)*len(points), backend)
+	return backend.line_distances(starts, ends, lo, hi, points)
+
+def line_closest_points(lines, points, backend=None):
+	starts, ends, lo, hi = _line_rows(lines)
+	points = _point_rows(points)
+	backend = get_backend(BATCH, len(starts)*len(points), backend)
+	return backend.line_closest_points(starts, ends, lo, hi, points)
+
+def line_sides(lines, points, epsilon=None, backend=None):
+	# For 2D lines only, see _Line2DBase.sides.
+	starts, ends, lo, hi = _line_rows(lines)
+	points = _point_rows(points)
+	backend = get_backend(BATCH, len(starts)*len(points), backend)
+	return backend.line_sides(starts, ends, points, default_epsilon() if epsilon is None else epsilon)
@@ -0,0 +1,414 @@
+import heapq
+from itertools import count as _counter
+
+from .compat import *
+from .vector import *
+from .aabb import *
+from .aabb import _bounds_of, _slab
+from .precision import get_dtype, as_float_array
+
+numpy = try_import("numpy")
+
+__all__ = ["Octree"]
+
+DEFAULT_MAX_ITEMS = 16
+DEFAULT_MAX_DEPTH = 20
+
+_INF = float("inf")
+
+_OCTANTS = [(k & 1, k >> 1 & 1, k >> 2 & 1) for k in range(8)]
+
+# Cells per axis (as a power of 2) of the Morton codes used by Octree.build;
+# three of them fit in 64 bits.
+_MORTON_BITS = 21
+
+def _spread(x):
+	# Spreads the low 21 bits of each value 3 apart (0b111 -> 0b1001001).
+	x = x & numpy.uint64(0x1fffff)
+	for shift, mask in ((32, 0x1f00000000ffff), (16, 0x1f0000ff0000ff), (8, 0x100f00f00f00f00f), (4, 0x10c30c30c30c30c3), (2, 0x1249249249249249)):
+		x = (x | x << numpy.uint64(shift)) & numpy.uint64(mask)
+	return x
+
+class _Node(object):
+
+	# A cube of the tree. Objects are placed by their centers, so a node's
+	# objects can stick out of its cell by up to half its side; ``outer_lo``
+	# and ``outer_hi`` bound them (the "loose" cell).
+
+	__slots__ = ("lo", "side", "items", "children", "count", "parent")
+
+	def __init__(self, lo, side, parent=None):
+		self.lo = lo
+		self.side = side
+		self.items = []
+		self.children = None
+		self.count = 0 # items in the whole subtree
+		self.parent = parent
+
+	@property
+	def hi(self):
+		return tuple(l + self.side for l in self.lo)
+
+	@property
+	def center(self):
+		return tuple(l + self.side/2 for l in self.lo)
+
+	@property
+	def outer_lo(self):
+		return tuple(l - self.side/2 for l in self.lo)
+
+	@property
+	def outer_hi(self):
+		return tuple(l + 1.5*self.side for l in self.lo)
+
+	def split(self):
+		# Child k is in the upper half of the cell along axis a if bit a of k
+		# is set.
+		half = self.side/2
+		x, y, z = self.lo
+		self.children = [_Node((x + half*i, y + half*j, z + half*k), half, self) for i, j, k in _OCTANTS]
+
+	def octant(self, lo, hi):
+		# The child the box lo..hi belongs in, or None if it's too large for
+		# the children (larger than their side along some axis).
+		limit = self.side/2
+		k = 0
+		for a, c in enumerate(self.center):
+			if (hi[a] - lo[a] > limit):
+				return None
+			if (lo[a] + hi[a] > 2*c):
+				k |= 1 << a
+		return k
+
+	def holds(self, lo, hi):
+		# Whether the box belongs in this node's subtree.
+		return all(l <= (bl + bh)/2 <= h and bh - bl <= self.side for l, h, bl, bh in zip(self.lo, self.hi, lo, hi))
+
+	def distance_squared(self, p):
+		return sum(max(l - x, 0, x - h)**2 for l, x, h in zip(self.outer_lo, p, self.outer_hi))
+
+class Octree(object):
+
+	# A loose octree over 3D points, AABB3Ds, Ellipsoid3Ds and Segment3Ds, or
+	# over plain boxes given as arrays (see ``build``). Every object is kept
+	# in the node containing the center of its bounding box whose side is at
+	# least as large as the box, as deep as the tree goes there. Unlike a
+	# plain octree, objects straddling the splitting planes don't pile up
+	# near the root. A node is split into eight once it holds more than
+	# ``max_items`` objects, and merged back when removals leave its subtree
+	# with half that.
+	#
+	# ``insert`` returns an id for the object, which the queries report.
+	# Queries test bounding boxes: they're exact for points and AABB3Ds and
+	# conservative for the other shapes. The bounding boxes are kept in
+	# arrays, so the objects gathered from the nodes a query visits are
+	# tested all at once.
+
+	@requires("numpy")
+	def __init__(self, bounds=None, max_items=DEFAULT_MAX_ITEMS, max_depth=DEFAULT_MAX_DEPTH):
+		if (max_items < 1):
+			raise ValueError("max_items must be positive.")
+		self.max_items = max_items
+		self.max_depth = max_depth
+		self._root = None
+		if (bounds is not None):
+			self._root = _Node(*self._cube(*_bounds_of(bounds)))
+		self._lo = numpy.empty((0, 3), dtype=get_dtype())
+		self._hi = numpy.empty((0, 3), dtype=get_dtype())
+		self._shapes = []
+		self._alive = numpy.zeros(0, dtype=bool)
+		self._nodes = [] # id -> node holding it
+		self._size = 0
+
+	@classmethod
+	@requires("numpy")
+	def build(cls, shapes, max_items=DEFAULT_MAX_ITEMS, max_depth=DEFAULT_MAX_DEPTH):
+		# Builds the tree over all of ``shapes`` at once, which is much faster
+		# than inserting them one by one. ``shapes`` can be a sequence of
+		# objects, an AABB3DArray or an (N, 3) array of points; the ids are
+		# their positions in it.
+		tree = cls(None, max_items, max_depth)
+		if (isinstance(shapes, AABB3DArray)):
+			lo, hi = shapes.lo, shapes.hi
+			tree._shapes = [None]*len(lo)
+		elif (isinstance(shapes, numpy.ndarray)):
+			lo = hi = as_float_array(shapes).reshape(-1, 3)
+			tree._shapes = [None]*len(lo)
+		else:
+			tree._shapes = list(shapes)
+			boxes = AABB3DArray.from_shapes(tree._shapes)
+			lo, hi = boxes.lo, boxes.hi
+		n = len(lo)
+		tree._lo, tree._hi = as_float_array(lo, copy=True), as_float_array(hi, copy=True)
+		tree._alive = numpy.ones(n, dtype=bool)
+		tree._nodes = [None]*n
+		tree._size = n
+		if (n):
+			tree._root = _Node(*tree._cube(tree._lo.min(axis=0).tolist(), tree._hi.max(axis=0).tolist()))
+			tree._build()
+		return tree
+
+	def _cube(self, lo, hi):
+		# The minimum corner and side of a cube around lo..hi.
+		side = max(h - l for l, h in zip(lo, hi)) or 1.0
+		return [(l + h)/2 - side/2 for l, h in zip(lo, hi)], side
+
+	def _build(self):
+		# Sorting the objects by the Morton code of their centers puts the
+		# objects of every cell next to each other, so the tree can be built
+		# top down from ranges of one sorted array. Each object also gets the
+		# deepest level whose cells are at least as large as it is.
+		root, lo, hi = self._root, self._lo, self._hi
+		bits = min(self.max_depth, _MORTON_BITS)
+		cells = numpy.floor(((lo + hi)/2 - root.lo)*((1 << bits)/root.side))
+		cells = numpy.clip(cells, 0, (1 << bits) - 1).astype(numpy.uint64)
+		codes = _spread(cells[:, 0]) | _spread(cells[:, 1]) << 1 | _spread(cells[:, 2]) << 2
+		extents = (hi - lo).max(axis=1)
+		with numpy.errstate(divide="ignore"):
+			levels = numpy.floor(numpy.log2(root.side/extents))
+		levels = numpy.minimum(levels, bits)
+		# log2 may be off by one either way when it's nearly an integer.
+		levels += extents <= root.side/2**(levels + 1)
+		levels -= extents > root.side/2**levels
+		order = numpy.argsort(codes, kind="stable")
+		levels = levels[order].astype(numpy.intp)
+		self._sorted = (order.tolist(), levels.tolist(), codes[order], levels, bits)
+		self._build_range(root, 0, len(order), 0, 0)
+		del self._sorted
+
+	def _build_range(self, node, a, b, depth, prefix):
+		# Fills ``node`` (at ``depth``, with Morton code prefix ``prefix``)
+		# from the sorted objects a:b, which also include the objects placed
+		# in its ancestors.
+		order, levels, codes, level_array, bits = self._sorted
+		if (b - a <= self.max_items):
+			here = [order[i] for i in range(a, b) if levels[i] >= depth]
+			node.count = len(here)
+		else:
+			below = level_array[a:b] >= depth
+			node.count = int(numpy.count_nonzero(below))
+			if (node.count <= self.max_items or depth >= bits):
+				here = [order[i] for i in (numpy.flatnonzero(below) + a).tolist()]
+			else:
+				here = [order[i] for i in (numpy.flatnonzero(level_array[a:b] == depth) + a).tolist()]
+				node.split()
+				shift = numpy.uint64(3*(bits - depth - 1))
+				first = numpy.uint64(prefix*8)
+				bounds = (numpy.searchsorted(codes[a:b], (numpy.arange(9, dtype=numpy.uint64) + first) << shift) + a).tolist()
+				for k, child in enumerate(node.children):
+					if (bounds[k] < bounds[k + 1]):
+						self._build_range(child, bounds[k], bounds[k + 1], depth + 1, prefix*8 + k)
+		node.items = here
+		nodes = self._nodes
+		for id in here:
+			nodes[id] = node
+
+	def __repr__(self):
+		return "%s(%i objects)" % (self.__class__.__name__, len(self))
+
+	def __len__(self):
+		return self._size
+
+	def __contains__(self, id):
+		return 0 <= id < len(self._alive) and bool(self._alive[id])
+
+	def __getitem__(self, id):
+		# The object inserted with ``id`` (its box for trees built from
+		# arrays).
+		if (id not in self):
+			raise KeyError(id)
+		shape = self._shapes[id]
+		return self.box(id) if shape is None else shape
+
+	def box(self, id):
+		if (id not in self):
+			raise KeyError(id)
+		return AABB3D.from_corners(self._lo[id].tolist(), self._hi[id].tolist())
+
+	@property
+	def bounds(self):
+		# A box containing every object (the loose cell of the root).
+		if (self._root is None):
+			return None
+		return AABB3D.from_corners(self._root.outer_lo, self._root.outer_hi)
+
+	def depth(self):
+		def depth(node):
+			if (node.children is None):
+				return 0
+			return 1 + max(depth(child) for child in node.children)
+		return 0 if self._root is None else depth(self._root)
+
+	## Editing
+
+	def insert(self, shape):
+		lo, hi = _bounds_of(shape)
+		id = len(self._shapes)
+		if (id == len(self._lo)):
+			# Grow the box arrays geometrically.
+			capacity = max(16, 2*id)
+			for name in ("_lo", "_hi"):
+				grown = numpy.empty((capacity, 3), dtype=getattr(self, name).dtype)
+				grown[:id] = getattr(self, name)[:id]
+				setattr(self, name, grown)
+			alive = numpy.zeros(capacity, dtype=bool)
+			alive[:id] = self._alive[:id]
+			self._alive = alive
+		self._lo[id], self._hi[id] = lo, hi
+		self._alive[id] = True
+		self._shapes.append(shape)
+		self._nodes.append(None)
+		self._size += 1
+
+		if (self._root is None):
+			self._root = _Node(*self._cube(lo, hi))
+		while (not self._root.holds(lo, hi)):
+			self._grow([(l + h)/2 for l, h in zip(lo, hi)])
+		node, depth = self._root, 0
+		while (True):
+			node.count += 1
+			k = None if node.children is None else node.octant(lo, hi)
+			if (k is None):
+				node.items.append(id)
+				self._nodes[id] = node
+				if (node.children is None and len(node.items) > self.max_items and depth < self.max_depth):
+					self._split(node, depth)
+				return id
+			node, depth = node.children[k], depth + 1
+
+	def _grow(self, toward):
+		# Doubles the root cell in the direction of the point ``toward``; the
+		# old root becomes one of the new root's children.
+		old = self._root
+		k, lo = 0, []
+		for a, l in enumerate(old.lo):
+			if (toward[a] < l):
+				k |= 1 << a
+				lo.append(l - old.side)
+			else:
+				lo.append(l)
+		root = _Node(lo, 2*old.side)
+		root.count = old.count
+		root.split()
+		root.children[k] = old
+		old.parent = root
+		self._root = root
+
+	def _split(self, node, depth):
+		node.split()
+		items, node.items = node.items, []
+		for id in items:
+			k = node.octant(self._lo[id], self._hi[id])
+			target = node if k is None else node.children[k]
+			target.items.append(id)
+			target.count += k is not None
+			self._nodes[id] = target
+		for child in node.children:
+			if (len(child.items) > self.max_items and depth + 1 < self.max_depth):
+				self._split(child, depth + 1)
+
+	def remove(self, id):
+		if (id not in self):
+			raise KeyError(id)
+		node = self._nodes[id]
+		self._nodes[id] = None
+		node.items.remove(id)
+		self._alive[id] = False
+		self._shapes[id] = None
+		self._size -= 1
+		# Merge the highest subtree left with few enough objects.
+		merge = None
+		while (node is not None):
+			node.count -= 1
+			if (node.children is not None and node.count <= self.max_items//2):
+				merge = node
+			node = node.parent
+		if (merge is not None):
+			items = []
+			stack = [merge]
+			while (stack):
+				n = stack.pop()
+				items.extend(n.items)
+				stack.extend(n.children or ())
+			for id in items:
+				self._nodes[id] = merge
+			merge.items, merge.children = items, None
+
+	def clear(self):
+		self.__init__(None, self.max_items, self.max_depth)
+
+	## Queries
+
+	def _gather(self, visit):
+		# The ids of the objects in the nodes for which visit(node) is true,
+		# skipping the subtrees of the other ones.
+		chunks = []
+		stack = [self._root] if self._root is not None else []
+		while (stack):
+			node = stack.pop()
+			if (not node.count or not visit(node)):
+				continue
+			if (node.items):
+				chunks.append(node.items)
+			if (node.children is not None):
+				stack.extend(node.children)
+		if (not chunks):
+			return numpy.zeros(0, dtype=numpy.intp)
+		return numpy.fromiter((id for chunk in chunks for id in chunk), dtype=numpy.intp)
+
+	def query(self, box):
+		# Ids of the objects whose bounding boxes overlap ``box`` (any shape
+		# that can be inserted), sorted.
+		lo, hi = _bounds_of(box)
+		def visit(node):
+			side = node.side
+			return all(l <= nl + 1.5*side and nl - side/2 <= h for l, h, nl in zip(lo, hi, node.lo))
+		ids = self._gather(visit)
+		mask = ((self._lo[ids] <= hi) & (lo <= self._hi[ids])).all(axis=1)
+		return numpy.sort(ids[mask]).tolist()
+
+	def query_point(self, point):
+		return self.query(change_vector_dimension(point, 3))
+
+	def query_ray(self, origin, direction, max_distance=_INF):
+		# (t, id) pairs for the objects whose bounding boxes the ray
+		# origin + t*direction enters before ``max_distance``, nearest first.
+		o = list(change_vector_dimension(origin, 3))
+		d = list(change_vector_dimension(direction, 3))
+		visit = lambda node: _slab(node.outer_lo, node.outer_hi, o, d, 0, max_distance) is not None
+		ids = self._gather(visit)
+		t = AABB3DArray(self._lo[ids], self._hi[ids]).intersect_ray(o, d, max_distance)
+		hit = numpy.isfinite(t)
+		ids, t = ids[hit], t[hit]
+		order = numpy.lexsort((ids, t))
+		return list(zip(t[order].tolist(), ids[order].tolist()))
+
+	def nearest(self, point, k=1, max_distance=_INF):
+		# The (distance, id) pairs of the ``k`` objects whose bounding boxes
+		# are nearest to ``point``, nearest first. Nodes are visited in order
+		# of distance, so only those closer than the k-th best are opened.
+		p = list(change_vector_dimension(point, 3))
+		if (self._root is None or k < 1):
+			return []
+		best = [] # max-heap of (-distance squared, -id)
+		limit = max_distance*max_distance
+		tie = _counter()
+		heap = [(self._root.distance_squared(p), next(tie), self._root)]
+		while (heap):
+			distance, _, node = heapq.heappop(heap)
+			if (distance > limit or (len(best) == k and distance > -best[0][0])):
+				break
+			if (node.items):
+				ids = numpy.array(node.items, dtype=numpy.intp)
+				gaps = numpy.maximum(numpy.maximum(self._lo[ids] - p, p - self._hi[ids]), 0)
+				for d, id in zip(numpy.einsum("ij,ij->i", gaps, gaps).tolist(), node.items):
+					if (d > limit):
+						continue
+					if (len(best) < k):
+						heapq.heappush(best, (-d, -id))
+					elif ((-d, -id) > best[0]):
+						heapq.heapreplace(best, (-d, -id))
+			for child in node.children or ():
+				if (child.count):
+					heapq.heappush(heap, (child.distance_squared(p), next(tie), child))
+		return [(d**0.5, id) for d, id in sorted((-d, -id) for d, id in best)]
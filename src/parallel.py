@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .compat import *
+from .linear import segment_intersections, segments_to_array
+
+numpy = try_import("numpy")
+
+__all__ = [
+	"SERIAL", "THREAD", "PROCESS", "ParallelExecutor", "parallel_contains_points",
+	"parallel_segment_intersections", "parallel_evaluate_bezier"
+	]
+
+SERIAL = "serial"
+THREAD = "thread"
+PROCESS = "process"
+
+_MODES = (SERIAL, THREAD, PROCESS)
+
+def _attach(name, shape, dtype):
+	from multiprocessing.shared_memory import SharedMemory
+	shm = SharedMemory(name=name)
+	return shm, numpy.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _process_chunk(func, args, source, target, start, stop):
+	# Runs inside a worker process. ``source`` and ``target`` are
+	# (name, shape, dtype) triples describing shared memory blocks, so only
+	# the slice bounds are pickled for every chunk, never the data.
+	in_shm, inputs = _attach(*source)
+	out_shm, outputs = _attach(*target)
+	try:
+		outputs[start:stop] = func(inputs[start:stop], *args)
+	finally:
+		del inputs, outputs
+		in_shm.close()
+		out_shm.close()
+
+def _pairwise_intersections(chunk):
+	return segment_intersections(chunk[:, :2], chunk[:, 2:])
+
+class ParallelExecutor(object):
+
+	def __init__(self, mode=PROCESS, workers=None, chunk_size=65536, min_size=None):
+		if (mode not in _MODES):
+			raise ValueError("Unknown mode '%s', expected one of %s." % (mode, ", ".join(_MODES)))
+		if (chunk_size < 1):
+			raise ValueError("Chunk size must be positive.")
+		self.mode = mode
+		self.workers = workers or os.cpu_count() or 1
+		self.chunk_size = chunk_size
+		# Inputs smaller than ``min_size`` are always run serially, since
+		# starting the pool would cost more than it saves.
+		self.min_size = chunk_size if min_size is None else min_size
+		self._pool = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.shutdown()
+
+	def shutdown(self):
+		if (self._pool is not None):
+			self._pool.shutdown()
+			self._pool = None
+
+	def _get_pool(self):
+		if (self._pool is None):
+			if (self.mode == PROCESS):
+				self._pool = ProcessPoolExecutor(self.workers)
+			else:
+				self._pool = ThreadPoolExecutor(self.workers)
+		return self._pool
+
+	def _chunks(self, n):
+		return [(i, min(i + self.chunk_size, n)) for i in range(0, n, self.chunk_size)]
+
+	@requires("numpy")
+	def map_chunks(self, func, array, *args):
+		# Applies ``func(chunk, *args)`` to consecutive chunks of ``array``
+		# (along the first axis) and concatenates the results. ``func`` must
+		# return one row per input row. In process mode ``func`` and ``args``
+		# have to be picklable.
+		array = numpy.ascontiguousarray(array)
+		n = len(array)
+		if (self.mode == SERIAL or n < max(self.min_size, 1) or n <= self.chunk_size):
+			return func(array, *args)
+
+		chunks = self._chunks(n)
+		start, stop = chunks[0]
+		first = numpy.asarray(func(array[start:stop], *args))
+		shape = (n,) + first.shape[1:]
+
+		if (self.mode == THREAD):
+			outputs = numpy.empty(shape, dtype=first.dtype)
+			outputs[start:stop] = first
+			def run(start, stop):
+				outputs[start:stop] = func(array[start:stop], *args)
+			futures = [self._get_pool().submit(run, *chunk) for chunk in chunks[1:]]
+			for future in futures:
+				future.result()
+			return outputs
+		return self._map_shared(func, array, args, chunks, first, shape)
+
+	def _map_shared(self, func, array, args, chunks, first, shape):
+		from multiprocessing.shared_memory import SharedMemory
+		in_shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+		out_shm = SharedMemory(create=True, size=max(first.dtype.itemsize * int(numpy.prod(shape)), 1))
+		try:
+			inputs = numpy.ndarray(array.shape, dtype=array.dtype, buffer=in_shm.buf)
+			inputs[:] = array
+			outputs = numpy.ndarray(shape, dtype=first.dtype, buffer=out_shm.buf)
+			outputs[:len(first)] = first
+
+			source = (in_shm.name, array.shape, array.dtype.str)
+			target = (out_shm.name, shape, first.dtype.str)
+			pool = self._get_pool()
+			futures = [
+				pool.submit(_process_chunk, func, args, source, target, start, stop)
+				for start, stop in chunks[1:]
+			]
+			for future in futures:
+				future.result()
+			result = outputs.copy()
+			del inputs, outputs
+			return result
+		finally:
+			in_shm.close()
+			in_shm.unlink()
+			out_shm.close()
+			out_shm.unlink()
+
+def _run(executor, options, func, array, *args):
+	if (executor is not None):
+		return executor.map_chunks(func, array, *args)
+	with ParallelExecutor(**options) as executor:
+		return executor.map_chunks(func, array, *args)
+
+@requires("numpy")
+def parallel_contains_points(shape, points, executor=None, **options):
+	# ``shape`` is anything with a ``contains_points`` method (Rect, Ellipse,
+	# Ellipsoid3D).
+	return _run(executor, options, shape.contains_points, numpy.asarray(points, dtype=float))
+
+@requires("numpy")
+def parallel_segment_intersections(first, second, executor=None, **options):
+	first = segments_to_array(first)
+	second = segments_to_array(second)
+	if (len(second) == 1):
+		return _run(executor, options, segment_intersections, first, second)
+	first, second = numpy.broadcast_arrays(first, second)
+	return _run(executor, options, _pairwise_intersections, numpy.concatenate((first, second), axis=1))
+
+@requires("numpy")
+def parallel_evaluate_bezier(curve, times, executor=None, **options):
+	return _run(executor, options, curve.evaluate_many, numpy.asarray(times, dtype=float))
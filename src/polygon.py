@@ -0,0 +1,690 @@
+import math
+import operator
+from fractions import Fraction
+from functools import cmp_to_key
+from numbers import Number
+
+from .compat import *
+from .vector import *
+from .rect import Rect
+from .predicates import _CCW_BOUND, _EPSILON, _orient2d_exact, orient2d
+
+__all__ = ["Polygon"]
+
+# Fill rules, deciding which points a set of rings covers from the number of
+# times the rings wind around them (counterclockwise counts +1).
+EVEN_ODD = "evenodd"
+NONZERO = "nonzero"
+POSITIVE = "positive"
+
+# Offset joins.
+ROUND = "round"
+MITER = "miter"
+BEVEL = "bevel"
+
+## Boolean operations
+##
+## Every operation runs the same two sweeps over the edges of both operands.
+##
+## The first one sorts the edges by their left end and sweeps a vertical
+## line across them, testing each edge only against the edges the line
+## crosses when it reaches it, and splits edges where they cross or touch.
+## Crossings are decided exactly (predicates.py).
+##
+## After splitting, edges only meet at their ends. Edges are stored from
+## their lexicographically smaller end to the larger one, with the change of
+## winding number of each operand from below to above the edge. The second
+## sweep keeps the edges crossing the sweep line sorted bottom to top, so
+## the winding numbers below an edge are the ones above its neighbour. An
+## edge is part of the result's boundary when the result covers one side of
+## it and not the other, and is turned so the result is on its left: outer
+## rings come out counterclockwise and holes clockwise.
+
+class _Edge(object):
+
+	__slots__ = ["p", "q", "wa", "wb", "above", "exact", "fp", "fq"]
+
+	def __init__(self, p, q, wa, wb):
+		self.p = p
+		self.q = q
+		self.wa = wa
+		self.wb = wb
+		self.above = None
+		# Float copies of ends that are fractions, for the sweep's filter.
+		self.exact = type(p[0]) is not float or type(q[0]) is not float
+		self.fp = (float(p[0]), float(p[1])) if self.exact else p
+		self.fq = (float(q[0]), float(q[1])) if self.exact else q
+
+def _inside(fill_rule, winding):
+	if (fill_rule == EVEN_ODD):
+		return winding % 2 == 1
+	elif (fill_rule == NONZERO):
+		return winding != 0
+	return winding > 0
+
+def _check_fill_rule(fill_rule):
+	if (fill_rule not in (EVEN_ODD, NONZERO, POSITIVE)):
+		raise ValueError("Unknown fill rule '%s'." % fill_rule)
+	return fill_rule
+
+def _add_edges(edges, rings, a):
+	for ring in rings:
+		# Plain floats: numpy scalars compare with fractions by rounding them.
+		ring = [(float(x), float(y)) for x, y in ring]
+		for i in range(len(ring)):
+			s, e = ring[i - 1], ring[i]
+			if (s < e):
+				edges.append(_Edge(s, e, 1 if a else 0, 0 if a else 1))
+			elif (e < s):
+				edges.append(_Edge(e, s, -1 if a else 0, 0 if a else -1))
+
+def _mixed_bound(ax, ay, bx, by, cx, cy, left, right):
+	# Error bound of orient2d's determinant left - right when the points are
+	# rounded fractions. Rounding moves each coordinate by at most _EPSILON
+	# times itself, so each difference d is off by at most the e below, and each
+	# product d*d' by |d|*e + |d'|*e + e*e; the factor 2 covers the
+	# rounding of the bound itself.
+	e = 4*_EPSILON*max(abs(ax), abs(ay), abs(bx), abs(by), abs(cx), abs(cy))
+	return _CCW_BOUND*(abs(left) + abs(right)) + 2*e*(abs(ax - cx) + abs(by - cy) + abs(ay - cy) + abs(bx - cx) + 2*e)
+
+def _orient(a, b, c):
+	# orient2d for points that may be fractions. A fraction minus a float is
+	# a float, so mixed points get their own filter, which also covers the
+	# rounding of the fractions.
+	if (type(a[0]) is float and type(b[0]) is float and type(c[0]) is float):
+		return orient2d(a, b, c)
+	ax, ay, bx, by, cx, cy = float(a[0]), float(a[1]), float(b[0]), float(b[1]), float(c[0]), float(c[1])
+	left, right = (ax - cx)*(by - cy), (ay - cy)*(bx - cx)
+	det = left - right
+	if (abs(det) > _mixed_bound(ax, ay, bx, by, cx, cy, left, right)):
+		return det
+	return _orient2d_exact(a[0], a[1], b[0], b[1], c[0], c[1])
+
+class _Exact(Fraction):
+
+	# The coordinates of crossings that floats can't represent. They're
+	# hashed, rounded and compared many times over, so the hash and the
+	# rounded value are cached, and comparisons try the rounded values
+	# first: rounding is monotonic, so when those differ they're in the
+	# same order as the exact values.
+
+	__slots__ = ["_float", "_hash"]
+
+	def __new__(cls, numerator=0, denominator=None):
+		self = Fraction.__new__(cls, numerator, denominator)
+		self._float = Fraction.__float__(self)
+		self._hash = Fraction.__hash__(self)
+		return self
+
+	def __float__(self):
+		return self._float
+
+	def __hash__(self):
+		return self._hash
+
+	def __eq__(self, other):
+		if (type(other) is float):
+			return self._float == other and Fraction.__eq__(self, other)
+		if (type(other) is _Exact and self._float != other._float):
+			return False
+		return Fraction.__eq__(self, other)
+
+	def _compare(self, other, op):
+		f = other if type(other) is float else getattr(other, "_float", None)
+		if (f is not None and f != self._float):
+			return op(self._float, f)
+		return op(Fraction(self), other)
+
+	def __lt__(self, other):
+		return self._compare(other, operator.lt)
+
+	def __le__(self, other):
+		return self._compare(other, operator.le)
+
+	def __gt__(self, other):
+		return self._compare(other, operator.gt)
+
+	def __ge__(self, other):
+		return self._compare(other, operator.ge)
+
+def _on_edge(edge, r):
+	# r is collinear with edge; is it strictly between its ends?
+	return edge.p < r < edge.q
+
+def _crossing(e, f):
+	# The crossing point of two edges with float ends. When it isn't exactly
+	# a pair of floats, the pieces ending at it could cross other edges if it
+	# were rounded, so it's kept as fractions instead; every later decision
+	# stays exact, and the vertices are only rounded in the output. Floats
+	# are integers over a power of two, so the exact point is computed with
+	# integers over the largest of those denominators.
+	ratios = [v.as_integer_ratio() for v in e.p + e.q + f.p + f.q]
+	scale = max(d for n, d in ratios)
+	x1, y1, x2, y2, x3, y3, x4, y4 = [n*(scale//d) for n, d in ratios]
+	dx1, dy1, dx2, dy2 = x2 - x1, y2 - y1, x4 - x3, y4 - y3
+	num = (x3 - x1)*dy2 - (y3 - y1)*dx2
+	den = dx1*dy2 - dy1*dx2
+	x, y = Fraction(x1*den + num*dx1, scale*den), Fraction(y1*den + num*dy1, scale*den)
+	fx, fy = float(x), float(y)
+	if (fx == x and fy == y):
+		return fx, fy
+	return _Exact(x), _Exact(y)
+
+def _grid_pairs(edges):
+	# The pairs of edges whose bounding boxes overlap, found through a
+	# uniform grid with about one cell per edge (but cells no smaller than
+	# the average edge): only edges sharing a cell can overlap, and a pair
+	# is only reported from the cell holding the lower left corner of the
+	# overlap, so once.
+	boxes = []
+	for e in edges:
+		(x1, y1), (x2, y2) = e.p, e.q
+		boxes.append((x1, min(y1, y2), x2, max(y1, y2)))
+	x0, y0 = min(b[0] for b in boxes), min(b[1] for b in boxes)
+	width, height = max(b[2] for b in boxes) - x0, max(b[3] for b in boxes) - y0
+	size = max(
+		math.sqrt(width*height/len(edges)),
+		sum(max(b[2] - b[0], b[3] - b[1]) for b in boxes)/len(edges),
+		max(width, height)/4096
+		)
+	if (not size):
+		size = 1.0
+	columns = int(width/size) + 1
+	cells = {}
+	corners = []
+	for i, (bx1, by1, bx2, by2) in enumerate(boxes):
+		cx1, cy1, cx2, cy2 = int((bx1 - x0)/size), int((by1 - y0)/size), int((bx2 - x0)/size), int((by2 - y0)/size)
+		corners.append((cx1, cy1))
+		for cy in range(cy1, cy2 + 1):
+			for cx in range(cx1, cx2 + 1):
+				cells.setdefault(cy*columns + cx, []).append(i)
+	for cell, members in cells.items():
+		if (len(members) < 2):
+			continue
+		cy, cx = divmod(cell, columns)
+		for k, i in enumerate(members):
+			ax1, ay1, ax2, ay2 = boxes[i]
+			ix, iy = corners[i]
+			for j in members[k + 1:]:
+				bx1, by1, bx2, by2 = boxes[j]
+				if (bx1 > ax2 or ax1 > bx2 or by1 > ay2 or ay1 > by2):
+					continue
+				jx, jy = corners[j]
+				if ((ix if ix > jx else jx) == cx and (iy if iy > jy else jy) == cy):
+					yield i, j
+
+def _split(edges):
+	# Tests every pair of edges whose bounding boxes overlap (see
+	# _grid_pairs) and splits them where they cross or touch.
+	splits = [[] for e in edges]
+	for i, j in (_grid_pairs(edges) if edges else ()):
+		e, f = edges[i], edges[j]
+		o1, o2 = orient2d(f.p, f.q, e.p), orient2d(f.p, f.q, e.q)
+		if ((o1 > 0 and o2 > 0) or (o1 < 0 and o2 < 0)):
+			continue
+		o3, o4 = orient2d(e.p, e.q, f.p), orient2d(e.p, e.q, f.q)
+		if ((o3 > 0 and o4 > 0) or (o3 < 0 and o4 < 0)):
+			continue
+		if (o1 and o2 and o3 and o4):
+			r = _crossing(e, f)
+			if (e.p < r < e.q):
+				splits[i].append(r)
+			if (f.p < r < f.q):
+				splits[j].append(r)
+			continue
+		# Touching or overlapping: split at the ends lying inside the
+		# other edge.
+		if (o1 == 0 and _on_edge(f, e.p)):
+			splits[j].append(e.p)
+		if (o2 == 0 and _on_edge(f, e.q)):
+			splits[j].append(e.q)
+		if (o3 == 0 and _on_edge(e, f.p)):
+			splits[i].append(f.p)
+		if (o4 == 0 and _on_edge(e, f.q)):
+			splits[i].append(f.q)
+
+	# Splits the edges, merging the pieces shared by several edges.
+	merged = {}
+	for e, points in zip(edges, splits):
+		points = [e.p] + sorted(set(points)) + [e.q]
+		for p, q in zip(points, points[1:]):
+			key = (p, q)
+			piece = merged.get(key)
+			if (piece is None):
+				merged[key] = _Edge(p, q, e.wa, e.wb)
+			else:
+				piece.wa += e.wa
+				piece.wb += e.wb
+	return [e for e in merged.values() if e.wa or e.wb]
+
+def _is_below(f, e):
+	# Whether active edge f is below edge e, which starts on the sweep line.
+	# This runs log(active edges) times per edge, so the float filter of
+	# orient2d and _orient are inlined.
+	(ax, ay), (bx, by) = f.fp, f.fq
+	cx, cy = e.fp
+	left, right = (ax - cx)*(by - cy), (ay - cy)*(bx - cx)
+	if (f.exact or e.exact):
+		bound = _mixed_bound(ax, ay, bx, by, cx, cy, left, right)
+	else:
+		bound = _CCW_BOUND*(abs(left) + abs(right))
+	if (abs(left - right) > bound):
+		return left > right
+	# Edges starting at the same point are ordered by their ends.
+	o = 0 if f.p == e.p else _orient(f.p, f.q, e.p)
+	if (o == 0):
+		o = _orient(f.p, f.q, e.q)
+	return o > 0
+
+def _compare_starts(e, f):
+	# Edges starting at the same point, bottom to top.
+	o = _orient(e.p, e.q, f.q)
+	return -1 if o > 0 else (1 if o < 0 else 0)
+
+def _classify(edges, keep, rule_a, rule_b):
+	# Yields the boundary edges of the result as (start, end) pairs.
+	events = {}
+	for e in edges:
+		events.setdefault(e.p, ([], []))[1].append(e)
+		events.setdefault(e.q, ([], []))[0].append(e)
+	status = []
+	inside = {}
+	def covered(wa, wb):
+		key = (wa, wb)
+		result = inside.get(key)
+		if (result is None):
+			result = inside[key] = bool(keep(_inside(rule_a, wa), _inside(rule_b, wb)))
+		return result
+	for point in sorted(events):
+		ending, starting = events[point]
+		for e in ending:
+			del status[status.index(e)]
+		if (len(starting) > 1):
+			starting.sort(key=cmp_to_key(_compare_starts))
+		for e in starting:
+			lo, hi = 0, len(status)
+			while (lo < hi):
+				mid = (lo + hi) // 2
+				if (_is_below(status[mid], e)):
+					lo = mid + 1
+				else:
+					hi = mid
+			wa, wb = status[lo - 1].above if lo else (0, 0)
+			e.above = (wa + e.wa, wb + e.wb)
+			status.insert(lo, e)
+			below, above = covered(wa, wb), covered(*e.above)
+			if (above and not below):
+				yield e.p, e.q
+			elif (below and not above):
+				yield e.q, e.p
+
+def _difference(a, b):
+	# A fraction minus a float rounds the fraction first, so only the
+	# difference of two fractions is worth working out exactly.
+	if (type(a) is _Exact and type(b) is _Exact):
+		return float(a - b)
+	return float(a) - float(b)
+
+def _angle(p, q):
+	return math.atan2(_difference(q[1], p[1]), _difference(q[0], p[0]))
+
+def _stitch(pieces):
+	# Joins boundary edges into rings. Where several rings touch at a
+	# vertex, each ring takes the sharpest left turn, keeping to the covered
+	# side, so rings that only touch there come out separate.
+	outgoing = {}
+	for p, q in pieces:
+		outgoing.setdefault(p, []).append(q)
+	rings = []
+	for start in list(outgoing):
+		while (outgoing.get(start)):
+			ring = [start]
+			previous, point = start, outgoing[start].pop()
+			while (point != start):
+				ring.append(point)
+				options = outgoing[point]
+				if (len(options) > 1):
+					back = _angle(point, previous)
+					options.sort(key=lambda q: (_angle(point, q) - back) % (2*math.pi))
+				previous, point = point, options.pop()
+			ring = _ring(_simplify_ring(ring))
+			if (len(ring) >= 3):
+				rings.append(ring)
+	return rings
+
+def _simplify_ring(ring):
+	# Drops the vertices splitting left where a straight edge crossed
+	# another one.
+	result = []
+	for i in range(len(ring)):
+		a, b, c = ring[i - 1], ring[i], ring[(i + 1) % len(ring)]
+		if (_orient(a, b, c) != 0):
+			result.append(b)
+	return result
+
+def _boolean(a, b, keep, rule_a=POSITIVE, rule_b=POSITIVE):
+	edges = []
+	_add_edges(edges, a, True)
+	_add_edges(edges, b, False)
+	return _stitch(_classify(_split(edges), keep, rule_a, rule_b))
+
+## Rings
+
+def _ring(points):
+	ring = [tuple(map(float, getattr(p, "_components", p))) for p in points]
+	return [p for i, p in enumerate(ring) if p != ring[i - 1]]
+
+def _signed_area(ring):
+	return sum(a[0]*b[1] - a[1]*b[0] for a, b in zip(ring, ring[1:] + ring[:1]))/2
+
+def _ring_side(ring, point):
+	# 1 if point is inside the ring, -1 if it's outside and 0 if it's on it.
+	x, y = point
+	inside = False
+	for i in range(len(ring)):
+		a, b = ring[i - 1], ring[i]
+		if ((a[1] > y) != (b[1] > y)):
+			o = orient2d(a, b, point)
+			if (o == 0):
+				return 0
+			if ((o > 0) == (b[1] > a[1])):
+				inside = not inside
+		elif (a[1] == y == b[1] and min(a[0], b[0]) <= x <= max(a[0], b[0])):
+			return 0
+		elif (a == point):
+			return 0
+	return 1 if inside else -1
+
+def _bounds(ring):
+	xs, ys = [p[0] for p in ring], [p[1] for p in ring]
+	return min(xs), min(ys), max(xs), max(ys)
+
+def _canonical(ring):
+	i = ring.index(min(ring))
+	return tuple(ring[i:] + ring[:i])
+
+def _rect_ring(rect):
+	x, y, w, h = rect
+	x0, y0, x1, y1 = min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h)
+	return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+## Offsetting
+
+def _arc(center, radius, start, end, tolerance):
+	# Points on the arc from angle start to end (either way round), ends
+	# excluded, no further than ``tolerance`` from the circle.
+	step = 2*math.acos(max(-1.0, 1 - tolerance/radius)) if tolerance < radius else math.pi/2
+	count = int(math.ceil(abs(end - start)/step))
+	cx, cy = center
+	return [
+		(cx + radius*math.cos(start + (end - start)*k/count), cy + radius*math.sin(start + (end - start)*k/count))
+		for k in range(1, count)
+	]
+
+def _offset_ring(ring, distance, join, miter_limit, tolerance):
+	# The raw offset of a ring with the covered side on its left: every edge
+	# moved ``distance`` to its right, joined around the vertices where they
+	# part and through the vertex where they overlap. The overlaps make
+	# loops winding the other way, which a union with the positive fill rule
+	# removes.
+	n = len(ring)
+	normals = []
+	for i in range(n):
+		(ax, ay), (bx, by) = ring[i], ring[(i + 1) % n]
+		length = math.hypot(bx - ax, by - ay)
+		normals.append(((by - ay)/length, (ax - bx)/length))
+	result = []
+	for i in range(n):
+		(x, y), n1, n2 = ring[i], normals[i - 1], normals[i]
+		start = (x + distance*n1[0], y + distance*n1[1])
+		end = (x + distance*n2[0], y + distance*n2[1])
+		cross = n1[0]*n2[1] - n1[1]*n2[0]
+		dot = n1[0]*n2[0] + n1[1]*n2[1]
+		result.append(start)
+		if (dot > 1 - 1e-12 and abs(cross) < 1e-12):
+			continue # straight on
+		if (cross*distance > 0 or (cross == 0 and dot < 0)):
+			if (join == ROUND):
+				# A spike turns half a circle, around its tip.
+				turn = math.atan2(cross, dot) if cross else math.copysign(math.pi, distance)
+				first = math.atan2(distance*n1[1], distance*n1[0])
+				result.extend(_arc((x, y), abs(distance), first, first + turn, tolerance))
+			elif (join == MITER and 1 + dot > 2/miter_limit**2):
+				# The offset lines meet at distance/cos(half the turn) from
+				# the vertex.
+				scale = distance/(1 + dot)
+				result.pop()
+				end = (x + scale*(n1[0] + n2[0]), y + scale*(n1[1] + n2[1]))
+		else:
+			result.append((x, y))
+		result.append(end)
+	return result
+
+def _offset_region(ring, distance, join, miter_limit, tolerance):
+	# The region covered by the offset of a ring, or for a hole the region
+	# left uncovered by it, counterclockwise.
+	raw = _ring(_offset_ring(ring, distance, join, miter_limit, tolerance))
+	if (_signed_area(ring) < 0):
+		raw.reverse()
+	return _boolean([raw], [], lambda a, b: a)
+
+class Polygon(object):
+
+	# A set of points bounded by rings of vertices, which may have holes and
+	# any number of separate parts, e.g. the zones of a map:
+	#
+	#     walkable = Polygon.from_rect(level) - Polygon.union_all(walls)
+	#     walkable |= Polygon.from_ellipse(clearing)
+	#
+	# The rings passed in may cross themselves and each other; which points
+	# they cover is decided by ``fill_rule`` (EVEN_ODD, NONZERO or POSITIVE).
+	# Polygons store the boundary of the covered points: rings that don't
+	# cross, with the outer ones counterclockwise and holes clockwise.
+	# Union, intersection, subtraction and xor can be given Rects as well as
+	# Polygons.
+
+	def __init__(self, rings=(), fill_rule=EVEN_ODD):
+		if (isinstance(rings, Polygon)):
+			self._rings = list(rings._rings)
+			return
+		if (isinstance(rings, Rect)):
+			self._rings = Polygon.from_rect(rings)._rings
+			return
+		if (len(rings) and isinstance(getattr(rings[0], "_components", rings[0])[0], Number)):
+			rings = [rings]
+		rings = [r for r in map(_ring, rings) if len(r) >= 3]
+		self._rings = _boolean(rings, [], lambda a, b: a, _check_fill_rule(fill_rule))
+
+	@classmethod
+	def _from_rings(cls, rings):
+		polygon = cls.__new__(cls)
+		polygon._rings = rings
+		return polygon
+
+	@classmethod
+	def from_rect(cls, rect):
+		return cls._from_rings([_rect_ring(rect)] if rect[2] and rect[3] else [])
+
+	@classmethod
+	def from_ellipse(cls, ellipse, count=64):
+		# An inscribed polygon with ``count`` vertices.
+		x, y, a, b = ellipse
+		a, b = abs(a), abs(b)
+		angles = [2*math.pi*k/count for k in range(count)]
+		return cls._from_rings([[(x + a*math.cos(t), y + b*math.sin(t)) for t in angles]] if a and b else [])
+
+	@classmethod
+	def union_all(cls, polygons):
+		# One sweep over all the polygons, instead of a union per polygon.
+		rings = []
+		for polygon in polygons:
+			rings.extend(Polygon._rings_of(polygon))
+		return cls._from_rings(_boolean(rings, [], lambda a, b: a))
+
+	@staticmethod
+	def _rings_of(other):
+		if (isinstance(other, Polygon)):
+			return other._rings
+		if (isinstance(other, Rect)):
+			return Polygon.from_rect(other)._rings
+		return Polygon(other)._rings
+
+	def __repr__(self):
+		return "%s(%i rings, area %s)" % (self.__class__.__name__, len(self._rings), self.area)
+
+	def __eq__(self, other):
+		try:
+			return sorted(map(_canonical, self._rings)) == sorted(map(_canonical, Polygon._rings_of(other)))
+		except:
+			return False
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __bool__(self):
+		return bool(self._rings)
+
+	def __len__(self):
+		return len(self._rings)
+
+	def __iter__(self):
+		return iter(self.rings)
+
+	@property
+	def rings(self):
+		return [[ImmutableVector2(*p) for p in ring] for ring in self._rings]
+
+	@property
+	def vertex_count(self):
+		return sum(map(len, self._rings))
+
+	@property
+	def area(self):
+		return sum(map(_signed_area, self._rings))
+
+	@property
+	def perimeter(self):
+		return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for ring in self._rings for a, b in zip(ring, ring[1:] + ring[:1]))
+
+	@property
+	def bounds(self):
+		# The smallest Rect containing the polygon, or None if it's empty.
+		if (not self._rings):
+			return None
+		x1, y1, x2, y2 = _bounds([p for ring in self._rings for p in ring])
+		return Rect(x1, y1, x2 - x1, y2 - y1)
+
+	def _parts(self):
+		# (outer ring, holes) pairs, with a hole belonging to the smallest
+		# outer ring around it.
+		outers = sorted(
+			((_signed_area(r), _bounds(r), r) for r in self._rings if _signed_area(r) > 0),
+			key=lambda o: o[0]
+			)
+		holes = dict((id(o[2]), []) for o in outers)
+		for ring in self._rings:
+			if (_signed_area(ring) > 0):
+				continue
+			x1, y1, x2, y2 = _bounds(ring)
+			for area, (ox1, oy1, ox2, oy2), outer in outers:
+				if (ox1 <= x1 and oy1 <= y1 and x2 <= ox2 and y2 <= oy2):
+					side = 0
+					for p in ring:
+						side = _ring_side(outer, p)
+						if (side):
+							break
+					if (side > 0):
+						holes[id(outer)].append(ring)
+						break
+		return [(outer, holes[id(outer)]) for area, bounds, outer in reversed(outers)]
+
+	def polygons(self):
+		# The separate parts of the polygon as (outer ring, holes) pairs,
+		# largest first.
+		return [
+			([ImmutableVector2(*p) for p in outer], [[ImmutableVector2(*p) for p in h] for h in holes])
+			for outer, holes in self._parts()
+		]
+
+	## Algebra
+
+	def _operate(self, other, keep):
+		return Polygon._from_rings(_boolean(self._rings, Polygon._rings_of(other), keep))
+
+	def union(self, other):
+		return self._operate(other, lambda a, b: a or b)
+
+	def intersection(self, other):
+		return self._operate(other, lambda a, b: a and b)
+
+	def subtract(self, other):
+		return self._operate(other, lambda a, b: a and not b)
+
+	def xor(self, other):
+		return self._operate(other, lambda a, b: a != b)
+
+	__or__ = union
+	__and__ = intersection
+	__sub__ = subtract
+	__xor__ = xor
+
+	def __ior__(self, other):
+		self._rings = self.union(other)._rings
+		return self
+
+	def __iand__(self, other):
+		self._rings = self.intersection(other)._rings
+		return self
+
+	def __isub__(self, other):
+		self._rings = self.subtract(other)._rings
+		return self
+
+	def __ixor__(self, other):
+		self._rings = self.xor(other)._rings
+		return self
+
+	def offset(self, distance, join=ROUND, miter_limit=2.0, tolerance=None):
+		# The points within ``distance`` of the polygon, or for a negative
+		# distance the points at least -distance inside it. Round joins are
+		# approximated by chords no further than ``tolerance`` (a thousandth
+		# of the distance by default) from the arcs. Miter joins longer than
+		# ``miter_limit`` times the distance are beveled.
+		if (join not in (ROUND, MITER, BEVEL)):
+			raise ValueError("Unknown join '%s'." % join)
+		if (distance == 0):
+			return Polygon(self)
+		if (tolerance is None):
+			tolerance = abs(distance)*1e-3
+		elif (tolerance <= 0):
+			raise ValueError("The offset tolerance must be positive.")
+		# Each part is offset on its own: the loops winding the wrong way in
+		# the raw offset of one ring could cancel out the offset of another.
+		parts = []
+		for outer, holes in self._parts():
+			part = _offset_region(outer, distance, join, miter_limit, tolerance)
+			if (holes):
+				holes = [r for h in holes for r in _offset_region(h, distance, join, miter_limit, tolerance)]
+				part = _boolean(part, holes, lambda a, b: a and not b)
+			parts.extend(part)
+		if (len(parts) > 1):
+			parts = _boolean(parts, [], lambda a, b: a)
+		return Polygon._from_rings(parts)
+
+	## Queries
+
+	def contains_point(self, point):
+		# Points on the boundary are contained.
+		point = tuple(map(float, getattr(point, "_components", point)))
+		inside = False
+		for ring in self._rings:
+			side = _ring_side(ring, point)
+			if (side == 0):
+				return True
+			if (side > 0):
+				inside = not inside
+		return inside
+
+	def translate(self, delta):
+		dx, dy = delta
+		self._rings = [[(x + dx, y + dy) for x, y in ring] for ring in self._rings]
@@ -0,0 +1,283 @@
+import heapq
+from numbers import Number
+
+from .exception import *
+from .vector import *
+from .compat import *
+from .fuzzy import *
+from .linear import *
+from .precision import as_float_array
+
+numpy = try_import("numpy")
+
+__all__ = ["Polyline2D", "Polyline3D"]
+
+RDP = "rdp"
+VISVALINGAM = "visvalingam"
+
+# Bounds the size of the (points x segments) temporaries in nearest_points.
+_NEAREST_BLOCK = 1 << 20
+
+@fill_in_fne
+class _PolylineBase(FuzzyComparable):
+
+	# A path through a sequence of vertices, stored as one read-only (N, d)
+	# array. Segment and cumulative lengths are computed once, on first use,
+	# so length queries don't allocate a vector per segment like a list of
+	# segments does. Polylines are only changed with ``translate``, which
+	# replaces the vertex array.
+
+	@requires("numpy")
+	def __init__(self, *vertices):
+		if (len(vertices) == 1 and not isinstance(vertices[0][0], Number)):
+			vertices = vertices[0]
+		if (not isinstance(vertices, numpy.ndarray)):
+			vertices = [getattr(v, "_components", v) for v in vertices]
+		self._set_vertices(as_float_array(vertices, copy=True))
+
+	def _set_vertices(self, vertices):
+		vertices = vertices.reshape(-1, self.__dimension__)
+		if (len(vertices) < 2):
+			raise ValueError("A polyline needs at least 2 vertices.")
+		vertices.flags.writeable = False
+		self._vertices = vertices
+		self._lengths = None
+
+	@classmethod
+	def _from_vertices(cls, vertices):
+		polyline = cls.__new__(cls)
+		polyline._set_vertices(vertices)
+		return polyline
+
+	@classmethod
+	def from_segments(cls, segments):
+		# Joins consecutive segments, which should each start where the
+		# previous one ends.
+		segments = list(segments)
+		if (not segments):
+			raise ValueError("Cannot make a polyline out of no segments.")
+		vertices = [change_vector_dimension(segments[0][0], cls.__dimension__)._components]
+		vertices += [change_vector_dimension(s[1], cls.__dimension__)._components for s in segments]
+		return cls._from_vertices(as_float_array(vertices))
+
+	def to_segments(self):
+		v = to_vector_many(self._vertices, immutable=True)
+		return [self.__segment__(v[i], v[i + 1]) for i in range(len(v) - 1)]
+
+	def __repr__(self):
+		return "%s(%i vertices, length %s)" % (self.__class__.__name__, len(self), self.length())
+
+	def __len__(self):
+		return len(self._vertices)
+
+	def __iter__(self):
+		return iter(to_vector_many(self._vertices, immutable=True))
+
+	def __getitem__(self, index):
+		if (not -len(self) <= index < len(self)):
+			raise index_out_of_range(type(self))
+		return self.__vector__(self._vertices[index])
+
+	def __eq__(self, other):
+		try:
+			return len(self) == len(other) and all(self[i] == other[i] for i in range(len(self)))
+		except:
+			return False
+
+	def __feq__(self, other, epsilon=None):
+		try:
+			return len(self) == len(other) and \
+				   all(fuzzy_eq(self[i], other[i], epsilon) for i in range(len(self)))
+		except:
+			return False
+
+	@property
+	def vertices(self):
+		return self._vertices
+
+	## Lengths
+
+	@property
+	def segment_lengths(self):
+		return numpy.diff(self.cumulative_lengths)
+
+	@property
+	def cumulative_lengths(self):
+		# The length of the path up to each vertex, starting at 0.
+		if (self._lengths is None):
+			deltas = numpy.diff(self._vertices, axis=0)
+			lengths = numpy.zeros(len(self._vertices))
+			numpy.cumsum(numpy.sqrt(numpy.einsum("ij,ij->i", deltas, deltas)), out=lengths[1:])
+			lengths.flags.writeable = False
+			self._lengths = lengths
+		return self._lengths
+
+	def length(self):
+		return float(self.cumulative_lengths[-1])
+
+	def points_at_lengths(self, lengths):
+		# The points at the given distances along the path, as an (N, d)
+		# array. Distances are clamped to [0, length].
+		cumulative = self.cumulative_lengths
+		lengths = numpy.clip(numpy.asarray(lengths, dtype=float), 0, cumulative[-1])
+		i = numpy.clip(numpy.searchsorted(cumulative, lengths, side="right") - 1, 0, len(cumulative) - 2)
+		span = cumulative[i + 1] - cumulative[i]
+		with numpy.errstate(invalid="ignore", divide="ignore"):
+			t = numpy.where(span > 0, (lengths - cumulative[i]) / span, 0)
+		v = self._vertices
+		return v[i] + t[..., None] * (v[i + 1] - v[i])
+
+	def point_at_length(self, length):
+		return self.__vector__(self.points_at_lengths(length))
+
+	def resample(self, count=None, spacing=None):
+		# Returns a polyline with ``count`` vertices (or vertices ``spacing``
+		# apart, plus the end point) spread evenly along this one.
+		total = self.length()
+		if (count is None):
+			if (spacing is None or spacing <= 0):
+				raise ValueError("resample needs a vertex count or a positive spacing.")
+			lengths = numpy.append(numpy.arange(0, total, spacing), total)
+		else:
+			if (count < 2):
+				raise ValueError("A polyline needs at least 2 vertices.")
+			lengths = numpy.linspace(0, total, count)
+		return self._from_vertices(self.points_at_lengths(lengths))
+
+	## Simplification
+
+	def simplify(self, epsilon, method=RDP):
+		# ``epsilon`` is a distance for RDP and an area for Visvalingam.
+		if (method == RDP):
+			return self.simplify_rdp(epsilon)
+		elif (method == VISVALINGAM):
+			return self.simplify_visvalingam(epsilon)
+		raise ValueError("Unknown simplification method '%s'." % method)
+
+	def simplify_rdp(self, epsilon):
+		# Ramer-Douglas-Peucker: keeps the vertices needed for the result to
+		# stay within ``epsilon`` of every original vertex.
+		v = self._vertices
+		keep = numpy.zeros(len(v), dtype=bool)
+		keep[0] = keep[-1] = True
+		stack = [(0, len(v) - 1)]
+		while (stack):
+			first, last = stack.pop()
+			if (last - first < 2):
+				continue
+			distances = _distances_to_segment(v[first + 1:last], v[first], v[last])
+			i = int(numpy.argmax(distances))
+			if (distances[i] > epsilon):
+				i += first + 1
+				keep[i] = True
+				stack.append((first, i))
+				stack.append((i, last))
+		return self._from_vertices(v[keep])
+
+	def simplify_visvalingam(self, min_area=None, count=None):
+		# Visvalingam-Whyatt: repeatedly removes the vertex forming the
+		# triangle of least area with its neighbours, until every triangle
+		# is at least ``min_area`` or only ``count`` vertices are left.
+		if (min_area is None and count is None):
+			raise ValueError("simplify_visvalingam needs a minimum area or a vertex count.")
+		v = self._vertices
+		n = len(v)
+		count = max(2, count or 2)
+		min_area = float("inf") if min_area is None else min_area
+		previous = numpy.arange(-1, n - 1)
+		next = numpy.arange(1, n + 1)
+		areas = numpy.full(n, numpy.inf)
+		areas[1:-1] = _triangle_areas(v[:-2], v[1:-1], v[2:])
+		heap = [(area, i) for i, area in enumerate(areas[1:-1].tolist(), 1)]
+		heapq.heapify(heap)
+		removed = numpy.zeros(n, dtype=bool)
+		left = n
+		while (heap and left > count):
+			area, i = heapq.heappop(heap)
+			if (removed[i] or area != areas[i]):
+				continue # stale entry
+			if (area >= min_area):
+				break
+			removed[i] = True
+			left -= 1
+			p, q = previous[i], next[i]
+			next[p], previous[q] = q, p
+			for j in (p, q):
+				if (0 < j < n - 1):
+					# A neighbour's area can't drop below the removed one,
+					# so vertices are removed in order of effective area.
+					areas[j] = max(area, float(_triangle_areas(v[previous[j]], v[j], v[next[j]])))
+					heapq.heappush(heap, (areas[j], j))
+		return self._from_vertices(v[~removed])
+
+	## Queries
+
+	def nearest_points(self, points, return_lengths=False):
+		# The closest point of the polyline to each of ``points`` as an
+		# (N, d) array, and optionally the distance along the path at which
+		# each one lies.
+		points = numpy.asarray(points, dtype=float).reshape(-1, self.__dimension__)
+		starts = self._vertices[:-1]
+		deltas = self._vertices[1:] - starts
+		squared = numpy.einsum("ij,ij->i", deltas, deltas)
+		squared[squared == 0] = 1 # zero length segments: t is 0 anyway
+
+		closest = numpy.empty_like(points)
+		lengths = numpy.empty(len(points))
+		cumulative = self.cumulative_lengths
+		block = max(1, _NEAREST_BLOCK // len(starts))
+		for lo in range(0, len(points), block):
+			chunk = points[lo:lo + block]
+			# (points, segments) parameters of the projections, clamped
+			t = numpy.einsum("pj,sj->ps", chunk, deltas) - numpy.einsum("sj,sj->s", starts, deltas)
+			numpy.clip(t / squared, 0, 1, out=t)
+			projected = starts + t[..., None] * deltas
+			distances = ((projected - chunk[:, None, :])**2).sum(axis=2)
+			nearest = numpy.argmin(distances, axis=1)
+			rows = numpy.arange(len(chunk))
+			closest[lo:lo + block] = projected[rows, nearest]
+			span = cumulative[nearest + 1] - cumulative[nearest]
+			lengths[lo:lo + block] = cumulative[nearest] + t[rows, nearest] * span
+		if (return_lengths):
+			return closest, lengths
+		return closest
+
+	def nearest_point(self, point):
+		point = change_vector_dimension(point, self.__dimension__)
+		return self.__vector__(self.nearest_points(point._components)[0])
+
+	def distance_to(self, point):
+		point = change_vector_dimension(point, self.__dimension__)
+		return (self.nearest_point(point) - point).magnitude()
+
+	def translate(self, delta):
+		delta = change_vector_dimension(delta, self.__dimension__)
+		lengths = self._lengths
+		self._set_vertices(self._vertices + numpy.asarray(delta._components, dtype=self._vertices.dtype))
+		self._lengths = lengths # translating doesn't change lengths
+
+def _distances_to_segment(points, start, end):
+	d = end - start
+	squared = d.dot(d)
+	if (squared == 0):
+		return numpy.sqrt(((points - start)**2).sum(axis=1))
+	t = numpy.clip((points - start).dot(d) / squared, 0, 1)
+	return numpy.sqrt(((points - start - t[:, None] * d)**2).sum(axis=1))
+
+def _triangle_areas(a, b, c):
+	u, v = b - a, c - a
+	if (u.shape[-1] == 2):
+		return numpy.abs(u[..., 0]*v[..., 1] - u[..., 1]*v[..., 0]) / 2
+	return numpy.sqrt((numpy.cross(u, v)**2).sum(axis=-1)) / 2
+
+class Polyline2D(_PolylineBase):
+
+	__dimension__ = 2
+	__vector__ = ImmutableVector2
+	__segment__ = Segment2D
+
+class Polyline3D(_PolylineBase):
+
+	__dimension__ = 3
+	__vector__ = ImmutableVector3
+	__segment__ = Segment3D
@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+
+from .compat import *
+
+__all__ = [
+	"FLOAT64", "FLOAT32", "get_precision", "set_precision", "use_precision", "get_dtype",
+	"as_float_array"
+	]
+
+## Storage precision
+##
+## Vectors and the array-backed containers (polylines, AABB3DArray, octrees,
+## datasets, stream chunks and the arrays made by vectors_to_array and
+## segments_to_array) store their coordinates as float64 by default.
+## float32 halves their memory and the bandwidth of batch operations on
+## them, which is usually plenty for rendering and large point clouds. The
+## rules are:
+##
+##   - New storage uses the active precision (see ``set_precision``).
+##   - float32 and float64 arrays passed in are kept as they are, so e.g.
+##     Vector2.from_array can still make views instead of copies.
+##   - Operations that update a container (e.g. ``translate``) keep its
+##     dtype; single vector arithmetic stores its results at the active
+##     precision.
+##   - Batch operations combining arrays of both precisions promote to
+##     float64, like numpy does. Python numbers never promote float32.
+##
+## Without numpy, vectors hold python floats (which are doubles), and only
+## vectors_to_array honours float32. The default epsilon of the fuzzy
+## comparisons follows the active precision either way (see fuzzy.py).
+## Exact predicates (predicates.py) always compute in float64.
+
+FLOAT64 = "f8"
+FLOAT32 = "f4"
+
+_active = {"precision": FLOAT64, "dtype": None}
+
+def _check(precision):
+	if (precision not in (FLOAT64, FLOAT32)):
+		raise ValueError("Unknown precision '%s', expected '%s' or '%s'." % (precision, FLOAT64, FLOAT32))
+	return precision
+
+def get_precision():
+	return _active["precision"]
+
+def set_precision(precision):
+	# Returns the previous precision.
+	previous = _active["precision"]
+	_active["precision"] = _check(precision)
+	_active["dtype"] = None
+	return previous
+
+@contextmanager
+def use_precision(precision):
+	previous = set_precision(precision)
+	try:
+		yield precision
+	finally:
+		set_precision(previous)
+
+def get_dtype(precision=None):
+	# The numpy dtype of ``precision``, the active one by default. This is
+	# on the path of every vector created, so the active one is cached.
+	if (precision is None):
+		dtype = _active["dtype"]
+		if (dtype is None):
+			dtype = _active["dtype"] = require("numpy").dtype(_active["precision"])
+		return dtype
+	return require("numpy").dtype(_check(precision))
+
+@requires("numpy")
+def as_float_array(values, copy=False):
+	# ``values`` as a float ndarray to store: float32 and float64 arrays keep
+	# their dtype, anything else is converted to the active precision.
+	numpy = try_import("numpy")
+	if (isinstance(values, numpy.ndarray) and values.dtype.kind == "f" and values.dtype.itemsize in (4, 8)):
+		return values.copy() if copy else values
+	return numpy.array(values, dtype=get_dtype())
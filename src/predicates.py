@@ -0,0 +1,234 @@
+from fractions import Fraction
+
+from .compat import *
+from .vector import *
+
+numpy = try_import("numpy")
+
+__all__ = [
+	"orient2d", "orient2d_many", "incircle", "segments_intersect", "line_intersection",
+	"convex_hull", "fallback_counts", "reset_fallback_counts"
+	]
+
+## Adaptive predicates
+##
+## Each predicate first evaluates its determinant in floating point and
+## compares it against a bound on the rounding error of that evaluation
+## (Shewchuk, "Adaptive Precision Floating-Point Arithmetic and Fast Robust
+## Geometric Predicates"). Only when the result is smaller than the bound,
+## which practically never happens for ordinary inputs, is the determinant
+## recomputed exactly with fractions. The sign of the result is always
+## correct; its magnitude is approximate.
+
+_EPSILON = 2.0**-53 # half an ulp of 1.0
+
+_CCW_BOUND = (3 + 16*_EPSILON)*_EPSILON
+_ICC_BOUND = (10 + 96*_EPSILON)*_EPSILON
+
+# How often each predicate fell back to exact arithmetic.
+_fallbacks = {"orient2d": 0, "incircle": 0}
+
+def fallback_counts():
+	return dict(_fallbacks)
+
+def reset_fallback_counts():
+	for key in _fallbacks:
+		_fallbacks[key] = 0
+
+def _orient2d_exact(ax, ay, bx, by, cx, cy):
+	ax, ay, bx, by, cx, cy = map(Fraction, (ax, ay, bx, by, cx, cy))
+	return (ax - cx)*(by - cy) - (ay - cy)*(bx - cx)
+
+def orient2d(a, b, c):
+	# Positive if a, b, c are in counterclockwise order (c is to the left of
+	# a -> b with the y axis pointing up), negative if they're clockwise and
+	# 0 if they're collinear.
+	ax, ay = a
+	bx, by = b
+	cx, cy = c
+	left = (ax - cx)*(by - cy)
+	right = (ay - cy)*(bx - cx)
+	det = left - right
+	if (abs(det) >= _CCW_BOUND*(abs(left) + abs(right))):
+		# This is also true when det is 0 because both terms are, which is
+		# exact.
+		return det
+	_fallbacks["orient2d"] += 1
+	return float(_orient2d_exact(ax, ay, bx, by, cx, cy))
+
+def orient2d_many(a, b, c):
+	# orient2d for arrays of points, any of which may be a single point that
+	# is broadcast. Returns an array of determinants.
+	numpy = require("numpy")
+	a, b, c = numpy.broadcast_arrays(*[numpy.asarray(p, dtype=float).reshape(-1, 2) for p in (a, b, c)])
+	left = (a[:, 0] - c[:, 0])*(b[:, 1] - c[:, 1])
+	right = (a[:, 1] - c[:, 1])*(b[:, 0] - c[:, 0])
+	det = left - right
+	uncertain = numpy.flatnonzero(numpy.abs(det) < _CCW_BOUND*(numpy.abs(left) + numpy.abs(right)))
+	if (len(uncertain)):
+		_fallbacks["orient2d"] += len(uncertain)
+		for i in uncertain.tolist():
+			det[i] = float(_orient2d_exact(*(a[i].tolist() + b[i].tolist() + c[i].tolist())))
+	return det
+
+def incircle(a, b, c, d):
+	# Positive if d lies inside the circle through a, b, c (which must be in
+	# counterclockwise order), negative if it lies outside and 0 if it's on
+	# the circle.
+	ax, ay = a
+	bx, by = b
+	cx, cy = c
+	dx, dy = d
+	adx, ady = ax - dx, ay - dy
+	bdx, bdy = bx - dx, by - dy
+	cdx, cdy = cx - dx, cy - dy
+
+	bdxcdy, cdxbdy = bdx*cdy, cdx*bdy
+	alift = adx*adx + ady*ady
+	cdxady, adxcdy = cdx*ady, adx*cdy
+	blift = bdx*bdx + bdy*bdy
+	adxbdy, bdxady = adx*bdy, bdx*ady
+	clift = cdx*cdx + cdy*cdy
+
+	det = alift*(bdxcdy - cdxbdy) + blift*(cdxady - adxcdy) + clift*(adxbdy - bdxady)
+	permanent = (abs(bdxcdy) + abs(cdxbdy))*alift + \
+				(abs(cdxady) + abs(adxcdy))*blift + \
+				(abs(adxbdy) + abs(bdxady))*clift
+	if (abs(det) > _ICC_BOUND*permanent or (det == 0 and permanent == 0)):
+		return det
+
+	_fallbacks["incircle"] += 1
+	dx, dy = Fraction(dx), Fraction(dy)
+	adx, ady = Fraction(ax) - dx, Fraction(ay) - dy
+	bdx, bdy = Fraction(bx) - dx, Fraction(by) - dy
+	cdx, cdy = Fraction(cx) - dx, Fraction(cy) - dy
+	return float(
+		(adx*adx + ady*ady)*(bdx*cdy - cdx*bdy) +
+		(bdx*bdx + bdy*bdy)*(cdx*ady - adx*cdy) +
+		(cdx*cdx + cdy*cdy)*(adx*bdy - bdx*ady)
+		)
+
+## Built on orient2d
+
+def _sign(x):
+	return (x > 0) - (x < 0)
+
+def _on_segment(p, q, r):
+	# r is collinear with p -> q; is it between them?
+	return min(p[0], q[0]) <= r[0] <= max(p[0], q[0]) and \
+		   min(p[1], q[1]) <= r[1] <= max(p[1], q[1])
+
+def segments_intersect(p1, p2, q1, q2):
+	# Whether the closed segments p1 -> p2 and q1 -> q2 have a point in
+	# common, decided exactly.
+	d1 = _sign(orient2d(q1, q2, p1))
+	d2 = _sign(orient2d(q1, q2, p2))
+	d3 = _sign(orient2d(p1, p2, q1))
+	d4 = _sign(orient2d(p1, p2, q2))
+	if (d1*d2 < 0 and d3*d4 < 0):
+		return True
+	return (d1 == 0 and _on_segment(q1, q2, p1)) or \
+		   (d2 == 0 and _on_segment(q1, q2, p2)) or \
+		   (d3 == 0 and _on_segment(p1, p2, q1)) or \
+		   (d4 == 0 and _on_segment(p1, p2, q2))
+
+def line_intersection(p1, p2, q1, q2):
+	# The point where the line through p1, p2 crosses the line through q1,
+	# q2 as an (x, y) tuple, or None if they're parallel. Parallelism is
+	# decided exactly, and the point is computed exactly when the float
+	# computation can't be trusted.
+	x1, y1 = p1
+	x2, y2 = p2
+	x3, y3 = q1
+	x4, y4 = q2
+	dx1, dy1 = x2 - x1, y2 - y1
+	dx2, dy2 = x4 - x3, y4 - y3
+	left, right = dx1*dy2, dy1*dx2
+	denom = left - right
+	if (abs(denom) >= _CCW_BOUND*(abs(left) + abs(right)) and denom != 0):
+		t = ((x3 - x1)*dy2 - (y3 - y1)*dx2)/denom
+		return (x1 + t*dx1, y1 + t*dy1)
+	_fallbacks["orient2d"] += 1
+	x1, y1, x2, y2, x3, y3, x4, y4 = map(Fraction, (x1, y1, x2, y2, x3, y3, x4, y4))
+	dx1, dy1 = x2 - x1, y2 - y1
+	dx2, dy2 = x4 - x3, y4 - y3
+	denom = dx1*dy2 - dy1*dx2
+	if (denom == 0):
+		return None
+	t = ((x3 - x1)*dy2 - (y3 - y1)*dx2)/denom
+	return (float(x1 + t*dx1), float(y1 + t*dy1))
+
+# Which of t >= 0, t <= 1, u >= 0 and u <= 1 _segment_intersection checks,
+# where t and u are the parameters of the crossing along each line.
+_SEGMENTS = (True, True, True, True)
+
+def _segment_intersection_exact(x1, y1, x2, y2, x3, y3, x4, y4, bounds=_SEGMENTS):
+	_fallbacks["orient2d"] += 1
+	x1, y1, x2, y2, x3, y3, x4, y4 = map(Fraction, (x1, y1, x2, y2, x3, y3, x4, y4))
+	dx1, dy1 = x2 - x1, y2 - y1
+	dx2, dy2 = x4 - x3, y4 - y3
+	denom = dx1*dy2 - dy1*dx2
+	if (denom == 0):
+		return None
+	t = ((x3 - x1)*dy2 - (y3 - y1)*dx2)/denom
+	u = ((x3 - x1)*dy1 - (y3 - y1)*dx1)/denom
+	if (any(check and not ok for check, ok in zip(bounds, (t >= 0, t <= 1, u >= 0, u <= 1)))):
+		return None
+	return (float(x1 + t*dx1), float(y1 + t*dy1))
+
+def _segment_intersection(x1, y1, x2, y2, x3, y3, x4, y4, bounds=_SEGMENTS):
+	# The point where the segments (x1, y1) -> (x2, y2) and (x3, y3) -> (x4,
+	# y4) cross as an (x, y) tuple, or None if they don't or are parallel.
+	# ``bounds`` drops some of the ends, for rays and lines (see _SEGMENTS).
+	# With d the denominator, whether they cross depends on the signs of d,
+	# t*d, (t - 1)*d, u*d and (u - 1)*d, each a determinant of the form
+	# orient2d filters; if any is uncertain it's all done exactly.
+	dx1, dy1 = x2 - x1, y2 - y1
+	dx2, dy2 = x4 - x3, y4 - y3
+	bx, by = x3 - x1, y3 - y1
+	terms = [(dx1*dy2, dy1*dx2)]
+	if (bounds[0]):
+		terms.append((bx*dy2, by*dx2))
+	if (bounds[1]):
+		terms.append(((x3 - x2)*dy2, (y3 - y2)*dx2))
+	if (bounds[2]):
+		terms.append((bx*dy1, by*dx1))
+	if (bounds[3]):
+		terms.append(((x4 - x1)*dy1, (y4 - y1)*dx1))
+	for left, right in terms:
+		if (abs(left - right) < _CCW_BOUND*(abs(left) + abs(right))):
+			return _segment_intersection_exact(x1, y1, x2, y2, x3, y3, x4, y4, bounds)
+	signs = [_sign(left - right) for left, right in terms]
+	denom = signs[0]
+	if (denom == 0):
+		return None
+	# The lower bounds need the same sign as d, the upper ones the opposite.
+	lower = [True, False, True, False]
+	for sign, is_lower in zip(signs[1:], [l for l, check in zip(lower, bounds) if check]):
+		if (sign*denom < 0 if is_lower else sign*denom > 0):
+			return None
+	t = (bx*dy2 - by*dx2)/(dx1*dy2 - dy1*dx2)
+	return (x1 + t*dx1, y1 + t*dy1)
+
+def convex_hull(points):
+	# The convex hull of 2D points in counterclockwise order (Andrew's
+	# monotone chain), without collinear points, as a list of
+	# ImmutableVector2.
+	if (numpy is not None and isinstance(points, numpy.ndarray)):
+		rows = points.reshape(-1, 2).tolist()
+	else:
+		rows = [list(getattr(p, "_components", p)) for p in points]
+	rows = sorted(set(map(tuple, rows)))
+	if (len(rows) < 3):
+		return [ImmutableVector2(*p) for p in rows]
+
+	def chain(rows):
+		hull = []
+		for p in rows:
+			while (len(hull) >= 2 and orient2d(hull[-2], hull[-1], p) <= 0):
+				hull.pop()
+			hull.append(p)
+		return hull
+
+	lower, upper = chain(rows), chain(reversed(rows))
+	return [ImmutableVector2(*p) for p in lower[:-1] + upper[:-1]]
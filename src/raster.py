@@ -0,0 +1,318 @@
+import math
+
+from .compat import *
+from .ellipse import Ellipse
+from .linear import Segment2D
+from .polygon import Polygon
+from .rect import Rect
+
+numpy = try_import("numpy")
+
+__all__ = ["Raster", "rasterize"]
+
+## Distance transforms
+##
+## Distances are measured between cell centers, in cells. With scipy they
+## come from scipy.ndimage; otherwise the separable transform of Felzenszwalb
+## and Huttenlocher is run with every row of the grid handled at once, one
+## column per step.
+
+def _lower_envelope(f):
+	# min over q of (p - q)**2 + f[:, q], for every p and row.
+	lines, n = f.shape
+	rows = numpy.arange(lines)
+	lifted = f + numpy.arange(n)**2
+	vertices = numpy.zeros((lines, n), dtype=numpy.intp)
+	bounds = numpy.empty((lines, n + 1))
+	bounds[:, 0], bounds[:, 1] = -numpy.inf, numpy.inf
+	k = numpy.zeros(lines, dtype=numpy.intp)
+	for q in range(1, n):
+		# Where the parabola of q overtakes the last one of the envelope;
+		# the ones it hides are popped.
+		v = vertices[rows, k]
+		s = (lifted[:, q] - lifted[rows, v])/(2*(q - v))
+		hidden = s <= bounds[rows, k]
+		while (hidden.any()):
+			k[hidden] -= 1
+			v = vertices[rows, k]
+			s = numpy.where(hidden, (lifted[:, q] - lifted[rows, v])/(2*(q - v)), s)
+			hidden &= s <= bounds[rows, k]
+		k += 1
+		vertices[rows, k] = q
+		bounds[rows, k] = s
+		bounds[rows, k + 1] = numpy.inf
+	result = numpy.empty((lines, n))
+	k[:] = 0
+	for q in range(n):
+		past = bounds[rows, k + 1] < q
+		while (past.any()):
+			k[past] += 1
+			past &= bounds[rows, k + 1] < q
+		v = vertices[rows, k]
+		result[:, q] = (q - v)**2 + f[rows, v]
+	return result
+
+def _distance_transform(mask):
+	# The distance from every True cell to the nearest False cell, or inf if
+	# there is none.
+	if (mask.all()):
+		return numpy.full(mask.shape, numpy.inf)
+	ndimage = try_import("scipy.ndimage")
+	if (ndimage is not None):
+		return ndimage.distance_transform_edt(mask)
+	return _distance_transform_numpy(mask)
+
+def _distance_transform_numpy(mask):
+	# Along the columns the nearest False cell is found with running maxima
+	# and minima of their indices.
+	rows, columns = mask.shape
+	index = numpy.arange(rows)[:, None]
+	far = rows + columns
+	before = numpy.maximum.accumulate(numpy.where(mask, -far, index), axis=0)
+	after = numpy.minimum.accumulate(numpy.where(mask, 2*far, index)[::-1], axis=0)[::-1]
+	nearest = numpy.minimum(index - before, after - index).astype(float)
+	return numpy.sqrt(_lower_envelope(nearest*nearest))
+
+def _signed_distances(occupied):
+	# Negative inside, in cells, with the zero level on the cell edges
+	# between occupied and free cells.
+	outside, inside = _distance_transform(~occupied), _distance_transform(occupied)
+	return numpy.where(occupied, .5 - inside, outside - .5)
+
+class Raster(object):
+
+	# An occupancy grid and a signed distance field of a set of shapes: Rects,
+	# Ellipses, Segment2Ds drawn ``thickness`` wide and Polygons (or rings
+	# of points). A cell is occupied when its center is inside a shape. The
+	# grid covers ``bounds`` with square cells of ``cell_size``; arrays are
+	# indexed [row, column], with row 0 at the lowest y.
+	#
+	# Every shape is only evaluated at the cells within its bounding box, and
+	# the grid keeps how many shapes cover each cell, so a shape is moved by
+	# changing it and calling ``update``, which only touches its old and new
+	# boxes. The distance field is brought up to date when it's read. With
+	# ``max_distance``, distances are clamped to it, which keeps updates
+	# local: only the cells within max_distance of a change are recomputed.
+	#
+	#     raster = Raster(Rect(0, 0, 100, 100), .5, max_distance=10)
+	#     walls = [raster.add(rect) for rect in level]
+	#     crate = raster.add(Rect(10, 10, 2, 2))
+	#     ...
+	#     crate_rect.translate((1, 0))
+	#     raster.update(crate, crate_rect)
+	#     field = raster.distance_field
+
+	@requires("numpy")
+	def __init__(self, bounds, cell_size, max_distance=None):
+		if (cell_size <= 0):
+			raise ValueError("The cell size must be positive.")
+		if (max_distance is not None and max_distance <= 0):
+			raise ValueError("The maximum distance must be positive.")
+		x, y, w, h = map(float, bounds)
+		self.origin = (min(x, x + w), min(y, y + h))
+		self.cell_size = float(cell_size)
+		self.columns = max(1, int(math.ceil(abs(w)/self.cell_size)))
+		self.rows = max(1, int(math.ceil(abs(h)/self.cell_size)))
+		self.max_distance = max_distance
+		self._counts = numpy.zeros((self.rows, self.columns), dtype=numpy.int32)
+		self._shapes = {}
+		self._next_key = 0
+		self._field = None
+		self._changes = []
+
+	def __repr__(self):
+		return "%s(%i x %i cells, %i shapes)" % (self.__class__.__name__, self.columns, self.rows, len(self._shapes))
+
+	def __len__(self):
+		return len(self._shapes)
+
+	def __contains__(self, key):
+		return key in self._shapes
+
+	@property
+	def shape(self):
+		return (self.rows, self.columns)
+
+	@property
+	def bounds(self):
+		return Rect(self.origin[0], self.origin[1], self.columns*self.cell_size, self.rows*self.cell_size)
+
+	def cell_centers(self):
+		# The x coordinates of the columns' centers and y of the rows'.
+		x, y = self.origin
+		return x + (numpy.arange(self.columns) + .5)*self.cell_size, y + (numpy.arange(self.rows) + .5)*self.cell_size
+
+	## Rasterizing
+
+	def _window(self, x1, y1, x2, y2):
+		# The rows and columns of the cells with centers in [x1, x2] x
+		# [y1, y2], as (row start, row end, column start, column end), or None.
+		x, y = self.origin
+		c = self.cell_size
+		c1, c2 = max(0, int(math.ceil((x1 - x)/c - .5))), min(self.columns, int(math.floor((x2 - x)/c - .5)) + 1)
+		r1, r2 = max(0, int(math.ceil((y1 - y)/c - .5))), min(self.rows, int(math.floor((y2 - y)/c - .5)) + 1)
+		if (c1 >= c2 or r1 >= r2):
+			return None
+		return r1, r2, c1, c2
+
+	def _centers(self, window):
+		r1, r2, c1, c2 = window
+		x, y = self.origin
+		c = self.cell_size
+		return x + (numpy.arange(c1, c2) + .5)*c, y + (numpy.arange(r1, r2) + .5)*c
+
+	def _rasterize(self, shape, thickness):
+		# (window, mask of the cells covered within it), or None.
+		if (isinstance(shape, Rect)):
+			x, y, w, h = map(float, shape)
+			window = self._window(min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h))
+			return window and (window, True)
+		if (isinstance(shape, Ellipse)):
+			(cx, cy), a, b = map(float, shape.center), abs(float(shape.a)), abs(float(shape.b))
+			window = self._window(cx - a, cy - b, cx + a, cy + b)
+			if (window is None or a == 0 or b == 0):
+				return None
+			xs, ys = self._centers(window)
+			return window, ((xs[None, :] - cx)/a)**2 + ((ys[:, None] - cy)/b)**2 <= 1
+		if (isinstance(shape, Segment2D)):
+			return self._rasterize_segment(shape, thickness)
+		if (not isinstance(shape, Polygon)):
+			try:
+				shape = Polygon(shape)
+			except Exception:
+				raise ValueError("Cannot rasterize %r." % (shape,))
+		return self._rasterize_polygon(shape)
+
+	def _rasterize_segment(self, segment, thickness):
+		# The cells within thickness/2 of the segment, or for no thickness
+		# the line one cell wide.
+		(x1, y1), (x2, y2) = [map(float, p) for p in (segment[0], segment[1])]
+		radius = thickness/2 if thickness else self.cell_size/2
+		window = self._window(min(x1, x2) - radius, min(y1, y2) - radius, max(x1, x2) + radius, max(y1, y2) + radius)
+		if (window is None):
+			return None
+		xs, ys = self._centers(window)
+		dx, dy = x2 - x1, y2 - y1
+		px, py = xs[None, :] - x1, ys[:, None] - y1
+		length = dx*dx + dy*dy
+		t = numpy.clip((px*dx + py*dy)/length, 0, 1) if length else 0
+		return window, (px - t*dx)**2 + (py - t*dy)**2 <= radius*radius
+
+	def _rasterize_polygon(self, polygon):
+		# Even-odd scanlines: every row counts the edges crossing it left of
+		# each cell center, with one cumulative sum over the crossings.
+		rings = polygon._rings
+		if (not rings):
+			return None
+		points = numpy.array([p for ring in rings for p in ring], dtype=float)
+		window = self._window(*(tuple(points.min(axis=0)) + tuple(points.max(axis=0))))
+		if (window is None):
+			return None
+		starts = numpy.concatenate([numpy.roll(numpy.array(ring, dtype=float), 1, axis=0) for ring in rings])
+		(ax, ay), (bx, by) = starts.T, points.T
+		xs, ys = self._centers(window)
+		y = ys[:, None]
+		crossing = (ay > y) != (by > y)
+		row, edge = numpy.nonzero(crossing)
+		x = ax[edge] + (ys[row] - ay[edge])*(bx[edge] - ax[edge])/(by[edge] - ay[edge])
+		# The first column of the window with its center right of the crossing.
+		column = numpy.clip(numpy.floor((x - xs[0])/self.cell_size) + 1, 0, len(xs)).astype(numpy.intp)
+		counts = numpy.zeros((len(ys), len(xs) + 1), dtype=numpy.int32)
+		numpy.add.at(counts, (row, column), 1)
+		return window, numpy.cumsum(counts[:, :-1], axis=1) % 2 == 1
+
+	def _apply(self, entry, sign):
+		if (entry is None):
+			return
+		(r1, r2, c1, c2), mask = entry
+		self._counts[r1:r2, c1:c2] += sign*numpy.asarray(mask, dtype=numpy.int32)
+		self._changes.append((r1, r2, c1, c2))
+
+	def add(self, shape, thickness=None):
+		# Returns a key for ``update`` and ``remove``. ``thickness`` is the
+		# width segments are drawn with.
+		key = self._next_key
+		self._next_key += 1
+		entry = self._rasterize(shape, thickness)
+		self._shapes[key] = (shape, thickness, entry)
+		self._apply(entry, 1)
+		return key
+
+	def update(self, key, shape=None, thickness=None):
+		# Rasterizes the shape of ``key`` again, after it has been moved or
+		# changed, or replaces it with ``shape``.
+		old_shape, old_thickness, entry = self._shapes[key]
+		shape = old_shape if shape is None else shape
+		thickness = old_thickness if thickness is None else thickness
+		self._apply(entry, -1)
+		entry = self._rasterize(shape, thickness)
+		self._shapes[key] = (shape, thickness, entry)
+		self._apply(entry, 1)
+
+	def remove(self, key):
+		self._apply(self._shapes.pop(key)[2], -1)
+
+	def clear(self):
+		self._shapes.clear()
+		self._counts[:] = 0
+		self._field = None
+		self._changes = []
+
+	## Results
+
+	@property
+	def occupancy(self):
+		# A (rows, columns) boolean array, True where a cell is covered.
+		return self._counts > 0
+
+	@property
+	def distance_field(self):
+		# A read-only (rows, columns) array of the signed distance from each
+		# cell center to the edges of the occupied cells, negative inside.
+		# Distances are multiples of the cell size off by at most half a
+		# cell, not distances to the shapes themselves.
+		if (self._field is None or (self._changes and self.max_distance is None)):
+			self._field = self._compute(self.occupancy)
+		elif (self._changes):
+			self._update_field()
+		self._changes = []
+		return self._field
+
+	def _compute(self, occupied):
+		field = _signed_distances(occupied)*self.cell_size
+		if (self.max_distance is not None):
+			numpy.clip(field, -self.max_distance, self.max_distance, out=field)
+		field.flags.writeable = False
+		return field
+
+	def _update_field(self):
+		# Changes only reach max_distance, so each changed window is grown by
+		# that much, and computed with as much again around it for the
+		# nearest cells on the other side.
+		reach = int(math.ceil(self.max_distance/self.cell_size)) + 1
+		field = self._field.copy()
+		occupied = self.occupancy
+		for r1, r2, c1, c2 in self._merge(self._changes):
+			inner = (max(0, r1 - reach), min(self.rows, r2 + reach), max(0, c1 - reach), min(self.columns, c2 + reach))
+			outer = (max(0, r1 - 2*reach), min(self.rows, r2 + 2*reach), max(0, c1 - 2*reach), min(self.columns, c2 + 2*reach))
+			local = _signed_distances(occupied[outer[0]:outer[1], outer[2]:outer[3]])*self.cell_size
+			numpy.clip(local, -self.max_distance, self.max_distance, out=local)
+			field[inner[0]:inner[1], inner[2]:inner[3]] = local[inner[0] - outer[0]:inner[1] - outer[0], inner[2] - outer[2]:inner[3] - outer[2]]
+		field.flags.writeable = False
+		self._field = field
+
+	def _merge(self, windows):
+		# Many small changes are cheaper as their bounding window.
+		if (len(windows) <= 4):
+			return windows
+		r1, r2, c1, c2 = zip(*windows)
+		return [(min(r1), max(r2), min(c1), max(c2))]
+
+@requires("numpy")
+def rasterize(shapes, bounds, cell_size, thickness=None):
+	# (occupancy, signed distance field) of ``shapes`` on a grid over
+	# ``bounds``, see Raster.
+	raster = Raster(bounds, cell_size)
+	for shape in shapes:
+		raster.add(shape, thickness)
+	return raster.occupancy, raster.distance_field
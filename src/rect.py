@@ -1,14 +1,23 @@
+import math
 from .vector import *
 from .compat import *
 from .fuzzy import *
-
-pygame = try_import("pygame")
+from .linear import Segment2D, _segment_rows
+from .backend import BATCH, get_backend
 
 __all__ = ["Rect"]
 
 @fill_in_fne
 class Rect(FuzzyComparable):
 
+	# Cohen-Sutherland outcode bits, set for points left of, right of, below
+	# and above the rect (with the y axis pointing up).
+	INSIDE = 0
+	LEFT = 1
+	RIGHT = 2
+	BOTTOM = 4
+	TOP = 8
+
 	def __init__(self, x, y, w, h):
 		self.center = ImmutableVector2(x, y)
 		self.width = w
@@ -32,7 +41,7 @@ class Rect(FuzzyComparable):
 		except:
 			return False
 
-	def __feq__(self, other, epsilon=EPSILON):
+	def __feq__(self, other, epsilon=None):
 		try:
 			return all(fuzzy_eq_numbers(self[i], other[i], epsilon) for i in range(4))
 		except:
@@ -78,6 +87,69 @@ class Rect(FuzzyComparable):
 		return (x <= px) == (px <= x + w) and \
 			   (y <= py) == (py <= y + h)
 
+	def contains_points(self, points, backend=None):
+		x, y, w, h = self
+		return get_backend(BATCH, len(points), backend).contains_rect(points, x, y, w, h)
+
+	## Clipping
+
+	def _bounds(self):
+		x, y, w, h = self
+		return min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h)
+
+	def _halfplanes(self):
+		# The sides in outcode bit order, as outward normals and offsets.
+		x0, y0, x1, y1 = self._bounds()
+		return [(-1, 0), (1, 0), (0, -1), (0, 1)], [-x0, x1, -y0, y1]
+
+	def outcode(self, point):
+		x0, y0, x1, y1 = self._bounds()
+		px, py = point
+		return (Rect.LEFT if px < x0 else Rect.RIGHT if px > x1 else 0) | \
+			   (Rect.BOTTOM if py < y0 else Rect.TOP if py > y1 else 0)
+
+	def outcodes(self, points, backend=None):
+		normals, offsets = self._halfplanes()
+		return get_backend(BATCH, len(points), backend).outcodes(points, normals, offsets)
+
+	def clip_segment(self, segment):
+		# Liang-Barsky: the part of ``segment`` inside the rect as a
+		# Segment2D, or None if there is none. Lines and rays are clipped
+		# too, into the segment crossing the rect.
+		x0, y0, x1, y1 = self._bounds()
+		(sx, sy), (ex, ey) = segment[0], segment[1]
+		dx, dy = ex - sx, ey - sy
+		t0, t1 = getattr(segment, "__range__", (0, 1))
+		for p, q in ((-dx, sx - x0), (dx, x1 - sx), (-dy, sy - y0), (dy, y1 - sy)):
+			if (p == 0):
+				if (q < 0):
+					return None # parallel to and outside this side
+			elif (p < 0):
+				t0 = max(t0, q/p)
+			else:
+				t1 = min(t1, q/p)
+			if (t0 > t1):
+				return None
+		if (math.isinf(t0) or math.isinf(t1)):
+			return None # a degenerate line
+		# Measured from the nearest end, so unclipped ends are exact.
+		return Segment2D(
+			(sx + t0*dx, sy + t0*dy) if t0 < 1 else (ex - (1 - t0)*dx, ey - (1 - t0)*dy),
+			(ex - (1 - t1)*dx, ey - (1 - t1)*dy) if t1 > 0 else (sx + t1*dx, sy + t1*dy)
+			)
+
+	def clip_segments(self, segments, backend=None):
+		# Clips a batch of segments (an (N, 2, 2) array or a sequence of
+		# segments or pairs of points) to the rect. Returns the (N, 2, 2)
+		# clipped segments, with rows of NaN for the segments entirely
+		# outside, and the (N,) mask of the visible ones. The endpoints'
+		# outcodes trivially accept or reject most segments of a batch much
+		# larger than the rect (or much smaller), so only the ones crossing
+		# its sides need clipping.
+		normals, offsets = self._halfplanes()
+		segments = _segment_rows(segments)
+		return get_backend(BATCH, len(segments), backend).clip_segments(segments, normals, offsets)
+
 	def collides_rect(self, rect):
 		x1, y1, w1, h1 = self
 		x2, y2, w2, h2 = rect
@@ -123,7 +195,7 @@ class Rect(FuzzyComparable):
 		max_x, max_y = max(x1 + w1, x2 + w2), max(y1 + h1, y2 + h2)
 
 		uw, uh = max_x - ux, max_y - uy
-		return Rect(ux, uy, max_x, max_y)
+		return Rect(ux, uy, uw, uh)
 
 	def fuse(self, rect):
 		x1, y1, w1, h1 = self
@@ -133,4 +205,5 @@ class Rect(FuzzyComparable):
 
 	@requires("pygame")
 	def to_pygame_rect(self):
+		pygame = require("pygame")
 		return pygame.Rect(self.center.x, self.center.y, self.width, self.height)
\ No newline at end of file
@@ -0,0 +1,292 @@
+from bisect import bisect_left, bisect_right
+from numbers import Number
+
+from .compat import *
+from .rect import *
+
+__all__ = ["Region"]
+
+## Regions are stored as bands: (y1, y2, xs) tuples sorted by y, where xs is
+## a flat tuple (x1, x2, x1, x2, ...) of the sorted, disjoint and
+## non-touching intervals covered between y1 and y2. Bands don't overlap,
+## and vertically adjacent bands with the same intervals are merged, so every
+## region has exactly one representation.
+
+def _normalize(rect):
+	x, y, w, h = rect
+	return min(x, x + w), min(y, y + h), max(x, x + w), max(y, y + h)
+
+def _merge_intervals(intervals):
+	# Sorted (x1, x2) pairs -> flat xs, joining overlapping and touching ones.
+	xs = []
+	for x1, x2 in intervals:
+		if (xs and x1 <= xs[-1]):
+			if (x2 > xs[-1]):
+				xs[-1] = x2
+		else:
+			xs.extend((x1, x2))
+	return tuple(xs)
+
+def _combine(xa, xb, keep):
+	# Applies ``keep(in_a, in_b)`` to two flat interval lists. As in
+	# ``_operate``, only the intervals of ``xa`` within the x range of ``xb``
+	# need to be looked at.
+	if (not xb):
+		return xa if keep(True, False) else ()
+	if (not xa):
+		return xb if keep(False, True) else ()
+	lo = bisect_left(xa, xb[0]) & ~1
+	hi = bisect_right(xa, xb[-1])
+	hi += hi & 1
+	middle = _combine_all(xa[lo:hi], xb, keep)
+	if (not keep(True, False)):
+		return middle
+	return xa[:lo] + middle + xa[hi:]
+
+def _combine_all(xa, xb, keep):
+	events = sorted([(x, 0) for x in xa] + [(x, 1) for x in xb])
+	inside = [False, False]
+	result = []
+	state = False
+	i = 0
+	while (i < len(events)):
+		x = events[i][0]
+		while (i < len(events) and events[i][0] == x):
+			inside[events[i][1]] = not inside[events[i][1]]
+			i += 1
+		now = keep(inside[0], inside[1])
+		if (now != state):
+			result.append(x)
+			state = now
+	return tuple(result)
+
+def _append_band(bands, y1, y2, xs):
+	if (not xs or y1 >= y2):
+		return
+	if (bands and bands[-1][1] == y1 and bands[-1][2] == xs):
+		bands[-1] = (bands[-1][0], y2, xs)
+	else:
+		bands.append((y1, y2, xs))
+
+def _band_at(bands, i, y):
+	# Advances index i past the bands ending at or above y; returns the new
+	# index and the intervals of the band covering [y, ...) (or ()).
+	while (i < len(bands) and bands[i][1] <= y):
+		i += 1
+	if (i < len(bands) and bands[i][0] <= y):
+		return i, bands[i][2]
+	return i, ()
+
+def _operate(a, b, keep):
+	# Outside the y range of ``b`` the result is either the bands of ``a``
+	# unchanged (union, subtraction, xor) or nothing (intersection), so only
+	# the overlap is recomputed. This keeps adding one rect at a time to a
+	# large region cheap.
+	if (not b):
+		return list(a) if keep(True, False) else []
+	lo, hi = b[0][0], b[-1][1]
+	first = 0
+	while (first < len(a) and a[first][1] <= lo):
+		first += 1
+	last = first
+	while (last < len(a) and a[last][0] < hi):
+		last += 1
+	outside = keep(True, False)
+	bands = a[:first] if outside else []
+	for band in _operate_all(a[first:last], b, keep):
+		_append_band(bands, *band)
+	if (outside and last < len(a)):
+		# Only the first band can coalesce with the recomputed ones.
+		_append_band(bands, *a[last])
+		bands.extend(a[last + 1:])
+	return bands
+
+def _operate_all(a, b, keep):
+	ys = sorted(set(y for band in a + b for y in band[:2]))
+	bands = []
+	i = j = 0
+	for y1, y2 in zip(ys, ys[1:]):
+		i, xa = _band_at(a, i, y1)
+		j, xb = _band_at(b, j, y1)
+		if (xa or xb):
+			_append_band(bands, y1, y2, _combine(xa, xb, keep))
+	return bands
+
+def _from_rects(rects):
+	# Sweeps the rects top to bottom, so building a region from many rects
+	# costs one pass instead of a union per rect.
+	rects = sorted((r for r in map(_normalize, rects) if r[0] < r[2] and r[1] < r[3]), key=lambda r: r[1])
+	ys = sorted(set(y for r in rects for y in (r[1], r[3])))
+	bands = []
+	active = []
+	next = 0
+	for y1, y2 in zip(ys, ys[1:]):
+		while (next < len(rects) and rects[next][1] <= y1):
+			active.append(rects[next])
+			next += 1
+		active = [r for r in active if r[3] > y1]
+		if (active):
+			_append_band(bands, y1, y2, _merge_intervals(sorted((r[0], r[2]) for r in active)))
+	return bands
+
+class Region(object):
+
+	# A set of points covered by rects, e.g. the damaged parts of a screen:
+	#
+	#     damage = Region()
+	#     for sprite in moved:
+	#         damage |= sprite.old_rect
+	#         damage |= sprite.rect
+	#     pygame.display.update(damage.to_pygame_rects())
+	#
+	# Union, intersection, subtraction and xor are exact and can be given
+	# Rects (or (x, y, w, h) tuples) as well as Regions.
+
+	def __init__(self, rects=()):
+		if (isinstance(rects, Region)):
+			self._bands = list(rects._bands)
+		elif (isinstance(rects, Rect) or (len(rects) == 4 and isinstance(rects[0], Number))):
+			self._bands = _from_rects([rects])
+		else:
+			self._bands = _from_rects(rects)
+
+	@classmethod
+	def _from_bands(cls, bands):
+		region = cls.__new__(cls)
+		region._bands = bands
+		return region
+
+	@staticmethod
+	def _bands_of(other):
+		if (isinstance(other, Region)):
+			return other._bands
+		return _from_rects([other])
+
+	def __repr__(self):
+		return "%s(%s)" % (self.__class__.__name__, self.rects())
+
+	def __eq__(self, other):
+		try:
+			return self._bands == Region._bands_of(other)
+		except:
+			return False
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __bool__(self):
+		return bool(self._bands)
+
+	def __len__(self):
+		return len(self.rects())
+
+	def __iter__(self):
+		return iter(self.rects())
+
+	@property
+	def bands(self):
+		return list(self._bands)
+
+	@property
+	def area(self):
+		return sum((y2 - y1)*sum(xs[1::2]) - (y2 - y1)*sum(xs[::2]) for y1, y2, xs in self._bands)
+
+	@property
+	def bounds(self):
+		# The smallest Rect containing the region, or None if it's empty.
+		if (not self._bands):
+			return None
+		x1 = min(xs[0] for y1, y2, xs in self._bands)
+		x2 = max(xs[-1] for y1, y2, xs in self._bands)
+		y1, y2 = self._bands[0][0], self._bands[-1][1]
+		return Rect(x1, y1, x2 - x1, y2 - y1)
+
+	## Algebra
+
+	def union(self, other):
+		return Region._from_bands(_operate(self._bands, Region._bands_of(other), lambda a, b: a or b))
+
+	def intersection(self, other):
+		return Region._from_bands(_operate(self._bands, Region._bands_of(other), lambda a, b: a and b))
+
+	def subtract(self, other):
+		return Region._from_bands(_operate(self._bands, Region._bands_of(other), lambda a, b: a and not b))
+
+	def xor(self, other):
+		return Region._from_bands(_operate(self._bands, Region._bands_of(other), lambda a, b: a != b))
+
+	__or__ = union
+	__and__ = intersection
+	__sub__ = subtract
+	__xor__ = xor
+
+	def __ior__(self, other):
+		self._bands = self.union(other)._bands
+		return self
+
+	def __iand__(self, other):
+		self._bands = self.intersection(other)._bands
+		return self
+
+	def __isub__(self, other):
+		self._bands = self.subtract(other)._bands
+		return self
+
+	def __ixor__(self, other):
+		self._bands = self.xor(other)._bands
+		return self
+
+	def clear(self):
+		self._bands = []
+
+	## Queries
+
+	def contains_point(self, point):
+		px, py = point
+		for y1, y2, xs in self._bands:
+			if (y1 <= py < y2):
+				return any(xs[i] <= px < xs[i + 1] for i in range(0, len(xs), 2))
+			if (py < y1):
+				break
+		return False
+
+	def collides_rect(self, rect):
+		return bool(self.intersection(rect))
+
+	def contains_rect(self, rect):
+		return not Region(rect).subtract(self)
+
+	def translate(self, delta):
+		dx, dy = delta
+		self._bands = [
+			(y1 + dy, y2 + dy, tuple(x + dx for x in xs)) for y1, y2, xs in self._bands
+		]
+
+	## Export
+
+	def rects(self):
+		# The region as a list of disjoint Rects. Intervals that continue
+		# unchanged from one band to the next are merged into a single
+		# taller rect, which usually gives far fewer rects than bands.
+		result = []
+		open = {}
+		previous_y2 = None
+		for y1, y2, xs in self._bands:
+			intervals = [(xs[i], xs[i + 1]) for i in range(0, len(xs), 2)]
+			still_open = {}
+			for interval in intervals:
+				top = open.pop(interval, None) if y1 == previous_y2 else None
+				still_open[interval] = y1 if top is None else top
+			for (x1, x2), top in open.items():
+				result.append((top, x1, x2, previous_y2))
+			open = still_open
+			previous_y2 = y2
+		for (x1, x2), top in open.items():
+			result.append((top, x1, x2, previous_y2))
+		result.sort()
+		return [Rect(x1, y1, x2 - x1, y2 - y1) for y1, x1, x2, y2 in result]
+
+	@requires("pygame")
+	def to_pygame_rects(self):
+		pygame = require("pygame")
+		return [pygame.Rect(*r) for r in self.rects()]
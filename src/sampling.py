@@ -0,0 +1,133 @@
+import math
+
+from .compat import *
+from .precision import get_dtype
+
+numpy = try_import("numpy")
+
+__all__ = [
+	"sample_unit_circle", "sample_unit_sphere", "sample_rect", "sample_ellipse", "sample_ellipsoid",
+	"sample_segment", "sample_bezier", "sample_poisson_disk"
+	]
+
+## Random sampling
+##
+## Every sampler draws ``count`` points at once and returns them as a
+## (count, d) array at the active precision (see precision.py). ``rng`` is a
+## numpy.random.Generator, or anything numpy.random.default_rng takes (None
+## or a seed), so the same seed gives the same points.
+
+def _generator(rng):
+	return require("numpy").random.default_rng(rng)
+
+def _components(point):
+	return [float(c) for c in getattr(point, "_components", point)]
+
+def _result(points):
+	return points.astype(get_dtype(), copy=False)
+
+def _circle(count, rng):
+	angles = rng.uniform(0, 2*math.pi, count)
+	return numpy.stack([numpy.cos(angles), numpy.sin(angles)], axis=1)
+
+def _sphere(count, rng):
+	# Archimedes: the height of a uniform point on the sphere is uniform.
+	z = rng.uniform(-1, 1, count)
+	angles = rng.uniform(0, 2*math.pi, count)
+	r = numpy.sqrt(1 - z*z)
+	return numpy.stack([r*numpy.cos(angles), r*numpy.sin(angles), z], axis=1)
+
+@requires("numpy")
+def sample_unit_circle(count, rng=None):
+	return _result(_circle(count, _generator(rng)))
+
+@requires("numpy")
+def sample_unit_sphere(count, rng=None):
+	return _result(_sphere(count, _generator(rng)))
+
+@requires("numpy")
+def sample_rect(rect, count, rng=None):
+	x, y, w, h = map(float, rect)
+	return _result(_generator(rng).random((count, 2))*(w, h) + (x, y))
+
+@requires("numpy")
+def sample_ellipse(ellipse, count, rng=None):
+	# Uniform in the unit disk (the square root keeps the density flat out
+	# to the rim), then stretched, which keeps it uniform.
+	rng = _generator(rng)
+	points = _circle(count, rng)*numpy.sqrt(rng.random(count))[:, None]
+	return _result(points*(float(ellipse.a), float(ellipse.b)) + _components(ellipse.center))
+
+@requires("numpy")
+def sample_ellipsoid(ellipsoid, count, rng=None):
+	rng = _generator(rng)
+	points = _sphere(count, rng)*numpy.cbrt(rng.random(count))[:, None]
+	return _result(points*(float(ellipsoid.a), float(ellipsoid.b), float(ellipsoid.c)) + _components(ellipsoid.center))
+
+@requires("numpy")
+def sample_segment(segment, count, rng=None):
+	start, end = numpy.array(_components(segment[0])), numpy.array(_components(segment[1]))
+	return _result(start + _generator(rng).random(count)[:, None]*(end - start))
+
+@requires("numpy")
+def sample_bezier(curve, count, rng=None, resolution=256):
+	# Uniform by arc length: the length is tabulated on ``resolution`` chords
+	# and inverted by interpolation, so the density is flat up to the
+	# difference between the curve and its chords.
+	times = numpy.linspace(0, 1, resolution + 1)
+	points = curve.evaluate_many(times, backend="numpy")
+	lengths = numpy.concatenate([[0], numpy.cumsum(numpy.linalg.norm(numpy.diff(points, axis=0), axis=1))])
+	if (lengths[-1] == 0):
+		return _result(numpy.repeat(points[:1], count, axis=0))
+	t = numpy.interp(_generator(rng).uniform(0, lengths[-1], count), lengths, times)
+	return _result(curve.evaluate_many(t, backend="numpy"))
+
+@requires("numpy")
+def sample_poisson_disk(rect, radius, rng=None, attempts=30):
+	# Points at least ``radius`` apart filling the rect, so that no more can
+	# be added (Bridson). A background grid with cells of radius/sqrt(2)
+	# holds at most one point per cell, so only the 5x5 cells around a
+	# candidate can hold points too close to it. Each step draws
+	# ``attempts`` candidates around a random active point at once and
+	# checks them together, then accepts those that are also far enough
+	# from each other; a point with no candidates left is retired.
+	if (radius <= 0):
+		raise ValueError("The Poisson disk radius must be positive.")
+	rng = _generator(rng)
+	x, y, w, h = map(float, rect)
+	x0, y0, w, h = min(x, x + w), min(y, y + h), abs(w), abs(h)
+	if (w == 0 or h == 0):
+		return _result(numpy.zeros((0, 2)))
+	cell = radius/math.sqrt(2)
+	columns, rows = int(math.ceil(w/cell)), int(math.ceil(h/cell))
+	# Two cells of padding on each side spare the bounds checks.
+	grid = numpy.full((rows + 4, columns + 4), -1, dtype=numpy.int64)
+	points = numpy.zeros((rows*columns, 2))
+	offsets = numpy.arange(-2, 3)
+	squared = radius*radius
+	points[0] = rng.random(2)*(w, h)
+	grid[int(points[0, 1]/cell) + 2, int(points[0, 0]/cell) + 2] = 0
+	count, active = 1, [0]
+	while (active):
+		k = int(rng.integers(len(active)))
+		distances = rng.uniform(radius, 2*radius, attempts)
+		angles = rng.uniform(0, 2*math.pi, attempts)
+		candidates = points[active[k]] + numpy.stack([distances*numpy.cos(angles), distances*numpy.sin(angles)], axis=1)
+		candidates = candidates[(candidates[:, 0] >= 0) & (candidates[:, 0] < w) & (candidates[:, 1] >= 0) & (candidates[:, 1] < h)]
+		cx, cy = (candidates[:, 0]/cell).astype(int) + 2, (candidates[:, 1]/cell).astype(int) + 2
+		neighbours = grid[cy[:, None, None] + offsets[None, :, None], cx[:, None, None] + offsets[None, None, :]]
+		neighbours = neighbours.reshape(len(candidates), -1)
+		near = points[neighbours] - candidates[:, None, :]
+		near = (numpy.einsum("ijk,ijk->ij", near, near) < squared) & (neighbours >= 0)
+		start = count
+		for index in numpy.flatnonzero(~near.any(axis=1)).tolist():
+			candidate = candidates[index]
+			if (all(((candidate - points[i])**2).sum() >= squared for i in range(start, count))):
+				points[count] = candidate
+				grid[cy[index], cx[index]] = count
+				active.append(count)
+				count += 1
+		if (count == start):
+			active[k] = active[-1]
+			active.pop()
+	return _result(points[:count] + (x0, y0))
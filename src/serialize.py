@@ -0,0 +1,320 @@
+import struct
+import sys
+from array import array
+from itertools import chain
+
+from .compat import *
+from .precision import FLOAT64, FLOAT32
+from .vector import *
+from .linear import *
+from .rect import *
+from .ellipse import *
+from .bezier import *
+
+numpy = try_import("numpy")
+
+__all__ = [
+	"SerializationException", "FLOAT64", "FLOAT32", "dumps", "loads", "dump", "load",
+	"dump_many", "dumps_batch", "loads_batch", "loads_batch_array", "iter_load",
+	"iter_load_arrays"
+	]
+
+## Format
+##
+## Single record:  tag (u8), flags (u8), [dimension (u8), count (u16)], payload
+## Batch record:   tag | BATCH (u8), flags (u8), dimension (u8), pad, count (u32),
+##                 points (u32), pad (4), payload
+##
+## The payload is packed little-endian floats (float64, or float32 when the
+## FLOAT32 flag is set). The bracketed fields are only present for types with
+## a variable size (BezierCurve: dimension and number of control points).
+## Batch payloads are columnar: all values of the first field, then all
+## values of the second field, ... so that each column can be decoded into an
+## array without copying. Batch headers are 16 bytes to keep the payload
+## 8-byte aligned.
+
+_FLAG_FLOAT32 = 0x01
+_BATCH = 0x80
+
+_HEADER = struct.Struct("<BB")
+_VARIABLE_HEADER = struct.Struct("<BH")
+_BATCH_HEADER = struct.Struct("<BBBxII4x")
+
+_SWAP = sys.byteorder != "little"
+
+class SerializationException(Exception):
+	pass
+
+def _vector_columns(cls):
+	def decode_columns(columns):
+		if (numpy is None):
+			return None
+		# Vectors view the decoded buffer when it's writeable, read-only
+		# buffers (like bytes) are copied so the vectors stay mutable.
+		return cls.from_array(columns.T if columns.flags.writeable else columns.T.copy())
+	return decode_columns
+
+def _vector_codec(cls, d):
+	return (d, lambda v: v._components, lambda values, d: cls(*values), _vector_columns(cls))
+
+def _line_codec(cls, d):
+	return (
+		2*d,
+		lambda l: chain(l[0]._components, l[1]._components),
+		lambda values, d: cls(values[:len(values)//2], values[len(values)//2:]),
+		None
+		)
+
+def _shape_codec(cls, n):
+	return (n, iter, lambda values, d: cls(*values), None)
+
+def _bezier_decode(values, d):
+	return BezierCurve(*[values[i:i + d] for i in range(0, len(values), d)])
+
+_BEZIER = 17
+
+# tag -> (class, (fixed width or None, encode, decode, decode columns))
+_types = {
+	1: (Vector2, _vector_codec(Vector2, 2)),
+	2: (ImmutableVector2, _vector_codec(ImmutableVector2, 2)),
+	3: (Vector3, _vector_codec(Vector3, 3)),
+	4: (ImmutableVector3, _vector_codec(ImmutableVector3, 3)),
+	5: (Vector4, _vector_codec(Vector4, 4)),
+	6: (ImmutableVector4, _vector_codec(ImmutableVector4, 4)),
+	7: (Quaternion, _vector_codec(Quaternion, 4)),
+	8: (Line2D, _line_codec(Line2D, 2)),
+	9: (Ray2D, _line_codec(Ray2D, 2)),
+	10: (Segment2D, _line_codec(Segment2D, 2)),
+	11: (Line3D, _line_codec(Line3D, 3)),
+	12: (Ray3D, _line_codec(Ray3D, 3)),
+	13: (Segment3D, _line_codec(Segment3D, 3)),
+	14: (Rect, _shape_codec(Rect, 4)),
+	15: (Ellipse, _shape_codec(Ellipse, 4)),
+	16: (Ellipsoid3D, _shape_codec(Ellipsoid3D, 6)),
+	_BEZIER: (BezierCurve, (None, lambda b: chain.from_iterable(v._components for v in b), _bezier_decode, None)),
+	}
+
+_tags = {cls: tag for tag, (cls, codec) in _types.items()}
+
+def _tag_of(obj):
+	tag = _tags.get(type(obj))
+	if (tag is None):
+		for cls in type(obj).__mro__:
+			if (cls in _tags):
+				return _tags[cls]
+		raise SerializationException("Cannot serialize objects of type '%s'." % type(obj).__name__)
+	return tag
+
+def _typecode(precision):
+	if (precision == FLOAT64):
+		return "d", 0
+	elif (precision == FLOAT32):
+		return "f", _FLAG_FLOAT32
+	raise ValueError("Unknown precision '%s', expected '%s' or '%s'." % (precision, FLOAT64, FLOAT32))
+
+def _pack(typecode, values):
+	packed = array(typecode, values)
+	if (_SWAP):
+		packed.byteswap()
+	return packed.tobytes()
+
+def _unpack(typecode, data):
+	values = array(typecode)
+	values.frombytes(data)
+	if (_SWAP):
+		values.byteswap()
+	return values
+
+def _variable_shape(obj):
+	return len(obj.control_polygon[0]), len(obj.control_polygon)
+
+def dumps(obj, precision=FLOAT64):
+	typecode, flags = _typecode(precision)
+	tag = _tag_of(obj)
+	width, encode, decode, decode_columns = _types[tag][1]
+	header = _HEADER.pack(tag, flags)
+	if (width is None):
+		header += _VARIABLE_HEADER.pack(*_variable_shape(obj))
+	return header + _pack(typecode, [float(c) for c in encode(obj)])
+
+def _read_record(read):
+	# Reads one record with ``read(n)``, returning the decoded object (a list
+	# of objects for batch records), or None at the end of the data.
+	head = read(_HEADER.size)
+	if (not head):
+		return None
+	if (len(head) < _HEADER.size):
+		raise SerializationException("Truncated record header.")
+	tag, flags = _HEADER.unpack(head)
+	if (tag & _BATCH):
+		rest = read(_BATCH_HEADER.size - _HEADER.size)
+		header = _parse_batch_header(bytes(head) + bytes(rest))
+		return _decode_batch(header, read(header[-1]))
+
+	if (tag not in _types):
+		raise SerializationException("Unknown type tag %i." % tag)
+	width, encode, decode, decode_columns = _types[tag][1]
+	typecode = "f" if flags & _FLAG_FLOAT32 else "d"
+	d = None
+	if (width is None):
+		d, n = _VARIABLE_HEADER.unpack(read(_VARIABLE_HEADER.size))
+		width = d*n
+	size = width * array(typecode).itemsize
+	payload = read(size)
+	if (len(payload) != size):
+		raise SerializationException("Truncated record payload.")
+	return decode(list(_unpack(typecode, payload)), d)
+
+class _Reader(object):
+
+	def __init__(self, data):
+		self.data = memoryview(data).cast("B")
+		self.offset = 0
+
+	def __call__(self, n):
+		chunk = self.data[self.offset:self.offset + n]
+		self.offset += len(chunk)
+		return chunk
+
+def loads(data):
+	reader = _Reader(data)
+	obj = _read_record(reader)
+	if (obj is None):
+		raise SerializationException("No record to decode.")
+	return obj
+
+def dump(obj, stream, precision=FLOAT64):
+	stream.write(dumps(obj, precision))
+
+def load(stream):
+	obj = _read_record(stream.read)
+	if (obj is None):
+		raise SerializationException("No record to decode.")
+	return obj
+
+def dump_many(objects, stream, precision=FLOAT64, batch_size=None):
+	# Writes every object as its own record, or, given ``batch_size``, groups
+	# consecutive objects of the same type (and size) into batch records of
+	# at most ``batch_size`` objects. Returns the number of objects written.
+	count = 0
+	if (batch_size is None):
+		for obj in objects:
+			stream.write(dumps(obj, precision))
+			count += 1
+		return count
+
+	batch, key = [], None
+	for obj in objects:
+		tag = _tag_of(obj)
+		obj_key = (tag, _variable_shape(obj) if tag == _BEZIER else None)
+		if (batch and (obj_key != key or len(batch) >= batch_size)):
+			stream.write(dumps_batch(batch, precision))
+			count += len(batch)
+			batch = []
+		batch.append(obj)
+		key = obj_key
+	if (batch):
+		stream.write(dumps_batch(batch, precision))
+		count += len(batch)
+	return count
+
+def iter_load(stream):
+	# Decodes records one at a time from a binary stream (or bytes-like
+	# object), flattening batch records into individual objects.
+	read = stream.read if hasattr(stream, "read") else _Reader(stream)
+	while (True):
+		obj = _read_record(read)
+		if (obj is None):
+			return
+		if (isinstance(obj, list)):
+			for item in obj:
+				yield item
+		else:
+			yield obj
+
+## Batches
+
+def dumps_batch(objects, precision=FLOAT64):
+	typecode, flags = _typecode(precision)
+	objects = list(objects)
+	if (not objects):
+		raise SerializationException("Cannot serialize an empty batch.")
+	tag = _tag_of(objects[0])
+	width, encode, decode, decode_columns = _types[tag][1]
+	d = n = 0
+	if (width is None):
+		d, n = _variable_shape(objects[0])
+		width = d*n
+	rows = []
+	for obj in objects:
+		if (_tag_of(obj) != tag or (n and _variable_shape(obj) != (d, n))):
+			raise SerializationException("Batches must contain objects of a single type and size.")
+		rows.append(encode(obj))
+
+	if (numpy is not None):
+		columns = numpy.array([numpy.fromiter(row, dtype=float, count=width) for row in rows]).T
+		payload = numpy.ascontiguousarray(columns, dtype="<" + precision).tobytes()
+	else:
+		rows = [list(row) for row in rows]
+		payload = _pack(typecode, [float(row[i]) for i in range(width) for row in rows])
+	return _BATCH_HEADER.pack(tag | _BATCH, flags, d, len(objects), n) + payload
+
+def _parse_batch_header(header):
+	if (len(header) < _BATCH_HEADER.size):
+		raise SerializationException("Truncated batch header.")
+	tag, flags, d, count, n = _BATCH_HEADER.unpack(header[:_BATCH_HEADER.size])
+	tag &= ~_BATCH
+	if (tag not in _types):
+		raise SerializationException("Unknown type tag %i." % tag)
+	width = _types[tag][1][0] or d*n
+	typecode = "f" if flags & _FLAG_FLOAT32 else "d"
+	return tag, typecode, d, count, width, count * width * array(typecode).itemsize
+
+def _columns(header, payload):
+	# A (width, count) view of the payload; no data is copied.
+	tag, typecode, d, count, width, size = header
+	if (len(payload) != size):
+		raise SerializationException("Truncated batch payload.")
+	if (numpy is not None):
+		return numpy.frombuffer(payload, dtype="<" + ("f4" if typecode == "f" else "f8")).reshape(width, count)
+	view = memoryview(payload).cast("B").cast(typecode)
+	return [view[i*count:(i + 1)*count] for i in range(width)]
+
+def _decode_batch(header, payload):
+	tag, typecode, d, count, width, size = header
+	codec = _types[tag][1]
+	columns = _columns(header, payload)
+	if (codec[3] is not None and typecode == "d"):
+		vectors = codec[3](columns)
+		if (vectors is not None):
+			return vectors
+	return [codec[2]([float(column[i]) for column in columns], d) for i in range(count)]
+
+def loads_batch(data):
+	data = memoryview(data).cast("B")
+	header = _parse_batch_header(data)
+	return _decode_batch(header, data[_BATCH_HEADER.size:_BATCH_HEADER.size + header[-1]])
+
+def loads_batch_array(data):
+	# Returns the class of the batch and its values as a (count, width) array
+	# viewing ``data`` directly (a list of memoryview columns without numpy).
+	data = memoryview(data).cast("B")
+	header = _parse_batch_header(data)
+	columns = _columns(header, data[_BATCH_HEADER.size:_BATCH_HEADER.size + header[-1]])
+	return _types[header[0]][0], (columns.T if numpy is not None else columns)
+
+def iter_load_arrays(stream):
+	# Like ``iter_load``, but yields (class, array) for every batch record
+	# instead of building objects. The stream may only contain batches.
+	read = stream.read if hasattr(stream, "read") else _Reader(stream)
+	while (True):
+		head = read(_HEADER.size)
+		if (not head):
+			return
+		tag, flags = _HEADER.unpack(head)
+		if (not tag & _BATCH):
+			raise SerializationException("iter_load_arrays only supports batch records.")
+		header = _parse_batch_header(bytes(head) + bytes(read(_BATCH_HEADER.size - _HEADER.size)))
+		payload = read(header[-1])
+		columns = _columns(header, payload)
+		yield _types[header[0]][0], (columns.T if numpy is not None else columns)
@@ -0,0 +1,134 @@
+import asyncio
+
+from .compat import *
+from .vector import *
+from .linear import *
+
+numpy = try_import("numpy")
+
+__all__ = ["BatchQueryService"]
+
+DEFAULT_MAX_BATCH_SIZE = 4096
+DEFAULT_MAX_DELAY = 0.002 # seconds
+
+def _pairwise_intersections(rows):
+	return segment_intersections(rows[:, :2], rows[:, 2:])
+
+class _Batch(object):
+
+	def __init__(self, func):
+		self.func = func
+		self.items = []
+		self.futures = []
+		self.size = 0
+		self.handle = None
+
+	def add(self, items, future):
+		self.items.append(items)
+		self.futures.append(future)
+		self.size += len(items)
+
+class BatchQueryService(object):
+
+	# Micro-batches geometry queries made from coroutines. Requests for the
+	# same operation (and shape) arriving within ``max_delay`` seconds of the
+	# first one are concatenated into a single vectorized call, which runs in
+	# ``executor`` (the loop's default executor if None) so the event loop is
+	# never blocked. Every caller gets back its own slice of the result.
+	#
+	#     async with BatchQueryService() as service:
+	#         inside = await service.contains_point(zone, (x, y))
+
+	@requires("numpy")
+	def __init__(self, executor=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_delay=DEFAULT_MAX_DELAY):
+		self.executor = executor
+		self.max_batch_size = max_batch_size
+		self.max_delay = max_delay
+		self.batches = 0
+		self.requests = 0
+		self._pending = {}
+		self._running = set()
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.close()
+
+	async def submit(self, key, func, items):
+		# Queues ``items`` (an array-like of rows) for ``func(rows) -> rows``.
+		# Requests are only batched with others sharing ``key`` and row shape,
+		# so a malformed request fails on its own.
+		loop = asyncio.get_running_loop()
+		items = numpy.asarray(items, dtype=float)
+		if (items.ndim < 2):
+			raise ValueError("expected an array of rows, got shape %r" % (items.shape,))
+		key = (key, items.shape[1:])
+		batch = self._pending.get(key)
+		if (batch is None):
+			batch = self._pending[key] = _Batch(func)
+			batch.handle = loop.call_later(self.max_delay, self._flush, key)
+		future = loop.create_future()
+		batch.add(items, future)
+		self.requests += 1
+		if (batch.size >= self.max_batch_size):
+			self._flush(key)
+		return await future
+
+	def _flush(self, key):
+		batch = self._pending.pop(key, None)
+		if (batch is None):
+			return
+		batch.handle.cancel()
+		self.batches += 1
+		task = asyncio.ensure_future(self._run(batch))
+		self._running.add(task)
+		task.add_done_callback(self._running.discard)
+
+	async def _run(self, batch):
+		loop = asyncio.get_running_loop()
+		try:
+			items = batch.items[0] if len(batch.items) == 1 else numpy.concatenate(batch.items)
+			result = await loop.run_in_executor(self.executor, batch.func, items)
+		except Exception as e:
+			for future in batch.futures:
+				if (not future.done()):
+					future.set_exception(e)
+			return
+		offset = 0
+		for items, future in zip(batch.items, batch.futures):
+			if (not future.done()):
+				future.set_result(result[offset:offset + len(items)])
+			offset += len(items)
+
+	async def flush(self):
+		# Sends every pending batch right away and waits for the results.
+		for key in list(self._pending):
+			self._flush(key)
+		if (self._running):
+			await asyncio.gather(*list(self._running))
+
+	close = flush
+
+	## Queries
+
+	async def contains_points(self, shape, points):
+		# ``shape`` is anything with a contains_points method (Rect, Ellipse,
+		# Ellipsoid3D). Batches are per shape object.
+		return await self.submit(("contains", id(shape)), shape.contains_points, points)
+
+	async def contains_point(self, shape, point):
+		return bool((await self.contains_points(shape, [getattr(point, "_components", point)]))[0])
+
+	async def segment_intersections(self, first, second):
+		# Like segment_intersections; every segment of ``first`` is paired
+		# with the corresponding segment of ``second``.
+		first, second = numpy.broadcast_arrays(segments_to_array(first), segments_to_array(second))
+		return await self.submit("intersections", _pairwise_intersections, numpy.concatenate((first, second), axis=1))
+
+	async def segment_intersection(self, first, second):
+		# The point of intersection of two segments, or None.
+		point = (await self.segment_intersections(first, second))[0]
+		if (numpy.isnan(point[0])):
+			return None
+		return Vector2(point)
@@ -0,0 +1,264 @@
+import math
+from numbers import Number
+
+from .compat import *
+from .fuzzy import *
+from .vector import *
+from .precision import as_float_array
+
+numpy = try_import("numpy")
+
+__all__ = ["Pipeline", "iter_chunks"]
+
+DEFAULT_CHUNK_SIZE = 4096
+
+def _is_point(item):
+	if (hasattr(item, "_components")):
+		return True
+	try:
+		return isinstance(item[0], Number)
+	except (TypeError, IndexError, KeyError):
+		return False
+
+def _row(item):
+	return getattr(item, "_components", item)
+
+def _like(chunk, values):
+	# Transforms keep the precision of float chunks (see precision.py).
+	return values.astype(chunk.dtype, copy=False) if chunk.dtype.kind == "f" else values
+
+@requires("numpy")
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+	# Splits a stream into chunks of at most ``chunk_size`` items. Points
+	# (vectors, tuples, or rows of 2D arrays) are gathered into (N, d)
+	# arrays, any other objects (e.g. curves) into lists.
+	buffer, points = [], None
+	for item in source:
+		if (isinstance(item, numpy.ndarray) and item.ndim == 2):
+			if (buffer):
+				yield as_float_array(buffer) if points else buffer
+				buffer = []
+			for start in range(0, len(item), chunk_size):
+				yield item[start:start + chunk_size]
+			continue
+		is_point = _is_point(item)
+		if (buffer and is_point != points):
+			raise ValueError("Streams can't mix points and other objects.")
+		points = is_point
+		buffer.append(_row(item) if is_point else item)
+		if (len(buffer) >= chunk_size):
+			yield as_float_array(buffer) if points else buffer
+			buffer = []
+	if (buffer):
+		yield as_float_array(buffer) if points else buffer
+
+def _cell_keys(keys):
+	# Rows of integer cell coordinates as one opaque value each. Flipping the
+	# sign bit and storing big-endian makes their bytewise order the
+	# lexicographic order of the rows, which adding an offset keeps: sorted
+	# keys stay sorted, and searchsorted is fastest with sorted needles.
+	keys = (numpy.asarray(keys, dtype=numpy.int64) ^ numpy.int64(-2**63)).astype(">i8")
+	return numpy.ascontiguousarray(keys).view("V%d" % (8*keys.shape[1])).ravel()
+
+def _find(sorted_keys, keys):
+	# Indices of ``keys`` in ``sorted_keys``, with -1 for the missing ones.
+	indices = numpy.searchsorted(sorted_keys, keys)
+	found = indices < len(sorted_keys)
+	found[found] = sorted_keys[indices[found]] == keys[found]
+	return numpy.where(found, indices, -1)
+
+def _neighbour_offsets(d):
+	return numpy.array(numpy.meshgrid(*[(-1, 0, 1)]*d, indexing="ij")).reshape(d, -1).T
+
+def _near_kept(cells, kept, keys, points, epsilon):
+	# Which of ``points`` are fuzzy-equal to a point of ``kept``, which has
+	# at most one point per cell, sorted by ``cells``.
+	near = numpy.zeros(len(points), dtype=bool)
+	if (not len(cells) or not len(points)):
+		return near
+	for offset in _neighbour_offsets(points.shape[1]):
+		found = _find(cells, _cell_keys(keys + offset))
+		hit = numpy.flatnonzero(found >= 0)
+		near[hit[numpy.all(numpy.abs(kept[found[hit]] - points[hit]) <= epsilon, axis=1)]] = True
+	return near
+
+def _unblocked(keys, points, ranks, epsilon):
+	# The points that no point earlier in the stream (by ``ranks``) could
+	# keep out: the first of their cell, with no earlier fuzzy-equal point in
+	# a neighbouring cell. Points of a cell must be in stream order.
+	cells, first, inverse = numpy.unique(_cell_keys(keys), return_index=True, return_inverse=True)
+	order = numpy.argsort(inverse.ravel(), kind="stable")
+	counts = numpy.bincount(inverse.ravel(), minlength=len(cells))
+	starts = numpy.cumsum(counts) - counts
+	blocked = numpy.zeros(len(cells), dtype=bool)
+	for offset in _neighbour_offsets(points.shape[1]):
+		if (not offset.any()):
+			continue
+		found = _find(cells, _cell_keys(keys[first] + offset))
+		heads = numpy.flatnonzero(found >= 0)
+		sizes = counts[found[heads]]
+		# Each cell's first point against every point of the neighbour cell
+		head = numpy.repeat(heads, sizes)
+		other = order[numpy.repeat(starts[found[heads]] - numpy.cumsum(sizes) + sizes, sizes) + numpy.arange(sizes.sum())]
+		near = (ranks[other] < ranks[first[head]]) & numpy.all(numpy.abs(points[other] - points[first[head]]) <= epsilon, axis=1)
+		blocked[head[near]] = True
+	return first[~blocked], cells[~blocked]
+
+class _FuzzySet(object):
+
+	# Remembers points to answer "was a point fuzzy-equal to this one kept
+	# before?". Points are bucketed in a grid with cells of size epsilon, so a
+	# match can only be in the same cell or a neighbouring one, and no two
+	# kept points share a cell. Kept points are stored sorted by cell.
+
+	def __init__(self, epsilon):
+		self.epsilon = epsilon
+		self.cells = None
+		self.points = None
+
+	def add_new(self, chunk):
+		# Returns a mask of the points in ``chunk`` that weren't fuzzy-equal to
+		# an earlier kept point, and remembers them. Matches are resolved in
+		# stream order, in rounds: the points nothing earlier can keep out are
+		# kept, then the points they match are dropped.
+		chunk = numpy.asarray(chunk)
+		keys = numpy.floor(chunk / self.epsilon).astype(numpy.int64)
+		# Sorted by cell (stably, so ties keep stream order) for the lookups
+		cells = _cell_keys(keys)
+		order = numpy.argsort(cells, kind="stable")
+		chunk, keys = chunk[order], keys[order]
+		if (self.cells is None):
+			self.cells = _cell_keys(keys[:0])
+			self.points = chunk[:0]
+		keep = numpy.zeros(len(chunk), dtype=bool)
+		pending = numpy.flatnonzero(~_near_kept(self.cells, self.points, keys, chunk, self.epsilon))
+		while (len(pending)):
+			firsts, cells = _unblocked(keys[pending], chunk[pending], order[pending], self.epsilon)
+			firsts = pending[firsts]
+			keep[firsts] = True
+			pending = pending[~keep[pending]]
+			pending = pending[~_near_kept(cells, chunk[firsts], keys[pending], chunk[pending], self.epsilon)]
+			positions = numpy.searchsorted(self.cells, cells)
+			self.cells = numpy.insert(self.cells, positions, cells)
+			self.points = numpy.insert(self.points, positions, chunk[firsts], axis=0)
+		result = numpy.empty_like(keep)
+		result[order] = keep
+		return result
+
+class Pipeline(object):
+
+	# A chain of vectorized stages applied to a stream of points (or curves)
+	# one chunk at a time, so memory use depends on the chunk size and not
+	# on the length of the stream. Stage methods return the pipeline so they
+	# can be chained:
+	#
+	#     pipeline = Pipeline().flatten_beziers(32).translate((10, 0)).inside(zone)
+	#     for chunk in pipeline.run(curves):
+	#         ...
+
+	@requires("numpy")
+	def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+		self.chunk_size = chunk_size
+		self.stages = []
+
+	def __len__(self):
+		return len(self.stages)
+
+	def stage(self, func):
+		# Adds ``func(chunk) -> chunk`` as the next stage.
+		self.stages.append(func)
+		return self
+
+	## Transforms
+
+	def transform(self, func):
+		return self.stage(func)
+
+	def translate(self, delta):
+		delta = numpy.asarray(_row(delta), dtype=float)
+		return self.stage(lambda chunk: chunk + _like(chunk, delta))
+
+	def scale(self, factor, anchor=None):
+		if (anchor is None):
+			return self.stage(lambda chunk: chunk * factor)
+		anchor = numpy.asarray(_row(anchor), dtype=float)
+		return self.stage(lambda chunk: (chunk - _like(chunk, anchor)) * factor + _like(chunk, anchor))
+
+	def rotate(self, angle, anchor=(0, 0), radians=False):
+		# Rotates 2D points like Vector2.rotate.
+		if (not radians):
+			angle = math.radians(angle)
+		c, s = math.cos(angle), math.sin(angle)
+		matrix = numpy.array([[c, s], [-s, c]])
+		anchor = numpy.asarray(_row(anchor), dtype=float)
+		return self.stage(lambda chunk: (chunk - _like(chunk, anchor)).dot(_like(chunk, matrix)) + _like(chunk, anchor))
+
+	## Filters
+
+	def filter(self, predicate):
+		# Keeps the points for which ``predicate(chunk)`` is True.
+		return self.stage(lambda chunk: chunk[numpy.asarray(predicate(chunk), dtype=bool)])
+
+	def inside(self, shape):
+		# Keeps the points inside ``shape`` (anything with contains_points).
+		return self.filter(shape.contains_points)
+
+	def outside(self, shape):
+		return self.filter(lambda chunk: ~numpy.asarray(shape.contains_points(chunk), dtype=bool))
+
+	def _bounds(self, rect):
+		x, y, w, h = rect
+		return numpy.array([min(x, x + w), min(y, y + h)]), numpy.array([max(x, x + w), max(y, y + h)])
+
+	def clip(self, rect):
+		# Keeps the points within ``rect``, borders included.
+		lo, hi = self._bounds(rect)
+		return self.filter(lambda chunk: numpy.all((lo <= chunk) & (chunk <= hi), axis=1))
+
+	def clamp(self, rect):
+		# Moves the points outside ``rect`` onto its border.
+		lo, hi = self._bounds(rect)
+		return self.stage(lambda chunk: numpy.clip(chunk, _like(chunk, lo), _like(chunk, hi)))
+
+	def dedupe(self, epsilon=None):
+		# Drops points fuzzy-equal (see fuzzy_eq) to a point seen earlier in
+		# the stream. Memory grows with the number of distinct points.
+		seen = _FuzzySet(default_epsilon() if epsilon is None else epsilon)
+		return self.filter(seen.add_new)
+
+	## Curves
+
+	def flatten_beziers(self, segments=16):
+		# Turns a chunk of BezierCurves into the points of their polylines,
+		# ``segments + 1`` points per curve.
+		times = numpy.linspace(0, 1, segments + 1)
+		def flatten(chunk):
+			if (isinstance(chunk, numpy.ndarray)):
+				return chunk
+			if (not chunk):
+				return numpy.zeros((0, 2))
+			return numpy.concatenate([curve.evaluate_many(times, backend="numpy") for curve in chunk])
+		return self.stage(flatten)
+
+	## Running
+
+	def run(self, source):
+		# Yields the output of the pipeline chunk by chunk.
+		for chunk in iter_chunks(source, self.chunk_size):
+			for stage in self.stages:
+				chunk = stage(chunk)
+			if (len(chunk)):
+				yield chunk
+
+	__call__ = run
+
+	def vectors(self, source, immutable=False):
+		for chunk in self.run(source):
+			for vector in to_vector_many(chunk, immutable):
+				yield vector
+
+	def collect(self, source):
+		chunks = list(self.run(source))
+		if (not chunks):
+			return numpy.zeros((0, 2))
+		return numpy.concatenate(chunks)
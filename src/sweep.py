@@ -0,0 +1,339 @@
+from numbers import Number
+
+from .compat import *
+from .vector import *
+from .linear import *
+from .rect import *
+from .ellipse import *
+from .aabb import *
+
+numpy = try_import("numpy")
+
+__all__ = ["time_of_impact", "times_of_impact"]
+
+## Continuous collision detection
+##
+## A body moving by ``velocity`` during a timestep sweeps the segment from
+## its position to position + velocity, so fast bodies can't pass through
+## thin targets unnoticed. Bodies are points or balls (circles in 2D,
+## spheres in 3D) with a radius; sweeping a ball against a target is
+## sweeping its center against the target grown by the radius, and that
+## shape is decomposed into pieces with simple ray tests:
+##
+##   point                 a ball of the radius
+##   Rect, AABB3D          boxes grown along one axis each, plus balls at
+##                         the corners (and cylinders along the edges in 3D)
+##   Segment2D             a box in the frame of the segment plus balls at
+##                         the ends
+##   Ellipse, Ellipsoid3D  exact for points and round targets; balls against
+##                         other ellipses use conservative advancement
+##
+## All the tests run on arrays of bodies at once. Times are fractions of the
+## timestep in [0, 1] (inf if there is no impact), and normals are unit
+## vectors out of the target at the contact, or 0 when a body already
+## touches or overlaps the target at the start of the step.
+
+_INF = float("inf")
+
+# Conservative advancement steps toward an ellipse before falling back to
+# bisection, the number of bisection steps, and the Newton steps used to find
+# the closest point of an ellipse.
+_MAX_STEPS = 16
+_BISECTIONS = 48
+_NEWTON_STEPS = 16
+
+def _rows(values, d):
+	# An (N, d) array from an array or a sequence of vectors, or a single
+	# vector as one row.
+	values = getattr(values, "_components", values)
+	if (not isinstance(values, numpy.ndarray) and not isinstance(values[0], Number)):
+		values = [getattr(v, "_components", v) for v in values]
+	return numpy.asarray(values, dtype=float).reshape(-1, d)
+
+def _first(*hits):
+	# The earliest of several (t, normals) results for the same bodies.
+	t = numpy.stack([h[0] for h in hits])
+	first = t.argmin(axis=0)
+	rows = numpy.arange(t.shape[1])
+	return t[first, rows], numpy.stack([h[1] for h in hits])[first, rows]
+
+def _box_hits(o, v, lo, hi):
+	# Rays o + t*v against the boxes lo..hi (the slab test).
+	n, d = o.shape
+	lo, hi = numpy.broadcast_to(lo, o.shape), numpy.broadcast_to(hi, o.shape)
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		t1, t2 = (lo - o)/v, (hi - o)/v
+	near, far = numpy.minimum(t1, t2), numpy.maximum(t1, t2)
+	parallel = v == 0
+	if (parallel.any()):
+		inside = (lo <= o) & (o <= hi)
+		near = numpy.where(parallel, numpy.where(inside, -_INF, _INF), near)
+		far = numpy.where(parallel, numpy.where(inside, _INF, -_INF), far)
+	rows = numpy.arange(n)
+	axis = near.argmax(axis=1)
+	t_in, t_out = near[rows, axis], far.min(axis=1)
+	hit = (t_in <= t_out) & (t_in <= 1) & (t_out >= 0)
+	t = numpy.where(hit, numpy.maximum(t_in, 0), _INF)
+	normals = numpy.zeros((n, d))
+	entering = numpy.flatnonzero(hit & (t_in >= 0))
+	normals[entering, axis[entering]] = -numpy.sign(v[entering, axis[entering]])
+	return t, normals
+
+def _sphere_hits(o, v, c, r):
+	# Rays o + t*v against balls of radius r around c.
+	w = o - c
+	a = numpy.einsum("ij,ij->i", v, v)
+	b = numpy.einsum("ij,ij->i", w, v)
+	cc = numpy.einsum("ij,ij->i", w, w) - r*r
+	disc = b*b - a*cc
+	inside = cc <= 0
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		# The smaller root, written so it doesn't cancel.
+		t = cc/(numpy.sqrt(numpy.maximum(disc, 0)) - b)
+	hit = ~inside & (disc >= 0) & (b < 0) & (t <= 1)
+	t = numpy.where(inside, 0, numpy.where(hit, t, _INF))
+	normals = numpy.zeros(o.shape)
+	if (hit.any()):
+		offsets = w[hit] + t[hit, None]*v[hit]
+		lengths = numpy.sqrt(numpy.einsum("ij,ij->i", offsets, offsets))
+		# A ball of radius 0 is only hit head-on.
+		speed = numpy.sqrt(a[hit])
+		normals[hit] = numpy.where((lengths > 0)[:, None], offsets/numpy.where(lengths > 0, lengths, 1)[:, None], -v[hit]/speed[:, None])
+	return t, normals
+
+def _ellipsoid_hits(o, v, c, axes):
+	# Rays against the ellipse (or ellipsoid) with semi-axes ``axes``: a unit
+	# ball once space is scaled by 1/axes.
+	t, scaled = _sphere_hits((o - c)/axes, v/axes, 0, 1)
+	hit = (t < _INF) & numpy.any(scaled != 0, axis=1)
+	normals = numpy.zeros(o.shape)
+	if (hit.any()):
+		# The gradient at the contact point.
+		gradient = scaled[hit]/axes
+		normals[hit] = gradient/numpy.sqrt(numpy.einsum("ij,ij->i", gradient, gradient))[:, None]
+	return t, normals
+
+def _rounded_box_hits(o, v, lo, hi, r):
+	# Rays against the boxes lo..hi grown by r.
+	if (not numpy.any(r)):
+		return _box_hits(o, v, lo, hi)
+	n, d = o.shape
+	r = numpy.broadcast_to(r, (n,))
+	hits = []
+	for axis in range(d):
+		grow = numpy.zeros((n, d))
+		grow[:, axis] = r
+		hits.append(_box_hits(o, v, lo - grow, hi + grow))
+	corners = numpy.array([[(lo, hi)[k >> a & 1][a] for a in range(d)] for k in range(1 << d)])
+	for corner in corners:
+		hits.append(_sphere_hits(o, v, corner, r))
+	if (d == 3):
+		# Cylinders around the edges along each axis: circles in the plane
+		# of the other two axes, hit where the ray is alongside the edge.
+		for axis in range(3):
+			plane = [a for a in range(3) if a != axis]
+			for corner in corners[:4] if axis == 2 else corners[::2] if axis == 0 else corners[[0, 1, 4, 5]]:
+				t, flat = _sphere_hits(o[:, plane], v[:, plane], corner[plane], r)
+				with numpy.errstate(invalid="ignore"):
+					along = o[:, axis] + numpy.where(t < _INF, t, 0)*v[:, axis]
+				t = numpy.where((lo[axis] <= along) & (along <= hi[axis]), t, _INF)
+				normals = numpy.zeros((n, 3))
+				normals[:, plane] = flat
+				hits.append((t, normals))
+	return _first(*hits)
+
+def _segment_hits(o, v, p, q, r):
+	# Rays against the segment p -> q grown by r: a box in the frame of the
+	# segment, plus balls at its ends.
+	d = q - p
+	length = numpy.sqrt(d.dot(d))
+	if (length == 0):
+		return _sphere_hits(o, v, p, r)
+	along = d/length
+	across = numpy.array([-along[1], along[0]])
+	frame = numpy.stack((along, across))
+	r = numpy.broadcast_to(r, (len(o),))
+	lo = numpy.column_stack((numpy.zeros(len(o)), -r))
+	hi = numpy.column_stack((numpy.full(len(o), length), r))
+	t, local = _box_hits((o - p).dot(frame.T), v.dot(frame.T), lo, hi)
+	hits = [(t, local.dot(frame))]
+	if (numpy.any(r)):
+		hits += [_sphere_hits(o, v, p, r), _sphere_hits(o, v, q, r)]
+	return _first(*hits)
+
+def _ellipsoid_gaps(points, c, axes):
+	# The distances from points to the surface of an ellipse (0 inside) and
+	# the outward normals at their closest points. In the first quadrant,
+	# the closest point to y is x = axes**2*y/(s + axes**2), where s is the
+	# root of f(s) = sum((axes*y/(s + axes**2))**2) - 1. f is convex and
+	# decreasing, and max(axes*y - axes**2) is a lower bound for the root,
+	# so Newton's method converges to it from there without overshooting.
+	y = points - c
+	signs = numpy.where(y < 0, -1.0, 1.0)
+	y = numpy.abs(y)
+	squared = axes*axes
+	inside = ((y/axes)**2).sum(axis=1) <= 1
+	s = numpy.maximum((axes*y - squared).max(axis=1), 0)
+	for i in range(_NEWTON_STEPS):
+		q = axes*y/(s[:, None] + squared)
+		f = (q*q).sum(axis=1) - 1
+		slope = -2*(q*q/(s[:, None] + squared)).sum(axis=1)
+		with numpy.errstate(divide="ignore", invalid="ignore"):
+			s = numpy.where(f > 0, s - f/slope, s)
+	x = squared*y/(s[:, None] + squared)
+	gaps = numpy.where(inside, 0, numpy.sqrt(((x - y)**2).sum(axis=1)))
+	gradient = signs*x/squared
+	normals = gradient/numpy.sqrt(numpy.einsum("ij,ij->i", gradient, gradient))[:, None]
+	return gaps, normals
+
+def _advance(o, v, c, axes, r):
+	# Conservative advancement: a ball whose distance to the ellipse is g
+	# can move g/speed without touching it, so stepping by that much
+	# approaches the time of impact from below. Bodies start where they enter
+	# the bounding box of the ellipse grown by their radius, and those that
+	# miss the box are never stepped.
+	n = len(o)
+	r = numpy.broadcast_to(r, (n,)).astype(float)
+	speeds = numpy.sqrt(numpy.einsum("ij,ij->i", v, v))
+	tolerance = 1e-9*(axes.max() + r)
+	t, _ = _box_hits(o, v, c - axes - r[:, None], c + axes + r[:, None])
+	result = numpy.full(n, _INF)
+	normals = numpy.zeros(o.shape)
+
+	def gaps_at(rows, t):
+		gaps, contact = _ellipsoid_gaps(o[rows] + t[:, None]*v[rows], c, axes)
+		return gaps - r[rows], contact
+
+	active = numpy.flatnonzero(t < _INF)
+	for step in range(_MAX_STEPS):
+		if (not len(active)):
+			break
+		gaps, contact = gaps_at(active, t[active])
+		hit = gaps <= tolerance[active]
+		done = active[hit]
+		result[done] = t[done]
+		normals[done] = numpy.where(((t[done] > 0) | (gaps[hit] > 0))[:, None], contact[hit], 0)
+		# The gap is a convex function of time, so it never shrinks again
+		# once it starts growing.
+		approaching = numpy.einsum("ij,ij->i", contact[~hit], v[active[~hit]]) < 0
+		active, gaps = active[~hit][approaching], gaps[~hit][approaching]
+		t[active] += gaps/speeds[active]
+		active = active[t[active] <= 1]
+
+	if (len(active)):
+		# Bodies that graze the ellipse approach it slowly: bisect for the
+		# time of the smallest gap (where its slope changes sign), and if the
+		# body touches the ellipse by then, for the first time it does.
+		lo, hi = t[active], numpy.ones(len(active))
+		for i in range(_BISECTIONS):
+			middle = (lo + hi)/2
+			gaps, contact = gaps_at(active, middle)
+			approaching = numpy.einsum("ij,ij->i", contact, v[active]) < 0
+			lo, hi = numpy.where(approaching, middle, lo), numpy.where(approaching, hi, middle)
+		touching = gaps_at(active, hi)[0] <= tolerance[active]
+		active, lo, hi = active[touching], t[active][touching], hi[touching]
+		for i in range(_BISECTIONS):
+			middle = (lo + hi)/2
+			apart = gaps_at(active, middle)[0] > tolerance[active]
+			lo, hi = numpy.where(apart, middle, lo), numpy.where(apart, hi, middle)
+		result[active] = hi
+		normals[active] = gaps_at(active, hi)[1]
+	return result, normals
+
+def _box(shape):
+	# The corners of a Rect or AABB3D.
+	if (isinstance(shape, Rect)):
+		x, y, w, h = shape
+		return numpy.array([min(x, x + w), min(y, y + h)]), numpy.array([max(x, x + w), max(y, y + h)])
+	return numpy.array(list(shape.min)), numpy.array(list(shape.max))
+
+def _target_hits(o, v, r, target):
+	d = o.shape[1]
+	if (isinstance(target, (Rect, AABB3D))):
+		lo, hi = _box(target)
+		return _rounded_box_hits(o, v, lo, hi, r)
+	if (isinstance(target, Segment2D)):
+		return _segment_hits(o, v, numpy.array(list(target[0])), numpy.array(list(target[1])), r)
+	if (isinstance(target, (Ellipse, Ellipsoid3D))):
+		c = numpy.array(list(target.center))
+		axes = numpy.abs(numpy.array(list(target)[d:], dtype=float))
+		if (numpy.all(axes == axes[0])):
+			return _sphere_hits(o, v, c, axes[0] + r)
+		if (not numpy.any(r)):
+			return _ellipsoid_hits(o, v, c, axes)
+		t, normals = _advance(o, v, c, axes, r)
+		exact = numpy.broadcast_to(r, (len(o),)) == 0
+		if (exact.any()):
+			t[exact], normals[exact] = _ellipsoid_hits(o[exact], v[exact], c, axes)
+		return t, normals
+	try:
+		point = _rows(target, d)[0]
+	except (TypeError, ValueError):
+		raise ValueError("Cannot sweep against %r." % (target,))
+	return _sphere_hits(o, v, point, r)
+
+def _dimension(target):
+	if (isinstance(target, (Rect, Ellipse, Segment2D))):
+		return 2
+	if (isinstance(target, (AABB3D, Ellipsoid3D))):
+		return 3
+	return len(getattr(target, "_components", target))
+
+@requires("numpy")
+def times_of_impact(positions, velocities, target, radii=0, target_velocity=None):
+	# Sweeps N bodies at ``positions`` (an (N, d) array), moving by
+	# ``velocities`` during the step, against one target: a point, Rect,
+	# Ellipse, Segment2D, Ellipsoid3D or AABB3D, itself moving by
+	# ``target_velocity``. ``radii`` (a number or N of them) makes the bodies
+	# balls. Returns the (N,) times of impact and the (N, d) contact
+	# normals.
+	d = _dimension(target)
+	o = _rows(positions, d)
+	v = numpy.broadcast_to(_rows(velocities, d), o.shape).copy()
+	if (target_velocity is not None):
+		v -= _rows(target_velocity, d)[0]
+	r = numpy.asarray(radii, dtype=float)
+	if (numpy.any(r < 0)):
+		raise ValueError("Radii can't be negative.")
+	return _target_hits(o, v, r if r.ndim else float(r), target)
+
+@requires("numpy")
+def time_of_impact(shape, velocity, target, target_velocity=None):
+	# The time of impact (a fraction of the step) and contact normal of
+	# ``shape`` moving by ``velocity`` against ``target``, or None if they
+	# don't meet during the step. ``shape`` is a point, a circle or sphere
+	# (an Ellipse or Ellipsoid3D with equal axes), a Rect or AABB3D against a
+	# Rect, AABB3D or point, or any Ellipse or Ellipsoid3D against a point.
+	d = _dimension(target)
+	v = _rows(velocity, d)[0]
+	if (target_velocity is not None):
+		v = v - _rows(target_velocity, d)[0]
+	radius = 0
+	if (isinstance(shape, (Rect, AABB3D))):
+		# Sweeping the minimum corner against the target grown by the size
+		# of the box (their Minkowski difference).
+		lo, size = _box(shape)
+		size -= lo
+		if (isinstance(target, (Rect, AABB3D)) and _dimension(target) == d):
+			target_lo, target_hi = _box(target)
+		elif (not isinstance(target, (Ellipse, Ellipsoid3D, Segment2D))):
+			target_lo = target_hi = _rows(target, d)[0]
+		else:
+			raise ValueError("Sweeping a %s against a %s is not supported." % (type(shape).__name__, type(target).__name__))
+		t, normals = _box_hits(lo[None], v[None], target_lo - size, target_hi)
+	elif (isinstance(shape, (Ellipse, Ellipsoid3D))):
+		axes = list(shape)[d:]
+		if (all(a == axes[0] for a in axes)):
+			radius = abs(axes[0])
+			t, normals = _target_hits(_rows(shape.center, d), v[None], radius, target)
+		elif (isinstance(target, (Rect, AABB3D, Ellipse, Ellipsoid3D, Segment2D))):
+			raise ValueError("Sweeping a %s against a %s is not supported." % (type(shape).__name__, type(target).__name__))
+		else:
+			# The point sweeps the other way against the ellipse.
+			t, normals = _ellipsoid_hits(_rows(target, d), -v[None], numpy.array(list(shape.center)), numpy.abs(numpy.array(axes, dtype=float)))
+			normals = -normals
+	else:
+		t, normals = _target_hits(_rows(shape, d), v[None], radius, target)
+	if (t[0] == _INF):
+		return None
+	return float(t[0]), to_vector(normals[0].tolist())
@@ -0,0 +1,98 @@
+import math
+import unittest
+from ..compat import try_import
+from ..fuzzy import *
+from ..vector import *
+from ..linear import *
+from ..ellipse import *
+from ..aabb import *
+
+numpy = try_import("numpy")
+
+class TestAABB3D(unittest.TestCase):
+
+	def setUp(self):
+		self.box = AABB3D(0, 0, 0, 2, 4, 6)
+
+	def test_properties(self):
+		self.assertEqual(AABB3D(2, 4, 6, -2, -4, -6), self.box)
+		self.assertEqual(self.box.max, Vector3(2, 4, 6))
+		self.assertEqual(self.box.center, Vector3(1, 2, 3))
+		self.assertEqual(self.box.volume, 48)
+		self.assertEqual(self.box.surface_area, 88)
+		self.assertEqual(len(self.box.corners), 8)
+		self.assertEqual(AABB3D.from_points([(1, 5, 2), (0, 7, -1)]), AABB3D(0, 5, -1, 1, 2, 3))
+		self.assertEqual(AABB3D.from_shape(Ellipsoid3D(1, 2, 3, 1, 2, 3)), self.box)
+		self.assertEqual(AABB3D.from_shape(Segment3D((2, 0, 6), (0, 4, 0))), self.box)
+
+	def test_queries(self):
+		self.assertTrue(self.box.contains_point((2, 4, 6)))
+		self.assertFalse(self.box.contains_point((1, 1, 7)))
+		self.assertEqual(list(self.box.contains_points([(1, 1, 1), (3, 1, 1)])), [True, False])
+		self.assertTrue(self.box.collides_aabb(AABB3D(2, 4, 6, 1, 1, 1)))
+		self.assertFalse(self.box.collides_aabb(AABB3D(2.5, 0, 0, 1, 1, 1)))
+		self.assertTrue(self.box.contains_aabb(AABB3D(1, 1, 1, 1, 1, 1)))
+		self.assertFalse(self.box.contains_aabb(AABB3D(1, 1, 1, 5, 1, 1)))
+		self.assertEqual(self.box.distance_to((5, 8, 3)), 5)
+		self.assertEqual(self.box.distance_to((1, 1, 1)), 0)
+
+	def test_rays(self):
+		self.assertEqual(self.box.intersect_ray((-1, 1, 1), (1, 0, 0)), 1)
+		self.assertEqual(self.box.intersect_ray((1, 1, 1), (0, 0, -1)), 0)
+		self.assertIsNone(self.box.intersect_ray((-1, 1, 1), (-1, 0, 0)))
+		self.assertIsNone(self.box.intersect_ray((-1, 1, 1), (1, 0, 0), 0.5))
+		self.assertIsNone(self.box.intersect_ray((-1, 5, 1), (1, 0, 0)))
+		self.assertTrue(self.box.collides_line(Line3D((-1, 1, 1), (-2, 1, 1))))
+		self.assertFalse(self.box.collides_line(Ray3D((-1, 1, 1), (-2, 1, 1))))
+		self.assertFalse(self.box.collides_line(Segment3D((-2, 1, 1), (-1, 1, 1))))
+		self.assertTrue(self.box.collides_line(Segment3D((-1, -1, -1), (1, 1, 1))))
+
+	def test_building(self):
+		self.assertEqual(self.box.union(AABB3D(-1, 1, 1, 1, 1, 10)), AABB3D(-1, 0, 0, 3, 4, 11))
+		self.assertEqual(self.box.union((5, 5, 5)), AABB3D(0, 0, 0, 5, 5, 6))
+		self.assertEqual(self.box.intersection(AABB3D(1, 1, 1, 5, 5, 5)), AABB3D(1, 1, 1, 1, 3, 5))
+		self.assertIsNone(self.box.intersection(AABB3D(3, 0, 0, 1, 1, 1)))
+		self.assertEqual(self.box.expand(1), AABB3D(-1, -1, -1, 4, 6, 8))
+		self.assertEqual(self.box.expand((1, 0, 0)), AABB3D(-1, 0, 0, 4, 4, 6))
+		box = AABB3D(0, 0, 0, 1, 1, 1)
+		box.translate((1, 2, 3))
+		self.assertEqual(box, AABB3D(1, 2, 3, 1, 1, 1))
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestAABB3DArray(unittest.TestCase):
+
+	def setUp(self):
+		rng = numpy.random.RandomState(0)
+		self.boxes = AABB3DArray.from_ellipsoids(rng.rand(200, 3)*10, rng.rand(200, 3))
+
+	def test_matches_scalar(self):
+		probe = AABB3D(2, 2, 2, 3, 3, 3)
+		origin, direction = (-1, 0.5, 0.3), (1, 0.8, 0.9)
+		collides = self.boxes.collides_aabb(probe)
+		inside = self.boxes.contained_in(probe)
+		t = self.boxes.intersect_ray(origin, direction)
+		distances = self.boxes.distances_to((5, 5, 5))
+		for i, box in enumerate(self.boxes):
+			self.assertEqual(collides[i], box.collides_aabb(probe))
+			self.assertEqual(inside[i], probe.contains_aabb(box))
+			hit = box.intersect_ray(origin, direction)
+			if (hit is None):
+				self.assertEqual(t[i], math.inf)
+			else:
+				self.assertTrue(fuzzy_eq(t[i], hit))
+			self.assertTrue(fuzzy_eq(distances[i], box.distance_to((5, 5, 5))))
+
+	def test_parallel_rays(self):
+		boxes = AABB3DArray([(0, 0, 0), (0, 2, 0)], [(1, 1, 1), (1, 3, 1)])
+		self.assertEqual(boxes.intersect_ray((-1, 0.5, 0.5), (1, 0, 0)).tolist(), [1, math.inf])
+
+	def test_array(self):
+		self.assertEqual(len(self.boxes), 200)
+		self.assertEqual(self.boxes[3], AABB3D.from_corners(self.boxes.lo[3], self.boxes.hi[3]))
+		self.assertEqual(len(self.boxes[:10]), 10)
+		bounds = self.boxes.bounds()
+		self.assertTrue(all(bounds.contains_aabb(box) for box in self.boxes))
+		self.assertTrue(numpy.allclose(self.boxes.expand(1).volumes, (self.boxes.sizes + 2).prod(axis=1)))
+		shapes = AABB3DArray.from_shapes([(1, 2, 3), Ellipsoid3D(0, 0, 0, 1, 1, 1)])
+		self.assertEqual(shapes.lo.tolist(), [[1, 2, 3], [-1, -1, -1]])
+		self.assertEqual(self.boxes.contains_point(self.boxes.centers[7]).nonzero()[0].tolist().count(7), 1)
@@ -0,0 +1,26 @@
+import unittest
+from ..backend import *
+from ..compat import RequirementException
+from ..ellipse import *
+from ..vector import *
+
+class TestBackends(unittest.TestCase):
+
+	def test_selection(self):
+		self.assertEqual(get_backend(SCALAR).name, "python")
+		with use_backend("python", BATCH):
+			self.assertEqual(get_backend(BATCH, 10**6).name, "python")
+		self.assertRaises(ValueError, set_backend, "fortran")
+
+	def test_backends_agree(self):
+		ellipse = Ellipse(0, 0, 2, 1)
+		points = [(0, 0), (1.9, 0), (1.5, 0.8), (3, 0)]
+		v = Vector3(1, 2, 3)
+		for name in ("python", "numpy"):
+			try:
+				get_backend(override=name)
+			except RequirementException:
+				continue
+			self.assertEqual(list(ellipse.contains_points(points, backend=name)), [True, True, False, False])
+			self.assertEqual(v.dot((1, 1, 1), backend=name), 6)
+			self.assertEqual(v.magnitude_squared(backend=name), 14)
@@ -0,0 +1,36 @@
+import random
+import unittest
+from ..bench import predicates
+from ..bench import octree
+from ..bench import precision
+from ..bench.runner import run, compare
+from ..bench.workloads import WORKLOADS
+
+class TestBenchmarks(unittest.TestCase):
+
+	def test_workloads_run(self):
+		for workload in WORKLOADS.values():
+			if (workload.is_available()):
+				for size in workload.sizes:
+					workload.make(size and 10)()
+
+	def test_compare(self):
+		results = run(names=["rect.collides_rect"], repeat=1, min_time=0.001, memory=False)
+		slower = {"benchmarks": {"rect.collides_rect": {"seconds": results["benchmarks"]["rect.collides_rect"]["seconds"] * 2}}}
+		self.assertEqual(compare(slower, results, 0.5)[0][0], "rect.collides_rect")
+		self.assertEqual(compare(results, slower, 0.5), [])
+
+	def test_predicates_benchmark(self):
+		per_call, hit_rate = predicates.measure(predicates.orient2d, 3, predicates.random_points(100, random.Random(0)), 1)
+		self.assertEqual(hit_rate, 1)
+
+	@unittest.skipIf(octree.numpy is None, "requires numpy")
+	def test_octree_benchmark(self):
+		result = octree.measure(200, queries=2, repeat=1)
+		self.assertIn("nearest (brute force)", result)
+
+	@unittest.skipIf(precision.numpy is None, "requires numpy")
+	def test_precision_benchmark(self):
+		result = precision.measure(100, repeat=1)
+		self.assertEqual(set(result["contains_box"]), set(["f8", "f4"]))
+		self.assertEqual(result["contains_box"]["f8"][0], 2*result["contains_box"]["f4"][0])
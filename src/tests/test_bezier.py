@@ -0,0 +1,61 @@
+import math
+import unittest
+from ..compat import try_import
+from ..bezier import *
+
+numpy = try_import("numpy")
+
+def _distances(curves, points, samples=1000):
+	# From each point to the nearest of many samples of the curves.
+	times = numpy.linspace(0, 1, samples)
+	samples = numpy.concatenate([curve.evaluate_many(times, backend="numpy") for curve in curves])
+	return numpy.concatenate([
+		numpy.sqrt(((block[:, None] - samples[None])**2).sum(axis=2)).min(axis=1)
+		for block in numpy.array_split(points, max(1, len(points)//20))
+		])
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestFitting(unittest.TestCase):
+
+	def test_cubic(self):
+		# Points on a single cubic come back as that cubic.
+		curve = BezierCurve((0, 0), (1, 2), (3, 2), (4, 0))
+		points = curve.evaluate_many(numpy.linspace(0, 1, 50), backend="numpy")
+		fitted = fit_bezier_curves(points, .1)
+		self.assertEqual(len(fitted), 1)
+		self.assertTrue(numpy.allclose([tuple(v) for v in fitted[0]], [tuple(v) for v in curve], atol=.05))
+
+	def test_tolerance(self):
+		angles = numpy.linspace(0, 3*math.pi, 500)
+		points = numpy.stack([angles*numpy.cos(angles), angles*numpy.sin(angles)], axis=1)
+		previous = 0
+		for tolerance in (.5, .1, .01):
+			curves = fit_bezier_curves(points, tolerance)
+			self.assertLess(_distances(curves, points).max(), tolerance)
+			self.assertGreaterEqual(len(curves), previous)
+			previous = len(curves)
+			# The curves join up, with matching tangents.
+			self.assertEqual(tuple(curves[0].control_polygon[0]), tuple(points[0]))
+			self.assertEqual(tuple(curves[-1].control_polygon[3]), tuple(points[-1]))
+			for a, b in zip(curves, curves[1:]):
+				self.assertEqual(tuple(a.control_polygon[3]), tuple(b.control_polygon[0]))
+				self.assertAlmostEqual(abs((a.control_polygon[3] - a.control_polygon[2]).normalize().dot((b.control_polygon[1] - b.control_polygon[0]).normalize())), 1)
+
+	def test_noisy_trace(self):
+		rng = numpy.random.default_rng(0)
+		heading = numpy.cumsum(rng.normal(0, .05, 2000))
+		points = numpy.cumsum(numpy.stack([numpy.cos(heading), numpy.sin(heading), numpy.zeros(2000)], axis=1), axis=0)
+		points += rng.normal(0, .05, points.shape)
+		points[100] = points[99] # repeated points are dropped
+		curves = fit_bezier_curves(points, .5)
+		self.assertEqual(len(curves[0].control_polygon[0]), 3)
+		self.assertLess(len(curves), 400)
+		self.assertLess(_distances(curves, points[::5], 200).max(), .5)
+
+	def test_degenerate(self):
+		self.assertEqual(len(fit_bezier_curves([(0, 0), (1, 1)], .1)), 1)
+		self.assertRaises(ValueError, fit_bezier_curves, [(0, 0), (0, 0)], .1)
+		self.assertRaises(ValueError, fit_bezier_curves, [(0, 0), (1, 1)], 0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,93 @@
+import itertools
+import math
+import random
+import unittest
+from ..compat import try_import
+from ..fuzzy import *
+from ..rect import *
+from ..ellipse import *
+from ..bounds import *
+
+numpy = try_import("numpy")
+
+def _brute_force_circle(points):
+	# The smallest of the circles through 2 or 3 of the points that contains
+	# all of them.
+	best = None
+	for (ax, ay), (bx, by) in itertools.combinations(points, 2):
+		candidates = [((ax + bx)/2, (ay + by)/2)]
+		for cx, cy in points:
+			d = 2*((bx - ax)*(cy - ay) - (by - ay)*(cx - ax))
+			if (d != 0):
+				b2, c2 = (bx - ax)**2 + (by - ay)**2, (cx - ax)**2 + (cy - ay)**2
+				candidates.append((ax + ((cy - ay)*b2 - (by - ay)*c2)/d, ay + ((bx - ax)*c2 - (cx - ax)*b2)/d))
+		for x, y in candidates:
+			r = max(math.hypot(px - x, py - y) for px, py in points)
+			if (best is None or r < best[2]):
+				best = (x, y, r)
+	return best
+
+class TestBounds(unittest.TestCase):
+
+	def setUp(self):
+		rng = random.Random(5)
+		self.points = [(rng.uniform(-3, 3), rng.uniform(-1, 1)) for i in range(40)]
+
+	def test_bounding_rect(self):
+		self.assertEqual(bounding_rect([(1, 5), (3, 2), (2, 4)]), Rect(1, 2, 2, 3))
+		self.assertRaises(ValueError, bounding_rect, [])
+
+	def test_enclosing_circle(self):
+		circle = enclosing_circle(self.points)
+		x, y, r = _brute_force_circle(self.points)
+		self.assertTrue(fuzzy_eq(circle, Ellipse(x, y, r, r), 1e-9))
+		self.assertEqual(enclosing_circle([(0, 0), (1, 1), (2, 2)]), Ellipse(1, 1, math.sqrt(2), math.sqrt(2)))
+		self.assertEqual(enclosing_circle([(1, 2)]*3), Ellipse(1, 2, 0, 0))
+
+	def test_enclosing_sphere(self):
+		cube = list(itertools.product((0, 1), repeat=3)) + [(0.5, 0.5, 0.5)]
+		r = math.sqrt(3)/2
+		self.assertTrue(fuzzy_eq(enclosing_sphere(cube), Ellipsoid3D(0.5, 0.5, 0.5, r, r, r)))
+		# Coplanar points
+		square = [(0, 0, 1), (2, 0, 1), (0, 2, 1), (2, 2, 1)]
+		self.assertTrue(fuzzy_eq(enclosing_sphere(square), Ellipsoid3D(1, 1, 1, *[math.sqrt(2)]*3)))
+
+	def test_bounding_ellipse(self):
+		ellipse = bounding_ellipse(self.points)
+		self.assertTrue(all((x - ellipse[0])**2/ellipse.a**2 + (y - ellipse[1])**2/ellipse.b**2 <= 1 + 1e-9 for x, y in self.points))
+		# Much smaller than the enclosing circle for points spread along x.
+		self.assertLess(ellipse.a*ellipse.b, 0.6*enclosing_circle(self.points).a**2)
+		corners = [(-2, -1), (2, -1), (2, 1), (-2, 1)]
+		self.assertTrue(fuzzy_eq(bounding_ellipse(corners), Ellipse(0, 0, 2*math.sqrt(2), math.sqrt(2)), 1e-3))
+		self.assertEqual(bounding_ellipse([(0, 0), (2, 0)]), Ellipse(1, 0, 1, 0))
+
+	@unittest.skipIf(numpy is None, "requires numpy")
+	def test_arrays(self):
+		rng = numpy.random.RandomState(2)
+		points = rng.rand(5000, 3)
+		sphere = enclosing_sphere(points)
+		distances = numpy.sqrt(((points - list(sphere.center))**2).sum(axis=1))
+		self.assertLessEqual(distances.max(), sphere.a*(1 + 1e-9))
+		self.assertAlmostEqual(distances.max(), sphere.a)
+		self.assertTrue(fuzzy_eq(enclosing_circle(numpy.array(self.points)), enclosing_circle(self.points)))
+
+	@unittest.skipIf(numpy is None, "requires numpy")
+	def test_batches(self):
+		rng = numpy.random.RandomState(3)
+		points = rng.rand(600, 2)
+		labels = rng.randint(0, 4, 600)
+		rects = bounding_rects(points, labels, count=6)
+		circles = enclosing_circles(points, labels)
+		ellipses = bounding_ellipses(points, labels)
+		self.assertEqual(rects.shape, (6, 4))
+		self.assertTrue(numpy.isnan(rects[4:]).all())
+		self.assertEqual(circles.shape, (4, 3))
+		for i in range(4):
+			group = points[labels == i]
+			self.assertTrue(fuzzy_eq(Rect(*rects[i]), bounding_rect(group)))
+			self.assertTrue(fuzzy_eq(Ellipse(*circles[i][[0, 1, 2, 2]]), enclosing_circle(group)))
+			self.assertTrue(fuzzy_eq(Ellipse(*ellipses[i]), bounding_ellipse(group)))
+		spheres = enclosing_spheres(rng.rand(100, 3), numpy.arange(100) % 2)
+		self.assertEqual(spheres.shape, (2, 4))
+		self.assertRaises(ValueError, bounding_rects, points, labels[:10])
+		self.assertRaises(ValueError, bounding_rects, points, -labels - 1)
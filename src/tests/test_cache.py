@@ -0,0 +1,80 @@
+import time
+import unittest
+from ..cache import *
+from ..compat import try_import
+from ..ellipse import *
+from ..linear import *
+from ..rect import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+class TestLRUCache(unittest.TestCase):
+
+	def test_lru_eviction(self):
+		cache = LRUCache(2)
+		cache.put("a", 1)
+		cache.put("b", 2)
+		self.assertEqual(cache.get("a"), 1)
+		cache.put("c", 3)
+		self.assertNotIn("b", cache)
+		self.assertEqual(cache.info(), {"hits": 1, "misses": 0, "evictions": 1, "size": 2, "maxsize": 2})
+
+	def test_ttl(self):
+		cache = LRUCache(ttl=0.01)
+		cache.put("a", 1)
+		self.assertEqual(cache.get("a"), 1)
+		time.sleep(0.02)
+		self.assertIsNone(cache.get("a"))
+
+	def test_memoize(self):
+		calls = []
+		@memoize(maxsize=8)
+		def area(rect):
+			calls.append(rect)
+			return rect.width * rect.height
+		self.assertEqual(area(Rect(0, 0, 2, 3)), 6)
+		self.assertEqual(area(Rect(0, 0, 2, 3)), 6)
+		self.assertEqual(len(calls), 1)
+		self.assertEqual(area.cache.hits, 1)
+
+class TestCaching(unittest.TestCase):
+
+	def tearDown(self):
+		disable_cache()
+
+	def test_per_method(self):
+		enable_cache(["ellipse.Ellipse.circumference"])
+		self.assertTrue(cache_enabled("ellipse.Ellipse.circumference"))
+		self.assertFalse(cache_enabled("bezier.BezierCurve.arclength"))
+		ellipse = Ellipse(0, 0, 3, 2)
+		expected = ellipse.circumference
+		self.assertEqual(Ellipse(0, 0, 3, 2).circumference, expected)
+		self.assertEqual(cache_stats()["ellipse.Ellipse.circumference"]["hits"], 1)
+		disable_cache()
+		self.assertFalse(cache_enabled())
+		self.assertEqual(Ellipse(0, 0, 3, 2).circumference, expected)
+
+	def test_translate_invalidates(self):
+		enable_cache(["ellipse.Ellipsoid3D.surface_area"])
+		ellipsoid = Ellipsoid3D(0, 0, 0, 3, 2, 1)
+		ellipsoid.surface_area
+		ellipsoid.translate((1, 1, 1))
+		self.assertEqual(cache_stats()["ellipse.Ellipsoid3D.surface_area"]["size"], 0)
+		ellipsoid.surface_area
+		ellipsoid.c = 2
+		self.assertNotEqual(ellipsoid.surface_area, Ellipsoid3D(1, 1, 1, 3, 2, 1).surface_area)
+
+	@unittest.skipIf(numpy is None, "requires numpy")
+	def test_point_of_intersection(self):
+		first, second = Segment2D((0, 0), (2, 2)), Segment2D((0, 2), (2, 0))
+		with caching() as stats:
+			poi = first.point_of_intersection(second)
+			poi.x = 5
+			self.assertEqual(first.point_of_intersection(second), Vector2(1, 1))
+		self.assertFalse(cache_enabled())
+		self.assertEqual(stats["linear._Line2DBase.point_of_intersection"]["hits"], 1)
+		self.assertEqual(stats["linear._Line2DBase.point_of_intersection"]["misses"], 1)
+
+if __name__ == "__main__":
+	unittest.main()
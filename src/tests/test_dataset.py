@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+from ..compat import try_import
+from ..dataset import *
+from ..linear import *
+from ..rect import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestGeometryDataset(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		rng = numpy.random.RandomState(0)
+		self.rects = numpy.column_stack([rng.rand(2000, 2) * 100, rng.rand(2000, 2) * 5])
+		self.segments = numpy.column_stack([rng.rand(2000, 2) * 100, rng.rand(2000, 2) * 100])
+		self.segments[1000:, 2:] = self.segments[1000:, :2] + rng.rand(1000, 2) * 10 - 5
+		self.points = rng.rand(2000, 2) * 100
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def test_queries(self):
+		path = os.path.join(self.directory, "rects")
+		dataset = GeometryDataset.create(path, RECTS, [Rect(*row) for row in self.rects[:10]])
+		dataset.extend(self.rects[10:])
+		query = Rect(40, 40, 10, 10)
+		expected = [i for i, row in enumerate(self.rects) if query.collides_rect(row)]
+		self.assertEqual(sorted(dataset.query_rect(query, chunk_size=300).tolist()), expected)
+
+		dataset.build_index()
+		reopened = GeometryDataset(path)
+		self.assertTrue(reopened.has_index)
+		self.assertEqual(sorted(reopened.query_rect(query).tolist()), expected)
+		self.assertEqual(reopened[5], Rect(*self.rects[5]))
+
+	def _check(self, dataset, query, expected):
+		# With and without the index, and across chunks
+		self.assertEqual(sorted(query(dataset, 300).tolist()), expected)
+		dataset.build_index()
+		self.assertEqual(sorted(query(GeometryDataset(dataset.path), 1 << 20).tolist()), expected)
+		dataset.drop_index()
+
+	def test_query_point(self):
+		dataset = GeometryDataset.create(os.path.join(self.directory, "rects"), RECTS, self.rects)
+		rects = [Rect(*row) for row in self.rects.tolist()]
+		for point in [(50, 50), (10.5, 93.2), tuple(self.rects[7, :2]), (-1, -1)]:
+			expected = [i for i, rect in enumerate(rects) if rect.contains_point(point)]
+			self._check(dataset, lambda d, c: d.query_point(point, chunk_size=c), expected)
+
+	def test_segments(self):
+		dataset = GeometryDataset.create(os.path.join(self.directory, "segments"), SEGMENTS, self.segments)
+		segments = [Segment2D(row[:2], row[2:]) for row in self.segments.tolist()]
+		self.assertEqual(dataset[3], segments[3])
+		for query in [Segment2D((0, 0), (100, 100)), Segment2D((20, 70), (35, 60))]:
+			hits = [(i, s.point_of_intersection(query)) for i, s in enumerate(segments)]
+			hits = [(i, point) for i, point in hits if point is not None]
+			self._check(dataset, lambda d, c: d.query_segment(query, chunk_size=c)[0], [i for i, point in hits])
+			ids, points = dataset.query_segment(query)
+			self.assertEqual([Vector2(*p) for p in points[numpy.argsort(ids)].tolist()], [point for i, point in hits])
+		# Segments crossing a rect, or inside it
+		rect = Rect(30, 40, 15, 10)
+		corners = [(30, 40), (45, 40), (45, 50), (30, 50)]
+		edges = [Segment2D(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+		expected = [
+			i for i, s in enumerate(segments)
+			if rect.contains_point(s[0]) or rect.contains_point(s[1]) or any(s.point_of_intersection(e) is not None for e in edges)
+		]
+		self.assertTrue(expected)
+		self._check(dataset, lambda d, c: d.query_rect(rect, chunk_size=c), expected)
+		self.assertRaises(DatasetException, dataset.query_point, (0, 0))
+
+	def test_points(self):
+		dataset = GeometryDataset.create(os.path.join(self.directory, "points"), POINTS, self.points)
+		self.assertEqual(dataset[4], Vector2(*self.points[4]))
+		for rect in [Rect(30, 40, 15, 10), Rect(90, 90, 20, 20), Rect(-5, -5, 1, 1)]:
+			expected = [i for i, point in enumerate(self.points.tolist()) if rect.contains_point(point)]
+			self._check(dataset, lambda d, c: d.query_rect(rect, chunk_size=c), expected)
+		self.assertRaises(DatasetException, dataset.query_segment, Segment2D((0, 0), (1, 1)))
+
+	def test_reopen(self):
+		path = os.path.join(self.directory, "points")
+		GeometryDataset.create(path, POINTS, self.points[:500], dtype=numpy.float32).build_index()
+		self.assertRaises(DatasetException, GeometryDataset.create, path, POINTS)
+		# Appending to the existing file drops its index.
+		dataset = GeometryDataset(path, "r+")
+		self.assertTrue(dataset.has_index)
+		dataset.extend(self.points[500:])
+		self.assertFalse(dataset.has_index)
+		dataset = GeometryDataset(path)
+		self.assertEqual(len(dataset), 2000)
+		self.assertEqual(dataset.rows.dtype, numpy.float32)
+		self.assertTrue(numpy.array_equal(dataset.rows, self.points.astype(numpy.float32)))
+		self.assertEqual(sum(len(chunk) for start, chunk in dataset.iter_chunks(300)), 2000)
+		self.assertRaises(DatasetException, dataset.extend, self.points[:1])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from ..compat import try_import
+from ..delaunay import *
+
+numpy = try_import("numpy")
+spatial = try_import("scipy.spatial")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestTriangulation(unittest.TestCase):
+
+	def setUp(self):
+		self.points = numpy.random.RandomState(3).rand(300, 2)
+
+	def check(self, triangulation):
+		points, triangles, neighbors = triangulation.points, triangulation.triangles, triangulation.neighbors
+		p = points[triangles]
+		d1, d2 = p[:, 1] - p[:, 0], p[:, 2] - p[:, 0]
+		self.assertTrue((d1[:, 0]*d2[:, 1] - d1[:, 1]*d2[:, 0] > 0).all())
+		for t, i in zip(*numpy.nonzero(neighbors >= 0)):
+			n = neighbors[t, i]
+			self.assertIn(t, neighbors[n])
+			edge = set(triangles[t]) - set([triangles[t, i]])
+			self.assertTrue(edge <= set(triangles[n]))
+		# Euler: 2n - 2 - h triangles for n points, h of them on the hull
+		n, h = len(numpy.unique(points, axis=0)), len(triangulation.hull_edges)
+		self.assertEqual(len(triangles), 2*n - 2 - h)
+		self.assertEqual(len(triangulation.edges), 3*n - 3 - h)
+
+	def test_incremental(self):
+		self.check(Triangulation(self.points, INCREMENTAL))
+
+	@unittest.skipIf(spatial is None, "requires scipy")
+	def test_methods_agree(self):
+		incremental = Triangulation(self.points, INCREMENTAL)
+		qhull = Triangulation(self.points, QHULL)
+		self.check(qhull)
+		normalize = lambda t: sorted(tuple(sorted(row)) for row in t.triangles.tolist())
+		self.assertEqual(normalize(incremental), normalize(qhull))
+
+	def test_degenerate(self):
+		grid = [(x, y) for x in range(5) for y in range(5)]
+		triangulation = Triangulation(grid + grid[:3], INCREMENTAL)
+		self.check(triangulation)
+		self.assertEqual(len(triangulation), 32)
+		self.assertEqual(len(Triangulation([(0, 0), (1, 1), (2, 2)], INCREMENTAL)), 0)
+		self.assertRaises(ValueError, Triangulation, grid, "nope")
+
+	def test_locate(self):
+		triangulation = Triangulation(self.points, INCREMENTAL)
+		queries = numpy.random.RandomState(4).rand(500, 2)*1.2 - 0.1
+		located = triangulation.locate_many(queries)
+		self.assertEqual(located.tolist(), [triangulation.locate(q) for q in queries])
+		for q, t in zip(queries, located.tolist()):
+			if (t != -1):
+				p = triangulation.points[triangulation.triangles[t]]
+				for i in range(3):
+					a, b = p[(i + 1) % 3], p[(i + 2) % 3]
+					self.assertGreaterEqual((a[0] - q[0])*(b[1] - q[1]) - (a[1] - q[1])*(b[0] - q[0]), 0)
+		self.assertEqual(triangulation.locate((5, 5)), -1)
+
+	def test_voronoi(self):
+		voronoi = Triangulation(self.points, INCREMENTAL).voronoi((0, 0, 1, 1))
+		self.assertEqual(len(voronoi), len(self.points))
+		self.assertAlmostEqual(voronoi.areas.sum(), 1)
+		self.assertTrue((voronoi.areas > 0).all())
+		for i in (0, 100, 200):
+			cell = voronoi.cell(i)
+			distances = ((self.points - cell.mean(axis=0))**2).sum(axis=1)
+			self.assertEqual(int(distances.argmin()), i)
+
+	def test_voronoi_degenerate(self):
+		voronoi = Triangulation([(1, 1), (2, 1), (3, 1), (2, 1)], INCREMENTAL).voronoi((0, 0, 4, 2))
+		self.assertEqual(voronoi.areas.tolist(), [3, 2, 3, 0])
@@ -0,0 +1,21 @@
+import unittest
+from ..instrument import *
+from ..linear import *
+from ..vector import *
+
+class TestInstrumentation(unittest.TestCase):
+
+	def test_counts(self):
+		rotate = Vector2.rotate
+		with instrumented() as stats:
+			Vector2(1, 2).rotate(30)
+			Vector2.from_array([[1, 2], [3, 4]])
+			Segment2D((0, 0), (1, 1)).length()
+		self.assertFalse(is_enabled())
+		self.assertIs(Vector2.rotate, rotate)
+
+		self.assertEqual(stats.calls["Vector2.rotate"], 1)
+		self.assertEqual(stats.calls["Segment2D.length"], 1)
+		self.assertGreaterEqual(stats.calls["vector.change_vector_dimension"], 2)
+		self.assertEqual(stats.allocations["Vector2"], 4)
+		self.assertEqual(stats.as_dict(flat=True)["calls.Vector2.rotate"], 1)
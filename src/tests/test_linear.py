@@ -0,0 +1,105 @@
+import unittest
+from ..backend import *
+from ..compat import try_import
+from ..linear import *
+from ..rect import Rect
+from ..vector import *
+
+numpy = try_import("numpy")
+
+BACKENDS = ["python"] + (["numpy"] if numpy is not None else [])
+
+class TestLinesAgainstPoints(unittest.TestCase):
+
+	def setUp(self):
+		self.points = [(-1, 1), (2, -3), (5, 0), (2, 1e-9)]
+
+	def test_perpendicular_distances(self):
+		segment = Segment2D((0, 0), (4, 0))
+		for backend in BACKENDS:
+			distances = segment.perpendicular_distances(self.points, backend=backend)
+			self.assertEqual(list(distances), [1, 3, 0, 1e-9])
+		self.assertEqual(Line3D((0, 0, 0), (1, 1, 0)).perpendicular_distance((0, 2, 0)), 2**.5)
+
+	def test_closest_points(self):
+		for backend in BACKENDS:
+			closest = Segment2D((0, 0), (4, 0)).closest_points(self.points, backend=backend)
+			self.assertEqual([list(p) for p in closest], [[0, 0], [2, 0], [4, 0], [2, 0]])
+			closest = Ray3D((0, 0, 0), (1, 0, 0)).closest_points([(-1, 2, 0), (3, 1, 1)], backend=backend)
+			self.assertEqual([list(p) for p in closest], [[0, 0, 0], [3, 0, 0]])
+
+	def test_sides(self):
+		segment = Segment2D((0, 0), (4, 0))
+		for backend in BACKENDS:
+			sides = segment.sides(self.points, backend=backend)
+			self.assertEqual(list(sides), [-1, 1, 0, 0])
+			self.assertEqual(list(segment.sides(self.points, epsilon=0, backend=backend)), [-1, 1, 0, -1])
+		self.assertEqual([segment.is_to_the_left(p) for p in self.points[:2]], [False, True])
+
+	def test_matrix(self):
+		lines = [Segment2D((0, 0), (4, 0)), Line2D((0, 0), (0, 1))]
+		for backend in BACKENDS:
+			distances = line_distances(lines, self.points, backend=backend)
+			self.assertEqual([list(row) for row in distances], [[2**.5, 3, 1, 1e-9], [1, 2, 5, 2]])
+			self.assertEqual([list(row) for row in line_sides(lines, self.points, backend=backend)], [[-1, 1, 0, 0], [-1, 1, 1, 1]])
+
+	@unittest.skipIf(numpy is None, "requires numpy")
+	def test_backends_agree(self):
+		rng = numpy.random.RandomState(0)
+		segments, points = rng.rand(40, 2, 2), rng.rand(300, 2)
+		for func in (line_distances, line_closest_points, line_sides):
+			self.assertTrue(numpy.allclose(func(segments, points, backend="python"), func(segments, points, backend="numpy")))
+
+class TestClipping(unittest.TestCase):
+
+	def setUp(self):
+		self.rect = Rect(0, 0, 4, 2)
+		self.segments = [((-1, 1), (5, 1)), ((1, 1), (3, 0)), ((-1, -1), (5, -1)), ((3, 3), (6, 1)), ((-1, 0), (1, 2))]
+
+	def test_clip_segment(self):
+		clip = self.rect.clip_segment
+		self.assertEqual(clip(self.segments[0]), Segment2D((0, 1), (4, 1)))
+		self.assertEqual(clip(self.segments[1]), Segment2D((1, 1), (3, 0)))
+		self.assertIsNone(clip(self.segments[2]))
+		self.assertIsNone(clip(self.segments[3])) # crosses the corner's lines, not the rect
+		self.assertEqual(clip(self.segments[4]), Segment2D((0, 1), (1, 2)))
+		self.assertEqual(clip(Line2D((2, 5), (2, 6))), Segment2D((2, 0), (2, 2)))
+		self.assertEqual(clip(Ray2D((1, 1), (0, 1))), Segment2D((1, 1), (0, 1)))
+		self.assertEqual(Rect(4, 2, -4, -2).clip_segment(self.segments[0]), Segment2D((0, 1), (4, 1)))
+
+	def test_outcodes(self):
+		points = [(2, 1), (-1, 1), (5, 3), (2, -1), (0, 2)]
+		codes = [Rect.INSIDE, Rect.LEFT, Rect.RIGHT | Rect.TOP, Rect.BOTTOM, Rect.INSIDE]
+		self.assertEqual([self.rect.outcode(p) for p in points], codes)
+		for backend in BACKENDS:
+			self.assertEqual(list(self.rect.outcodes(points, backend=backend)), codes)
+
+	def test_clip_segments(self):
+		for backend in BACKENDS:
+			clipped, visible = self.rect.clip_segments(self.segments, backend=backend)
+			self.assertEqual(list(visible), [True, True, False, False, True])
+			for segment, row, shown in zip(self.segments, clipped, visible):
+				if (shown):
+					self.assertEqual(Segment2D(*row), self.rect.clip_segment(segment))
+				else:
+					self.assertTrue(all(c != c for p in row for c in p))
+
+	def test_clip_segments_to_polygon(self):
+		triangle = [(0, 0), (0, 4), (4, 0)] # clockwise
+		for backend in BACKENDS:
+			clipped, visible = clip_segments_to_polygon([((-1, 1), (5, 1)), ((3, 3), (5, 5))], triangle, backend=backend)
+			self.assertEqual(list(visible), [True, False])
+			self.assertEqual([list(p) for p in clipped[0]], [[0, 1], [3, 1]])
+		self.assertRaises(ValueError, clip_segments_to_polygon, self.segments, [(0, 0), (4, 0), (1, 1), (0, 4)])
+		self.assertRaises(ValueError, clip_segments_to_polygon, self.segments, [(0, 0), (1, 1), (2, 2)])
+
+	@unittest.skipIf(numpy is None, "requires numpy")
+	def test_backends_agree(self):
+		segments = numpy.random.RandomState(0).rand(500, 2, 2)*8 - 2
+		python, numpy_ = (self.rect.clip_segments(segments, backend=b) for b in BACKENDS)
+		self.assertTrue((python[1] == numpy_[1]).all())
+		self.assertTrue(numpy.allclose(python[0], numpy_[0], equal_nan=True))
+		self.assertTrue(numpy.allclose(clip_segments_to_polygon(segments, [(0, 0), (4, 0), (4, 2), (0, 2)])[0], numpy_[0], equal_nan=True))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from ..compat import try_import
+from ..ellipse import *
+from ..aabb import *
+from ..octree import *
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestOctree(unittest.TestCase):
+
+	def setUp(self):
+		rng = numpy.random.RandomState(0)
+		self.boxes = AABB3DArray.from_ellipsoids(rng.rand(3000, 3)*100, rng.rand(3000, 3)*3)
+		self.probes = [AABB3D(*(rng.rand(3)*80).tolist() + [20, 10, 15]) for i in range(10)]
+		self.rays = [(rng.rand(3)*100, rng.randn(3)) for i in range(10)]
+
+	def check(self, tree, alive):
+		for probe in self.probes:
+			expected = [i for i in numpy.flatnonzero(self.boxes.collides_aabb(probe)).tolist() if i in alive]
+			self.assertEqual(tree.query(probe), expected)
+		for origin, direction in self.rays:
+			t = self.boxes.intersect_ray(origin, direction)
+			expected = sorted((t[i], i) for i in numpy.flatnonzero(t < numpy.inf).tolist() if i in alive)
+			self.assertEqual(tree.query_ray(origin, direction), expected)
+		distances = self.boxes.distances_to((50, 50, 50))
+		expected = sorted((distances[i], i) for i in alive)[:5]
+		self.assertEqual(tree.nearest((50, 50, 50), 5), expected)
+
+	def test_build(self):
+		tree = Octree.build(self.boxes, max_items=8)
+		self.assertEqual(len(tree), 3000)
+		self.assertGreater(tree.depth(), 2)
+		self.check(tree, set(range(3000)))
+
+	def test_insert_remove(self):
+		tree = Octree(max_items=8)
+		for box in self.boxes:
+			tree.insert(box)
+		self.check(tree, set(range(3000)))
+		for i in range(0, 3000, 3):
+			tree.remove(i)
+		self.assertNotIn(0, tree)
+		self.assertRaises(KeyError, tree.remove, 0)
+		self.check(tree, set(range(3000)) - set(range(0, 3000, 3)))
+		for i in range(3000):
+			if (i in tree):
+				tree.remove(i)
+		self.assertEqual(len(tree), 0)
+		self.assertEqual(tree.query(self.probes[0]), [])
+
+	def test_mixed(self):
+		tree = Octree.build([(1, 1, 1), Ellipsoid3D(5, 5, 5, 1, 2, 3)])
+		self.assertEqual(tree[0], (1, 1, 1))
+		self.assertEqual(tree.query_point((5, 6.5, 7.5)), [1])
+		self.assertEqual(tree.nearest((0, 1, 1)), [(1, 0)])
+		id = tree.insert(AABB3D(-50, 0, 0, 1, 1, 1))
+		self.assertEqual(tree.query(AABB3D(-60, -10, -10, 20, 20, 20)), [id])
+		self.assertTrue(tree.bounds.contains_aabb(AABB3D(-50, 0, 0, 1, 1, 1)))
+		points = Octree.build(numpy.array([[0, 0, 0], [1, 1, 1], [1, 1, 1]]))
+		self.assertEqual(points.query_point((1, 1, 1)), [1, 2])
+		self.assertEqual(points.box(0), AABB3D(0, 0, 0, 0, 0, 0))
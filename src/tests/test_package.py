@@ -0,0 +1,20 @@
+import unittest
+from importlib import import_module
+from .. import _exports
+from ..bench.import_time import PACKAGE, measure_import
+
+class TestLazyImport(unittest.TestCase):
+
+	def test_exports(self):
+		for module, names in _exports.items():
+			module = import_module("..%s" % module, __package__)
+			self.assertEqual(sorted(module.__all__), sorted(names))
+
+	def test_import_is_lazy(self):
+		elapsed, modules = measure_import("pass", repeat=1)
+		self.assertEqual([m for m in modules if m.startswith(PACKAGE + ".")], [])
+
+		elapsed, modules = measure_import(repeat=1)
+		self.assertNotIn(PACKAGE + ".tests", modules)
+		self.assertNotIn("scipy", modules)
+		self.assertNotIn("pygame", modules)
@@ -0,0 +1,45 @@
+import unittest
+from ..compat import try_import
+from ..ellipse import *
+from ..linear import *
+from ..parallel import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+def _fails_late(chunk):
+	# Fails on every chunk but the first, which runs in the caller.
+	if (chunk[0, 0] != 0):
+		raise ValueError("bad chunk")
+	return chunk
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestParallelExecutor(unittest.TestCase):
+
+	def setUp(self):
+		self.points = numpy.random.RandomState(0).rand(5000, 2) * 4
+		self.segments = numpy.random.RandomState(1).rand(5000, 2, 2)
+
+	def test_matches_serial(self):
+		ellipse = Ellipse(1, 1, 1.5, 0.7)
+		expected = ellipse.contains_points(self.points)
+		for mode in (THREAD, PROCESS):
+			result = parallel_contains_points(ellipse, self.points, mode=mode, workers=2, chunk_size=700)
+			self.assertTrue(numpy.array_equal(result, expected))
+
+	def test_segment_intersections(self):
+		query = Segment2D((0, 0), (1, 1))
+		expected = segment_intersections(self.segments, query)
+		with ParallelExecutor(PROCESS, workers=2, chunk_size=1000) as executor:
+			result = parallel_segment_intersections(self.segments, query, executor=executor)
+		self.assertTrue(numpy.array_equal(result, expected, equal_nan=True))
+		self.assertEqual(query.point_of_intersection(Segment2D((0, 1), (1, 0))), Vector2(.5, .5))
+
+	def test_errors_propagate(self):
+		points = numpy.arange(10000.0).reshape(-1, 2)
+		for mode in (THREAD, PROCESS):
+			with ParallelExecutor(mode, workers=2, chunk_size=1000) as executor:
+				self.assertRaises(ValueError, executor.map_chunks, _fails_late, points)
+
+if __name__ == "__main__":
+	unittest.main()
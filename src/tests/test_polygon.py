@@ -0,0 +1,153 @@
+import math
+import random
+import unittest
+from ..ellipse import Ellipse
+from ..polygon import *
+from ..rect import Rect
+
+def _even_odd(rings, point):
+	x, y = point
+	inside = False
+	for ring in rings:
+		for (ax, ay), (bx, by) in zip(ring, ring[1:] + ring[:1]):
+			if ((ay > y) != (by > y) and x < ax + (y - ay)*(bx - ax)/(by - ay)):
+				inside = not inside
+	return inside
+
+def _star(rng, count):
+	cx, cy, r = rng.uniform(-3, 3), rng.uniform(-3, 3), rng.uniform(2, 5)
+	return [
+		(cx + r*rng.uniform(.4, 1)*math.cos(2*math.pi*k/count), cy + r*rng.uniform(.4, 1)*math.sin(2*math.pi*k/count))
+		for k in range(count)
+	]
+
+def _distance(polygon, point):
+	# Signed distance to the boundary, negative inside.
+	px, py = point
+	best = float("inf")
+	for ring in polygon.rings:
+		for a, b in zip(ring, ring[1:] + ring[:1]):
+			dx, dy = b.x - a.x, b.y - a.y
+			t = max(0, min(1, ((px - a.x)*dx + (py - a.y)*dy)/(dx*dx + dy*dy)))
+			best = min(best, math.hypot(px - a.x - t*dx, py - a.y - t*dy))
+	return -best if polygon.contains_point(point) else best
+
+class TestPolygon(unittest.TestCase):
+
+	def test_rects(self):
+		a = Polygon.from_rect(Rect(0, 0, 4, 4))
+		self.assertEqual(a | Rect(4, 0, 2, 4), Polygon(Rect(0, 0, 6, 4)))
+		self.assertEqual((a | Rect(4, 0, 2, 4)).vertex_count, 4)
+		self.assertEqual((a | Rect(2, 2, 4, 4)).area, 28)
+		self.assertEqual((a & Rect(2, 2, 4, 4)), Polygon(Rect(2, 2, 2, 2)))
+		self.assertEqual((a ^ Rect(2, 2, 4, 4)).area, 24)
+		self.assertFalse(a - a)
+		self.assertEqual((a | Rect(2, 2, 4, 4)).bounds, Rect(0, 0, 6, 6))
+
+	def test_holes(self):
+		frame = Polygon(Rect(0, 0, 10, 10)) - Rect(3, 3, 4, 4)
+		self.assertEqual(frame.area, 84)
+		self.assertEqual(len(frame), 2)
+		outer, holes = frame.polygons()[0]
+		self.assertEqual(len(outer), 4)
+		self.assertEqual(len(holes), 1)
+		self.assertTrue(frame.contains_point((1, 1)))
+		self.assertFalse(frame.contains_point((5, 5)))
+		self.assertTrue(frame.contains_point((3, 5))) # on the boundary
+		island = frame | Rect(4, 4, 2, 2)
+		self.assertEqual(island.area, 88)
+		self.assertEqual([len(holes) for outer, holes in island.polygons()], [1, 0])
+
+	def test_fill_rules(self):
+		# Two overlapping squares wound the same way.
+		rings = [[(0, 0), (2, 0), (2, 2), (0, 2)], [(1, 1), (3, 1), (3, 3), (1, 3)]]
+		self.assertEqual(Polygon(rings).area, 6)
+		self.assertEqual(Polygon(rings, fill_rule="nonzero").area, 7)
+		# A bow tie
+		self.assertEqual(Polygon([(0, 0), (2, 2), (2, 0), (0, 2)]).area, 2)
+		self.assertRaises(ValueError, Polygon, rings, "winding")
+
+	def test_touching(self):
+		squares = Polygon([[(0, 0), (1, 0), (1, 1), (0, 1)], [(1, 1), (2, 1), (2, 2), (1, 2)]])
+		self.assertEqual(len(squares), 2)
+		self.assertEqual(squares.area, 2)
+
+	def test_random(self):
+		rng = random.Random(0)
+		for i in range(20):
+			first = [_star(rng, rng.randint(3, 12)) for j in range(rng.randint(1, 3))]
+			second = [_star(rng, rng.randint(3, 12)) for j in range(rng.randint(1, 3))]
+			if (i % 3 == 0):
+				# Shared vertices and collinear edges
+				first = [[(x//1, y//1) for x, y in ring] for ring in first]
+				second = [[(x//1, y//1) for x, y in ring] for ring in second]
+			a, b = Polygon(first), Polygon(second)
+			results = [(a | b, lambda p, q: p or q), (a & b, lambda p, q: p and q), (a - b, lambda p, q: p and not q), (a ^ b, lambda p, q: p != q)]
+			for j in range(100):
+				point = (rng.uniform(-9, 9), rng.uniform(-9, 9))
+				for result, keep in results:
+					self.assertEqual(result.contains_point(point), keep(_even_odd(first, point), _even_odd(second, point)))
+			self.assertAlmostEqual((a | b).area + (a & b).area, a.area + b.area)
+			for ring in (a | b).rings:
+				self.assertTrue(all(ring[k] != ring[k - 1] for k in range(len(ring))))
+
+	def test_self_intersecting(self):
+		# A long ring crossing itself thousands of times, as is and snapped
+		# to a grid, where the crossings share vertices and edges overlap.
+		rng = random.Random(3)
+		count = 1000
+		ring = [
+			(100*math.cos(2*math.pi*k/count) + rng.uniform(-8, 8), 100*math.sin(2*math.pi*k/count) + rng.uniform(-8, 8))
+			for k in range(count)
+		]
+		for rings in ([ring], [[(x//1, y//1) for x, y in ring]]):
+			polygon = Polygon(rings)
+			for j in range(200):
+				point = (rng.uniform(-110, 110), rng.uniform(-110, 110))
+				self.assertEqual(polygon.contains_point(point), _even_odd(rings, point))
+			self.assertAlmostEqual(Polygon(polygon.rings).area, polygon.area)
+
+	def test_union_all(self):
+		rng = random.Random(1)
+		rects = [Rect(rng.randint(0, 20), rng.randint(0, 20), rng.randint(1, 5), rng.randint(1, 5)) for i in range(40)]
+		union = Polygon.union_all(rects)
+		pairwise = Polygon()
+		for rect in rects:
+			pairwise |= rect
+		self.assertEqual(union, pairwise)
+		cells = set((i, j) for x, y, w, h in (map(int, r) for r in rects) for i in range(x, x + w) for j in range(y, y + h))
+		self.assertEqual(union.area, len(cells))
+
+	def test_ellipse(self):
+		circle = Polygon.from_ellipse(Ellipse(0, 0, 2, 2), 256)
+		self.assertAlmostEqual(circle.area, math.pi*4, 2)
+		self.assertEqual(circle.vertex_count, 256)
+
+	def test_offset(self):
+		square = Polygon(Rect(0, 0, 4, 4))
+		self.assertAlmostEqual(square.offset(1).area, 16 + 16 + math.pi, 2)
+		self.assertEqual(square.offset(1, join="miter"), Polygon(Rect(-1, -1, 6, 6)))
+		self.assertAlmostEqual(square.offset(1, join="bevel").area, 36 - 2)
+		self.assertEqual(square.offset(-1), Polygon(Rect(1, 1, 2, 2)))
+		self.assertFalse(square.offset(-2))
+		self.assertEqual((square - Rect(1, 1, 2, 2)).offset(.5, join="miter"), Polygon(Rect(-.5, -.5, 5, 5)) - Rect(1.5, 1.5, 1, 1))
+		self.assertRaises(ValueError, square.offset, 1, "square")
+
+	def test_offset_distances(self):
+		rng = random.Random(2)
+		polygon = Polygon([[(rng.uniform(0, 6), rng.uniform(0, 6)) for i in range(7)], [(rng.uniform(2, 8), rng.uniform(2, 8)) for i in range(5)]])
+		for distance in (.7, -.3):
+			offset = polygon.offset(distance)
+			for i in range(200):
+				point = (rng.uniform(-2, 10), rng.uniform(-2, 10))
+				d = _distance(polygon, point)
+				if (abs(d - distance) > 1e-2):
+					self.assertEqual(offset.contains_point(point), d < distance)
+
+	def test_translate(self):
+		polygon = Polygon(Rect(0, 0, 2, 2))
+		polygon.translate((1, 2))
+		self.assertEqual(polygon, Polygon(Rect(1, 2, 2, 2)))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,63 @@
+import math
+import unittest
+from ..compat import try_import
+from ..fuzzy import *
+from ..linear import *
+from ..polyline import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestPolyline(unittest.TestCase):
+
+	def setUp(self):
+		self.path = Polyline2D((0, 0), (3, 0), (3, 4))
+
+	def test_lengths(self):
+		self.assertEqual(self.path.length(), 7)
+		self.assertEqual(self.path.cumulative_lengths.tolist(), [0, 3, 7])
+		self.assertEqual(self.path.point_at_length(5), Vector2(3, 2))
+		self.assertEqual(self.path.points_at_lengths([-1, 1, 10]).tolist(), [[0, 0], [1, 0], [3, 4]])
+
+	def test_segments(self):
+		segments = self.path.to_segments()
+		self.assertEqual(segments, [Segment2D((0, 0), (3, 0)), Segment2D((3, 0), (3, 4))])
+		self.assertEqual(sum(s.length() for s in segments), self.path.length())
+		self.assertEqual(Polyline2D.from_segments(segments), self.path)
+		self.assertEqual(Polyline3D.from_segments([Segment3D((0, 0, 0), (0, 0, 2))]).length(), 2)
+
+	def test_resample(self):
+		resampled = self.path.resample(8)
+		self.assertEqual(len(resampled), 8)
+		self.assertTrue(numpy.allclose(resampled.segment_lengths, 1))
+		self.assertEqual(len(self.path.resample(spacing=2)), 5)
+
+	def test_simplify(self):
+		x = numpy.linspace(0, 10, 201)
+		noisy = Polyline2D(numpy.column_stack((x, numpy.sin(x) + 0.001*numpy.cos(40*x))))
+		for method in ("rdp", "visvalingam"):
+			simplified = noisy.simplify(0.05, method)
+			self.assertLess(len(simplified), 50)
+			self.assertEqual(simplified[0], noisy[0])
+			self.assertEqual(simplified[-1], noisy[-1])
+			self.assertLess(numpy.abs(simplified.nearest_points(noisy.vertices) - noisy.vertices).max(), 0.1)
+		self.assertEqual(len(noisy.simplify_visvalingam(count=10)), 10)
+		self.assertEqual(len(Polyline2D((0, 0), (1, 0), (2, 0)).simplify_rdp(0)), 2)
+
+	def test_nearest(self):
+		closest, lengths = self.path.nearest_points([[1, 1], [5, 2], [-1, -1]], return_lengths=True)
+		self.assertEqual(closest.tolist(), [[1, 0], [3, 2], [0, 0]])
+		self.assertEqual(lengths.tolist(), [1, 5, 0])
+		self.assertEqual(self.path.nearest_point((4, 4)), Vector2(3, 4))
+		self.assertEqual(self.path.distance_to((5, 2)), 2)
+
+	def test_translate(self):
+		self.path.translate((1, 1))
+		self.assertEqual(self.path[0], Vector2(1, 1))
+		self.assertEqual(self.path.length(), 7)
+		with self.assertRaises(ValueError):
+			self.path.vertices[0, 0] = 5
+
+if __name__ == "__main__":
+	unittest.main()
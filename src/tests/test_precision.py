@@ -0,0 +1,90 @@
+import unittest
+from ..compat import try_import
+from ..fuzzy import *
+from ..precision import *
+from ..vector import *
+from ..linear import *
+from ..aabb import *
+
+numpy = try_import("numpy")
+
+class TestPrecision(unittest.TestCase):
+
+	def tearDown(self):
+		set_precision(FLOAT64)
+
+	def test_set_precision(self):
+		self.assertEqual(get_precision(), FLOAT64)
+		self.assertEqual(set_precision(FLOAT32), FLOAT64)
+		self.assertEqual(get_precision(), FLOAT32)
+		with use_precision(FLOAT64):
+			self.assertEqual(get_precision(), FLOAT64)
+		self.assertEqual(get_precision(), FLOAT32)
+		with self.assertRaises(ValueError):
+			set_precision("f2")
+
+	def test_epsilon(self):
+		self.assertEqual(default_epsilon(), EPSILON)
+		self.assertFalse(fuzzy_eq(1, 1.00005))
+		self.assertFalse(Vector2(1, 2).__feq__(Vector2(1.00005, 2)))
+		with use_precision(FLOAT32):
+			self.assertEqual(default_epsilon(), EPSILONS[FLOAT32])
+			self.assertTrue(fuzzy_eq(1, 1.00005))
+			self.assertTrue(fuzzy_eq(Vector2(1, 2), Vector2(1.00005, 2)))
+			self.assertFalse(fuzzy_eq(1, 1.00005, 1e-8))
+
+	def test_vectors_to_array(self):
+		with use_precision(FLOAT32):
+			array = vectors_to_array([(1, 2), (3, 4)])
+		if (numpy is None):
+			self.assertEqual(array.typecode, "f")
+		else:
+			self.assertEqual(array.dtype, numpy.float32)
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestStorage(unittest.TestCase):
+
+	def test_vectors(self):
+		with use_precision(FLOAT32):
+			v = Vector3(1, 2, 3)
+			self.assertEqual(v._components.dtype, numpy.float32)
+			self.assertEqual((v + v)._components.dtype, numpy.float32)
+			self.assertEqual((v*0.5)._components.dtype, numpy.float32)
+			self.assertEqual(Vector2()._components.dtype, numpy.float32)
+		self.assertEqual(Vector3(1, 2, 3)._components.dtype, numpy.float64)
+		# Results are stored at the active precision.
+		self.assertEqual((v + Vector3(1, 1, 1))._components.dtype, numpy.float64)
+
+	def test_arrays_are_kept(self):
+		array = numpy.arange(6, dtype=numpy.float32).reshape(3, 2)
+		vectors = Vector2.from_array(array)
+		self.assertEqual(vectors[1]._components.dtype, numpy.float32)
+		vectors[1].x = 10
+		self.assertEqual(array[1, 0], 10)
+		self.assertIs(as_float_array(array), array)
+		self.assertEqual(as_float_array(array.astype(int)).dtype, numpy.float64)
+		self.assertEqual(Vector2.from_buffer(array.tobytes(), FLOAT32)[2], Vector2(4, 5))
+
+	def test_buffer_round_trip(self):
+		vectors = [Vector2(1, 2), Vector2(3, 4)]
+		for precision in (FLOAT32, FLOAT64):
+			with use_precision(precision):
+				buffer = bytearray(vectors_to_array(vectors))
+				self.assertEqual(len(buffer), 4*(4 if precision == FLOAT32 else 8))
+				self.assertEqual(Vector2.from_buffer(buffer), vectors)
+
+	def test_containers(self):
+		points = numpy.random.RandomState(0).rand(100, 3).astype(numpy.float32)
+		boxes = AABB3DArray.from_points(points)
+		boxes.translate(Vector3(1, 1, 1))
+		self.assertEqual(boxes.lo.dtype, numpy.float32)
+		self.assertEqual(boxes.expand(0.5).lo.dtype, numpy.float32)
+		# Mixing precisions promotes to float64.
+		self.assertEqual(boxes.union(AABB3DArray.from_points(points.astype(float))).lo.dtype, numpy.float64)
+		box = AABB3D(0.25, 0.25, 0.25, 0.5, 0.5, 0.5)
+		self.assertEqual(box.contains_points(points).tolist(), box.contains_points(points.astype(float)).tolist())
+		with use_precision(FLOAT32):
+			self.assertEqual(segments_to_array([Segment2D((0, 0), (1, 1))]).dtype, numpy.float32)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,142 @@
+import math
+import random
+import unittest
+from fractions import Fraction
+from ..compat import try_import
+from ..linear import *
+from ..predicates import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+def _exact_sign(a, b, c):
+	(ax, ay), (bx, by), (cx, cy) = [map(Fraction, p) for p in (a, b, c)]
+	det = (ax - cx)*(by - cy) - (ay - cy)*(bx - cx)
+	return (det > 0) - (det < 0)
+
+def _sign(x):
+	return (x > 0) - (x < 0)
+
+def _exact_crosses(p1, p2, q1, q2):
+	(x1, y1), (x2, y2), (x3, y3), (x4, y4) = [map(Fraction, p) for p in (p1, p2, q1, q2)]
+	denom = (x2 - x1)*(y4 - y3) - (y2 - y1)*(x4 - x3)
+	if (denom == 0):
+		return False
+	t = ((x3 - x1)*(y4 - y3) - (y3 - y1)*(x4 - x3))/denom
+	u = ((x3 - x1)*(y2 - y1) - (y3 - y1)*(x2 - x1))/denom
+	return 0 <= t <= 1 and 0 <= u <= 1
+
+class TestPredicates(unittest.TestCase):
+
+	def setUp(self):
+		# A grid of points a few ulps around (0.5, 0.5), tested against a
+		# line through it: the classic case where float orientation fails.
+		ulp = 2.0**-53
+		self.near = [(0.5 + i*ulp, 0.5 + j*ulp) for i in range(-8, 8) for j in range(-8, 8)]
+
+	def test_orient2d(self):
+		b, c = (12.0, 12.0), (24.0, 24.0)
+		self.assertEqual(orient2d((0, 0), (1, 0), (0, 1)) > 0, True)
+		self.assertEqual(orient2d((0, 0), (1, 0), (0, -1)) < 0, True)
+		for a in self.near:
+			self.assertEqual(_sign(orient2d(a, b, c)), _exact_sign(a, b, c))
+
+	@unittest.skipIf(numpy is None, "requires numpy")
+	def test_orient2d_many(self):
+		b, c = (12.0, 12.0), (24.0, 24.0)
+		signs = numpy.sign(orient2d_many(numpy.array(self.near), b, c)).tolist()
+		self.assertEqual(signs, [_exact_sign(a, b, c) for a in self.near])
+
+	def test_fallbacks(self):
+		reset_fallback_counts()
+		rng = random.Random(0)
+		for i in range(1000):
+			orient2d(*[(rng.random(), rng.random()) for j in range(3)])
+		self.assertEqual(fallback_counts()["orient2d"], 0)
+		orient2d((0.5, 0.5), (12.0, 12.0), (24.0, 24.0))
+		self.assertEqual(fallback_counts()["orient2d"], 1)
+
+	def test_incircle(self):
+		self.assertEqual(incircle((0, 0), (1, 0), (0, 1), (1, 1)), 0)
+		self.assertGreater(incircle((0, 0), (1, 0), (0, 1), (0.5, 0.5)), 0)
+		self.assertLess(incircle((0, 0), (1, 0), (0, 1), (2, 2)), 0)
+		ulp = 2.0**-52
+		self.assertGreater(incircle((0, 0), (1, 0), (0, 1), (1 - ulp, 1)), 0)
+		self.assertLess(incircle((0, 0), (1, 0), (0, 1), (1 + ulp, 1)), 0)
+
+	def test_segments_intersect(self):
+		self.assertTrue(segments_intersect((0, 0), (2, 2), (0, 2), (2, 0)))
+		self.assertTrue(segments_intersect((0, 0), (2, 2), (2, 2), (3, 0)))
+		self.assertTrue(segments_intersect((0, 0), (2, 0), (1, 0), (3, 0)))
+		self.assertFalse(segments_intersect((0, 0), (1, 0), (2, 0), (3, 0)))
+		self.assertFalse(segments_intersect((0, 0), (1, 1), (0, 1), (1, 2)))
+
+	def test_line_intersection(self):
+		self.assertEqual(line_intersection((0, 0), (1, 1), (0, 1), (1, 0)), (0.5, 0.5))
+		self.assertIsNone(line_intersection((0, 0), (1, 1), (0, 1), (1, 2)))
+		# Nearly parallel, but not quite
+		self.assertIsNotNone(line_intersection((0, 0), (1, 1), (0, 1e-300), (1, 1 + 2.0**-52)))
+
+	def test_segment_intersections(self):
+		# Segments ending a few ulps from the other segment's line: whether
+		# they touch it is decided exactly, by both backends.
+		segments = [(a, (-1.0, 2.0)) for a in self.near] + [((1.0, 0.0), a) for a in self.near]
+		expected = [_exact_crosses(p1, p2, (-12.0, -12.0), (24.0, 24.0)) for p1, p2 in segments]
+		self.assertIn(True, expected)
+		self.assertIn(False, expected)
+		for backend in (["python", "numpy"] if numpy is not None else ["python"]):
+			points = segment_intersections(segments, ((-12.0, -12.0), (24.0, 24.0)), backend=backend)
+			hits = [not math.isnan(point[0]) for point in points]
+			self.assertEqual(hits, expected)
+		self.assertTrue(math.isnan(segment_intersections([((0, 0), (1, 1))], [((0, 1), (1, 2))], backend="python")[0][0]))
+
+	def test_point_of_intersection(self):
+		# Segments with an end on (or a rounding error off) the other one, and
+		# collinear segments touching end to end: the scalar intersection
+		# agrees with segments_intersect and with the batch one.
+		rng = random.Random(2)
+		pairs = []
+		for i in range(500):
+			q1, q2 = (rng.uniform(-5, 5), rng.uniform(-5, 5)), (rng.uniform(-5, 5), rng.uniform(-5, 5))
+			t = rng.random()
+			p1 = (q1[0] + t*(q2[0] - q1[0]), q1[1] + t*(q2[1] - q1[1]))
+			pairs.append(((p1, (rng.uniform(-5, 5), rng.uniform(-5, 5))), (q1, q2)))
+			pairs.append(((q2, (rng.uniform(-5, 5), rng.uniform(-5, 5))), (q1, q2)))
+			a, b = (rng.randint(-5, 5), rng.randint(-5, 5)), (rng.randint(-5, 5), rng.randint(-5, 5))
+			pairs.append(((b, (2*b[0] - a[0], 2*b[1] - a[1])), (a, b)))
+		for (p1, p2), (q1, q2) in pairs:
+			poi = Segment2D(p1, p2).point_of_intersection(Segment2D(q1, q2))
+			self.assertEqual(poi is not None, _exact_crosses(p1, p2, q1, q2))
+			if (poi is not None):
+				self.assertTrue(segments_intersect(p1, p2, q1, q2))
+		crosses = [_exact_crosses(*(p + q)) for p, q in pairs[::3]]
+		self.assertIn(True, crosses)
+		self.assertIn(False, crosses)
+		if (numpy is not None):
+			points = segment_intersections([p for p, q in pairs], [q for p, q in pairs])
+			for ((p1, p2), (q1, q2)), point in zip(pairs, points.tolist()):
+				poi = Segment2D(p1, p2).point_of_intersection(Segment2D(q1, q2))
+				self.assertEqual(poi is None, math.isnan(point[0]))
+				if (poi is not None):
+					self.assertEqual(list(poi), point)
+		# Rays and lines only bound one end, or none.
+		self.assertEqual(Ray2D((0, 0), (1, 0)).point_of_intersection(Segment2D((3, -1), (3, 1))), Vector2(3, 0))
+		self.assertIsNone(Ray2D((0, 0), (1, 0)).point_of_intersection(Segment2D((-3, -1), (-3, 1))))
+		self.assertEqual(Line2D((0, 0), (1, 0)).point_of_intersection(Ray2D((-3, 1), (-3, 2))), None)
+		self.assertEqual(Line2D((0, 0), (1, 0)).point_of_intersection(Ray2D((-3, 1), (-3, 0))), Vector2(-3, 0))
+
+	def test_lines(self):
+		self.assertEqual(Segment2D((0, 0), (2, 2)).point_of_intersection(Segment2D((0, 2), (2, 0))), Vector2(1, 1))
+		self.assertEqual(Line2D((1, 0), (1, 1))._poi(Line2D((0, 3), (5, 3))), Vector2(1, 3))
+		self.assertIsNone(Line2D((0, 0), (1, 1))._poi(Line2D((0, 1), (3, 4))))
+		for a in self.near:
+			self.assertEqual(Line2D((12.0, 12.0), (24.0, 24.0)).is_to_the_left(a), _exact_sign((12.0, 12.0), (24.0, 24.0), a) < 0)
+
+	def test_convex_hull(self):
+		points = [(0, 0), (1, 0), (2, 0), (2, 2), (0, 2), (1, 1), (1, 2)]
+		self.assertEqual(convex_hull(points), [Vector2(0, 0), Vector2(2, 0), Vector2(2, 2), Vector2(0, 2)])
+		if (numpy is not None):
+			self.assertEqual(convex_hull(numpy.array(points, dtype=float)), convex_hull(points))
+
+if __name__ == "__main__":
+	unittest.main()
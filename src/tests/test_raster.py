@@ -0,0 +1,91 @@
+import math
+import random
+import unittest
+from ..compat import try_import
+from ..ellipse import Ellipse
+from ..linear import Segment2D
+from ..polygon import Polygon
+from ..rect import Rect
+from .. import raster
+from ..raster import *
+
+numpy = try_import("numpy")
+
+def _signed_distances(occupied, cell_size):
+	# Brute force: from each cell center to the nearest center of the other
+	# kind, less half a cell.
+	rows, columns = numpy.indices(occupied.shape)
+	cells = numpy.stack([rows.ravel(), columns.ravel()], axis=1)
+	flat = occupied.ravel()
+	result = numpy.empty(len(cells))
+	for i, cell in enumerate(cells):
+		other = cells[flat != flat[i]]
+		d = numpy.sqrt(((other - cell)**2).sum(axis=1)).min() if len(other) else numpy.inf
+		result[i] = -(d - .5) if flat[i] else d - .5
+	return (result*cell_size).reshape(occupied.shape)
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestRaster(unittest.TestCase):
+
+	def test_shapes(self):
+		grid = Raster(Rect(0, 0, 20, 15), .5)
+		shapes = [Rect(2, 2, 5, 3), Ellipse(12, 9, 4, 2.5), Polygon(Rect(10, 1, 6, 5)) - Rect(12, 2, 2, 2)]
+		for shape in shapes:
+			grid.add(shape)
+		xs, ys = grid.cell_centers()
+		expected = numpy.array([[any(s.contains_point((x, y)) for s in shapes) for x in xs] for y in ys])
+		self.assertEqual(grid.shape, (30, 40))
+		self.assertTrue(numpy.array_equal(grid.occupancy, expected))
+		# A thick segment covers the cells within half its thickness.
+		grid.clear()
+		grid.add(Segment2D((1, 1), (18, 12)), 2)
+		t = numpy.linspace(0, 1, 2001)
+		distances = numpy.hypot(xs[None, :, None] - 1 - 17*t, ys[:, None, None] - 1 - 11*t).min(axis=2)
+		self.assertLessEqual((grid.occupancy != (distances <= 1 + 1e-3)).sum(), 2)
+		# Rings and shapes outside the grid
+		self.assertTrue(rasterize([[(0, 0), (4, 0), (0, 4)]], Rect(0, 0, 4, 4), 1)[0][0, 0])
+		self.assertFalse(rasterize([Rect(50, 50, 2, 2)], Rect(0, 0, 4, 4), 1)[0].any())
+		self.assertRaises(ValueError, grid.add, 5)
+
+	def test_distance_field(self):
+		rng = random.Random(0)
+		grid = Raster(Rect(-5, -5, 12, 8), .25)
+		for i in range(6):
+			grid.add(Ellipse(rng.uniform(-5, 7), rng.uniform(-5, 3), rng.uniform(.2, 2), rng.uniform(.2, 2)))
+		field = grid.distance_field
+		self.assertTrue(numpy.allclose(field, _signed_distances(grid.occupancy, .25)))
+		self.assertTrue(numpy.array_equal(field < 0, grid.occupancy))
+		self.assertTrue(numpy.all(numpy.isinf(Raster(Rect(0, 0, 2, 2), 1).distance_field)))
+
+	def test_numpy_transform(self):
+		rng = numpy.random.default_rng(0)
+		for density in (.5, .05, .001):
+			mask = rng.random((40, 70)) > density
+			mask[0, 0] = False
+			distances = raster._distance_transform_numpy(mask)
+			self.assertTrue(numpy.all(distances[~mask] == 0))
+			self.assertTrue(numpy.allclose(distances[mask], _signed_distances(~mask, 1)[mask] + .5))
+
+	def test_updates(self):
+		rng = random.Random(1)
+		for max_distance in (None, 1.5):
+			grid = Raster(Rect(0, 0, 30, 20), .5, max_distance)
+			rects = [Rect(rng.uniform(0, 28), rng.uniform(0, 18), 2, 1) for i in range(10)]
+			keys = [grid.add(rect) for rect in rects]
+			grid.distance_field
+			for step in range(20):
+				i = rng.randrange(len(rects))
+				rects[i].translate((rng.uniform(-3, 3), rng.uniform(-3, 3)))
+				grid.update(keys[i])
+				if (step % 5 == 4):
+					grid.remove(keys[i])
+					keys[i] = grid.add(Ellipse(rng.uniform(0, 30), rng.uniform(0, 20), 1, 2))
+				fresh = Raster(Rect(0, 0, 30, 20), .5, max_distance)
+				for key in keys:
+					fresh.add(grid._shapes[key][0])
+				self.assertTrue(numpy.array_equal(grid.occupancy, fresh.occupancy))
+				self.assertTrue(numpy.allclose(grid.distance_field, fresh.distance_field))
+		self.assertEqual(len(grid), 10)
+
+if __name__ == "__main__":
+	unittest.main()
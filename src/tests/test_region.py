@@ -0,0 +1,57 @@
+import random
+import unittest
+from ..rect import *
+from ..region import *
+
+def _cells(region, size=16):
+	return set((x, y) for x in range(-size, size) for y in range(-size, size) if region.contains_point((x + .5, y + .5)))
+
+def _rect_cells(rects):
+	return set((i, j) for x, y, w, h in map(tuple, rects) for i in range(x, x + w) for j in range(y, y + h))
+
+class TestRegion(unittest.TestCase):
+
+	def test_union(self):
+		region = Region([Rect(0, 0, 4, 4), Rect(2, 2, 4, 4)])
+		self.assertEqual(region.area, 28)
+		self.assertEqual(region.bounds, Rect(0, 0, 6, 6))
+		self.assertEqual(region.rects(), [Rect(0, 0, 4, 2), Rect(0, 2, 6, 2), Rect(2, 4, 4, 2)])
+		self.assertEqual(Region(Rect(0, 0, 4, 4)) | Rect(4, 0, 2, 4), Region(Rect(0, 0, 6, 4)))
+
+	def test_algebra(self):
+		a = Region([Rect(0, 0, 4, 4), Rect(6, 0, 2, 8)])
+		b = Region(Rect(2, 2, 6, 4))
+		self.assertEqual((a & b).rects(), [Rect(2, 2, 2, 2), Rect(6, 2, 2, 4)])
+		self.assertEqual((a - b).area, 16 + 16 - 4 - 8)
+		self.assertEqual((a ^ b).area, (a | b).area - (a & b).area)
+		self.assertFalse(a - a)
+
+	def test_random(self):
+		rng = random.Random(0)
+		rects = [(rng.randint(-10, 8), rng.randint(-10, 8), rng.randint(0, 6), rng.randint(0, 6)) for i in range(30)]
+		a, b = Region(rects[:15]), Region(rects[15:])
+		ca, cb = _rect_cells(rects[:15]), _rect_cells(rects[15:])
+		self.assertEqual(_cells(a), ca)
+		self.assertEqual(_cells(a | b), ca | cb)
+		self.assertEqual(_cells(a & b), ca & cb)
+		self.assertEqual(_cells(a - b), ca - cb)
+		self.assertEqual(_cells(a ^ b), ca ^ cb)
+		# Exported rects are disjoint and cover the region exactly.
+		rects = (a | b).rects()
+		self.assertEqual(sum(r.width*r.height for r in rects), len(ca | cb))
+		self.assertEqual(Region(rects), a | b)
+
+	def test_accumulate(self):
+		damage = Region()
+		for i in range(10):
+			damage |= Rect(i, 0, 1, 1)
+		self.assertEqual(damage.rects(), [Rect(0, 0, 10, 1)])
+		damage.translate((1, 1))
+		self.assertTrue(damage.contains_rect(Rect(1, 1, 10, 1)))
+		self.assertFalse(damage.collides_rect(Rect(0, 0, 1, 1)))
+
+	def test_rect_union(self):
+		self.assertEqual(Rect(0, 0, 2, 2).union(Rect(3, 1, 2, 2)), Rect(0, 0, 5, 3))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,77 @@
+import math
+import unittest
+from ..compat import try_import
+from ..bezier import BezierCurve
+from ..ellipse import *
+from ..linear import Segment2D
+from ..rect import Rect
+from ..sampling import *
+from ..vector import Vector3
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestSampling(unittest.TestCase):
+
+	def test_seeding(self):
+		rect = Rect(0, 0, 4, 3)
+		self.assertTrue(numpy.array_equal(sample_rect(rect, 100, 7), sample_rect(rect, 100, 7)))
+		self.assertFalse(numpy.array_equal(sample_rect(rect, 100, 7), sample_rect(rect, 100, 8)))
+		rng = numpy.random.default_rng(1)
+		self.assertFalse(numpy.array_equal(sample_rect(rect, 100, rng), sample_rect(rect, 100, rng)))
+
+	def test_unit(self):
+		for points, d in ((sample_unit_circle(20000, 0), 2), (sample_unit_sphere(20000, 0), 3)):
+			self.assertEqual(points.shape, (20000, d))
+			self.assertTrue(numpy.allclose(numpy.linalg.norm(points, axis=1), 1))
+			# Every axis is covered evenly: the mean of each coordinate is 0.
+			self.assertTrue(numpy.all(numpy.abs(points.mean(axis=0)) < .02))
+		# A band of the sphere gets its share of the area.
+		z = sample_unit_sphere(20000, 1)[:, 2]
+		self.assertAlmostEqual(numpy.mean(z > .5), .25, delta=.015)
+
+	def test_shapes(self):
+		rect, ellipse, ellipsoid = Rect(1, 2, 4, 3), Ellipse(1, 2, 4, 2), Ellipsoid3D(1, 2, 3, 4, 2, 1)
+		points = sample_rect(rect, 10000, 0)
+		self.assertTrue(rect.contains_points(points).all())
+		points = sample_ellipse(ellipse, 10000, 0)
+		self.assertTrue(ellipse.contains_points(points).all())
+		# Half the area lies within 1/sqrt(2) of the center, scaled.
+		self.assertAlmostEqual(numpy.mean(Ellipse(1, 2, 4/math.sqrt(2), 2/math.sqrt(2)).contains_points(points)), .5, delta=.02)
+		points = sample_ellipsoid(ellipsoid, 10000, 0)
+		self.assertTrue(ellipsoid.contains_points(points).all())
+		self.assertAlmostEqual(numpy.mean(Ellipsoid3D(1, 2, 3, 2, 1, .5).contains_points(points)), 1/8, delta=.015)
+
+	def test_curves(self):
+		points = sample_segment(Segment2D((0, 0), (4, 2)), 1000, 0)
+		self.assertTrue(numpy.allclose(points[:, 1]*2, points[:, 0]))
+		self.assertTrue(numpy.all((0 <= points[:, 0]) & (points[:, 0] <= 4)))
+		# The control points bunch the curve's times up at the start, but
+		# samples still spread evenly along it.
+		curve = BezierCurve((0, 0), (0, 0), (10, 0))
+		x = sample_bezier(curve, 20000, 0)[:, 0]
+		self.assertTrue(numpy.allclose(sample_bezier(curve, 1000, 0)[:, 1], 0))
+		self.assertAlmostEqual(numpy.mean(x < 5), .5, delta=.015)
+
+	def test_poisson_disk(self):
+		rect, radius = Rect(0, 0, 20, 10), .5
+		points = sample_poisson_disk(rect, radius, 0)
+		self.assertTrue(rect.contains_points(points).all())
+		distances = numpy.linalg.norm(points[:, None] - points[None], axis=2)
+		numpy.fill_diagonal(distances, numpy.inf)
+		self.assertGreaterEqual(distances.min(), radius)
+		# Every point of the rect is within 2 radii of a sample, otherwise one
+		# more could have been added there.
+		grid = numpy.stack(numpy.meshgrid(numpy.linspace(0, 20, 81), numpy.linspace(0, 10, 41)), axis=2).reshape(-1, 2)
+		self.assertLess(numpy.linalg.norm(grid[:, None] - points[None], axis=2).min(axis=1).max(), 2*radius)
+		self.assertTrue(numpy.array_equal(points, sample_poisson_disk(rect, radius, 0)))
+		self.assertRaises(ValueError, sample_poisson_disk, rect, 0)
+
+	def test_random_unit(self):
+		# Used to be biased towards the diagonal of the positive octant.
+		vectors = [Vector3.random_unit() for i in range(2000)]
+		self.assertTrue(all(abs(v.magnitude() - 1) < 1e-9 for v in vectors))
+		self.assertLess(abs(sum(v.x for v in vectors))/2000, .1)
+
+if __name__ == "__main__":
+	unittest.main()
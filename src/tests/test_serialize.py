@@ -0,0 +1,37 @@
+import io
+import unittest
+from ..precision import *
+from ..serialize import *
+from ..vector import *
+from ..linear import *
+from ..rect import *
+from ..ellipse import *
+
+class TestSerialization(unittest.TestCase):
+
+	def test_round_trip(self):
+		objects = [
+			Vector2(1, 2), ImmutableVector3(1, 2, 3), Quaternion(1, 2, 3, 4),
+			Segment2D((0, 0), (1, 2)), Ray3D((0, 0, 0), (1, 2, 3)), Rect(0, 1, 2, 3),
+			Ellipse(0, 0, 2, 1), Ellipsoid3D(0, 0, 0, 3, 2, 1)
+		]
+		for obj in objects:
+			decoded = loads(dumps(obj))
+			self.assertIs(type(decoded), type(obj))
+			self.assertEqual(decoded, obj)
+		self.assertEqual(len(dumps(Vector2(1, 2), FLOAT32)), 10)
+
+	def test_streaming(self):
+		objects = [Vector2(i, i) for i in range(5)] + [Rect(i, i, 1, 1) for i in range(3)]
+		for batch_size in (None, 2):
+			stream = io.BytesIO()
+			self.assertEqual(dump_many(objects, stream, batch_size=batch_size), 8)
+			stream.seek(0)
+			self.assertEqual(list(iter_load(stream)), objects)
+
+	def test_batch_array(self):
+		data = bytearray(dumps_batch([Vector3(1, 2, 3), Vector3(4, 5, 6)]))
+		cls, values = loads_batch_array(data)
+		self.assertIs(cls, Vector3)
+		self.assertEqual(list(values[1]), [4, 5, 6])
+		self.assertEqual(loads_batch(data), [Vector3(1, 2, 3), Vector3(4, 5, 6)])
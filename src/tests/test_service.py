@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+from ..compat import try_import
+from ..ellipse import *
+from ..linear import *
+from ..rect import *
+from ..service import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestBatchQueryService(unittest.TestCase):
+
+	def test_contains_points_batched(self):
+		ellipse = Ellipse(1, 1, 1.5, 0.7)
+		rect = Rect(0, 0, 1, 1)
+		points = numpy.random.RandomState(0).rand(50, 2) * 3
+
+		async def run():
+			async with BatchQueryService(max_delay=0.01) as service:
+				return service, await asyncio.gather(
+					*[service.contains_point(ellipse, point) for point in points] +
+					[service.contains_points(rect, points[:10]), service.contains_points(rect, points[10:])]
+					)
+		service, results = asyncio.run(run())
+		self.assertEqual(results[:50], [bool(b) for b in ellipse.contains_points(points)])
+		self.assertTrue(numpy.array_equal(numpy.concatenate(results[50:]), rect.contains_points(points)))
+		self.assertEqual(service.requests, 52)
+		self.assertEqual(service.batches, 2)
+
+	def test_max_batch_size(self):
+		ellipse = Ellipse(1, 1, 1.5, 0.7)
+
+		async def run():
+			service = BatchQueryService(max_batch_size=8, max_delay=10)
+			await asyncio.gather(*[service.contains_point(ellipse, (i, 1)) for i in range(32)])
+			return service
+		self.assertEqual(asyncio.run(run()).batches, 4)
+
+	def test_segment_intersection(self):
+		async def run():
+			async with BatchQueryService() as service:
+				return await asyncio.gather(
+					service.segment_intersection(Segment2D((0, 0), (1, 1)), Segment2D((0, 1), (1, 0))),
+					service.segment_intersection(Segment2D((0, 0), (1, 0)), Segment2D((0, 1), (1, 1)))
+					)
+		self.assertEqual(asyncio.run(run()), [Vector2(.5, .5), None])
+
+	def test_errors_propagate(self):
+		class Broken(object):
+			def contains_points(self, points):
+				raise ValueError("broken")
+
+		async def run():
+			service = BatchQueryService()
+			return await asyncio.gather(service.contains_point(Broken(), (0, 0)), return_exceptions=True)
+		self.assertIsInstance(asyncio.run(run())[0], ValueError)
+
+	def test_bad_request(self):
+		# A malformed request fails on its own; the rest of its batch still
+		# resolves.
+		ellipse = Ellipse(1, 1, 1.5, 0.7)
+
+		async def run():
+			async with BatchQueryService(max_delay=0.01) as service:
+				return await asyncio.wait_for(asyncio.gather(
+					service.contains_point(ellipse, (1, 1)),
+					service.contains_points(ellipse, [0, 0]),
+					service.contains_points(ellipse, []),
+					service.segment_intersection(Segment2D((0, 0), (1, 1)), Segment2D((0, 1), (1, 0))),
+					service.contains_points(ellipse, [(0, 0, 0)]),
+					service.contains_point(ellipse, (5, 5)),
+					return_exceptions=True
+					), 2)
+		results = asyncio.run(run())
+		self.assertEqual(results[0], True)
+		self.assertIsInstance(results[1], ValueError)
+		self.assertIsInstance(results[2], ValueError)
+		self.assertEqual(results[3], Vector2(.5, .5))
+		# Rows of another width can't be concatenated with the others, so
+		# they make up a batch of their own.
+		self.assertEqual(len(results[4]), 1)
+		self.assertEqual(results[5], False)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,87 @@
+import itertools
+import unittest
+from ..bezier import BezierCurve
+from ..compat import try_import
+from ..ellipse import Ellipse
+from ..rect import Rect
+from ..stream import *
+from ..vector import *
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestStream(unittest.TestCase):
+
+	def setUp(self):
+		self.points = numpy.random.RandomState(0).rand(1000, 2) * 10
+
+	def test_chunks(self):
+		chunks = list(iter_chunks(map(tuple, self.points), 300))
+		self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+		self.assertTrue(numpy.array_equal(numpy.concatenate(chunks), self.points))
+		# Arrays are split, and vectors gathered like tuples.
+		chunks = list(iter_chunks([Vector2(1, 2), self.points[:500], Vector2(3, 4)], 300))
+		self.assertEqual([len(chunk) for chunk in chunks], [1, 300, 200, 1])
+		self.assertEqual(chunks[0].tolist(), [[1, 2]])
+		curves = [BezierCurve((0, 0), (1, 1), (2, 0))] * 5
+		self.assertEqual([len(chunk) for chunk in iter_chunks(curves, 2)], [2, 2, 1])
+		self.assertRaises(ValueError, list, iter_chunks([(0, 0), curves[0]]))
+
+	def test_transforms(self):
+		pipeline = Pipeline(256).translate((1, 2)).scale(2, anchor=(1, 1)).rotate(30, anchor=Vector2(3, 0))
+		expected = [(((Vector2(p) + (1, 2)) - (1, 1))*2 + (1, 1)).rotate(30, (3, 0)) for p in self.points.tolist()]
+		self.assertTrue(numpy.allclose(pipeline.collect(self.points), [tuple(v) for v in expected]))
+		self.assertEqual(len(pipeline), 3)
+		# Vectors come out one at a time.
+		self.assertEqual(list(Pipeline().translate((1, 1)).vectors([(0, 0), (1, 2)])), [Vector2(1, 1), Vector2(2, 3)])
+
+	def test_filters(self):
+		ellipse, rect = Ellipse(5, 5, 3, 2), Rect(2, 3, 4, 4)
+		inside = Pipeline(128).inside(ellipse).collect(self.points)
+		self.assertTrue(numpy.array_equal(inside, self.points[ellipse.contains_points(self.points)]))
+		outside = Pipeline(128).outside(ellipse).collect(self.points)
+		self.assertEqual(len(inside) + len(outside), len(self.points))
+		# Clipping drops the points outside the rect, clamping moves them
+		# onto its border.
+		clipped = Pipeline(128).clip(rect).collect(self.points)
+		self.assertTrue(numpy.array_equal(clipped, self.points[rect.contains_points(self.points)]))
+		self.assertEqual(Pipeline().clip(rect).collect([(2, 3), (6, 5), (7, 5)]).tolist(), [[2, 3], [6, 5]])
+		clamped = Pipeline(128).clamp(rect).collect(self.points)
+		self.assertEqual(len(clamped), len(self.points))
+		self.assertTrue(numpy.all((clamped >= (2, 3)) & (clamped <= (6, 7))))
+		self.assertEqual(Pipeline(128).clip(rect).collect(self.points + 100).shape, (0, 2))
+
+	def test_dedupe(self):
+		# Duplicates are dropped across chunk boundaries, and the first of two
+		# fuzzy-equal points is the one kept, even in another grid cell.
+		points = numpy.concatenate([self.points, self.points + 5e-4, self.points[::-1] - 5e-4])
+		result = Pipeline(700).dedupe(1e-3).collect(points)
+		self.assertTrue(numpy.array_equal(result, self.points))
+		self.assertEqual(Pipeline().dedupe(.1).collect([(.52, 0), (.48, 0), (.6, 0), (.7, 0)]).tolist(), [[.52, 0], [.7, 0]])
+		# Chains: (.7, 0) is kept as (.6, 0) was dropped.
+		self.assertEqual(Pipeline(2).dedupe(.1).collect([(.5, 0), (.6, 0), (.7, 0), (.5, .05)]).tolist(), [[.5, 0], [.7, 0]])
+		self.assertEqual(len(Pipeline().dedupe().collect([(1, 2, 3)]*10 + [(1, 2, 3.5)])), 2)
+
+	def test_flatten_beziers(self):
+		curves = [BezierCurve((0, 0), (i, 2), (4, 0)) for i in range(5)]
+		points = Pipeline(2).flatten_beziers(8).collect(curves)
+		times = numpy.linspace(0, 1, 9)
+		expected = numpy.concatenate([curve.evaluate_many(times, backend="numpy") for curve in curves])
+		self.assertTrue(numpy.allclose(points, expected))
+		self.assertEqual(Pipeline().flatten_beziers().translate((1, 0)).collect([]).shape, (0, 2))
+
+	def test_lazy(self):
+		# Only a chunk is read ahead of the output, however long the stream.
+		read = [0]
+		def source():
+			for i in itertools.count():
+				read[0] += 1
+				yield (i, i)
+		chunks = Pipeline(100).translate((1, 0)).run(source())
+		for i in range(3):
+			chunk = next(chunks)
+		self.assertEqual(chunk[0].tolist(), [201, 200])
+		self.assertEqual(read[0], 300)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,106 @@
+import math
+import unittest
+from ..compat import try_import
+from ..fuzzy import *
+from ..vector import *
+from ..linear import *
+from ..rect import *
+from ..ellipse import *
+from ..aabb import *
+from ..sweep import *
+
+numpy = try_import("numpy")
+
+@unittest.skipIf(numpy is None, "requires numpy")
+class TestTimeOfImpact(unittest.TestCase):
+
+	def assertImpact(self, result, t, normal):
+		self.assertIsNotNone(result)
+		self.assertTrue(fuzzy_eq(result[0], t), result)
+		self.assertTrue(fuzzy_eq(result[1], to_vector(normal)), result)
+
+	def test_point(self):
+		self.assertImpact(time_of_impact((0, 0), (10, 0), Rect(5, -1, 2, 2)), 0.5, (-1, 0))
+		self.assertImpact(time_of_impact((0, 0), (10, 0), Segment2D((5, -1), (5, 1))), 0.5, (-1, 0))
+		self.assertImpact(time_of_impact((0, 0), (10, 0), Segment2D((5, 0), (7, 0))), 0.5, (-1, 0))
+		self.assertImpact(time_of_impact((0, 0), (10, 0), Ellipse(5, 0, 2, 1)), 0.3, (-1, 0))
+		self.assertImpact(time_of_impact((0, 0, 0), (0, 0, 10), Ellipsoid3D(0, 0, 5, 1, 2, 3)), 0.2, (0, 0, -1))
+		self.assertIsNone(time_of_impact((0, 0), (4, 0), Rect(5, -1, 2, 2)))
+		self.assertIsNone(time_of_impact((0, 0), (10, 0), Segment2D((5, 1), (5, 2))))
+
+	def test_balls(self):
+		ball = Ellipse(0, 1.5, 1, 1)
+		# Hits the rounded corner at (5, 1).
+		self.assertImpact(time_of_impact(ball, (10, 0), Rect(5, -1, 2, 2)), (5 - math.sqrt(0.75))/10, (-math.sqrt(0.75), 0.5))
+		self.assertIsNone(time_of_impact(Ellipse(0, 3, 1, 1), (10, 0), Rect(5, -1, 2, 2)))
+		self.assertImpact(time_of_impact(Ellipse(0, 0, 0.5, 0.5), (10, 0), Segment2D((5, -1), (5, 1))), 0.45, (-1, 0))
+		self.assertImpact(time_of_impact(Ellipse(0, 0, 1, 1), (10, 0), Ellipse(5, 0, 1, 1)), 0.3, (-1, 0))
+		self.assertImpact(time_of_impact(Ellipse(0, 0, 0.5, 0.5), (10, 0), Ellipse(5, 0, 2, 1)), 0.25, (-1, 0))
+		self.assertImpact(time_of_impact(Ellipse(0, 0, 1, 1), (10, 0), (5, 0)), 0.4, (-1, 0))
+		sphere = Ellipsoid3D(0, 1.5, 0, 1, 1, 1)
+		# Hits the rounded edge along z at (5, 1).
+		self.assertImpact(time_of_impact(sphere, (10, 0, 0), AABB3D(5, 0, 0, 1, 1, 1)), (5 - math.sqrt(0.75))/10, (-math.sqrt(0.75), 0.5, 0))
+		self.assertImpact(time_of_impact(sphere, (10, 0, 0), Ellipsoid3D(5, 1.5, 0, 1, 1, 1)), 0.3, (-1, 0, 0))
+
+	def test_shapes(self):
+		self.assertImpact(time_of_impact(Rect(0, 0, 1, 1), (10, 0), Rect(5, 0.5, 1, 1)), 0.4, (-1, 0))
+		self.assertImpact(time_of_impact(Rect(0, 0, 1, 1), (0, -10), (0.5, -4)), 0.4, (0, 1))
+		self.assertImpact(time_of_impact(AABB3D(0, 0, 0, 1, 1, 1), (0, 0, 10), AABB3D(0, 0, 3, 1, 1, 1)), 0.2, (0, 0, -1))
+		self.assertImpact(time_of_impact(Ellipse(0, 0, 2, 1), (10, 0), (5, 0)), 0.3, (-1, 0))
+		with self.assertRaises(ValueError):
+			time_of_impact(Rect(0, 0, 1, 1), (1, 0), Ellipse(5, 0, 1, 1))
+		with self.assertRaises(ValueError):
+			time_of_impact(Ellipse(0, 0, 2, 1), (1, 0), Rect(5, 0, 1, 1))
+
+	def test_moving_target(self):
+		self.assertImpact(time_of_impact((0, 0), (10, 0), Ellipse(5, 0, 2, 1), (5, 0)), 0.6, (-1, 0))
+		self.assertIsNone(time_of_impact((0, 0), (10, 0), Rect(5, -1, 2, 2), (10, 0)))
+
+	def test_overlapping(self):
+		t, normal = time_of_impact((0, 0), (1, 0), Rect(-1, -1, 2, 2))
+		self.assertEqual(t, 0)
+		self.assertEqual(normal, Vector2(0, 0))
+
+	def test_many(self):
+		rng = numpy.random.RandomState(0)
+		positions = rng.uniform(-6, 6, (200, 2))
+		velocities = rng.uniform(-8, 8, (200, 2))
+		radii = rng.uniform(0, 1, 200)
+		for target in [(1, 1), Rect(-1, -2, 3, 2), Segment2D((-2, 1), (3, -1)), Ellipse(0.5, 0.2, 2, 1)]:
+			t, normals = times_of_impact(positions, velocities, target, radii)
+			self.assertEqual(t.shape, (200,))
+			self.assertEqual(normals.shape, (200, 2))
+			self.assertTrue(numpy.isfinite(t).any())
+			for i in range(0, 200, 7):
+				ball = Ellipse(positions[i][0], positions[i][1], radii[i], radii[i])
+				expected = time_of_impact(ball, velocities[i], target)
+				if (expected is None):
+					self.assertEqual(t[i], float("inf"))
+				else:
+					self.assertTrue(fuzzy_eq(t[i], expected[0]))
+					self.assertTrue(fuzzy_eq(to_vector(normals[i].tolist()), expected[1]))
+		with self.assertRaises(ValueError):
+			times_of_impact(positions, velocities, Rect(0, 0, 1, 1), -1)
+
+	def test_many_3d(self):
+		rng = numpy.random.RandomState(1)
+		positions = rng.uniform(-6, 6, (300, 3))
+		velocities = rng.uniform(-8, 8, (300, 3))
+		box = AABB3D(-1, -2, 0, 3, 2, 1)
+		t, normals = times_of_impact(positions, velocities, box, 0.5)
+		hit = numpy.isfinite(t) & (t > 0)
+		self.assertTrue(hit.any())
+		# At the time of impact the ball touches the box, and the normal
+		# points from the closest point of the box to its center.
+		centers = positions[hit] + t[hit, None]*velocities[hit]
+		closest = numpy.clip(centers, [-1, -2, 0], [2, 0, 1])
+		self.assertTrue(numpy.allclose(numpy.linalg.norm(centers - closest, axis=1), 0.5))
+		self.assertTrue(numpy.allclose((centers - closest)/0.5, normals[hit]))
+		ellipsoid = Ellipsoid3D(0, 0, 0, 1, 2, 3)
+		t, normals = times_of_impact(positions, velocities, ellipsoid)
+		hit = numpy.isfinite(t)
+		contacts = positions[hit] + t[hit, None]*velocities[hit]
+		self.assertTrue(numpy.allclose(((contacts/[1, 2, 3])**2).sum(axis=1)[t[hit] > 0], 1))
+
+if __name__ == "__main__":
+	unittest.main()
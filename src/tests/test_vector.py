@@ -51,6 +51,27 @@ class TestQuaternions(unittest.TestCase):
 		## Same here (too lazy to make an assertFuzzyEqual)
 		# self.assertEqual(q1.exp(), Quaternion(1.69392272368, -0.789559624542, -1.18433943681, -1.57911924908))
 
+class TestBulkConversion(unittest.TestCase):
+
+	def test_round_trip(self):
+		vectors = [Vector2(1, 2), Vector2(3, 4), Vector2(5, 6)]
+		self.assertEqual(Vector2.from_array(vectors_to_array(vectors)), vectors)
+		self.assertEqual(to_vector_many([(1, 2, 3), (4, 5, 6)]), [Vector3(1, 2, 3), Vector3(4, 5, 6)])
+
+	def test_from_array_shape(self):
+		# Rows of the wrong width aren't reinterpreted.
+		self.assertRaises(ValueError, Vector2.from_array, [[0, 1, 2], [3, 4, 5]])
+		self.assertRaises(ValueError, Vector3.from_array, [[0, 1], [2, 3], [4, 5]])
+
+	def test_from_buffer(self):
+		buffer = bytearray(vectors_to_array([Vector3(1, 2, 3), Vector3(4, 5, 6)]))
+		vectors = Vector3.from_buffer(buffer)
+		self.assertEqual(vectors, [Vector3(1, 2, 3), Vector3(4, 5, 6)])
+
+		# Vectors share memory with the buffer.
+		vectors[0].x = 7
+		self.assertEqual(Vector3.from_buffer(memoryview(buffer))[0], Vector3(7, 2, 3))
+
 ## Too lazy to figure out how unittest is supposed to be used (unittest.main doesn't seem to work, idk why and idc)
 vectors = TestVectors()
 vectors.test_constructors()
@@ -1,28 +1,34 @@
 import math
 import random
+from array import array as _float_array
+from itertools import chain
 from numbers import Real, Number
 from .utils import get_in_bases
+from .backend import SCALAR, get_backend
 from .compat import *
 from .fuzzy import *
+from .precision import FLOAT64, FLOAT32, get_precision, get_dtype, as_float_array
 
 numpy = try_import("numpy")
 
 __all__ = [
     "VectorException", "_VectorMeta", "_BaseVector", "VectorType", "Vector2", 
     "ImmutableVector2", "Vector3", "ImmutableVector3", "Vector4", "ImmutableVector4",
-    "Quaternion", "to_vector", "change_vector_dimension", "rectify_vector",
-    "rectify_vectors"
+    "Quaternion", "to_vector", "to_vector_many", "vectors_to_array",
+    "change_vector_dimension", "rectify_vector", "rectify_vectors"
     ]
 
+# Components are stored at the active precision (see precision.py).
+
 def _make_zeros(n):
     if (numpy is None):
         return [0 for i in range(n)]
-    return numpy.zeros(n)
+    return numpy.zeros(n, dtype=get_dtype())
 
 def _make_array(iterable):
     if (numpy is None):
         return list(iterable)
-    return numpy.array(iterable, dtype=float)
+    return numpy.array(iterable, dtype=get_dtype())
 
 def _vec_check_if_real_scalar(x, operation):
     if (not isinstance(x, Real)):
@@ -84,9 +90,72 @@ class _VectorMeta(type):
                     self._components[i] = x
             kwargs[c] = property(fget=_get, fset=_set)
 
+def _buffer_rows(buffer, c, typecode="d"):
+    # Without numpy the rows are memoryview slices, which still alias the
+    # original buffer (so nothing is copied), and support indexing and
+    # item assignment like a list.
+    view = memoryview(buffer)
+    if (view.format != typecode or view.ndim != 1):
+        view = view.cast("B").cast(typecode)
+    if (len(view) % c != 0):
+        raise ValueError("Buffer length is not a multiple of %i." % c)
+    return [view[i:i + c] for i in range(0, len(view), c)]
+
 @fill_in_fne
 class _BaseVector(FuzzyComparable):
 
+    @classmethod
+    def _from_components(cls, components):
+        # Bypasses the generated ``__init__`` (and ``_make_array``), the
+        # components are used as-is.
+        vec = cls.__new__(cls)
+        vec._components = components
+        return vec
+
+    @classmethod
+    def from_array(cls, array):
+        # Every row of ``array`` becomes a vector. When ``array`` is already a
+        # float32 or float64 ndarray the vectors are views into it, so no data
+        # is copied and mutable vectors write straight through to ``array``.
+        c = len(cls.__components__)
+        if (numpy is None):
+            if (isinstance(array, (_float_array, memoryview))):
+                return cls.from_buffer(array, FLOAT32 if memoryview(array).format == "f" else FLOAT64)
+            rows = [list(row) for row in array]
+            if (any(len(row) != c for row in rows)):
+                raise ValueError("Invalid component count for %i-dimensional vector." % c)
+            return [cls._from_components(row) for row in rows]
+        array = as_float_array(array)
+        if (array.ndim == 1):
+            # Packed rows, like the ones from_buffer reads
+            if (len(array) % c != 0):
+                raise ValueError("Array length is not a multiple of %i." % c)
+            array = array.reshape(-1, c)
+        elif (array.ndim != 2 or array.shape[1] != c):
+            raise ValueError("Expected an array of shape (N, %i), got %r." % (c, array.shape))
+        new = cls.__new__
+        vectors = []
+        append = vectors.append
+        for row in array:
+            vec = new(cls)
+            vec._components = row
+            append(vec)
+        return vectors
+
+    @classmethod
+    def from_buffer(cls, buffer, precision=None):
+        # ``buffer`` is anything supporting the buffer protocol (bytes,
+        # bytearray, memoryview, array.array, shared memory, ...) holding
+        # packed floats of ``precision`` (by default the active one, which
+        # vectors_to_array writes), one vector after another.
+        if (precision is None):
+            precision = get_precision()
+        c = len(cls.__components__)
+        typecode = "f" if precision == FLOAT32 else "d"
+        if (numpy is None):
+            return [cls._from_components(row) for row in _buffer_rows(buffer, c, typecode)]
+        return cls.from_array(numpy.frombuffer(buffer, dtype=get_dtype(precision)))
+
     @classmethod
     def random(cls):
         return cls(*[random.random() for i in range(len(cls.__components__))])
@@ -97,8 +166,13 @@ class _BaseVector(FuzzyComparable):
 
     @classmethod
     def random_unit(cls):
-        vec = cls.random()
-        return vec.normalize()
+        # Normally distributed components point in uniformly distributed
+        # directions, unlike a point in the unit cube. For many at once, see
+        # sampling.py.
+        while (True):
+            vec = cls(*[random.gauss(0, 1) for i in range(len(cls.__components__))])
+            if (vec.magnitude_squared() > 0):
+                return vec.normalize()
 
     def __repr__(self):
         string = "<"
@@ -126,7 +200,7 @@ class _BaseVector(FuzzyComparable):
         except:
             return False
 
-    def __feq__(self, other, epsilon=EPSILON):
+    def __feq__(self, other, epsilon=None):
         try:
             return len(self) == len(other) and \
                    all(fuzzy_eq_numbers(c1, c2, epsilon) for c1, c2 in zip(self._components, other))
@@ -145,10 +219,9 @@ class _BaseVector(FuzzyComparable):
     def __setitem__(self, index, value):
         self._components[index] = value
 
-    ## Originally, the following methods were going to be included in the
-    ## ``if (numpy is None):`` block, and there were separate numpy-compatible 
-    ## methods, but for such low component counts (2, 3, and 4), there was no
-    ## gain in speed most of the time.
+    ## Arithmetic is always done in python; for such low component counts (2,
+    ## 3, and 4) numpy gives no gain in speed. Norms and dot products go
+    ## through the scalar backend (see backend.py).
 
     def __add__(self, other):
         return self.__class__(*[c1 + c2 for c1, c2 in zip(self._components, other)])
@@ -166,40 +239,27 @@ class _BaseVector(FuzzyComparable):
         _vec_check_if_real_scalar(other, "floor-divide")
         return self.__class__(*[c // other for c in self._components])
 
-    if (numpy is None):
-
-        def __abs__(self):
-            return math.sqrt(sum(c*c for c in self._components))
+    def __abs__(self):
+        return get_backend(SCALAR).norm(self._components)
 
-        def dot(self, other):
-            return sum(c1 * c2 for c1, c2 in zip(self._components, other))
+    def magnitude(self, backend=None):
+        return get_backend(SCALAR, override=backend).norm(self._components)
 
-        def magnitude_squared(self):
-            return sum(c * c for c in self._components)
-
-    else:
-
-        def __abs__(self):
-            return numpy.linalg.norm(self._components)
-
-        def dot(self, other):
-            # We need this because numpy.dot won't automatically treat
-            # _BaseVector subclasses as iterables.
-            if (hasattr(other, "_components")):
-                other = other._components
-            return numpy.dot(self._components, other)
+    def dot(self, other, backend=None):
+        # The backends need raw components, they won't automatically treat
+        # _BaseVector subclasses as iterables.
+        if (hasattr(other, "_components")):
+            other = other._components
+        return get_backend(SCALAR, override=backend).dot(self._components, other)
 
-        def magnitude_squared(self):
-            components = self._components
-            return numpy.dot(components, components)
+    def magnitude_squared(self, backend=None):
+        return get_backend(SCALAR, override=backend).norm_squared(self._components)
 
     __nonzero__ = __bool__
     __radd__ = __add__
     __rmul__ = __mul__
     __truediv__ = __div__
 
-    magnitude = __abs__
-
     def cast_to_ints(self):
         return self.__class__(*(int(c) for c in self._components))
 
@@ -221,7 +281,7 @@ class _BaseVector(FuzzyComparable):
 
         return other * scalar
 
-    def is_orthogonal(self, epsilon=EPSILON):
+    def is_orthogonal(self, epsilon=None):
         non_zero_components = 0
         for c in self._components:
             if (not fuzzy_eq_numbers(c, 0, epsilon)):
@@ -449,6 +509,47 @@ def to_vector(iterable, immutable=False):
         return ImmutableVector4(*iterable) if immutable else Vector4(*iterable)
     raise ValueError("No vector with %i comonents." % l)
 
+_vector_classes = {
+    2: (Vector2, ImmutableVector2),
+    3: (Vector3, ImmutableVector3),
+    4: (Vector4, ImmutableVector4)
+    }
+
+def _vector_class(n, immutable):
+    classes = _vector_classes.get(n)
+    if (classes is None):
+        raise ValueError("No vector with %i comonents." % n)
+    return classes[1] if immutable else classes[0]
+
+def to_vector_many(iterable, immutable=False):
+    if (numpy is not None and isinstance(iterable, numpy.ndarray)):
+        if (iterable.ndim != 2):
+            raise ValueError("Expected a 2-dimensional array, got %i dimensions." % iterable.ndim)
+        return _vector_class(iterable.shape[1], immutable).from_array(iterable)
+    rows = [getattr(v, "_components", v) for v in iterable]
+    if (not rows):
+        return []
+    cls = _vector_class(len(rows[0]), immutable)
+    if (any(len(row) != len(rows[0]) for row in rows)):
+        raise ValueError("All vectors must have the same number of components.")
+    if (numpy is None):
+        return cls.from_array(rows)
+    return cls.from_array(vectors_to_array(rows))
+
+def vectors_to_array(vectors):
+    # Returns an (N, d) ndarray, or a flat ``array.array`` when numpy isn't
+    # available, of the active precision. Both support the buffer protocol.
+    rows = [getattr(v, "_components", v) for v in vectors]
+    if (numpy is None):
+        return _float_array("f" if get_precision() == FLOAT32 else "d", chain.from_iterable(rows))
+    dtype = get_dtype()
+    if (not rows):
+        return numpy.zeros((0, 0), dtype=dtype)
+    if (isinstance(rows[0], numpy.ndarray)):
+        return numpy.array(rows, dtype=dtype)
+    c = len(rows[0])
+    return numpy.fromiter(chain.from_iterable(rows), dtype=dtype, count=len(rows) * c).reshape(-1, c)
+
 def change_vector_dimension(v, n, immutable=False):
     l = len(v)
     components = []